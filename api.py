@@ -0,0 +1,192 @@
+"""
+Headless HTTP JSON API for the hybrid query pipeline.
+
+A plain WSGI application, so it runs under gunicorn (already a requirement)
+with several worker processes; gunicorn.conf.py builds each worker's agent
+before it takes traffic. Every worker opens its own read-only connections to
+data/pbp_db through db_pool, so the processes share the database file and
+the OS page cache but no Python state.
+
+Endpoints:
+    POST /query   {"question": "...", "stream": false, "show_reasoning": false,
+                   "debug": false}
+                  Non-streaming: one JSON object with answer, error, reasoning,
+                  source, trace_id and elapsed seconds (plus the request's
+                  debug log and trace spans with "debug": true).
+                  Streaming: newline-delimited JSON, one {"type": "chunk",
+                  "text": ...} line per answer chunk and a final
+                  {"type": "done", ...} line.
+    GET  /health  {"status": "ok", "pid": ..., "agent_ready": ..., "coalescing": {...}}
+
+Usage (from the project root):
+    gunicorn -c gunicorn.conf.py api:app
+    python api.py            # single-process development server on $PORT
+"""
+
+import os
+import json
+import time
+from wsgiref.simple_server import make_server, WSGIServer
+from socketserver import ThreadingMixIn
+
+import pipeline
+from debug_log import RequestLog, capturing
+from tracing import Trace
+
+MAX_BODY_BYTES = 64 * 1024
+
+STATUS_TEXT = {
+    200: '200 OK',
+    400: '400 Bad Request',
+    404: '404 Not Found',
+    405: '405 Method Not Allowed',
+    413: '413 Payload Too Large',
+    500: '500 Internal Server Error',
+}
+
+
+class BadRequest(ValueError):
+    """The request can't be answered as sent."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_response(start_response, status: int, payload: dict, headers=()):
+    body = json.dumps(payload).encode('utf-8')
+    start_response(STATUS_TEXT[status], [
+        ('Content-Type', 'application/json'),
+        ('Content-Length', str(len(body))),
+        *headers,
+    ])
+    return [body]
+
+
+def _read_request(environ) -> dict:
+    try:
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        raise BadRequest("Invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise BadRequest(f"Request body is larger than {MAX_BODY_BYTES} bytes", 413)
+    try:
+        request = json.loads(environ['wsgi.input'].read(length) or b'{}')
+    except ValueError:
+        raise BadRequest("Request body must be JSON")
+    if not isinstance(request, dict):
+        raise BadRequest("Request body must be a JSON object")
+    question = request.get('question')
+    if not isinstance(question, str) or not question.strip():
+        raise BadRequest("'question' must be a non-empty string")
+    request['question'] = question.strip()
+    return request
+
+
+def _debug_details(log: RequestLog, trace: Trace) -> dict:
+    return {'log': log.text(), 'spans': [span.to_dict() for span in trace.spans()]}
+
+
+def _answer(request: dict) -> dict:
+    trace = Trace(request['question'])
+    start_time = time.perf_counter()
+    with capturing() as log:
+        answer, error, reasoning = pipeline.run_query_hybrid(
+            request['question'], show_reasoning=bool(request.get('show_reasoning')), trace=trace)
+    response = {
+        'answer': answer,
+        'error': error,
+        'reasoning': reasoning,
+        'source': trace.source,
+        'trace_id': trace.trace_id,
+        'elapsed': round(time.perf_counter() - start_time, 4),
+    }
+    if request.get('debug'):
+        response['debug'] = _debug_details(log, trace)
+    return response
+
+
+def _ndjson(payload: dict) -> bytes:
+    return (json.dumps(payload) + '\n').encode('utf-8')
+
+
+def _stream_answer(request: dict):
+    """Generator of NDJSON lines; the answer is produced as the server sends it."""
+    trace = Trace(request['question'])
+    start_time = time.perf_counter()
+    with capturing() as log:
+        chunks, error, reasoning = pipeline.run_query_hybrid(
+            request['question'], show_reasoning=bool(request.get('show_reasoning')), stream=True, trace=trace)
+
+    def lines():
+        first_chunk = None
+        for chunk in chunks or ():
+            if first_chunk is None:
+                first_chunk = time.perf_counter() - start_time
+            yield _ndjson({'type': 'chunk', 'text': chunk})
+        elapsed = time.perf_counter() - start_time
+        done = {
+            'type': 'done',
+            'error': error,
+            'reasoning': reasoning,
+            'source': trace.source,
+            'trace_id': trace.trace_id,
+            'first_chunk': round(first_chunk if first_chunk is not None else elapsed, 4),
+            'elapsed': round(elapsed, 4),
+        }
+        if request.get('debug'):
+            done['debug'] = _debug_details(log, trace)
+        yield _ndjson(done)
+
+    return lines()
+
+
+def app(environ, start_response):
+    """WSGI entry point."""
+    method = environ.get('REQUEST_METHOD', 'GET').upper()
+    path = environ.get('PATH_INFO') or '/'
+
+    if path == '/health':
+        return _json_response(start_response, 200, {
+            'status': 'ok',
+            'pid': os.getpid(),
+            'agent_ready': pipeline._agent is not None,
+            'coalescing': pipeline.coalescing_stats(),
+        })
+    if path != '/query':
+        return _json_response(start_response, 404, {'error': f"No such endpoint: {path}"})
+    if method != 'POST':
+        return _json_response(start_response, 405, {'error': "Use POST /query"}, [('Allow', 'POST')])
+
+    try:
+        request = _read_request(environ)
+        if request.get('stream'):
+            lines = _stream_answer(request)
+            start_response(STATUS_TEXT[200], [
+                ('Content-Type', 'application/x-ndjson'),
+                ('Cache-Control', 'no-cache'),
+                ('X-Accel-Buffering', 'no'),
+            ])
+            return lines
+        return _json_response(start_response, 200, _answer(request))
+    except BadRequest as e:
+        return _json_response(start_response, e.status, {'error': str(e)})
+    except Exception as e:
+        print(f"❌ API request failed: {e}")
+        return _json_response(start_response, 500, {'error': str(e)})
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+def main():
+    port = int(os.getenv('PORT', 8000))
+    pipeline.get_agent()
+    print(f"🏈 NFL Stat Agent API on http://0.0.0.0:{port} (POST /query)")
+    with make_server('0.0.0.0', port, app, server_class=_ThreadingWSGIServer) as server:
+        server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
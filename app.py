@@ -1,5 +1,7 @@
 import streamlit as st
-from agent import run_query_hybrid, get_debug_logs
+from debug_log import RequestLog, capturing
+from progress import QueryProgress
+from tracing import Trace, format_waterfall
 from datetime import datetime
 from typing import Optional
 import time
@@ -12,6 +14,17 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource(show_spinner="Loading the NFL Stat Agent...")
+def load_pipeline():
+    """Import the pipeline and create its agent once per server process.
+
+    Kept out of the module imports so the page renders before the LLM clients
+    load; cache_resource shares the result across sessions and reruns.
+    """
+    import pipeline
+    pipeline.get_agent()
+    return pipeline
+
 # Custom CSS for better styling
 st.markdown("""
     <style>
@@ -120,53 +133,78 @@ with examples[2]:
 # Process query
 if query and query != st.session_state.get('last_processed_query', ''):
     st.session_state.last_processed_query = query
+    pipeline = load_pipeline()
     timestamp = datetime.now()
     
     with st.spinner("Analyzing your question..."):
         progress_bar = st.progress(0)
         
-        # Simulate progress (in real app, you might update this based on actual progress)
-        for percent in range(0, 101, 10):
-            time.sleep(0.1)
-            progress_bar.progress(percent)
-        
-        # Time the query
+        # Time the query; the bar follows the pipeline's stage events and
+        # the answer arrives as a stream of text chunks
         start_time = time.time()
-        result = run_query_hybrid(query, show_reasoning=True)
+        trace = Trace(query)
+        # This request's debug output, kept apart from other sessions' queries
+        debug_log = RequestLog()
+        with capturing(debug_log):
+            progress = QueryProgress(pipeline.run_query_hybrid, query, show_reasoning=True, stream=True, trace=trace)
+        for event in progress:
+            progress_bar.progress(event.percent, text=f"{event.label}: {event.detail}" if event.detail else event.label)
+        answer_stream, error, reasoning = progress.result
+        progress_bar.empty()
+    
+    # Display results
+    if error:
         elapsed = time.time() - start_time
-        answer, error, reasoning = result
+        answer = None
+        st.error(f"Error: {error}")
+    else:
+        # Show reasoning chain if available
+        if reasoning:
+            st.info(f"🤔 **Thinking:** {reasoning}")
         
-        # Get debug logs for history and data source
-        debug_logs = get_debug_logs()
-        if "web_search" in debug_logs.lower():
-            source_icon = "🌐 Web Search"
-            data_source = "web"
-        elif "sql" in debug_logs.lower() or "database" in debug_logs.lower():
-            source_icon = "📊 Database"
-            data_source = "database"
-        else:
-            source_icon = "🔄 Hybrid"
-            data_source = "hybrid"
+        metrics = st.empty()
+        st.markdown("### Answer:")
+        first_token = []
         
-        # Save to history
-        st.session_state.query_history.append(
-            (query, answer, timestamp, debug_logs, reasoning)
-        )
+        def timed_stream(chunks):
+            for chunk in chunks:
+                if not first_token:
+                    first_token.append(time.time() - start_time)
+                yield chunk
         
-        progress_bar.empty()
+        answer = st.write_stream(timed_stream(answer_stream))
+        elapsed = time.time() - start_time
+        time_to_first_token = first_token[0] if first_token else elapsed
+    
+    # Get debug logs for history; the trace knows which answer was selected
+    debug_logs = debug_log.text()
+    data_source = trace.source or "hybrid"
+    source_icon = {
+        "web": "🌐 Web Search",
+        "database": "📊 Database",
+        "filtered": "🚫 Not NFL",
+    }.get(data_source, "🔄 Hybrid")
+    
+    # Save to history
+    st.session_state.query_history.append(
+        (query, answer, timestamp, debug_logs, reasoning)
+    )
+    
+    if not error:
+        metrics.markdown(
+            f"**Data Source:** {source_icon} &nbsp;&nbsp; "
+            f"**First Token:** ⚡ {time_to_first_token:.2f}s &nbsp;&nbsp; "
+            f"**Response Time:** ⏱️ {elapsed:.2f}s"
+        )
         
-        # Display results
-        if error:
-            st.error(f"Error: {error}")
-        else:
-            # Show reasoning chain if available
-            if reasoning:
-                st.info(f"🤔 **Thinking:** {reasoning}")
-            
-            st.markdown(f"**Data Source:** {source_icon} &nbsp;&nbsp; **Response Time:** ⏱️ {elapsed:.2f}s")
-            st.markdown("### Answer:")
-            st.markdown(f"<div style='background-color:#f8f9fa; padding:15px; border-radius:10px;'>{answer}</div>", 
-                        unsafe_allow_html=True)
-            
-            with st.expander("View Debug Details", expanded=False):
-                st.code(debug_logs, language="text")
\ No newline at end of file
+        with st.expander("View Debug Details", expanded=False):
+            st.markdown("**Timing waterfall:**")
+            st.code(format_waterfall(trace), language="text")
+            st.download_button(
+                "Download trace (JSON lines)",
+                trace.to_jsonl(),
+                file_name=f"trace_{trace.trace_id}.jsonl",
+                mime="application/jsonl",
+                key=f"trace_{trace.trace_id}"
+            )
+            st.code(debug_logs, language="text")
\ No newline at end of file
@@ -0,0 +1,278 @@
+"""
+Record/replay stand-ins for the Together AI LLMs and DuckDuckGo search.
+
+Benchmarks and regression tests need deterministic, offline runs, and
+network variance swamps any measurement of our own code. In record mode
+every call an NFLStatAgent instance makes to _llm, _web_llm and
+_classifier_llm, and every web search, is passed through to the real
+service and saved to a cassette file. In replay mode the responses come
+from the cassettes with a configurable synthetic latency, so no API key
+traffic or network access is needed.
+
+Settings come from the environment:
+    BACKEND_MODE        live (default), record or replay
+    CASSETTE_DIR        cassette files (default tests/cassettes)
+    REPLAY_LATENCY_MS   delay before each replayed response: a number of
+                        milliseconds, or 'recorded' to reuse the latency
+                        measured when recording (default 0)
+    REPLAY_TOKEN_DELAY_MS  delay between replayed stream chunks (default 0)
+
+The wrappers cover the invoke/stream/predict/__call__ interface; other
+attributes are read from the wrapped client.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+import web_search
+
+LIVE, RECORD, REPLAY = 'live', 'record', 'replay'
+DEFAULT_CASSETTE_DIR = os.path.join('tests', 'cassettes')
+
+# Agent attribute -> cassette name
+LLM_CLIENTS = {
+    '_llm': 'sql_llm',
+    '_web_llm': 'web_llm',
+    '_classifier_llm': 'classifier_llm',
+}
+SEARCH_CASSETTE = 'web_search'
+
+
+class CassetteMiss(KeyError):
+    """Replay was asked for a request that was never recorded."""
+
+
+def backend_mode() -> str:
+    mode = os.getenv('BACKEND_MODE', LIVE).strip().lower()
+    if mode not in (LIVE, RECORD, REPLAY):
+        raise ValueError(f"BACKEND_MODE must be live, record or replay, not {mode!r}")
+    return mode
+
+
+def request_key(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:32]
+
+
+def search_key(query: str, max_results: int, options: dict) -> str:
+    """Cassette key of a search; one without options keeps the key it was recorded under before."""
+    if options:
+        return request_key(SEARCH_CASSETTE, query, max_results, options)
+    return request_key(SEARCH_CASSETTE, query, max_results)
+
+
+class Cassette:
+    """Recorded responses for one client, stored as a JSON file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def get(self, key: str) -> dict:
+        entry = self.entries.get(key)
+        if entry is None:
+            raise CassetteMiss(f"No recording for request {key} in {self.path}; "
+                               f"record it with BACKEND_MODE=record")
+        return entry
+
+    def put(self, key: str, entry: dict):
+        with self._lock:
+            self.entries[key] = entry
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+class ReplayLatency:
+    """Synthetic delays for replayed responses."""
+
+    def __init__(self, latency=None, token_delay_ms: float = None):
+        latency = os.getenv('REPLAY_LATENCY_MS', '0') if latency is None else latency
+        self.recorded = str(latency).strip().lower() == 'recorded'
+        self.latency = 0.0 if self.recorded else float(latency) / 1000
+        token_delay_ms = (float(os.getenv('REPLAY_TOKEN_DELAY_MS', 0))
+                          if token_delay_ms is None else token_delay_ms)
+        self.token_delay = token_delay_ms / 1000
+
+    def wait(self, entry: dict):
+        delay = entry.get('latency', 0.0) if self.recorded else self.latency
+        if delay:
+            time.sleep(delay)
+
+    def wait_token(self):
+        if self.token_delay:
+            time.sleep(self.token_delay)
+
+
+def _text(response) -> str:
+    # LLMs return str, chat models return messages
+    return getattr(response, 'content', response)
+
+
+class _LLMBackend:
+    def __init__(self, client, cassette: Cassette, name: str):
+        self._client = client
+        self._cassette = cassette
+        self._name = name
+
+    def __getattr__(self, attribute):
+        return getattr(self._client, attribute)
+
+    def _key(self, prompt, kwargs):
+        return request_key(self._name, str(prompt), {k: v for k, v in kwargs.items() if k != 'config'})
+
+    def predict(self, text, **kwargs):
+        return self.invoke(text, **kwargs)
+
+    def __call__(self, prompt, **kwargs):
+        return self.invoke(prompt, **kwargs)
+
+
+class RecordingLLM(_LLMBackend):
+    """Passes calls to the real LLM and records each response."""
+
+    def invoke(self, prompt, **kwargs):
+        start_time = time.perf_counter()
+        response = _text(self._client.invoke(prompt, **kwargs))
+        self._cassette.put(self._key(prompt, kwargs), {
+            'prompt': str(prompt)[:500],
+            'response': response,
+            'latency': round(time.perf_counter() - start_time, 4),
+        })
+        return response
+
+    def stream(self, prompt, **kwargs):
+        start_time = time.perf_counter()
+        chunks = []
+        first_chunk = None
+        for chunk in self._client.stream(prompt, **kwargs):
+            if first_chunk is None:
+                first_chunk = time.perf_counter() - start_time
+            chunks.append(_text(chunk))
+            yield chunks[-1]
+        # A stream and an invoke of the same prompt share one recording
+        self._cassette.put(self._key(prompt, kwargs), {
+            'prompt': str(prompt)[:500],
+            'response': ''.join(chunks),
+            'chunks': chunks,
+            'latency': round(first_chunk if first_chunk is not None else time.perf_counter() - start_time, 4),
+        })
+
+
+class ReplayLLM(_LLMBackend):
+    """Answers from the cassette; never touches the network."""
+
+    def __init__(self, client, cassette: Cassette, name: str, latency: ReplayLatency = None):
+        super().__init__(client, cassette, name)
+        self._latency = latency or ReplayLatency()
+
+    def invoke(self, prompt, **kwargs):
+        entry = self._cassette.get(self._key(prompt, kwargs))
+        self._latency.wait(entry)
+        return entry['response']
+
+    def stream(self, prompt, **kwargs):
+        entry = self._cassette.get(self._key(prompt, kwargs))
+        self._latency.wait(entry)
+        for i, chunk in enumerate(entry.get('chunks') or [entry['response']]):
+            if i:
+                self._latency.wait_token()
+            yield chunk
+
+
+class RecordingSearch:
+    """Runs the real web search and records its results."""
+
+    def __init__(self, search, cassette: Cassette):
+        self._search = search
+        self._cassette = cassette
+
+    def __call__(self, query: str, max_results: int, **options):
+        start_time = time.perf_counter()
+        results = list(self._search(query, max_results, **options))
+        self._cassette.put(search_key(query, max_results, options), {
+            'query': query,
+            'results': results,
+            'latency': round(time.perf_counter() - start_time, 4),
+        })
+        return results
+
+
+class ReplaySearch:
+    """Returns recorded web search results."""
+
+    def __init__(self, cassette: Cassette, latency: ReplayLatency = None):
+        self._cassette = cassette
+        self._latency = latency or ReplayLatency()
+
+    def __call__(self, query: str, max_results: int, **options):
+        entry = self._cassette.get(search_key(query, max_results, options))
+        self._latency.wait(entry)
+        return entry['results']
+
+
+def _ddgs_class():
+    try:
+        from ddgs import DDGS
+    except ImportError:
+        return None
+    return DDGS
+
+
+def _patch_ddgs(ddgs_class, search):
+    """Route DDGS().text() (used inside the agent's own web search) through search."""
+    def text(self, query, *args, max_results=10, **kwargs):
+        return search(query, max_results, **web_search.ddgs_options(args, kwargs))
+
+    ddgs_class.text = text
+
+
+def install_backends(agent=None, mode: str = None, cassette_dir: str = None,
+                     latency: ReplayLatency = None):
+    """Wrap an NFLStatAgent instance's LLM clients and the web search for record/replay.
+
+    Does nothing in live mode. Returns the mode in effect.
+    """
+    mode = mode or backend_mode()
+    if mode == LIVE:
+        return mode
+    cassette_dir = cassette_dir or os.getenv('CASSETTE_DIR', DEFAULT_CASSETTE_DIR)
+    latency = latency or ReplayLatency()
+
+    def cassette(name):
+        return Cassette(os.path.join(cassette_dir, f"{name}.json"))
+
+    if agent is not None:
+        for attribute, name in LLM_CLIENTS.items():
+            client = getattr(agent, attribute, None)
+            if client is None:
+                continue
+            if mode == RECORD:
+                setattr(agent, attribute, RecordingLLM(client, cassette(name), name))
+            else:
+                setattr(agent, attribute, ReplayLLM(client, cassette(name), name, latency))
+
+    ddgs_class = _ddgs_class()
+    if mode == RECORD:
+        live_search = web_search.text_search
+        if ddgs_class is not None:
+            original_text = ddgs_class.text
+
+            def live_search(query, max_results, **options):
+                return original_text(ddgs_class(), query, max_results=max_results, **options) or []
+        search = RecordingSearch(live_search, cassette(SEARCH_CASSETTE))
+    else:
+        search = ReplaySearch(cassette(SEARCH_CASSETTE), latency)
+    web_search.set_search_backend(search)
+    if ddgs_class is not None:
+        _patch_ddgs(ddgs_class, search)
+    print(f"📼 Backends in {mode} mode (cassettes in {cassette_dir})")
+    return mode
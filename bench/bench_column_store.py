@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SQLite vs the memory-mapped column store on aggregate queries.
+
+Runs bench/questions.py's play-table queries (and optionally a captured SQL
+workload) both on SQLite, the way db_pool runs them without a column store,
+and through column_store.ColumnStore. Reports the median latency of each,
+whether the results agree, and how many statements the column store can
+answer at all. The store is exported with util/export_columns.py first if
+the database doesn't have one.
+
+Usage (from the project root):
+    python -m bench.bench_column_store
+    python -m bench.bench_column_store --repeats 10
+    python -m bench.bench_column_store --workload logs/sql_workload.jsonl
+"""
+
+import os
+import math
+import time
+import argparse
+import statistics
+
+from column_store import NotEligible, open_column_store
+from db_pool import ReadOnlyConnectionPool
+from sql_workload import load_workload
+from util.export_columns import export
+from bench.questions import AGGREGATE_QUERIES, PBP_QUERIES
+
+OUTPUT_FILE = 'bench_output.txt'
+DB_PATH = os.getenv('DB_PATH', 'data/pbp_db')
+
+
+def timed(func, repeats: int):
+    """(median seconds, last result) after one warm-up call."""
+    result = func()
+    seconds = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        result = func()
+        seconds.append(time.perf_counter() - start_time)
+    return statistics.median(seconds), result
+
+
+def same_rows(expected, actual) -> bool:
+    if len(expected) != len(actual):
+        return False
+    for expected_row, actual_row in zip(expected, actual):
+        for left, right in zip(expected_row, actual_row):
+            if isinstance(left, float) and isinstance(right, float):
+                if not math.isclose(left, right, rel_tol=1e-9, abs_tol=1e-9):
+                    return False
+            elif left != right:
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SQLite vs the column store on aggregate queries')
+    parser.add_argument('--db', default=DB_PATH, help='Path to the SQLite database')
+    parser.add_argument('--workload', help='Also run statements from a captured SQL workload')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed runs per query and engine')
+    parser.add_argument('--export', action='store_true', help='Re-export the column store first')
+    args = parser.parse_args()
+
+    store = None if args.export else open_column_store(args.db)
+    if store is None:
+        print(f"📦 Exporting the column store for {args.db}")
+        result = export(args.db)
+        print(f"✅ {len(result['columns'])} columns, {result['rows']} rows")
+        store = open_column_store(args.db)
+
+    queries = [(f"test-suite #{i + 1}", sql) for i, sql in enumerate(PBP_QUERIES)]
+    queries += [(f"aggregate #{i + 1}", sql) for i, sql in enumerate(AGGREGATE_QUERIES)]
+    if args.workload:
+        queries += [(f"workload #{i + 1}", sql) for i, (sql, _) in enumerate(load_workload(args.workload))]
+
+    pool = ReadOnlyConnectionPool(args.db, column_store=False)
+    conn = pool.connection()
+    lines = ["Column store benchmark", "=" * 60,
+             f"{args.db}: {store.rows} rows, {len(store.column_names)} exported columns, "
+             f"median of {args.repeats} warm runs", "",
+             f"{'query':<16} {'sqlite ms':>10} {'columns ms':>11} {'speedup':>8}  result"]
+    eligible, mismatches, sqlite_total, columns_total = 0, 0, 0.0, 0.0
+    for name, sql in queries:
+        routed = pool.route(conn, sql)
+        try:
+            store.execute(sql)
+        except NotEligible as e:
+            lines.append(f"{name:<16} {'':>10} {'':>11} {'':>8}  SQLite only ({e})")
+            continue
+        eligible += 1
+        sqlite_seconds, expected = timed(lambda: conn.execute(routed).fetchall(), args.repeats)
+        columns_seconds, (_, rows) = timed(lambda: store.execute(sql), args.repeats)
+        sqlite_total += sqlite_seconds
+        columns_total += columns_seconds
+        agrees = same_rows(expected, rows)
+        mismatches += not agrees
+        lines.append(f"{name:<16} {sqlite_seconds * 1000:>10.1f} {columns_seconds * 1000:>11.1f} "
+                     f"{sqlite_seconds / max(columns_seconds, 1e-9):>7.1f}x  {'same rows' if agrees else 'DIFFERENT ROWS'}")
+    pool.close_all()
+    lines.append("")
+    lines.append(f"Eligible: {eligible}/{len(queries)} statements")
+    if eligible:
+        lines.append(f"Total on eligible statements: {sqlite_total:.3f}s -> {columns_total:.3f}s "
+                     f"({sqlite_total / max(columns_total, 1e-9):.1f}x)")
+    if mismatches:
+        lines.append(f"⚠️  {mismatches} statement(s) returned different rows")
+
+    report = "\n".join(lines)
+    print(report)
+    with open(OUTPUT_FILE, 'w') as f:
+        f.write(report + "\n")
+    print(f"\n📝 Report written to {OUTPUT_FILE}")
+
+
+if __name__ == '__main__':
+    main()
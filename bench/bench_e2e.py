@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency benchmark for run_query_hybrid with per-stage percentiles.
+
+Replays a question corpus (the test suites' questions from bench/questions.py,
+plus optionally a file of logged questions) through run_query_hybrid at a
+given concurrency. Stage timings come from the pipeline's progress events:
+
+  keyword_screen  start -> keyword screen done
+  classifier      keyword screen -> classifier done (only when it ran)
+  database        classifier -> SQL executed
+  web             classifier -> web results fetched
+  scoring         later of the two branches -> scoring done
+  end_to_end      start -> answer returned
+
+p50/p95/p99 for each are written to bench_output.txt and, with --json, to a
+JSON file that --compare can diff against a run from another commit. Run it
+with BACKEND_MODE=replay (see backends.py) for deterministic numbers that
+measure our code rather than the network. Identical questions in flight at
+the same time are coalesced by the pipeline; set COALESCE_REQUESTS=0 to time
+every repeat on its own.
+
+Usage (from the project root):
+    python -m bench.bench_e2e --concurrency 4 --json bench_e2e.json
+    python -m bench.bench_e2e --questions-file logs/questions.txt --compare bench_e2e.json
+"""
+
+import io
+import json
+import time
+import argparse
+import subprocess
+import threading
+from contextlib import redirect_stdout, nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.questions import (DATABASE_QUESTIONS, WEB_QUESTIONS, NON_NFL_QUESTIONS,
+                             FILTERING_SHOULD_PASS, FILTERING_SHOULD_BE_FILTERED)
+
+OUTPUT_FILE = 'bench_output.txt'
+STAGES = ['keyword_screen', 'classifier', 'database', 'web', 'scoring', 'end_to_end']
+PERCENTILES = [50, 95, 99]
+
+
+def percentile(values, p: float) -> float:
+    """Linear-interpolated percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def load_questions(path: str = None):
+    """Corpus questions, deduplicated, plus one question per line (or JSON line with
+    a 'question' field) from path."""
+    questions = (DATABASE_QUESTIONS + WEB_QUESTIONS + NON_NFL_QUESTIONS
+                 + FILTERING_SHOULD_PASS + FILTERING_SHOULD_BE_FILTERED)
+    if path:
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith('{'):
+                    line = json.loads(line).get('question', '')
+                questions.append(line)
+    return list(dict.fromkeys(question for question in questions if question))
+
+
+def stage_durations(start: float, end: float, events) -> dict:
+    """Per-stage seconds from (timestamp, ProgressEvent) pairs of one query."""
+    first, last = {}, {}
+    for timestamp, event in events:
+        if event.stage == 'classifier' and event.detail.startswith('skipped'):
+            continue
+        first.setdefault(event.stage, timestamp)
+        last[event.stage] = timestamp
+    durations = {'end_to_end': end - start}
+    if 'keyword_screen' in first:
+        durations['keyword_screen'] = first['keyword_screen'] - start
+    branch_start = first.get('classifier', first.get('keyword_screen', start))
+    if 'classifier' in first:
+        durations['classifier'] = first['classifier'] - first.get('keyword_screen', start)
+    if 'sql_executed' in last:
+        durations['database'] = last['sql_executed'] - branch_start
+    if 'web_results' in first:
+        durations['web'] = first['web_results'] - branch_start
+    if 'scoring' in first:
+        branches_done = max(last.get('sql_executed', branch_start), first.get('web_results', branch_start))
+        durations['scoring'] = max(0.0, first['scoring'] - branches_done)
+    return durations
+
+
+def run_one(run_query, question: str) -> dict:
+    events = []
+    lock = threading.Lock()
+
+    def on_progress(event):
+        with lock:
+            events.append((time.perf_counter(), event))
+
+    start = time.perf_counter()
+    try:
+        answer, error, _ = run_query(question, on_progress=on_progress)
+    except Exception as e:
+        answer, error = None, str(e)
+    end = time.perf_counter()
+    with lock:
+        durations = stage_durations(start, end, events)
+    return {'question': question, 'error': error, 'answered': answer is not None, 'stages': durations}
+
+
+def summarize(results) -> dict:
+    summary = {}
+    for stage in STAGES:
+        values = [r['stages'][stage] for r in results if stage in r['stages']]
+        if values:
+            summary[stage] = {'count': len(values),
+                              **{f"p{p}": percentile(values, p) for p in PERCENTILES}}
+    return summary
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+
+def format_report(summary: dict, results, args, wall_time: float, baseline: dict = None) -> str:
+    lines = ["End-to-end latency benchmark", "=" * 72,
+             f"{len(results)} queries ({args.repeats} passes) at concurrency {args.concurrency}, "
+             f"{wall_time:.1f}s wall, {sum(1 for r in results if r['error'])} errors", ""]
+    header = f"{'stage':<16}{'n':>5}" + ''.join(f"{'p' + str(p) + ' (ms)':>13}" for p in PERCENTILES)
+    if baseline:
+        header += f"{'p95 vs base':>14}"
+    lines.append(header)
+    for stage, stats in summary.items():
+        line = f"{stage:<16}{stats['count']:>5}" + ''.join(f"{stats['p' + str(p)] * 1000:>13.1f}"
+                                                           for p in PERCENTILES)
+        base = (baseline or {}).get(stage)
+        if base:
+            change = (stats['p95'] - base['p95']) / base['p95'] * 100 if base['p95'] else 0.0
+            line += f"{change:>+13.1f}%"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end latency benchmark for run_query_hybrid')
+    parser.add_argument('--concurrency', type=int, default=1, help='Queries in flight at once')
+    parser.add_argument('--repeats', type=int, default=1, help='Passes over the question corpus')
+    parser.add_argument('--questions-file', help='Extra questions, one per line or JSON lines with "question"')
+    parser.add_argument('--json', help='Write summary and per-query timings to this JSON file')
+    parser.add_argument('--compare', help='JSON file from an earlier run to compare p95 against')
+    parser.add_argument('--verbose', action='store_true', help="Show the agent's debug output")
+    args = parser.parse_args()
+
+    from pipeline import get_agent, run_query_hybrid
+    get_agent()  # build the agent outside the timed runs
+
+    questions = load_questions(args.questions_file) * args.repeats
+    print(f"⏱️ Running {len(questions)} queries at concurrency {args.concurrency}...")
+    start = time.perf_counter()
+    with nullcontext() if args.verbose else redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            results = list(executor.map(lambda q: run_one(run_query_hybrid, q), questions))
+    wall_time = time.perf_counter() - start
+
+    summary = summarize(results)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['summary']
+    report = format_report(summary, results, args, wall_time, baseline)
+    print(report)
+    with open(OUTPUT_FILE, 'w') as f:
+        f.write(report + "\n")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'commit': git_commit(), 'concurrency': args.concurrency, 'repeats': args.repeats,
+                       'wall_time': wall_time, 'summary': summary, 'results': results}, f, indent=2)
+    print(f"\n📝 Report written to {OUTPUT_FILE}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: list-scan vs compiled single-pass keyword pre-screen.
+
+The list scan checks each term in turn with a word-boundary search, which is
+what stage 1 did before keyword_screen.py; its cost grows with the number of
+terms. The compiled screen matches one trie-factored pattern per question.
+Both run over the tests/test_filtering_fix.py question set, first with the
+shipped vocabulary and then with synthetic roster names added, to show how
+each scales as rosters are added.
+
+Usage (from the project root):
+    python -m bench.bench_keyword_screen
+    python -m bench.bench_keyword_screen --repeats 500 --roster-sizes 0 1000 5000
+"""
+
+import re
+import time
+import argparse
+import statistics
+
+from keyword_screen import KeywordScreen, nfl_vocabulary
+from nfl_terms import NON_NFL_TERMS
+from bench.questions import FILTERING_SHOULD_PASS, FILTERING_SHOULD_BE_FILTERED
+
+OUTPUT_FILE = 'bench_output.txt'
+
+FIRST_NAMES = ['Aaron', 'Brandon', 'Caleb', 'Darius', 'Elijah', 'Tyler', 'Jordan', 'Marcus',
+               'Isaiah', 'Zach', 'Trevon', 'Malik', 'Kyle', 'Devin', 'Jaylen', 'Andre', 'Cole',
+               'Xavier', 'Quentin', 'Bryce']
+LAST_NAMES = ['Adams', 'Bennett', 'Carter', 'Dawson', 'Ellis', 'Foster', 'Griffin', 'Hayes',
+              'Irving', 'Jenkins', 'Kendrick', 'Lawson', 'Mitchell', 'Norwood', 'Owens', 'Pruitt',
+              'Quarles', 'Reddick', 'Sutton', 'Thornton', 'Underwood', 'Vance', 'Whitaker',
+              'Yates', 'Zeller']
+
+
+def synthetic_roster(size: int):
+    names = []
+    for i in range(size):
+        first = FIRST_NAMES[i % len(FIRST_NAMES)]
+        last = LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]
+        names.append(f"{first} {last}{'' if i < 500 else i // 500}")
+    return names
+
+
+class ListScanScreen:
+    """One word-boundary search per term, NFL list first."""
+
+    def __init__(self, nfl_terms, non_nfl_terms):
+        self.nfl = [re.compile(rf"(?<![\w']){re.escape(term)}(?![\w'])") for term in nfl_terms]
+        self.non_nfl = [re.compile(rf"(?<![\w']){re.escape(term)}(?![\w'])")
+                        for term in non_nfl_terms]
+
+    def __call__(self, question: str):
+        text = ' '.join(question.lower().split())
+        nfl = [pattern.pattern for pattern in self.nfl if pattern.search(text)]
+        non_nfl = [pattern.pattern for pattern in self.non_nfl if pattern.search(text)]
+        if nfl and not non_nfl:
+            return True, "NFL terms found", True
+        if non_nfl and not nfl:
+            return False, "Non-NFL terms found", True
+        return True, "Inconclusive", False
+
+
+def time_screen(screen, questions, repeats: int) -> float:
+    """Median microseconds per question."""
+    samples = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        for question in questions:
+            screen(question)
+        samples.append((time.perf_counter() - start_time) / len(questions) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the stage 1 keyword pre-screen')
+    parser.add_argument('--repeats', type=int, default=200, help='Timed passes over the question set')
+    parser.add_argument('--roster-sizes', type=int, nargs='+', default=[0, 1000, 5000],
+                        help='Synthetic player names added to the vocabulary')
+    args = parser.parse_args()
+
+    questions = FILTERING_SHOULD_PASS + FILTERING_SHOULD_BE_FILTERED
+    lines = ["Keyword pre-screen benchmark", "=" * 60,
+             f"{len(questions)} questions from tests/test_filtering_fix.py, {args.repeats} passes", ""]
+
+    lines.append(f"{'terms':>8}  {'list scan (us/q)':>18}  {'compiled (us/q)':>16}  {'speedup':>8}")
+    for size in args.roster_sizes:
+        nfl_terms = nfl_vocabulary(synthetic_roster(size))
+        start_time = time.perf_counter()
+        compiled = KeywordScreen(nfl_terms, NON_NFL_TERMS)
+        compile_ms = (time.perf_counter() - start_time) * 1000
+        scan = ListScanScreen(nfl_terms, [term.lower() for term in NON_NFL_TERMS])
+
+        mismatches = [q for q in questions if scan(q)[0::2] != compiled(q)[0::2]]
+        scan_us = time_screen(scan, questions, args.repeats)
+        compiled_us = time_screen(compiled, questions, args.repeats)
+        terms = len(nfl_terms) + len(NON_NFL_TERMS)
+        lines.append(f"{terms:>8}  {scan_us:>18.1f}  {compiled_us:>16.1f}  {scan_us / compiled_us:>7.1f}x"
+                     f"   (compile {compile_ms:.0f} ms{', ' + str(len(mismatches)) + ' verdicts differ' if mismatches else ''})")
+
+    screen = KeywordScreen()
+    lines.extend(["", "Verdicts with the shipped vocabulary:"])
+    for question in questions:
+        is_relevant, reason, is_conclusive = screen(question)
+        verdict = 'NFL' if is_relevant else 'not NFL'
+        lines.append(f"  {verdict if is_conclusive else 'inconclusive':>12}  {question}  [{reason}]")
+
+    report = "\n".join(lines)
+    print(report)
+    with open(OUTPUT_FILE, 'w') as f:
+        f.write(report + "\n")
+    print(f"\n📝 Report written to {OUTPUT_FILE}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full-width vs hot/cold partitioned nflfastR_pbp.
+
+Runs the test-suite SQL over the play table (bench/questions.py PBP_QUERIES
+and the rollup build's selects) on the original database and on a
+partitioned copy made with util/partition_pbp.py, both as written (through
+the nflfastR_pbp view) and routed the way db_pool routes it. Reports median
+latency and the bytes SQLite reads from the database file per query. Each run opens a fresh connection with memory-mapping off and a
+small page cache, so every page it needs is a read() call, counted from
+/proc/self/io (Linux only; elsewhere only latency is reported).
+
+Usage (from the project root):
+    python -m bench.bench_partition                    # copies data/pbp_db to data/pbp_db.partitioned first
+    python -m bench.bench_partition --partitioned /tmp/pbp_split --repeats 5
+    python -m bench.bench_partition --workload logs/sql_workload.jsonl
+"""
+
+import os
+import time
+import sqlite3
+import argparse
+import statistics
+
+from partitioning import partition_layout, route_sql
+from sql_workload import load_workload
+from util.build_rollups import SELECT_STATEMENTS
+from util.partition_pbp import partition
+from bench.questions import PBP_QUERIES
+
+OUTPUT_FILE = 'bench_output.txt'
+DB_PATH = os.getenv('DB_PATH', 'data/pbp_db')
+CACHE_SIZE_KB = 2048
+
+
+def bytes_read() -> int:
+    """Bytes this process has read through read() syscalls, or -1 if unknown."""
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return -1
+
+
+def build_partitioned_copy(db_path: str, target: str):
+    print(f"📋 Copying {db_path} to {target}")
+    conn = sqlite3.connect(db_path)
+    conn.execute('VACUUM INTO ?', (target,))
+    conn.close()
+    conn = sqlite3.connect(target)
+    try:
+        result = partition(conn)
+        print(f"✂️  Partitioned: {len(result['hot'])} hot, {len(result['cold'])} cold columns")
+        conn.execute('ANALYZE')
+        conn.commit()
+        conn.execute('VACUUM')
+    finally:
+        conn.close()
+
+
+def run(db_path: str, sql: str, repeats: int, route: bool = True):
+    """(median seconds, median bytes read) over fresh connections."""
+    seconds, reads = [], []
+    for _ in range(repeats):
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        conn.execute('PRAGMA mmap_size = 0')
+        conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KB}')
+        if route:
+            sql = route_sql(sql, partition_layout(conn))
+        start_bytes = bytes_read()
+        start_time = time.perf_counter()
+        conn.execute(sql).fetchall()
+        seconds.append(time.perf_counter() - start_time)
+        reads.append(bytes_read() - start_bytes if start_bytes >= 0 else -1)
+        conn.close()
+    return statistics.median(seconds), statistics.median(reads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the hot/cold partitioned play table')
+    parser.add_argument('--db', default=DB_PATH, help='Unpartitioned database')
+    parser.add_argument('--partitioned', help='Partitioned copy (built if missing; default <db>.partitioned)')
+    parser.add_argument('--workload', help='Also run statements from a captured SQL workload')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per query and database')
+    args = parser.parse_args()
+    partitioned = args.partitioned or f"{args.db}.partitioned"
+    if not os.path.exists(partitioned):
+        build_partitioned_copy(args.db, partitioned)
+
+    queries = [(f"test-suite #{i + 1}", sql) for i, sql in enumerate(PBP_QUERIES)]
+    # team_season also reads the games rollup table, so it needs a built database
+    queries += [(f"rollup {table}", select.format(season_filter='season = 2024'))
+                for table, select in SELECT_STATEMENTS.items()]
+    if args.workload:
+        queries += [(f"workload #{i + 1}", sql) for i, (sql, _) in enumerate(load_workload(args.workload))]
+
+    size_full = os.path.getsize(args.db) / 1e6
+    size_split = os.path.getsize(partitioned) / 1e6
+    lines = ["Hot/cold partitioning benchmark", "=" * 60,
+             f"{args.db} ({size_full:.0f} MB) vs {partitioned} ({size_split:.0f} MB), "
+             f"median of {args.repeats} runs, {CACHE_SIZE_KB} KiB page cache, mmap off", "",
+             "view = the SQL as written, through the nflfastR_pbp view; "
+             "routed = pointed at nflfastR_pbp_hot where possible", "",
+             f"{'query':<18} {'full ms':>9} {'view ms':>9} {'routed ms':>10} "
+             f"{'full MB':>9} {'view MB':>9} {'routed MB':>10} {'I/O':>6}"]
+    totals = [0.0, 0.0, 0.0, 0, 0, 0]
+    for name, sql in queries:
+        try:
+            full_seconds, full_bytes = run(args.db, sql, args.repeats)
+            view_seconds, view_bytes = run(partitioned, sql, args.repeats, route=False)
+            routed_seconds, routed_bytes = run(partitioned, sql, args.repeats)
+        except sqlite3.Error as e:
+            lines.append(f"{name:<18} skipped: {e}")
+            continue
+        totals = [total + value for total, value in zip(totals, (
+            full_seconds, view_seconds, routed_seconds, full_bytes, view_bytes, routed_bytes))]
+        ratio = f"{routed_bytes / full_bytes:>5.0%}" if full_bytes > 0 else '   n/a'
+        lines.append(f"{name:<18} {full_seconds * 1000:>9.1f} {view_seconds * 1000:>9.1f} "
+                     f"{routed_seconds * 1000:>10.1f} {full_bytes / 1e6:>9.1f} {view_bytes / 1e6:>9.1f} "
+                     f"{routed_bytes / 1e6:>10.1f} {ratio}")
+    lines.append("")
+    lines.append(f"Total latency: {totals[0]:.2f}s full, {totals[1]:.2f}s view "
+                 f"({totals[0] / max(totals[1], 1e-9):.1f}x), {totals[2]:.2f}s routed "
+                 f"({totals[0] / max(totals[2], 1e-9):.1f}x)")
+    if totals[3] > 0:
+        lines.append(f"Total read: {totals[3] / 1e6:.0f} MB full, {totals[4] / 1e6:.0f} MB view "
+                     f"({totals[4] / totals[3]:.0%}), {totals[5] / 1e6:.0f} MB routed "
+                     f"({totals[5] / totals[3]:.0%})")
+
+    report = "\n".join(lines)
+    print(report)
+    with open(OUTPUT_FILE, 'w') as f:
+        f.write(report + "\n")
+    print(f"\n📝 Report written to {OUTPUT_FILE}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: name matching vs player id lookups on the play table.
+
+Resolves the players named in bench/questions.py's database and player
+questions with player_index.PlayerIndex, then for each one times the query
+generated SQL used to write (LIKE '%Surname%' on the player's name column)
+against the equality filter on the indexed player id column that resolution
+suggests. Reports resolution latency, median query latency of both and
+whether they count the same plays. The index (and the id indexes) are built
+with util/build_player_index.py first if the database doesn't have them.
+
+Usage (from the project root):
+    python -m bench.bench_player_index
+    python -m bench.bench_player_index --repeats 10
+    python -m bench.bench_player_index --rebuild
+"""
+
+import os
+import time
+import sqlite3
+import argparse
+import statistics
+
+from partitioning import partition_layout, route_sql
+from player_index import ROLES, get_player_index, player_index_path
+from util.build_player_index import build_player_index, create_id_indexes
+from bench.questions import DATABASE_QUESTIONS, PLAYER_QUESTIONS
+
+OUTPUT_FILE = 'bench_output.txt'
+DB_PATH = os.getenv('DB_PATH', 'data/pbp_db')
+
+
+def timed(func, repeats: int):
+    """(median seconds, last result) after one warm-up call."""
+    result = func()
+    seconds = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        result = func()
+        seconds.append(time.perf_counter() - start_time)
+    return statistics.median(seconds), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark LIKE name matching vs player id lookups')
+    parser.add_argument('--db', default=DB_PATH, help='Path to the SQLite database')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed runs per query')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the player index first')
+    args = parser.parse_args()
+
+    if args.rebuild or not os.path.exists(player_index_path(args.db)):
+        print(f"👤 Building the player index for {args.db}")
+        build_player_index(args.db)
+        conn = sqlite3.connect(args.db)
+        create_id_indexes(conn)
+        conn.close()
+    index = get_player_index(args.db)
+
+    questions = DATABASE_QUESTIONS + PLAYER_QUESTIONS
+    resolution_seconds, players = [], {}
+    for question in questions:
+        start_time = time.perf_counter()
+        resolved = index.resolve(question)
+        resolution_seconds.append(time.perf_counter() - start_time)
+        for _, player_ids in resolved:
+            players.setdefault(player_ids[0], question)
+
+    conn = sqlite3.connect(f"file:{os.path.abspath(args.db)}?mode=ro", uri=True)
+    layout = partition_layout(conn)
+    lines = ["Player index benchmark", "=" * 60,
+             f"{args.db}: {len(index.players)} players indexed, median of {args.repeats} warm runs",
+             f"Resolution: {len(players)} players in {len(questions)} questions, "
+             f"{statistics.median(resolution_seconds) * 1000:.2f} ms median per question", "",
+             f"{'player':<20} {'LIKE ms':>9} {'id ms':>8} {'speedup':>8}  result"]
+    like_total, id_total = 0.0, 0.0
+    for player_id in players:
+        player = index.players[player_id]
+        role = max(ROLES, key=lambda role: sum(entry.get(role, 0) for entry in player['seasons'].values()))
+        like_sql = route_sql(f"SELECT COUNT(*), SUM(yards_gained) FROM nflfastR_pbp "
+                             f"WHERE {role}_player_name LIKE ?", layout)
+        id_sql = route_sql(f"SELECT COUNT(*), SUM(yards_gained) FROM nflfastR_pbp "
+                           f"WHERE {role}_player_id = ?", layout)
+        pattern = f"%{player['name'].split('.', 1)[-1]}%"
+        like_seconds, by_name = timed(lambda: conn.execute(like_sql, (pattern,)).fetchall(), args.repeats)
+        id_seconds, by_id = timed(lambda: conn.execute(id_sql, (player_id,)).fetchall(), args.repeats)
+        like_total += like_seconds
+        id_total += id_seconds
+        # LIKE also matches every other player with the same surname
+        result = 'same plays' if by_name == by_id else f"LIKE matched {by_name[0][0] - by_id[0][0]} other plays"
+        lines.append(f"{player['name']:<20} {like_seconds * 1000:>9.1f} {id_seconds * 1000:>8.1f} "
+                     f"{like_seconds / max(id_seconds, 1e-9):>7.1f}x  {result}")
+    conn.close()
+    if players:
+        lines.append("")
+        lines.append(f"Total: {like_total:.3f}s -> {id_total:.3f}s ({like_total / max(id_total, 1e-9):.1f}x)")
+
+    report = "\n".join(lines)
+    print(report)
+    with open(OUTPUT_FILE, 'w') as f:
+        f.write(report + "\n")
+    print(f"\n📝 Report written to {OUTPUT_FILE}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full-schema vs relevance-pruned SQL prompts.
+
+For each question in the corpus, builds the SQL-generation prompt with the
+full schema context and with the pruned context from schema_context.py and
+reports prompt size. With --llm it also generates SQL from both prompts with
+the agent's SQL model, runs both statements and reports generation latency
+and whether the two result sets agree.
+
+Usage (from the project root):
+    python -m bench.bench_schema_pruning                 # prompt sizes only
+    python -m bench.bench_schema_pruning --llm           # + latency/agreement
+    python -m bench.bench_schema_pruning --top-k 30 --json bench_schema.json
+"""
+
+import re
+import json
+import time
+import argparse
+import statistics
+
+from schema_context import load_full_schema_context, build_pruned_schema_context
+from bench.questions import DATABASE_QUESTIONS
+
+OUTPUT_FILE = 'bench_output.txt'
+
+SQL_PROMPT = """You are an expert SQLite analyst for NFL play-by-play data.
+Use only the tables and columns described below.
+
+{schema}
+
+Write one SQLite query that answers the question. Return only the SQL.
+
+Question: {question}
+SQL:"""
+
+
+def approx_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English/SQL)."""
+    return max(1, len(text) // 4)
+
+
+def extract_sql(response: str) -> str:
+    text = re.sub(r'```(?:sql)?', '', str(response), flags=re.IGNORECASE)
+    match = re.search(r'\b(WITH|SELECT)\b.*?(;|$)', text, re.IGNORECASE | re.DOTALL)
+    return match.group(0).strip().rstrip(';') if match else text.strip()
+
+
+def generate_and_run(llm, prompt: str):
+    """Return (latency_seconds, sql, rows or None, error)."""
+    from db_pool import execute_query
+    start_time = time.perf_counter()
+    response = llm.invoke(prompt)
+    latency = time.perf_counter() - start_time
+    sql = extract_sql(response)
+    try:
+        _, rows = execute_query(sql)
+        return latency, sql, rows, None
+    except Exception as e:
+        return latency, sql, None, str(e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare full and pruned schema prompts')
+    parser.add_argument('--top-k', type=int, default=None, help='Columns kept in the pruned context')
+    parser.add_argument('--llm', action='store_true', help='Generate and run SQL with the agent LLM')
+    parser.add_argument('--json', help='Also write per-question results to this JSON file')
+    args = parser.parse_args()
+
+    full_schema = load_full_schema_context()
+    llm = None
+    if args.llm:
+        from pipeline import get_agent
+        llm = get_agent()._llm
+
+    results = []
+    lines = ["Schema pruning benchmark", "=" * 60]
+    for question in DATABASE_QUESTIONS:
+        kwargs = {'top_k': args.top_k} if args.top_k else {}
+        pruned_schema = build_pruned_schema_context(question, **kwargs)
+        full_prompt = SQL_PROMPT.format(schema=full_schema, question=question)
+        pruned_prompt = SQL_PROMPT.format(schema=pruned_schema, question=question)
+        result = {
+            'question': question,
+            'full_tokens': approx_tokens(full_prompt),
+            'pruned_tokens': approx_tokens(pruned_prompt),
+        }
+        if llm is not None:
+            full_latency, full_sql, full_rows, full_error = generate_and_run(llm, full_prompt)
+            pruned_latency, pruned_sql, pruned_rows, pruned_error = generate_and_run(llm, pruned_prompt)
+            result.update({
+                'full_latency': full_latency,
+                'pruned_latency': pruned_latency,
+                'full_sql': full_sql,
+                'pruned_sql': pruned_sql,
+                'full_error': full_error,
+                'pruned_error': pruned_error,
+                'agree': full_rows is not None and pruned_rows is not None
+                         and sorted(map(repr, full_rows)) == sorted(map(repr, pruned_rows)),
+            })
+        results.append(result)
+        line = (f"{result['full_tokens']:>7} -> {result['pruned_tokens']:>6} tokens  "
+                f"{question[:55]}")
+        if llm is not None:
+            line += (f"  | {result['full_latency']:.2f}s -> {result['pruned_latency']:.2f}s"
+                     f"  {'✅ agree' if result['agree'] else '❌ differ'}")
+        lines.append(line)
+
+    full_total = sum(r['full_tokens'] for r in results)
+    pruned_total = sum(r['pruned_tokens'] for r in results)
+    lines.append("-" * 60)
+    lines.append(f"Prompt tokens (approx): {full_total} -> {pruned_total} "
+                 f"({100 * (1 - pruned_total / full_total):.1f}% smaller)")
+    if llm is not None:
+        lines.append(f"Median generation latency: "
+                     f"{statistics.median(r['full_latency'] for r in results):.2f}s -> "
+                     f"{statistics.median(r['pruned_latency'] for r in results):.2f}s")
+        agreed = sum(1 for r in results if r['agree'])
+        lines.append(f"Answer agreement: {agreed}/{len(results)}")
+
+    report = "\n".join(lines)
+    print(report)
+    with open(OUTPUT_FILE, 'w') as f:
+        f.write(report + "\n")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    print(f"\n📝 Report written to {OUTPUT_FILE}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: raw vs ranked-and-compressed web snippets for answer synthesis.
+
+For each web-favored question from tests/test_scoring.py, searches the web
+(search_web, so the same cached fan-out the agent uses) and builds the
+synthesis prompt from the raw results and from the results compressed by
+snippets.py, and reports prompt size. With --synthesize it also sends both
+prompts to the agent's web synthesis model and reports latency.
+
+Usage (from the project root):
+    python -m bench.bench_snippets                          # prompt sizes only
+    python -m bench.bench_snippets --synthesize             # + synthesis latency
+    BACKEND_MODE=replay python -m bench.bench_snippets      # offline, from recorded search results
+    python -m bench.bench_snippets --token-budget 250
+"""
+
+import time
+import argparse
+import statistics
+
+import snippets
+from tracing import approx_tokens
+from backends import install_backends
+from web_search import WEB_MAX_RESULTS, search_web, synthesis_prompt
+from bench.questions import WEB_QUESTIONS
+
+OUTPUT_FILE = 'bench_output.txt'
+
+
+def time_invoke(llm, prompt: str) -> float:
+    start_time = time.perf_counter()
+    llm.invoke(prompt)
+    return time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark web snippet compression')
+    parser.add_argument('--synthesize', action='store_true',
+                        help='Also time answer synthesis on both prompts')
+    parser.add_argument('--token-budget', type=int, default=snippets.TOKEN_BUDGET,
+                        help='Snippet token budget (WEB_SNIPPET_TOKEN_BUDGET)')
+    parser.add_argument('--max-results', type=int, default=WEB_MAX_RESULTS, help='Search results per question')
+    args = parser.parse_args()
+    snippets.TOKEN_BUDGET = args.token_budget
+
+    llm = None
+    if args.synthesize:
+        from pipeline import get_agent
+        llm = get_agent()._web_llm
+    else:
+        install_backends()
+
+    lines = ["Web snippet compression benchmark", "=" * 60,
+             f"{len(WEB_QUESTIONS)} web questions from tests/test_scoring.py, "
+             f"{args.max_results} results, budget {args.token_budget} tokens", ""]
+    header = f"{'raw tok':>8}  {'compressed':>10}  {'saved':>6}"
+    if llm:
+        header += f"  {'raw s':>7}  {'comp s':>7}"
+    lines.append(f"{header}  question")
+
+    raw_tokens, compressed_tokens, raw_seconds, compressed_seconds = [], [], [], []
+    for question in WEB_QUESTIONS:
+        try:
+            results = search_web(question, args.max_results)
+        except Exception as e:
+            lines.append(f"{'failed':>8}  {question}  ({e})")
+            continue
+        raw_prompt = synthesis_prompt(question, results, compress=False)
+        prompt = synthesis_prompt(question, results)
+        raw, compressed = approx_tokens(raw_prompt), approx_tokens(prompt)
+        raw_tokens.append(raw)
+        compressed_tokens.append(compressed)
+        row = f"{raw:>8}  {compressed:>10}  {1 - compressed / raw:>6.0%}"
+        if llm:
+            raw_seconds.append(time_invoke(llm, raw_prompt))
+            compressed_seconds.append(time_invoke(llm, prompt))
+            row += f"  {raw_seconds[-1]:>7.2f}  {compressed_seconds[-1]:>7.2f}"
+        lines.append(f"{row}  {question}")
+
+    if raw_tokens:
+        saved = sum(raw_tokens) - sum(compressed_tokens)
+        lines.extend(["", f"Prompt tokens: {sum(raw_tokens)} -> {sum(compressed_tokens)} "
+                          f"({saved} saved, {saved / sum(raw_tokens):.0%})"])
+    if raw_seconds:
+        raw_median, compressed_median = statistics.median(raw_seconds), statistics.median(compressed_seconds)
+        lines.append(f"Median synthesis latency: {raw_median:.2f}s -> {compressed_median:.2f}s "
+                     f"({compressed_median - raw_median:+.2f}s)")
+
+    report = "\n".join(lines)
+    print(report)
+    with open(OUTPUT_FILE, 'w') as f:
+        f.write(report + "\n")
+    print(f"\n📝 Report written to {OUTPUT_FILE}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold start of a worker process.
+
+Times fresh interpreters importing the app's entry modules (pipeline for the
+Streamlit UI, api for the HTTP API), loading the schema context and, with
+--agent, constructing the shared NFLStatAgent, each minus the cost of an
+empty interpreter. The slowest imports of each entry module are listed from
+python -X importtime. Every run is appended to a JSON lines history (by
+default logs/startup_history.jsonl) and compared with the previous run, so
+import regressions show up over time.
+
+Usage (from the project root):
+    python -m bench.bench_startup
+    python -m bench.bench_startup --repeats 10 --agent
+    python -m bench.bench_startup --history bench_startup.jsonl --top 20
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from datetime import datetime, timezone
+
+OUTPUT_FILE = 'bench_output.txt'
+HISTORY_FILE = os.path.join('logs', 'startup_history.jsonl')
+
+# name -> code run in a fresh interpreter
+STEPS = {
+    'import pipeline': 'import pipeline',
+    'import api': 'import api',
+    'schema context': ('import schema_context; schema_context.load_full_schema_context(); '
+                       'schema_context.get_schema_index()'),
+}
+AGENT_STEP = ('agent ready', 'import pipeline; pipeline.get_agent()')
+
+
+def run_python(code: str, importtime: bool = False):
+    """(seconds, stderr) of a fresh interpreter running code; raises on failure."""
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    # Deployed workers import from cached bytecode, so let the warm-up run write it
+    env = {name: value for name, value in os.environ.items() if name != 'PYTHONDONTWRITEBYTECODE'}
+    start_time = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True, env=dict(env, PYTHONPATH=os.getcwd()))
+    seconds = time.perf_counter() - start_time
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed')
+    return seconds, result.stderr
+
+
+def median_seconds(code: str, repeats: int) -> float:
+    """Median wall time of fresh interpreters running code, after one warm-up run."""
+    run_python(code)
+    return statistics.median(run_python(code)[0] for _ in range(repeats))
+
+
+def slowest_imports(code: str, top: int):
+    """[(self ms, cumulative ms, module)] with the largest self time from -X importtime."""
+    _, stderr = run_python(code, importtime=True)
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line.split(':', 1)[1].split('|')
+        imports.append((int(self_us) / 1000, int(cumulative_us) / 1000, module.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                               text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_run(path: str):
+    try:
+        with open(path) as f:
+            lines = [line for line in f if line.strip()]
+        return json.loads(lines[-1]) if lines else None
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark worker cold start (imports, schema context, agent)')
+    parser.add_argument('--repeats', type=int, default=5, help='Fresh interpreters per step')
+    parser.add_argument('--agent', action='store_true', help='Also time constructing the agent (needs agent.py)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports to list per entry module')
+    parser.add_argument('--history', default=HISTORY_FILE, help='JSON lines file runs are appended to')
+    args = parser.parse_args()
+
+    steps = dict(STEPS)
+    if args.agent:
+        steps[AGENT_STEP[0]] = AGENT_STEP[1]
+    baseline = median_seconds('pass', args.repeats)
+    previous = previous_run(args.history)
+    previous_results = previous['results'] if previous else {}
+
+    lines = ["Startup benchmark", "=" * 60,
+             f"Median of {args.repeats} fresh interpreters, minus an empty interpreter ({baseline * 1000:.0f} ms)",
+             f"Previous run: {previous['timestamp']} ({previous.get('commit') or 'no commit'})" if previous
+             else "Previous run: none", "",
+             f"{'step':<18} {'ms':>8} {'previous':>9}  change"]
+    results = {}
+    for name, code in steps.items():
+        try:
+            milliseconds = max(0.0, median_seconds(code, args.repeats) - baseline) * 1000
+        except RuntimeError as e:
+            lines.append(f"{name:<18} {'':>8} {'':>9}  skipped ({e})")
+            continue
+        results[name] = round(milliseconds, 1)
+        before = previous_results.get(name)
+        change = f"{milliseconds - before:+.0f} ms" if before is not None else ''
+        lines.append(f"{name:<18} {milliseconds:>8.0f} {'' if before is None else f'{before:.0f}':>9}  {change}")
+
+    for module in ('pipeline', 'api'):
+        try:
+            imports = slowest_imports(f'import {module}', args.top)
+        except RuntimeError:
+            continue
+        lines.append("")
+        lines.append(f"Slowest imports under {module} (self ms / cumulative ms):")
+        lines.extend(f"  {self_ms:>7.1f} {cumulative_ms:>8.1f}  {name}" for self_ms, cumulative_ms, name in imports)
+
+    run = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': sys.version.split()[0],
+        'repeats': args.repeats,
+        'baseline_ms': round(baseline * 1000, 1),
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(args.history) or '.', exist_ok=True)
+    with open(args.history, 'a') as f:
+        f.write(json.dumps(run) + "\n")
+    lines.append("")
+    lines.append(f"Run appended to {args.history}")
+
+    report = "\n".join(lines)
+    print(report)
+    with open(OUTPUT_FILE, 'w') as f:
+        f.write(report + "\n")
+    print(f"\n📝 Report written to {OUTPUT_FILE}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Question corpus shared by the benchmarks.
+
+Drawn from the test suites (tests/test_sql_agent.py, tests/test_scoring.py,
+tests/test_filtering_fix.py) and the example queries in app.py and the README.
+"""
+
+DATABASE_QUESTIONS = [
+    "Who were the top 5 rushers in 2022?",
+    "Which team had the most passing yards in 2023?",
+    "What was the most common play type in the 2023 season?",
+    "who had the most passing touchdowns in 2024",
+    "how many games were played in week 1 of 2024",
+    "which team had the most wins in 2024",
+    "which team covered the spread on the road the most in 2024",
+    "which team had the best red zone touchdown percentage in 2024",
+    "which team had the best record in games decided by 3 points or less in 2024",
+    "which team had exactly 8 wins in 2024",
+    "who had the most passing touchdowns in the last 2 minutes of games in 2024",
+    "which team had the most rushing yards in the red zone in 2024",
+    "which player had the most rushing yards in 2022?",
+    "which team allowed the fewest points in 2021?",
+    "who had the most interceptions in the 2020 season?",
+    "Compare Patrick Mahomes and Josh Allen by WPA in clutch time.",
+]
+
+# Questions naming players the way people do; resolved by player_index.py
+PLAYER_QUESTIONS = [
+    "How many passing yards did Patrick Mahomes have in 2024?",
+    "how many touchdowns did josh allen throw in 2023",
+    "What was Lamar Jackson's EPA per dropback in 2024?",
+    "How many receiving yards did Travis Kelce have against Buffalo?",
+    "Compare Derrick Henry and James Cook on third down",
+    "How many rushing yards did Pacheco have in the playoffs?",
+    "Amon-Ra St. Brown targets in the red zone in 2024",
+]
+
+WEB_QUESTIONS = [
+    "who won the super bowl last week?",
+    "is Patrick Mahomes injured right now?",
+    "which team made the biggest trade this offseason?",
+    "who is the current head coach of the New England Patriots?",
+    "what is the latest news on Aaron Rodgers?",
+]
+
+NON_NFL_QUESTIONS = [
+    "What's the weather like in New York?",
+    "Who won the NBA championship last year?",
+    "How do I cook lasagna?",
+    "What is the capital of France?",
+]
+
+# tests/test_filtering_fix.py
+FILTERING_SHOULD_PASS = [
+    "Which quarterback had the most passing yards in the last two years?",
+    "What team scored the most points in the 2024 season?",
+    "Which quarterback had the most interceptions in the 2024 season?",
+    "Who had the most rushing touchdowns in the 2024 season?",
+    "What's the difference between 2023 and 2024 stats?",
+    "Who has the most wins this year?",
+    "Which team had the best red zone efficiency in 2023?",
+    "Who led the league in sacks in 2022?",
+    "Which team covered the spread the most in 2024?",
+    "Who had the most field goals in 2021?",
+]
+
+FILTERING_SHOULD_BE_FILTERED = [
+    "What's the weather like in New York?",
+    "Who won the NBA championship last year?",
+    "How do I cook lasagna?",
+    "What is the capital of France?",
+    "Tell me a joke about cats.",
+    "Who is the president of the United States?",
+    "What is the stock price of Apple?",
+    "How to fix a flat tire?",
+    "What is the best movie of 2023?",
+    "How do I learn Python programming?",
+]
+
+# Direct SQL over the play table from tests/test_sql_agent.py, util/debug_red_zone.py
+# and sql_templates.py
+PBP_QUERIES = [
+    """WITH final_scores AS (
+        SELECT game_id, away_team, home_team, spread_line,
+               MAX(total_away_score) as final_away_score,
+               MAX(total_home_score) as final_home_score
+        FROM nflfastR_pbp
+        WHERE season=2024 AND week BETWEEN 1 AND 18
+        GROUP BY game_id
+    )
+    SELECT away_team, COUNT(DISTINCT game_id) as covers
+    FROM final_scores
+    WHERE (
+        (spread_line > 0 AND final_away_score + spread_line > final_home_score)
+        OR (spread_line < 0 AND final_away_score > final_home_score)
+        OR (spread_line = 0 AND final_away_score > final_home_score)
+    )
+    GROUP BY away_team
+    ORDER BY covers DESC
+    LIMIT 1""",
+    """WITH red_zone_plays AS (
+        SELECT posteam,
+               COUNT(*) as total_plays,
+               SUM(CASE WHEN touchdown = 1 THEN 1 ELSE 0 END) as touchdowns
+        FROM nflfastR_pbp
+        WHERE season=2024
+          AND week BETWEEN 1 AND 18
+          AND yardline_100 <= 20
+          AND play_type IN ('pass', 'run')
+        GROUP BY posteam
+    )
+    SELECT posteam, total_plays, touchdowns,
+           ROUND(CAST(touchdowns AS FLOAT) / total_plays * 100, 1) as td_percentage
+    FROM red_zone_plays
+    WHERE total_plays >= 20
+    ORDER BY td_percentage DESC
+    LIMIT 5""",
+    """SELECT play_type, COUNT(*) FROM nflfastR_pbp
+    WHERE season = 2023 AND season_type = 'REG' AND play_type IS NOT NULL AND play_type != 'no_play'
+    GROUP BY play_type ORDER BY COUNT(*) DESC LIMIT 1""",
+]
+
+# Single-table aggregates in the shape generated SQL usually takes; the column
+# store (column_store.py) can answer these and PBP_QUERIES[2]
+AGGREGATE_QUERIES = [
+    """SELECT posteam, SUM(passing_yards) AS passing_yards FROM nflfastR_pbp
+    WHERE season = 2023 AND season_type = 'REG' GROUP BY posteam ORDER BY passing_yards DESC LIMIT 5""",
+    """SELECT passer_player_name, SUM(pass_touchdown) AS touchdowns, COUNT(*) AS dropbacks FROM nflfastR_pbp
+    WHERE season = 2023 AND passer_player_name IS NOT NULL
+    GROUP BY passer_player_name ORDER BY touchdowns DESC, passer_player_name LIMIT 10""",
+    """SELECT season, AVG(epa) AS epa_per_play FROM nflfastR_pbp
+    WHERE play_type IN ('pass', 'run') GROUP BY season ORDER BY season""",
+    """SELECT COUNT(*) FROM nflfastR_pbp
+    WHERE down = 4 AND qtr = 4 AND play_type IN ('pass', 'run')""",
+    """SELECT rusher_player_name, SUM(rushing_yards) AS yards FROM nflfastR_pbp
+    WHERE season = 2022 AND rush_touchdown = 1 GROUP BY rusher_player_name ORDER BY yards DESC, rusher_player_name LIMIT 5""",
+    """SELECT posteam, COUNT(DISTINCT game_id) AS games, AVG(yards_gained) AS yards_per_play FROM nflfastR_pbp
+    WHERE season BETWEEN 2020 AND 2023 AND down = 3 AND ydstogo >= 7 GROUP BY posteam ORDER BY 3 DESC""",
+]
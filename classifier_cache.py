@@ -0,0 +1,202 @@
+"""
+Memoized and micro-batched stage 2 LLM classifier.
+
+Each inconclusive question costs a classifier round trip even though the
+verdict (NFL or not) is the same for near-identical phrasings. This module
+keeps a bounded LRU of verdicts keyed by normalized question, and can group
+classifier requests that arrive within a few milliseconds of each other
+(from concurrent sessions) into a single prompt.
+
+Settings come from the environment:
+    CLASSIFIER_CACHE_SIZE       verdicts kept (default 1024, 0 disables)
+    CLASSIFIER_BATCH_WINDOW_MS  how long the first request waits for others
+                                to join its batch (default 0, batching off)
+    CLASSIFIER_BATCH_MAX        questions per batched prompt (default 16)
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from query_cache import normalize_question
+
+DEFAULT_CACHE_SIZE = int(os.getenv('CLASSIFIER_CACHE_SIZE', 1024))
+DEFAULT_BATCH_WINDOW_MS = float(os.getenv('CLASSIFIER_BATCH_WINDOW_MS', 0))
+DEFAULT_BATCH_MAX = int(os.getenv('CLASSIFIER_BATCH_MAX', 16))
+
+# Words that don't change whether a question is about the NFL
+FILLER_WORDS = {
+    'a', 'an', 'the', 'please', 'can', 'could', 'you', 'tell', 'me', 'i', 'want', 'to', 'know',
+    'show', 'give', 'hey', 'so', 'just', 'exactly', 'actually',
+}
+
+BATCH_PROMPT = """For each numbered question, answer Y if it is about the NFL (teams, players, games, statistics, betting lines or league news) and N otherwise.
+Reply with one line per question in the form "<number>: Y" or "<number>: N" and nothing else.
+
+{questions}
+"""
+
+ANSWER_LINE = re.compile(r'^\s*(\d+)\s*[:.)-]\s*([YN])', re.IGNORECASE | re.MULTILINE)
+
+
+def classifier_key(question: str) -> str:
+    """Normalized question with filler words dropped."""
+    words = normalize_question(question).split()
+    return ' '.join(word for word in words if word not in FILLER_WORDS) or ' '.join(words)
+
+
+class VerdictCache:
+    """Thread-safe bounded LRU of classifier verdicts."""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, verdict):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = verdict
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ClassifierBatcher:
+    """Groups classify() calls made within window_ms of each other into one prompt.
+
+    The first caller in a window becomes the batch leader: it waits for the
+    window, sends the queued questions in one prompt and hands each waiting
+    caller its verdict, repeating until the queue is empty. A batch of one,
+    and any question whose line can't be parsed from the reply, goes through
+    classify_one (the agent's own classifier) instead.
+
+    llm is used as given (it may be wrapped for tracing or record/replay); the
+    larger completion budget a batched reply needs is passed with each call.
+    """
+
+    def __init__(self, llm, classify_one, window_ms: float = DEFAULT_BATCH_WINDOW_MS,
+                 max_batch: int = DEFAULT_BATCH_MAX):
+        self.llm = llm
+        self.max_tokens = 8 * max_batch
+        self.classify_one = classify_one
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.batches = 0
+        self.batched_questions = 0
+        self._pending = []
+        self._leading = False
+        self._lock = threading.Lock()
+        self._full = threading.Event()
+
+    def classify(self, question: str):
+        future = Future()
+        with self._lock:
+            self._pending.append((question, future))
+            leader = not self._leading
+            self._leading = True
+            if len(self._pending) >= self.max_batch:
+                self._full.set()
+        if leader:
+            self._full.wait(self.window)
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        self._leading = False
+                        break
+                    batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+                    self._full.clear()
+                self._run(batch)
+        return future.result()
+
+    def _run(self, batch):
+        if len(batch) == 1 or self.llm is None:
+            for question, future in batch:
+                self._resolve(future, lambda q=question: self.classify_one(q))
+            return
+        prompt = BATCH_PROMPT.format(
+            questions='\n'.join(f"{i}. {question}" for i, (question, _) in enumerate(batch, 1)))
+        try:
+            reply = self.llm.invoke(prompt, max_tokens=self.max_tokens)
+            answers = {int(number): flag.upper() == 'Y'
+                       for number, flag in ANSWER_LINE.findall(getattr(reply, 'content', reply))}
+        except Exception as e:
+            print(f"⚠️ Batched classifier call failed, classifying one by one: {e}")
+            answers = {}
+        with self._lock:
+            self.batches += 1
+            self.batched_questions += len(batch)
+        print(f"📦 Classifier batch of {len(batch)} questions in one LLM call")
+        for i, (question, future) in enumerate(batch, 1):
+            if i in answers:
+                future.set_result((answers[i], f"LLM classifier (batched): {'Y' if answers[i] else 'N'}"))
+            else:
+                self._resolve(future, lambda q=question: self.classify_one(q))
+
+    @staticmethod
+    def _resolve(future, func):
+        try:
+            future.set_result(func())
+        except Exception as e:
+            future.set_exception(e)
+
+
+class CachedClassifier:
+    """Stage 2 with a verdict cache in front and optional micro-batching behind."""
+
+    def __init__(self, classify_one, llm=None, cache: VerdictCache = None,
+                 batch_window_ms: float = DEFAULT_BATCH_WINDOW_MS, max_batch: int = DEFAULT_BATCH_MAX):
+        self.classify_one = classify_one
+        self.cache = cache if cache is not None else VerdictCache()
+        self.batcher = (ClassifierBatcher(llm, classify_one, batch_window_ms, max_batch)
+                        if batch_window_ms > 0 else None)
+        self.cache_hits = 0
+        self.llm_calls = 0
+        self._lock = threading.Lock()
+
+    def stats(self) -> str:
+        text = f"cache hits {self.cache_hits}, LLM classifications {self.llm_calls}"
+        if self.batcher is not None:
+            text += f", batches {self.batcher.batches} ({self.batcher.batched_questions} questions)"
+        return text
+
+    def __call__(self, question: str):
+        key = classifier_key(question)
+        verdict = self.cache.get(key)
+        if verdict is not None:
+            with self._lock:
+                self.cache_hits += 1
+            print(f"🧠 Classifier cache hit: {self.stats()}")
+            return verdict[0], f"{verdict[1]} (cached)"
+        if self.batcher is not None:
+            verdict = self.batcher.classify(question)
+        else:
+            verdict = self.classify_one(question)
+        with self._lock:
+            self.llm_calls += 1
+        self.cache.put(key, tuple(verdict))
+        print(f"🧠 Classifier cache miss: {self.stats()}")
+        return verdict
+
+
+def install_classifier_cache(agent, classifier: CachedClassifier = None):
+    """Put the verdict cache (and batching, if enabled) in front of an NFLStatAgent
+    instance's _stage2_llm_classifier."""
+    classifier = classifier or CachedClassifier(agent._stage2_llm_classifier,
+                                                llm=getattr(agent, '_classifier_llm', None))
+    agent._stage2_llm_classifier = classifier
+    agent.classifier_cache = classifier
+    return agent
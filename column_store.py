@@ -0,0 +1,565 @@
+"""
+Memory-mapped column store for vectorized aggregates over nflfastR_pbp.
+
+Many generated queries are a filtered count, sum or average over a few
+columns of the play table, which SQLite evaluates a row at a time over
+millions of plays. util/export_columns.py writes the hot columns to .npy
+files next to the database: numbers as float64 with NaN for NULL, strings
+dictionary-encoded as int32 codes into their sorted values (-1 for NULL):
+
+    data/pbp_db.columns/manifest.json                build, database version, column kinds
+    data/pbp_db.columns/<build>/<column>.npy
+    data/pbp_db.columns/<build>/<column>.values.json  (text columns)
+
+ColumnStore.execute() answers single-table aggregates from those arrays,
+filter -> group -> aggregate:
+
+    SELECT [group columns,] COUNT/SUM/AVG/MIN/MAX(...) FROM nflfastR_pbp
+    [WHERE column op value AND ...] [GROUP BY ...] [ORDER BY ...] [LIMIT n]
+
+with =, !=, <, <=, >, >=, IN, BETWEEN and IS [NOT] NULL conditions and
+COUNT(DISTINCT column). Anything else (joins, OR, CASE, arithmetic,
+subqueries, HAVING, columns that were not exported) raises NotEligible, and
+the statement runs on SQLite as before. db_pool consults the store for
+statements run through execute_query and for the agent's generated SQL on
+the pooled connections install_agent_connections() gives it; SQL run on
+other connections never reaches it. Floating-point sums can differ from
+SQLite's in the last digits.
+
+Arrays are opened with mmap_mode='r', so worker processes share the same
+page-cache pages instead of each holding a copy. numpy is optional; without
+it, or without a current export, every query goes to SQLite.
+"""
+
+import os
+import re
+import json
+import threading
+
+# numpy is optional (without it every query runs on SQLite) and is only
+# imported by load_numpy() once a store is opened or exported, so processes
+# that never use one don't pay for the import at startup
+np = None
+_numpy_missing = False
+
+COLUMN_STORE_SUFFIX = '.columns'
+MANIFEST_FILE = 'manifest.json'
+NUMERIC = 'numeric'
+CATEGORY = 'category'
+
+TABLES = {'nflfastr_pbp', 'nflfastr_pbp_hot'}
+AGGREGATES = {'count', 'sum', 'avg', 'min', 'max'}
+# Group keys up to this many combinations are indexed directly rather than sorted
+DIRECT_GROUPS = 1 << 22
+_RESERVED = {'select', 'from', 'where', 'group', 'by', 'order', 'limit', 'offset', 'having', 'and',
+             'or', 'not', 'in', 'between', 'is', 'null', 'as', 'asc', 'desc', 'distinct', 'all',
+             'join', 'on', 'using', 'union', 'case', 'when', 'then', 'else', 'end', 'like', 'glob',
+             'collate', 'cast', 'exists', 'with', 'left', 'inner', 'cross', 'natural', 'nulls'}
+_COMPARISONS = {'=', '==', '!=', '<>', '<', '<=', '>', '>='}
+
+_TOKEN = re.compile(r"""\s*(?:
+    (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<quoted>"(?:[^"]|"")+"|`[^`]+`|\[[^\]]+\])
+  | (?P<word>[A-Za-z_]\w*)
+  | (?P<symbol><=|>=|<>|!=|==|[=<>(),*?;.+/%|-])
+)""", re.VERBOSE)
+
+
+class NotEligible(ValueError):
+    """The statement isn't a single-table aggregate the column store can answer."""
+
+
+def _tokenize(sql: str):
+    """[(kind, text, start, end)]; quoted identifiers are unquoted."""
+    tokens, position = [], 0
+    sql = sql.rstrip()
+    while position < len(sql):
+        match = _TOKEN.match(sql, position)
+        if match is None:
+            raise NotEligible(f"Unsupported syntax at {sql[position:position + 20]!r}")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == 'quoted':
+            text = text[1:-1].replace('""', '"') if text[0] == '"' else text[1:-1]
+        tokens.append((kind, text, match.start(kind), match.end()))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser for the aggregate subset described above."""
+
+    def __init__(self, sql: str, params):
+        self.sql = sql
+        self.tokens = _tokenize(sql)
+        self.position = 0
+        self.params = list(params)
+
+    def peek(self, offset: int = 0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None, len(self.sql), len(self.sql))
+
+    def keyword(self, *words) -> bool:
+        kind, text, _, _ = self.peek()
+        if kind == 'word' and text.lower() in words:
+            self.position += 1
+            return True
+        return False
+
+    def symbol(self, *symbols) -> bool:
+        kind, text, _, _ = self.peek()
+        if kind == 'symbol' and text in symbols:
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, word: str):
+        if not (self.keyword(word) or self.symbol(word)):
+            raise NotEligible(f"Expected {word!r}")
+
+    def at_identifier(self) -> bool:
+        kind, text, _, _ = self.peek()
+        return kind == 'quoted' or (kind == 'word' and text.lower() not in _RESERVED)
+
+    def identifier(self) -> str:
+        if not self.at_identifier():
+            raise NotEligible(f"Expected a column name at {self.peek()[1]!r}")
+        self.position += 1
+        return self.tokens[self.position - 1][1]
+
+    def literal(self):
+        kind, text, _, _ = self.peek()
+        sign = 1
+        if kind == 'symbol' and text == '-':
+            sign = -1
+            self.position += 1
+            kind, text, _, _ = self.peek()
+            if kind != 'number':
+                raise NotEligible("Expected a number after '-'")
+        self.position += 1
+        if kind == 'number':
+            value = float(text) if any(c in text for c in '.eE') else int(text)
+            return sign * value
+        if kind == 'string':
+            return text[1:-1].replace("''", "'")
+        if kind == 'symbol' and text == '?':
+            if not self.params:
+                raise NotEligible("Not enough parameters")
+            return self.params.pop(0)
+        raise NotEligible(f"Expected a value at {text!r}")
+
+    def aggregate(self):
+        """('aggregate', function, column or None for *, distinct, text) at an aggregate call."""
+        kind, text, start, _ = self.peek()
+        if not (kind == 'word' and text.lower() in AGGREGATES and self.peek(1)[1] == '('):
+            return None
+        self.position += 2
+        function = text.lower()
+        distinct = self.keyword('distinct')
+        if not distinct and self.symbol('*'):
+            if function != 'count':
+                raise NotEligible(f"{function.upper()}(*)")
+            column = None
+        else:
+            column = self.identifier()
+        self.expect(')')
+        return ('aggregate', function, column, distinct, self.sql[start:self.tokens[self.position - 1][3]])
+
+    def select_item(self):
+        item = self.aggregate()
+        if item is None:
+            column = self.identifier()
+            item = ('column', column, None, False, column)
+        label = item[4]
+        if self.keyword('as'):
+            label = self.identifier()
+        elif self.at_identifier():
+            label = self.identifier()
+        return item + (label,)
+
+    def condition(self):
+        column = self.identifier()
+        if self.keyword('is'):
+            negate = self.keyword('not')
+            self.expect('null')
+            return ('null', column, None, negate)
+        negate = self.keyword('not')
+        if self.keyword('in'):
+            self.expect('(')
+            values = [self.literal()]
+            while self.symbol(','):
+                values.append(self.literal())
+            self.expect(')')
+            return ('in', column, values, negate)
+        if self.keyword('between'):
+            low = self.literal()
+            self.expect('and')
+            return ('between', column, (low, self.literal()), negate)
+        if negate:
+            raise NotEligible("NOT")
+        kind, text, _, _ = self.peek()
+        if kind != 'symbol' or text not in _COMPARISONS:
+            raise NotEligible(f"Unsupported condition at {text!r}")
+        self.position += 1
+        return ('compare', column, (text, self.literal()), False)
+
+    def group_item(self, items):
+        """Column name for a GROUP BY term: a column, an ordinal or a column's alias."""
+        kind, text, _, _ = self.peek()
+        if kind == 'number':
+            self.position += 1
+            index = int(text) - 1
+            if not 0 <= index < len(items) or items[index][0] != 'column':
+                raise NotEligible(f"GROUP BY {text}")
+            return items[index][1]
+        name = self.identifier()
+        aliased = [item[1] for item in items if item[0] == 'column' and item[5].lower() == name.lower()]
+        return aliased[0] if aliased else name
+
+    def order_item(self, items):
+        kind, text, _, _ = self.peek()
+        if kind == 'number':
+            self.position += 1
+            index = int(text) - 1
+            if not 0 <= index < len(items):
+                raise NotEligible(f"ORDER BY {text}")
+        else:
+            aggregate = self.aggregate()
+            if aggregate is not None:
+                key = _expression_key(aggregate[4])
+                matches = [i for i, item in enumerate(items) if item[0] == 'aggregate' and _expression_key(item[4]) == key]
+            else:
+                name = self.identifier().lower()
+                matches = ([i for i, item in enumerate(items) if item[5].lower() == name]
+                           or [i for i, item in enumerate(items) if item[0] == 'column' and item[1].lower() == name])
+            if not matches:
+                raise NotEligible("ORDER BY a value that isn't selected")
+            index = matches[0]
+        descending = self.keyword('desc')
+        if not descending:
+            self.keyword('asc')
+        return index, descending
+
+    def parse(self) -> dict:
+        self.expect('select')
+        if self.keyword('distinct'):
+            raise NotEligible("SELECT DISTINCT")
+        self.keyword('all')
+        items = [self.select_item()]
+        while self.symbol(','):
+            items.append(self.select_item())
+        self.expect('from')
+        table = self.identifier()
+        if table.lower() not in TABLES:
+            raise NotEligible(f"Table {table}")
+        conditions, groups, order, limit, offset = [], [], [], None, 0
+        if self.keyword('where'):
+            conditions.append(self.condition())
+            while self.keyword('and'):
+                conditions.append(self.condition())
+        if self.keyword('group'):
+            self.expect('by')
+            groups.append(self.group_item(items))
+            while self.symbol(','):
+                groups.append(self.group_item(items))
+        if self.keyword('order'):
+            self.expect('by')
+            order.append(self.order_item(items))
+            while self.symbol(','):
+                order.append(self.order_item(items))
+        if self.keyword('limit'):
+            limit = self.literal()
+            if self.keyword('offset'):
+                offset = self.literal()
+            if not all(isinstance(value, int) for value in (limit, offset)):
+                raise NotEligible("LIMIT")
+        self.symbol(';')
+        if self.position != len(self.tokens):
+            raise NotEligible(f"Unsupported syntax at {self.peek()[1]!r}")
+        if self.params:
+            raise NotEligible("Too many parameters")
+        if not any(item[0] == 'aggregate' for item in items):
+            raise NotEligible("No aggregate")
+        group_names = {name.lower() for name in groups}
+        if any(item[0] == 'column' and item[1].lower() not in group_names for item in items):
+            raise NotEligible("Selected column isn't grouped")
+        return {'items': items, 'conditions': conditions, 'groups': groups, 'order': order,
+                'limit': limit, 'offset': offset}
+
+
+def _expression_key(text: str) -> str:
+    return re.sub(r'\s+', '', text).lower()
+
+
+def parse_aggregate(sql: str, params=()) -> dict:
+    """Parse an eligible statement into its select items, conditions, groups,
+    order and limit; raise NotEligible for anything else."""
+    return _Parser(sql, params).parse()
+
+
+class _Column:
+    """One exported column: its array (memory-mapped) and, for text, its values."""
+
+    def __init__(self, name: str, meta: dict, directory: str):
+        self.name = name
+        self.kind = meta['kind']
+        self.integer = meta.get('integer', False)
+        self.data = np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+        self.labels = None
+        if self.kind == CATEGORY:
+            with open(os.path.join(directory, f'{name}.values.json')) as f:
+                self.labels = json.load(f)
+            self.values = np.array(self.labels, dtype=str)
+
+    @property
+    def is_category(self) -> bool:
+        return self.kind == CATEGORY
+
+    def take(self, index):
+        return self.data if index is None else self.data[index]
+
+    def present(self, data):
+        return data >= 0 if self.is_category else ~np.isnan(data)
+
+    def python(self, value):
+        if self.is_category:
+            return self.labels[int(value)]
+        return int(value) if self.integer else float(value)
+
+    def codes(self, data):
+        """(int64 codes with -1 for NULL, Python labels) for grouping."""
+        if self.is_category:
+            return data.astype(np.int64), self.labels
+        present = ~np.isnan(data)
+        values = data[present]
+        codes = np.full(len(data), -1, dtype=np.int64)
+        if self.integer and len(values):
+            # Seasons, weeks, downs: offsets into the range instead of a sort
+            low, high = int(values.min()), int(values.max())
+            if high - low < DIRECT_GROUPS:
+                codes[present] = values.astype(np.int64) - low
+                return codes, list(range(low, high + 1))
+        unique, inverse = np.unique(values, return_inverse=True)
+        codes[present] = inverse.reshape(-1)
+        return codes, [self.python(value) for value in unique.tolist()]
+
+    def matches(self, condition):
+        """Boolean mask of the rows that satisfy a condition on this column."""
+        kind, _, argument, negate = condition
+        data = self.data
+        if kind == 'null':
+            mask = ~self.present(data)
+            return ~mask if negate else mask
+        values = argument if kind == 'in' else argument[1:] if kind == 'compare' else argument
+        wanted = str if self.is_category else (int, float)
+        if not all(isinstance(value, wanted) and not isinstance(value, bool) for value in values):
+            raise NotEligible(f"{self.name} compared with a value of another type")
+        if kind == 'compare':
+            mask = self._compare(argument[0], argument[1])
+        elif kind == 'in':
+            targets = [self._code(value) for value in values] if self.is_category else values
+            mask = np.isin(data, targets)
+        else:
+            low, high = values
+            mask = self._compare('>=', low) & self._compare('<=', high)
+        return (~mask & self.present(data)) if negate else mask
+
+    def _code(self, value) -> int:
+        index = int(np.searchsorted(self.values, value))
+        return index if index < len(self.values) and self.values[index] == value else -2
+
+    def _compare(self, op: str, value):
+        data = self.data
+        if not self.is_category:
+            if op in ('=', '=='):
+                return data == value
+            if op in ('!=', '<>'):
+                return (data != value) & ~np.isnan(data)
+            return {'<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal}[op](data, value)
+        # Codes follow the sorted values, so string order is code order
+        if op in ('=', '=='):
+            return data == self._code(value)
+        if op in ('!=', '<>'):
+            return (data != self._code(value)) & (data >= 0)
+        left = int(np.searchsorted(self.values, value, 'left'))
+        right = int(np.searchsorted(self.values, value, 'right'))
+        if op == '<':
+            return (data >= 0) & (data < left)
+        if op == '<=':
+            return (data >= 0) & (data < right)
+        return data >= (right if op == '>' else left)
+
+
+class ColumnStore:
+    """An exported column store; answers eligible aggregates with numpy."""
+
+    def __init__(self, directory: str):
+        manifest_path = os.path.join(directory, MANIFEST_FILE)
+        self.manifest_mtime = os.stat(manifest_path).st_mtime_ns
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        self.directory = directory
+        self.build = manifest['build']
+        self.database_version = manifest['database_version']
+        self.rows = manifest['rows']
+        self._meta = {name.lower(): (name, meta) for name, meta in manifest['columns'].items()}
+        self._columns = {}
+        self._lock = threading.Lock()
+
+    @property
+    def column_names(self):
+        return [name for name, _ in self._meta.values()]
+
+    def column(self, name: str) -> _Column:
+        """The named column, mapped on first use; NotEligible if it wasn't exported."""
+        key = name.lower()
+        column = self._columns.get(key)
+        if column is None:
+            if key not in self._meta:
+                raise NotEligible(f"Column {name} isn't in the column store")
+            with self._lock:
+                column = self._columns.get(key)
+                if column is None:
+                    stored_name, meta = self._meta[key]
+                    column = _Column(stored_name, meta, os.path.join(self.directory, self.build))
+                    self._columns[key] = column
+        return column
+
+    def execute(self, sql: str, params=()):
+        """Answer an eligible aggregate.
+
+        Returns:
+            (columns, rows) like db_pool.execute_query
+        Raises:
+            NotEligible: the statement has to run on SQLite
+        """
+        query = parse_aggregate(sql, params)
+        items = query['items']
+        # Resolve every column (and its type checks) before doing any work
+        for item in items:
+            if item[0] == 'aggregate' and item[2] is not None:
+                column = self.column(item[2])
+                if column.is_category and item[1] in ('sum', 'avg'):
+                    raise NotEligible(f"{item[1].upper()} of text column {item[2]}")
+        for name in query['groups']:
+            self.column(name)
+
+        mask = None
+        for condition in query['conditions']:
+            matches = self.column(condition[1]).matches(condition)
+            mask = matches if mask is None else mask & matches
+        index = None if mask is None else np.flatnonzero(mask)
+        size = self.rows if index is None else len(index)
+
+        group_ids, group_count, keys = self._group(query['groups'], index, size)
+        group_values = {name.lower(): values for name, values in zip(query['groups'], keys)}
+        output = []
+        for item in items:
+            if item[0] == 'column':
+                output.append(group_values[item[1].lower()])
+            else:
+                output.append(self._aggregate(item, index, group_ids, group_count))
+        rows = list(zip(*output)) if output else []
+
+        for position, descending in reversed(query['order']):
+            rows.sort(key=lambda row: (0, 0) if row[position] is None else (1, row[position]), reverse=descending)
+        offset = max(query['offset'], 0)
+        if query['limit'] is not None and query['limit'] >= 0:
+            rows = rows[offset:offset + query['limit']]
+        elif offset:
+            rows = rows[offset:]
+        return [item[5] for item in items], rows
+
+    def _group(self, groups, index, size):
+        """(group id per selected row, number of groups, key values per group column)."""
+        if not groups:
+            return np.zeros(size, dtype=np.int64), 1, []
+        combined = np.zeros(size, dtype=np.int64)
+        labels, capacity = [], 1
+        for name in groups:
+            codes, column_labels = self.column(name).codes(self.column(name).take(index))
+            # NULL becomes 0, so NULL groups sort first, as in SQLite
+            column_labels = [None] + column_labels
+            capacity *= len(column_labels)
+            if capacity >= 2 ** 62:
+                raise NotEligible("Too many group combinations")
+            combined = combined * len(column_labels) + (codes + 1)
+            labels.append(column_labels)
+        if capacity <= DIRECT_GROUPS:
+            # Few possible keys: find the used ones by counting instead of sorting
+            unique = np.flatnonzero(np.bincount(combined, minlength=capacity))
+            lookup = np.zeros(capacity, dtype=np.int64)
+            lookup[unique] = np.arange(len(unique))
+            group_ids = lookup[combined]
+        else:
+            unique, group_ids = np.unique(combined, return_inverse=True)
+        keys, remaining = [], unique
+        for column_labels in reversed(labels):
+            keys.insert(0, [column_labels[code] for code in (remaining % len(column_labels)).tolist()])
+            remaining = remaining // len(column_labels)
+        return group_ids.reshape(-1), len(unique), keys
+
+    def _aggregate(self, item, index, group_ids, group_count):
+        _, function, name, distinct, _, _ = item
+        if name is None:
+            return np.bincount(group_ids, minlength=group_count).tolist()
+        column = self.column(name)
+        data = column.take(index)
+        present = column.present(data)
+        ids, values = group_ids[present], data[present]
+        if distinct:
+            if function != 'count':
+                raise NotEligible(f"{function.upper()}(DISTINCT)")
+            codes, labels = column.codes(values)
+            width = max(len(labels), 1)
+            pairs = np.unique(ids * width + codes)
+            return np.bincount(pairs // width, minlength=group_count).tolist()
+        counts = np.bincount(ids, minlength=group_count)
+        if function == 'count':
+            return counts.tolist()
+        if function in ('sum', 'avg'):
+            sums = np.bincount(ids, weights=values, minlength=group_count)
+            if function == 'avg':
+                return [total / count if count else None for total, count in zip(sums.tolist(), counts.tolist())]
+            return [column.python(total) if count else None for total, count in zip(sums.tolist(), counts.tolist())]
+        extreme = np.full(group_count, np.inf if function == 'min' else -np.inf)
+        (np.minimum if function == 'min' else np.maximum).at(extreme, ids, values)
+        return [column.python(value) if count else None for value, count in zip(extreme.tolist(), counts.tolist())]
+
+
+def column_store_path(db_path: str) -> str:
+    """Directory of a database's column store."""
+    return db_path + COLUMN_STORE_SUFFIX
+
+
+def load_numpy():
+    """Import numpy on first use; None if it isn't installed."""
+    global np, _numpy_missing
+    if np is None and not _numpy_missing:
+        try:
+            import numpy
+        except ImportError:
+            _numpy_missing = True
+        else:
+            np = numpy
+    return np
+
+
+def open_column_store(db_path: str, current: ColumnStore = None):
+    """Return db_path's ColumnStore (current, unless it has been re-exported
+    since), or None without numpy or an export."""
+    directory = column_store_path(db_path)
+    try:
+        mtime = os.stat(os.path.join(directory, MANIFEST_FILE)).st_mtime_ns
+    except OSError:
+        return None
+    if current is not None and current.manifest_mtime == mtime:
+        return current
+    if load_numpy() is None:
+        return None
+    try:
+        return ColumnStore(directory)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Column store {directory} unreadable, using SQLite: {e}")
+        return None
@@ -0,0 +1,402 @@
+"""
+Shared read-only SQLite connections for query execution.
+
+Each worker thread gets its own connection to the play-by-play database,
+opened read-only through a URI and tuned for large sequential scans
+(memory-mapped I/O, a bigger page cache, in-memory temp tables). Threads
+never share a connection, so concurrent run_query_hybrid calls do not
+contend on a lock and the open/schema-parse cost is paid once per thread.
+A connection lives only as long as its thread: it is closed when the
+thread exits, so short-lived threads don't leave connections (each with its
+page cache and memory map) behind. Run queries from long-lived worker
+threads (pipeline.py uses one shared executor) to keep reusing them.
+When the play table is split into hot and cold columns
+(util/partition_pbp.py), statements that only read hot columns are routed to
+the narrow table (see partitioning.py), both in execute_query and on the
+agent's pooled connections; the layout is read once per pool, so restart the
+app after partitioning.
+Single-table aggregates are answered from the memory-mapped column store
+(column_store.py, exported by util/export_columns.py) when one exists and
+matches the current data, again both in execute_query and on the agent's
+pooled connections; every other statement runs on SQLite.
+
+Settings come from the environment:
+    DB_PATH                database file (default data/pbp_db)
+    DB_MMAP_SIZE           bytes to memory-map (default 2 GiB)
+    DB_CACHE_SIZE_KB       page cache per connection in KiB (default 65536)
+    DB_IMMUTABLE           set to 1 to open with immutable=1 (only when the file
+                           is never written while the app runs)
+    COLUMN_STORE_DISABLED  set to 1 to run every query on SQLite
+
+util/ingest_pbp.py writes a data-version marker next to the database file
+(data/pbp_db.version) after every load; read_data_version() returns it so
+caches can tell when the data changed, even while the new rows still sit in
+the write-ahead log.
+
+The agent generates SQL and runs it on connections it opens itself with
+sqlite3.connect. install_agent_connections() hooks sqlite3.connect so that
+while the agent answers a database question (or is constructed),
+sqlite3.connect(path) to a database file returns the calling thread's pooled
+AgentConnection for it: read-only, tuned like the pool's own, reused for the
+thread's next question (the agent's close() hands it back) and a
+sql_governor.GovernedConnection, so its statements run under the same budget
+as execute_query's, are routed to the hot table and answered from the column
+store like execute_query's and are recorded to SQL_WORKLOAD_LOG (as routed;
+column store answers are not recorded). Connections opened
+with other arguments (:memory:, URIs, check_same_thread=False, a factory)
+are opened as asked but still governed and recorded; they are not routed. A question whose SQL
+was stopped is asked again with a rewrite hint
+(sql_governor.answer_with_regeneration). Connections the agent gets any
+other way (another driver, a connection passed in from outside) are not
+covered.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+import weakref
+import contextvars
+from contextlib import contextmanager
+from pathlib import Path
+
+from column_store import NotEligible, open_column_store
+from partitioning import partition_layout, quote, route_sql
+from sql_governor import GovernedConnection, GovernedCursor, QueryGovernor, answer_with_regeneration
+from sql_workload import record_workload
+from tracing import span
+
+DEFAULT_DB_PATH = 'data/pbp_db'
+DEFAULT_MMAP_SIZE = 2 * 1024 * 1024 * 1024
+DEFAULT_CACHE_SIZE_KB = 64 * 1024
+DATA_VERSION_SUFFIX = '.version'
+# Leads the statement that hands the agent a column store answer; the
+# workload recorder only logs statements that start with SELECT or WITH
+COLUMN_STORE_MARKER = '/* column store */'
+
+# sqlite3.connect before install_agent_connections() hooks it; the pool's own
+# connections always use it
+_sqlite_connect = sqlite3.connect
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class _ThreadConnection:
+    """Holds a thread's connection in its thread-local storage.
+
+    The holder is the only strong reference, so when the thread exits and
+    its locals are cleared the connection is deallocated, which closes it.
+    """
+    __slots__ = ('conn', '__weakref__')
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+def _answer_statement(columns, rows):
+    """(sql, parameters) of a statement whose result is rows under the given column names."""
+    row = '(' + ', '.join('?' for _ in columns) + ')'
+    values = ', '.join(row for _ in rows) or '(' + ', '.join('NULL' for _ in columns) + ')'
+    sql = (f"{COLUMN_STORE_MARKER} WITH answer({', '.join(quote(column) for column in columns)}) "
+           f"AS (VALUES {values}) SELECT * FROM answer{'' if rows else ' LIMIT 0'}")
+    return sql, [value for answer_row in rows for value in answer_row]
+
+
+class AgentCursor(GovernedCursor):
+    """GovernedCursor for the agent's SQL on a pooled connection.
+
+    Aggregates the column store can answer are served from it: the rows are
+    handed back through a VALUES statement, so description, row_factory and
+    fetching work as usual. Other statements are routed for the pool's
+    hot/cold layout; the budget (and a regeneration hint) names the SQL the
+    agent wrote.
+    """
+
+    def execute(self, sql, parameters=()):
+        conn = self.connection
+        answer = None
+        if isinstance(parameters, (list, tuple)):
+            answer = conn.pool.column_store_answer(sql, parameters)
+        if answer is not None:
+            statement, values = _answer_statement(*answer)
+            if len(values) <= conn.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER):
+                return sqlite3.Cursor.execute(self, statement, values)
+        with conn.governor.governing(conn, sql):
+            return sqlite3.Cursor.execute(self, conn.pool.route(conn, sql), parameters)
+
+
+class AgentConnection(GovernedConnection):
+    """A thread's pooled connection for the agent's own SQL (see install_agent_connections)."""
+
+    pool = None
+
+    def cursor(self, factory=AgentCursor):
+        return super().cursor(factory)
+
+    def close(self):
+        # The pool owns the connection: it is closed by close_all() or when
+        # its thread exits, and reused for the thread's next question
+        if self.in_transaction:
+            self.rollback()
+
+
+class ReadOnlyConnectionPool:
+    """Hands out one read-only connection per thread for a database file."""
+
+    def __init__(self, db_path: str, mmap_size: int = DEFAULT_MMAP_SIZE,
+                 cache_size_kb: int = DEFAULT_CACHE_SIZE_KB, immutable: bool = False,
+                 column_store: bool = True):
+        self.db_path = db_path
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.immutable = immutable
+        self.use_column_store = column_store
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = weakref.WeakSet()
+        self._layout = None
+        self._layout_loaded = False
+        self._column_store = None
+
+    @property
+    def uri(self) -> str:
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        if self.immutable:
+            uri += "&immutable=1"
+        return uri
+
+    def _open(self, factory=sqlite3.Connection) -> sqlite3.Connection:
+        # check_same_thread stays on: a connection belongs to the thread that opened it
+        conn = _sqlite_connect(self.uri, uri=True, factory=factory)
+        # A plain cursor, so an AgentConnection's setup isn't governed
+        setup = sqlite3.Cursor(conn)
+        setup.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        setup.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        setup.execute("PRAGMA temp_store = MEMORY")
+        setup.execute("PRAGMA query_only = ON")
+        setup.close()
+        record_workload(conn)
+        return conn
+
+    def _thread_connection(self, name: str, factory) -> sqlite3.Connection:
+        holder = getattr(self._local, name, None)
+        if holder is None:
+            holder = _ThreadConnection(self._open(factory))
+            setattr(self._local, name, holder)
+            with self._lock:
+                self._connections.add(holder)
+        return holder.conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use."""
+        return self._thread_connection('holder', sqlite3.Connection)
+
+    def agent_connection(self) -> AgentConnection:
+        """Return the calling thread's connection for the agent's own SQL."""
+        conn = self._thread_connection('agent_holder', AgentConnection)
+        conn.pool = self
+        # Undo what the agent set on it for its previous question
+        conn.row_factory = None
+        conn.text_factory = str
+        return conn
+
+    def route(self, conn: sqlite3.Connection, sql: str) -> str:
+        """Rewrite sql for the database's hot/cold layout, if it has one."""
+        if not self._layout_loaded:
+            # Through a plain cursor, so an AgentConnection doesn't route or govern the lookup
+            layout = partition_layout(sqlite3.Cursor(conn))
+            with self._lock:
+                self._layout, self._layout_loaded = layout, True
+        return route_sql(sql, self._layout)
+
+    def column_store(self):
+        """The database's column store if there is one for the current data, else None."""
+        if not self.use_column_store:
+            return None
+        store = open_column_store(self.db_path, self._column_store)
+        self._column_store = store
+        if store is None or store.database_version != database_version(self.db_path):
+            return None
+        return store
+
+    def column_store_answer(self, sql: str, params=()):
+        """(columns, rows) if the column store can answer the statement, else None."""
+        store = self.column_store()
+        if store is None:
+            return None
+        try:
+            return store.execute(sql, params)
+        except NotEligible:
+            return None
+
+    def close_all(self):
+        """Close every connection the pool has opened (e.g. on shutdown or reload)."""
+        with self._lock:
+            holders, self._connections = list(self._connections), weakref.WeakSet()
+        for holder in holders:
+            try:
+                # Not holder.conn.close(): an AgentConnection only hands itself back
+                sqlite3.Connection.close(holder.conn)
+            except sqlite3.ProgrammingError:
+                # Closing from another thread is refused; the owning thread's
+                # reference is dropped below and the connection is collected.
+                pass
+        self._local = threading.local()
+        self._layout_loaded = False
+        self._column_store = None
+
+    def __len__(self):
+        return len(self._connections)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str = None) -> ReadOnlyConnectionPool:
+    """Return the process-wide pool for a database path."""
+    db_path = db_path or os.getenv('DB_PATH', DEFAULT_DB_PATH)
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = ReadOnlyConnectionPool(
+                db_path,
+                mmap_size=int(os.getenv('DB_MMAP_SIZE', DEFAULT_MMAP_SIZE)),
+                cache_size_kb=int(os.getenv('DB_CACHE_SIZE_KB', DEFAULT_CACHE_SIZE_KB)),
+                immutable=_env_flag('DB_IMMUTABLE'),
+                column_store=not _env_flag('COLUMN_STORE_DISABLED'),
+            )
+            _pools[db_path] = pool
+        return pool
+
+
+def get_connection(db_path: str = None) -> sqlite3.Connection:
+    """Return this thread's read-only connection to the database."""
+    return get_pool(db_path).connection()
+
+
+def execute_query(sql: str, params=(), db_path: str = None, timeout: float = None,
+                  max_steps: int = None):
+    """Run a read-only query on this thread's pooled connection.
+
+    The statement runs under the sql_governor budget (SQL_TIMEOUT_SECONDS /
+    SQL_MAX_VM_STEPS unless timeout or max_steps is given) and raises
+    QueryBudgetExceeded if it is stopped. Aggregates the column store can
+    answer skip SQLite (and the budget: they are a few vectorized passes).
+
+    Returns:
+        (columns, rows) where columns is a list of column names
+    """
+    with span('sql', sql=sql) as sql_span:
+        pool = get_pool(db_path)
+        answer = pool.column_store_answer(sql, params)
+        if answer is not None:
+            sql_span.set(engine='columns', rows=len(answer[1]))
+            return answer
+        conn = pool.connection()
+        routed = pool.route(conn, sql)
+        if routed != sql:
+            sql_span.set(routed='hot')
+        with QueryGovernor(timeout, max_steps).governing(conn, sql):
+            cursor = conn.execute(routed, params)
+            columns = [description[0] for description in cursor.description or []]
+            rows = cursor.fetchall()
+        sql_span.set(rows=len(rows))
+    return columns, rows
+
+
+def data_version_path(db_path: str = None) -> str:
+    """Path of the data-version marker for a database file."""
+    return (db_path or os.getenv('DB_PATH', DEFAULT_DB_PATH)) + DATA_VERSION_SUFFIX
+
+
+def read_data_version(db_path: str = None) -> dict:
+    """Return the marker written by the last ingest, or {} if there is none."""
+    try:
+        with open(data_version_path(db_path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def database_version(db_path: str = None) -> str:
+    """Identify the current contents of the play-by-play database file."""
+    db_path = db_path or os.getenv('DB_PATH', DEFAULT_DB_PATH)
+    try:
+        stat = os.stat(db_path)
+    except OSError:
+        return 'missing'
+    version = f"{stat.st_size}-{stat.st_mtime_ns}"
+    marker = read_data_version(db_path).get('version')
+    # Ingested rows can sit in the WAL without touching the main file
+    return f"{version}-v{marker}" if marker is not None else version
+
+
+# True while the agent is constructed or answers a database question
+_agent_sql = contextvars.ContextVar('agent_sql', default=False)
+_connect_hooked = False
+
+
+@contextmanager
+def agent_sql():
+    """Treat SQLite connections opened in the body as the agent's."""
+    token = _agent_sql.set(True)
+    try:
+        yield
+    finally:
+        _agent_sql.reset(token)
+
+
+def _prepare_agent_connection(conn: sqlite3.Connection) -> sqlite3.Connection:
+    record_workload(conn)
+    return conn
+
+
+def _agent_pool(database=None, *args, **kwargs):
+    """The pool to serve a sqlite3.connect(path) from, or None to open it as asked."""
+    if args or set(kwargs) - {'timeout', 'check_same_thread'} or not kwargs.get('check_same_thread', True):
+        return None
+    if not isinstance(database, (str, os.PathLike)):
+        return None
+    path = os.fspath(database)
+    if path == ':memory:' or path.startswith('file:') or not os.path.isfile(path):
+        return None
+    return get_pool(path)
+
+
+def _connect(*args, **kwargs):
+    if not _agent_sql.get():
+        return _sqlite_connect(*args, **kwargs)
+    pool = _agent_pool(*args, **kwargs)
+    if pool is not None:
+        return pool.agent_connection()
+    # factory is connect()'s sixth positional parameter
+    if len(args) < 6 and 'factory' not in kwargs:
+        kwargs['factory'] = GovernedConnection
+    return _prepare_agent_connection(_sqlite_connect(*args, **kwargs))
+
+
+def install_agent_connections(agent=None):
+    """Pool, govern and capture the SQL an NFLStatAgent instance runs on its own SQLite connections.
+
+    Call once without an agent before the agent module is imported (so it
+    sees the hooked sqlite3.connect), then with the agent to cover its
+    database queries.
+    """
+    global _connect_hooked
+    with _pools_lock:
+        if not _connect_hooked:
+            sqlite3.connect = sqlite3.dbapi2.connect = _connect
+            _connect_hooked = True
+    if agent is None:
+        return agent
+    generate = agent._run_database_query
+
+    def _run_database_query(question, *args, **kwargs):
+        with agent_sql():
+            return answer_with_regeneration(question, lambda prompt: generate(prompt, *args, **kwargs))
+
+    agent._run_database_query = _run_database_query
+    return agent
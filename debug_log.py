@@ -0,0 +1,115 @@
+"""
+Request-scoped, bounded debug logs.
+
+The agent and the performance layers report what they are doing with print().
+A single module-level log buffer mixes up the output of two sessions answering
+questions at the same time and grows for as long as the process runs. Here
+each request gets its own RequestLog, a ring buffer of the most recent lines,
+held in a context variable: while capturing(log) is active, output printed on
+the current thread, and on any worker thread started with a copy of the
+current context (the pipeline's branch threads, QueryProgress), is appended to
+that log as well as written to the console.
+
+    log = RequestLog()
+    with capturing(log):
+        answer, error, reasoning = run_query_hybrid(question)
+    print(log.text())
+
+Settings come from the environment:
+    DEBUG_LOG_MAX_LINES   lines kept per request; older lines are dropped
+                          (default 2000)
+"""
+
+import os
+import sys
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+DEFAULT_MAX_LINES = 2000
+MAX_LINE_CHARS = 4000
+
+_current_log = contextvars.ContextVar('debug_log', default=None)
+_install_lock = threading.Lock()
+
+
+class RequestLog:
+    """The last max_lines lines of debug output for one request."""
+
+    def __init__(self, max_lines: int = None, max_line_chars: int = MAX_LINE_CHARS):
+        max_lines = int(os.getenv('DEBUG_LOG_MAX_LINES', DEFAULT_MAX_LINES)) if max_lines is None else max_lines
+        self.lines = deque(maxlen=max(1, max_lines))
+        self.max_line_chars = max_line_chars
+        self.dropped = 0
+        self._partial = ''
+        self._lock = threading.Lock()
+
+    def _append(self, line: str):
+        if len(line) > self.max_line_chars:
+            line = line[:self.max_line_chars] + f" ... [{len(line) - self.max_line_chars} chars truncated]"
+        if len(self.lines) == self.lines.maxlen:
+            self.dropped += 1
+        self.lines.append(line)
+
+    def write(self, text: str):
+        with self._lock:
+            *complete, self._partial = (self._partial + text).split('\n')
+            for line in complete:
+                self._append(line)
+
+    def text(self) -> str:
+        with self._lock:
+            lines = list(self.lines) + ([self._partial] if self._partial else [])
+            dropped = self.dropped
+        if dropped:
+            lines.insert(0, f"... {dropped} earlier lines dropped ...")
+        return '\n'.join(lines)
+
+    def __len__(self):
+        return len(self.lines)
+
+
+class _ContextStdout:
+    """sys.stdout replacement that also writes to the current request's log."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        log = _current_log.get()
+        if log is not None:
+            log.write(text)
+        return self._stream.write(text)
+
+    def __getattr__(self, attribute):
+        return getattr(self._stream, attribute)
+
+
+def install_capture():
+    """Route sys.stdout through the request logs (idempotent)."""
+    with _install_lock:
+        if not isinstance(sys.stdout, _ContextStdout):
+            sys.stdout = _ContextStdout(sys.stdout)
+
+
+@contextmanager
+def capturing(log: RequestLog = None):
+    """Collect debug output printed for the current request into log."""
+    log = log if log is not None else RequestLog()
+    install_capture()
+    token = _current_log.set(log)
+    try:
+        yield log
+    finally:
+        _current_log.reset(token)
+
+
+def current_log():
+    return _current_log.get()
+
+
+def get_debug_logs() -> str:
+    """Debug output of the request being handled in this context."""
+    log = _current_log.get()
+    return log.text() if log is not None else ''
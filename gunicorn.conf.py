@@ -0,0 +1,38 @@
+"""
+gunicorn settings for the HTTP API (api.py).
+
+    gunicorn -c gunicorn.conf.py api:app
+
+Each worker process builds its own NFLStatAgent once it has loaded the app, so
+the first request a worker serves doesn't pay for agent construction. The app
+is deliberately not preloaded: the agent's thread pools and SQLite
+connections must not be shared across a fork. Workers run gthread so one
+process can serve several queries at once while they wait on the LLMs.
+
+Settings come from the environment:
+    PORT             port to listen on (default 8000)
+    API_WORKERS      worker processes (default: number of CPUs)
+    API_THREADS      request threads per worker (default 4)
+    API_TIMEOUT      seconds before a silent worker is restarted
+                     (default HYBRID_DEADLINE_SECONDS + 30)
+"""
+
+import os
+import time
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8000)}"
+workers = int(os.getenv('API_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.getenv('API_THREADS', 4))
+timeout = int(os.getenv('API_TIMEOUT', float(os.getenv('HYBRID_DEADLINE_SECONDS', 30)) + 30))
+preload_app = False
+accesslog = '-'
+
+
+def post_worker_init(worker):
+    """Warm this worker's agent before it accepts requests."""
+    from pipeline import get_agent
+    start_time = time.perf_counter()
+    get_agent()
+    worker.log.info("Worker %s: agent ready in %.1fs", worker.pid, time.perf_counter() - start_time)
@@ -0,0 +1,128 @@
+"""
+Compiled single-pass keyword pre-screen (stage 1 of the hybrid flow).
+
+Team names, player names, football, season and stat terms and non-NFL terms
+are compiled once into a single regular expression. nflfastR team
+abbreviations ('KC', 'SF') are part of it too, matched case-sensitively so
+that 'NO', 'MIN' or 'SEA' only count when written as abbreviations. The alternation is factored into a trie
+('pass(?:er(?:s)?|ing)' rather than 'passer|passers|passing'), so matching
+walks the question once and the work at each position depends on the length
+of the longest term, not on how many terms there are. Adding rosters grows
+the pattern, not the per-question cost.
+"""
+
+import re
+import threading
+
+from nfl_terms import TEAMS, PLAYER_NAMES, FOOTBALL_TERMS, SEASON_TERMS, STAT_TERMS, NON_NFL_TERMS
+
+NFL = 'nfl'
+NON_NFL = 'non_nfl'
+TEAM_ABBREVIATION = 'team_abbreviation'
+
+
+def _normalize(term: str) -> str:
+    return ' '.join(term.lower().split())
+
+
+def _trie_pattern(terms) -> str:
+    """Regex source matching any of terms, with common prefixes factored out."""
+    if not terms:
+        return '(?!)'
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        if list(node) == ['']:
+            return None
+        optional = '' in node
+        branches = []
+        for char in sorted(key for key in node if key):
+            rest = build(node[char])
+            branches.append(re.escape(char) + (rest or ''))
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        pattern = '(?:' + '|'.join(branches) + ')'
+        return pattern + '?' if optional else pattern
+
+    return build(trie)
+
+
+def nfl_vocabulary(extra_terms=()):
+    """Team nicknames (alone and with their city), player names and football, season and stat terms."""
+    terms = set()
+    for city, nickname in TEAMS.values():
+        terms.add(nickname)
+        terms.add(f"{city} {nickname}")
+    terms.update(PLAYER_NAMES)
+    terms.update(FOOTBALL_TERMS)
+    terms.update(SEASON_TERMS)
+    terms.update(STAT_TERMS)
+    terms.update(extra_terms)
+    return sorted({_normalize(term) for term in terms if term.strip()})
+
+
+class KeywordScreen:
+    """One compiled pattern over the NFL and non-NFL vocabularies and the team abbreviations."""
+
+    def __init__(self, nfl_terms=None, non_nfl_terms=None, abbreviations=None):
+        self.nfl_terms = list(nfl_terms) if nfl_terms is not None else nfl_vocabulary()
+        self.non_nfl_terms = sorted({_normalize(term) for term in (
+            non_nfl_terms if non_nfl_terms is not None else NON_NFL_TERMS)})
+        self.abbreviations = sorted(abbreviations if abbreviations is not None else TEAMS)
+        # Terms are lowercase and matched ignoring case; abbreviations must be upper case
+        self.pattern = re.compile(
+            rf"(?<![\w'])(?:(?P<{NFL}>{_trie_pattern(self.nfl_terms)})"
+            rf"|(?P<{NON_NFL}>{_trie_pattern(self.non_nfl_terms)})"
+            rf"|(?P<{TEAM_ABBREVIATION}>(?-i:{_trie_pattern(self.abbreviations)})))(?![\w'])",
+            re.IGNORECASE,
+        )
+
+    def matches(self, question: str):
+        """Return (nfl_matches, non_nfl_matches) found in one pass over the question."""
+        found = {NFL: [], NON_NFL: []}
+        for match in self.pattern.finditer(' '.join(question.split())):
+            if match.lastgroup == TEAM_ABBREVIATION:
+                found[NFL].append(match.group(TEAM_ABBREVIATION))
+            else:
+                found[match.lastgroup].append(match.group(match.lastgroup).lower())
+        return found[NFL], found[NON_NFL]
+
+    def __call__(self, question: str):
+        """Stage 1 verdict in the agent's format: (is_relevant, reason, is_conclusive)."""
+        nfl, non_nfl = self.matches(question)
+        if nfl and not non_nfl:
+            return True, f"NFL terms found: {', '.join(dict.fromkeys(nfl))}", True
+        if non_nfl and not nfl:
+            return False, f"Non-NFL terms found: {', '.join(dict.fromkeys(non_nfl))}", True
+        if nfl and non_nfl:
+            return True, (f"Mixed terms (NFL: {', '.join(dict.fromkeys(nfl))}; "
+                          f"non-NFL: {', '.join(dict.fromkeys(non_nfl))})"), False
+        return True, "No NFL or non-NFL keywords found", False
+
+
+_screen = None
+_screen_lock = threading.Lock()
+
+
+def get_keyword_screen() -> KeywordScreen:
+    """The shared screen, compiled on first use."""
+    global _screen
+    with _screen_lock:
+        if _screen is None:
+            _screen = KeywordScreen()
+        return _screen
+
+
+def keyword_pre_screen(question: str):
+    return get_keyword_screen()(question)
+
+
+def install_keyword_screen(agent, screen: KeywordScreen = None):
+    """Replace an NFLStatAgent instance's stage 1 with the compiled screen."""
+    agent._stage1_keyword_pre_screen = screen or get_keyword_screen()
+    return agent
@@ -0,0 +1,105 @@
+"""
+Shared NFL vocabulary: team abbreviations as stored in nflfastR and the
+city/nickname each one is known by, plus the player names, football, season
+and stat terms and clearly non-NFL terms used by the keyword pre-screen.
+"""
+
+# nflfastR abbreviation -> (city, nickname)
+TEAMS = {
+    'ARI': ('Arizona', 'Cardinals'),
+    'ATL': ('Atlanta', 'Falcons'),
+    'BAL': ('Baltimore', 'Ravens'),
+    'BUF': ('Buffalo', 'Bills'),
+    'CAR': ('Carolina', 'Panthers'),
+    'CHI': ('Chicago', 'Bears'),
+    'CIN': ('Cincinnati', 'Bengals'),
+    'CLE': ('Cleveland', 'Browns'),
+    'DAL': ('Dallas', 'Cowboys'),
+    'DEN': ('Denver', 'Broncos'),
+    'DET': ('Detroit', 'Lions'),
+    'GB': ('Green Bay', 'Packers'),
+    'HOU': ('Houston', 'Texans'),
+    'IND': ('Indianapolis', 'Colts'),
+    'JAX': ('Jacksonville', 'Jaguars'),
+    'KC': ('Kansas City', 'Chiefs'),
+    'LA': ('Los Angeles', 'Rams'),
+    'LAC': ('Los Angeles', 'Chargers'),
+    'LV': ('Las Vegas', 'Raiders'),
+    'MIA': ('Miami', 'Dolphins'),
+    'MIN': ('Minnesota', 'Vikings'),
+    'NE': ('New England', 'Patriots'),
+    'NO': ('New Orleans', 'Saints'),
+    'NYG': ('New York', 'Giants'),
+    'NYJ': ('New York', 'Jets'),
+    'PHI': ('Philadelphia', 'Eagles'),
+    'PIT': ('Pittsburgh', 'Steelers'),
+    'SEA': ('Seattle', 'Seahawks'),
+    'SF': ('San Francisco', '49ers'),
+    'TB': ('Tampa Bay', 'Buccaneers'),
+    'TEN': ('Tennessee', 'Titans'),
+    'WAS': ('Washington', 'Commanders'),
+    # Abbreviations used for earlier seasons
+    'OAK': ('Oakland', 'Raiders'),
+    'SD': ('San Diego', 'Chargers'),
+    'STL': ('St. Louis', 'Rams'),
+}
+
+# Players people ask about by name; nflfastR stores them as 'P.Mahomes'
+PLAYER_NAMES = [
+    'Patrick Mahomes', 'Mahomes', 'Josh Allen', 'Lamar Jackson', 'Joe Burrow', 'Jalen Hurts',
+    'Aaron Rodgers', 'Tom Brady', 'Dak Prescott', 'Justin Herbert', 'Jared Goff', 'Brock Purdy',
+    'C.J. Stroud', 'Tua Tagovailoa', 'Kirk Cousins', 'Matthew Stafford', 'Russell Wilson',
+    'Derrick Henry', 'Christian McCaffrey', 'Saquon Barkley', 'Jonathan Taylor', 'Josh Jacobs',
+    'Nick Chubb', 'Austin Ekeler', 'Bijan Robinson', 'James Cook', 'Dalvin Cook', 'Travis Kelce',
+    'George Kittle', 'Tyreek Hill', 'Justin Jefferson', "Ja'Marr Chase", 'CeeDee Lamb',
+    'Davante Adams', 'Cooper Kupp', 'Stefon Diggs', 'Amon-Ra St. Brown', 'A.J. Brown', 'Puka Nacua',
+    'T.J. Watt', 'Micah Parsons', 'Myles Garrett', 'Nick Bosa', 'Aaron Donald', 'Justin Tucker',
+    'Harrison Butker', 'Andy Reid', 'Bill Belichick',
+]
+
+# Words and phrases that only make sense as football questions
+FOOTBALL_TERMS = [
+    'nfl', 'football', 'super bowl', 'playoffs', 'playoff', 'postseason', 'afc', 'nfc',
+    'quarterback', 'quarterbacks', 'qb', 'qbs', 'running back', 'running backs', 'rb',
+    'wide receiver', 'wide receivers', 'receiver', 'receivers', 'tight end', 'kicker', 'punter',
+    'linebacker', 'cornerback', 'defensive end', 'offensive line',
+    'touchdown', 'touchdowns', 'td', 'tds', 'passing', 'rushing', 'receiving', 'rusher', 'rushers',
+    'passer', 'passers', 'yards', 'yardage', 'interception', 'interceptions', 'sack', 'sacks',
+    'fumble', 'fumbles', 'field goal', 'field goals', 'extra point', 'two point conversion',
+    'punt', 'punts', 'kickoff', 'red zone', 'third down', 'fourth down', 'first down',
+    'completion', 'completions', 'passer rating', 'epa', 'wpa', 'cpoe', 'air yards',
+    'yards after catch', 'scrimmage', 'blitz', 'spread', 'against the spread',
+    'over/under', 'draft pick', 'head coach', 'offensive coordinator',
+    'defensive coordinator', 'gridiron', 'end zone', 'two-minute drill', 'hail mary',
+]
+
+# Season and stat words the play-by-play data answers ("most points in the 2024 season")
+SEASON_TERMS = [
+    'season', 'seasons', 'regular season', 'preseason', 'offseason', 'week', 'weeks',
+    'standings', 'division', 'divisional', 'wild card',
+]
+STAT_TERMS = [
+    'points', 'points allowed', 'scored', 'wins', 'losses', 'win-loss', 'stats', 'statistics',
+    'play type', 'play types', 'plays', 'first downs', 'turnovers', 'penalties', 'penalty yards',
+    'receptions', 'targets', 'carries', 'tackles', 'snaps', 'drives', 'completion percentage',
+    'yards per carry', 'yards per attempt', 'win probability', 'expected points',
+]
+
+# Topics that are clearly not NFL questions
+NON_NFL_TERMS = [
+    'nba', 'mlb', 'nhl', 'mls', 'basketball', 'baseball', 'hockey', 'soccer', 'tennis', 'golf',
+    'cricket', 'premier league', 'world cup', 'olympics',
+    'weather', 'forecast', 'recipe', 'recipes', 'cook', 'cooking', 'bake', 'lasagna',
+    'capital of', 'president', 'election', 'stock', 'stocks', 'stock price', 'bitcoin', 'crypto',
+    'movie', 'movies', 'film', 'tv show', 'song', 'album', 'joke', 'jokes', 'poem',
+    'python', 'javascript', 'programming', 'code', 'flat tire', 'car repair', 'homework',
+    'translate', 'math problem',
+]
+
+
+def team_display_name(abbreviation: str) -> str:
+    """'KC' -> 'Kansas City Chiefs (KC)'; unknown abbreviations pass through."""
+    if abbreviation not in TEAMS:
+        return abbreviation
+    city, nickname = TEAMS[abbreviation]
+    return f"{city} {nickname} ({abbreviation})"
@@ -0,0 +1,127 @@
+"""
+Hot/cold column layout of the play-by-play table.
+
+util/partition_pbp.py can split nflfastR_pbp (370+ columns) into a narrow
+table of the columns generated SQL actually uses and a wide table of the
+rest, joined on play_key, and replace nflfastR_pbp with a view over the two
+so existing SQL keeps working:
+
+    nflfastR_pbp_hot   play_key INTEGER PRIMARY KEY, hot columns
+    nflfastR_pbp_cold  play_key INTEGER PRIMARY KEY, cold columns
+    nflfastR_pbp       view: hot LEFT JOIN cold ON play_key
+
+SQLite drops the unused join from non-aggregate queries but not from
+aggregates (most of what the agent runs), so route_sql() rewrites statements
+that reference no cold column and no SELECT * to read nflfastR_pbp_hot
+directly. Anything else goes through the view and still returns every column.
+"""
+
+import re
+
+TABLE_NAME = 'nflfastR_pbp'
+HOT_TABLE = 'nflfastR_pbp_hot'
+COLD_TABLE = 'nflfastR_pbp_cold'
+PLAY_KEY = 'play_key'
+
+# Columns generated SQL, the rollup build and the test-suite queries touch.
+# util/partition_pbp.py can add more from a captured SQL workload.
+HOT_COLUMNS = [
+    'play_id', 'game_id', 'season', 'season_type', 'week', 'game_date',
+    'home_team', 'away_team', 'posteam', 'defteam', 'play_type', 'desc',
+    'qtr', 'down', 'ydstogo', 'yardline_100', 'drive',
+    'game_seconds_remaining', 'half_seconds_remaining',
+    'yards_gained', 'air_yards', 'yards_after_catch',
+    'epa', 'wpa', 'wp', 'success', 'cpoe',
+    'score_differential', 'posteam_score', 'defteam_score',
+    'total_home_score', 'total_away_score', 'result', 'total',
+    'spread_line', 'total_line',
+    'touchdown', 'pass_touchdown', 'rush_touchdown', 'complete_pass',
+    'incomplete_pass', 'pass_attempt', 'rush_attempt', 'interception', 'sack',
+    'fumble_lost', 'first_down', 'penalty', 'field_goal_attempt',
+    'field_goal_result', 'two_point_conv_result',
+    'passer_player_id', 'passer_player_name', 'passing_yards',
+    'receiver_player_id', 'receiver_player_name', 'receiving_yards',
+    'rusher_player_id', 'rusher_player_name', 'rushing_yards',
+    'kicker_player_name',
+]
+
+_TABLE_REFERENCE = re.compile(rf'"?\b{TABLE_NAME}\b"?', re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_IDENTIFIER = re.compile(r'"([^"]+)"|`([^`]+)`|\[([^\]]+)\]|\b([A-Za-z_]\w*)\b')
+_SELECT_STAR = re.compile(r'\bSELECT\s+(?:DISTINCT\s+|ALL\s+)?\*|,\s*\*|\.\s*\*', re.IGNORECASE)
+# Reserved words that are also nflfastR column names (desc, end); unquoted they
+# can only be the keyword
+_KEYWORDS = {'asc', 'desc', 'end', 'order', 'group', 'by', 'limit', 'offset', 'case', 'when',
+             'then', 'else', 'from', 'where', 'select', 'and', 'or', 'not', 'in', 'is', 'as'}
+
+
+class PartitionLayout:
+    """Column sets of a partitioned database (lowercased for matching)."""
+
+    def __init__(self, hot_columns, cold_columns):
+        self.hot = frozenset(column.lower() for column in hot_columns)
+        self.cold = frozenset(column.lower() for column in cold_columns)
+
+    def __repr__(self):
+        return f"PartitionLayout({len(self.hot)} hot, {len(self.cold)} cold)"
+
+
+def quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def column_types(conn, table: str):
+    """[(name, declared type)] in table order, without play_key."""
+    return [(row[1], row[2]) for row in conn.execute(f'PRAGMA table_info({table})') if row[1] != PLAY_KEY]
+
+
+def partition_layout(conn):
+    """Return the PartitionLayout if nflfastR_pbp is the hot/cold view, else None."""
+    objects = dict(conn.execute(
+        "SELECT name, type FROM sqlite_master WHERE name IN (?, ?, ?)",
+        (TABLE_NAME, HOT_TABLE, COLD_TABLE)).fetchall())
+    if objects != {TABLE_NAME: 'view', HOT_TABLE: 'table', COLD_TABLE: 'table'}:
+        return None
+    return PartitionLayout([name for name, _ in column_types(conn, HOT_TABLE)],
+                           [name for name, _ in column_types(conn, COLD_TABLE)])
+
+
+def reads_only_hot_columns(sql: str, layout: PartitionLayout) -> bool:
+    """True if the statement can't need a cold column (conservative: any
+    identifier that names a cold column counts, even an alias)."""
+    text = _STRING_LITERAL.sub("''", sql)
+    if _SELECT_STAR.search(text):
+        return False
+    for match in _IDENTIFIER.finditer(text):
+        name = next(group for group in match.groups() if group is not None)
+        if match.group(4) is not None and name.lower() in _KEYWORDS:
+            continue
+        if name.lower() in layout.cold:
+            return False
+    return True
+
+
+def route_sql(sql: str, layout) -> str:
+    """Point a statement at nflfastR_pbp_hot when it only reads hot columns."""
+    if layout is None or not _TABLE_REFERENCE.search(sql) or not reads_only_hot_columns(sql, layout):
+        return sql
+    return _TABLE_REFERENCE.sub(HOT_TABLE, sql)
+
+
+def joined_select(conn, order=None) -> str:
+    """SELECT of every column from the hot/cold join, in order (then the rest)."""
+    hot = [name for name, _ in column_types(conn, HOT_TABLE)]
+    cold = [name for name, _ in column_types(conn, COLD_TABLE)]
+    source = {name: HOT_TABLE for name in hot}
+    source.update({name: COLD_TABLE for name in cold})
+    order = [name for name in (order or []) if name in source]
+    order += [name for name in hot + cold if name not in order]
+    select = ', '.join(f'{source[name]}.{quote(name)}' for name in order)
+    return (f'SELECT {select} FROM {HOT_TABLE} '
+            f'LEFT JOIN {COLD_TABLE} ON {COLD_TABLE}.{PLAY_KEY} = {HOT_TABLE}.{PLAY_KEY}')
+
+
+def create_view(conn, order=None):
+    """(Re)create the nflfastR_pbp view, keeping the given column order."""
+    conn.execute(f'DROP VIEW IF EXISTS {TABLE_NAME}')
+    conn.execute(f'CREATE VIEW {TABLE_NAME} AS {joined_select(conn, order)}')
@@ -0,0 +1,476 @@
+"""
+Hybrid query pipeline around a shared, process-wide NFLStatAgent.
+
+The agent's stage methods do the actual work (keyword pre-screen, LLM
+classifier, database query, web search, answer scoring). This module owns
+the single agent instance that the UI uses, installs the performance layers
+on it once, and runs the four-stage flow:
+
+  1. Keyword pre-screen (_stage1_keyword_pre_screen, compiled by keyword_screen.py)
+  2. LLM classifier, only when stage 1 is inconclusive (_stage2_llm_classifier)
+  3. Database query and web search in parallel
+  4. Scoring and selection of the best answer
+
+Each completed stage is reported to an optional on_progress callback as a
+progress.ProgressEvent. With stream=True the answer is returned as an
+iterator of text chunks: when the database query fails, the agent's web
+answer is streamed while its web LLM is still synthesizing it
+(web_search.install_answer_streaming); otherwise both answers are scored as
+in the blocking flow and the chosen one is returned in one chunk, so time to
+first token only improves when the database branch fails. Every request
+is recorded as a tracing.Trace: one span per stage, with the SQL statements,
+LLM calls and the selected source nested beneath. Branch threads run in a
+copy of the caller's context, so the trace and any debug_log.capturing()
+request log follow them.
+
+Identical questions asked while one is already being answered are coalesced
+(singleflight.py): they wait for the in-flight computation and share its
+answer and progress events instead of repeating every stage.
+
+run_query_hybrid_async is the asyncio entry point: it stops waiting for the
+other branch as soon as one answer is confident enough, and gives up on
+whatever is still running at a deadline.
+"""
+
+import os
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backends import install_backends
+from classifier_cache import install_classifier_cache
+from db_pool import agent_sql, install_agent_connections
+from keyword_screen import install_keyword_screen
+from player_index import install_player_index
+from query_cache import install_query_cache, normalize_question
+from schema_context import install_schema_pruning
+from sql_templates import install_template_fast_path
+from progress import ProgressReporter, reporting
+from singleflight import SingleFlight, SharedStream
+from tracing import Trace, install_tracing, span, traced_stream, with_current_context
+from web_search import install_answer_streaming, install_web_search, streaming_to
+
+NOT_NFL_ANSWER = (
+    "Sorry, I can only answer questions about the NFL, its teams, players and statistics."
+)
+
+# Rule-based score (agent._score_answer) at which one branch's answer is used
+# without waiting for the other; a database answer with a number and NFL
+# terms scores about 25
+CONFIDENCE_THRESHOLD = float(os.getenv('HYBRID_CONFIDENCE_THRESHOLD', 22))
+DEADLINE_SECONDS = float(os.getenv('HYBRID_DEADLINE_SECONDS', 30))
+COALESCE_REQUESTS = os.getenv('COALESCE_REQUESTS', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+
+# Branch threads for every request. Long-lived, so each thread's pooled
+# SQLite connection (db_pool) is reused instead of opened per request, and
+# private rather than the event loop's default executor, whose shutdown at
+# the end of asyncio.run would wait for a cancelled branch to finish.
+BRANCH_THREADS = int(os.getenv('HYBRID_BRANCH_THREADS', 16))
+_branch_executor = ThreadPoolExecutor(max_workers=BRANCH_THREADS, thread_name_prefix='hybrid-branch')
+
+_agent = None
+_agent_lock = threading.Lock()
+
+# Questions currently being answered by run_query_hybrid
+_in_flight = SingleFlight()
+
+
+def get_agent():
+    """Return the shared NFLStatAgent, creating and configuring it on first use."""
+    global _agent
+    with _agent_lock:
+        if _agent is None:
+            # Before the agent module is imported, so it picks up the hooked sqlite3.connect
+            install_agent_connections()
+            from agent import NFLStatAgent
+            with agent_sql():
+                agent = NFLStatAgent()
+            # Innermost, so only the agent's own SQL work is marked
+            install_agent_connections(agent)
+            # Record/replay wraps the LLM clients before anything else uses them
+            install_backends(agent)
+            # After backends, so cached/fanned-out searches sit on top of record/replay
+            install_web_search(agent)
+            # LLM spans measure the (possibly replayed) clients, not cache hits
+            install_tracing(agent)
+            # After tracing, so LLM spans and cassettes see the pruned prompt
+            install_schema_pruning(agent)
+            install_answer_streaming(agent)
+            install_keyword_screen(agent)
+            install_classifier_cache(agent)
+            # Inside the template fast path, so templates see the question as asked
+            install_player_index(agent)
+            # Templates run before LLM SQL generation; the cache wraps both
+            install_template_fast_path(agent)
+            install_query_cache(agent)
+            _agent = agent
+        return _agent
+
+
+def _run_branch(method, query, reporter=None):
+    """Run one branch, turning unexpected exceptions into an (answer, error) pair.
+
+    Stages reported from inside the branch go to reporter.
+    """
+    with reporting(reporter):
+        try:
+            return method(query)
+        except Exception as e:
+            return None, str(e)
+
+
+def _branch_attributes(result) -> dict:
+    answer, error = result
+    return {'answered': bool(answer), 'answer_chars': len(answer or ''), 'error': error}
+
+
+def _run_database_branch(agent, query, reporter):
+    with span('database') as branch_span:
+        result = _run_branch(agent._run_database_query, query, reporter)
+        branch_span.set(**_branch_attributes(result))
+    # SQL generated and run inside the agent isn't visible to the reporter
+    if 'sql_executed' not in reporter.seen:
+        if 'sql_generated' not in reporter.seen:
+            reporter('sql_generated')
+        reporter('sql_executed', "database answer ready" if result[0] else result[1] or '')
+    return result
+
+
+def _run_web_branch(method, query, reporter):
+    with span('web') as branch_span:
+        result = _run_branch(method, query, reporter)
+        branch_span.set(**_branch_attributes(result))
+    # A streamed answer reports it when its first chunk arrives
+    if 'web_results' not in reporter.seen:
+        reporter('web_results')
+    return result
+
+
+def _select_answer(agent, query, db_result, web_result):
+    """Pick between the database and web answers.
+
+    The LLM scoring agent decides when both branches produced an answer; the
+    rule-based scores break ties and cover the case where one branch failed.
+
+    Returns:
+        (answer, error, source, explanation)
+    """
+    with span('scoring') as scoring_span:
+        result = _choose_answer(agent, query, db_result, web_result, scoring_span)
+        scoring_span.set(source=result[2])
+    return result
+
+
+def _choose_answer(agent, query, db_result, web_result, scoring_span):
+    db_answer, db_error = db_result
+    web_answer, web_error = web_result
+    db_score = agent._score_answer(db_answer, db_error, "database")
+    web_score = agent._score_answer(web_answer, web_error, "web")
+    scoring_span.set(db_score=db_score, web_score=web_score)
+    print(f"📊 Answer scores - database: {db_score}, web: {web_score}")
+
+    if db_error and web_error:
+        return None, db_error, None, "Both the database and web search failed"
+    if db_answer and web_answer and not db_error and not web_error:
+        choice, rationale = agent._llm_score_answers(query, db_answer, web_answer)
+        scoring_span.set(llm_choice=choice)
+        print(f"🤖 LLM scoring agent choice: {choice}")
+        if choice == "Database":
+            return db_answer, None, "database", rationale
+        if choice == "Web":
+            return web_answer, None, "web", rationale
+    if db_score >= web_score and not db_error:
+        return db_answer, None, "database", f"Database answer scored {db_score} vs web {web_score}"
+    return web_answer, None, "web", f"Web answer scored {web_score} vs database {db_score}"
+
+
+def _screen(agent, query, reporter):
+    """Stages 1 and 2. Returns (is_relevant, reasoning steps)."""
+    with span('keyword_screen') as screen_span:
+        is_relevant, reason, is_conclusive = agent._stage1_keyword_pre_screen(query)
+        screen_span.set(relevant=is_relevant, conclusive=is_conclusive, reason=reason)
+    reporter('keyword_screen', reason)
+    reasoning = [f"Keyword screen: {reason}"]
+    if not is_conclusive:
+        with span('classifier') as classifier_span:
+            is_relevant, reason = agent._stage2_llm_classifier(query)
+            classifier_span.set(relevant=is_relevant, reason=reason)
+        reasoning.append(f"Classifier: {reason}")
+        reporter('classifier', reason)
+    else:
+        reporter('classifier', "skipped, keyword screen was conclusive")
+    return is_relevant, reasoning
+
+
+def _single_chunk(text):
+    yield text
+
+
+# Put after the web branch's last chunk
+_WEB_DONE = object()
+
+
+def _run_streamed_web_branch(agent, query, reporter, chunks):
+    """The web branch with its synthesis LLM's chunks put on the chunks queue."""
+    try:
+        with streaming_to(chunks.put):
+            return _run_web_branch(agent._run_web_search, query, reporter)
+    finally:
+        chunks.put(_WEB_DONE)
+
+
+def _queued_chunks(first, chunks):
+    yield first
+    while True:
+        chunk = chunks.get()
+        if chunk is _WEB_DONE:
+            return
+        yield chunk
+
+
+def _run_streaming(agent, query, reasoning, reporter):
+    """Streaming variant of stages 3 and 4.
+
+    The agent's web search runs in parallel with the database query, with its
+    synthesis streamed to a queue. When the query fails, scoring could only
+    pick the web answer, so it is returned as a stream of those chunks, live
+    while they are still being synthesized. Otherwise both answers go through
+    the same scoring step as the blocking path, and only the chosen answer is
+    returned.
+
+    Returns:
+        (chunks, source, error)
+    """
+    chunks = queue.Queue()
+    db_future = _branch_executor.submit(with_current_context(_run_database_branch), agent, query, reporter)
+    web_future = _branch_executor.submit(with_current_context(_run_streamed_web_branch), agent, query, reporter,
+                                         chunks)
+    db_result = db_future.result()
+
+    db_answer, db_error = db_result
+    if db_error or not db_answer:
+        first = chunks.get()
+        if first is _WEB_DONE:
+            # Nothing was streamed (an error, or a web LLM that can't stream)
+            web_answer, web_error = web_future.result()
+            if web_error or not web_answer:
+                reporter('scoring', '')
+                reasoning.append("Both the database and web search failed")
+                return None, None, db_error or web_error or "Web search returned no answer"
+            answer_chunks = _single_chunk(web_answer)
+        else:
+            answer_chunks = _queued_chunks(first, chunks)
+            reporter('web_results', "synthesizing")
+        reporter('scoring', "web")
+        reasoning.append(f"Selected web answer: database query failed ({db_error or 'no answer'})")
+        return traced_stream(answer_chunks, 'synthesis'), "web", None
+
+    web_result = web_future.result()
+    answer, error, source, explanation = _select_answer(agent, query, db_result, web_result)
+    reporter('scoring', source or '')
+    reasoning.append(f"Selected {source} answer: {explanation}")
+    return _single_chunk(answer), source, error
+
+
+def run_query_hybrid(query: str, show_reasoning: bool = False, stream: bool = False,
+                     on_progress=None, trace: Trace = None):
+    """Answer a question with the hybrid database/web flow.
+
+    on_progress, if given, is called with a ProgressEvent as each stage
+    completes; it may be called from worker threads. Pass a Trace to get the
+    request's spans back; it is finished (and exported when TRACE_LOG is set)
+    when the answer is complete, which for a stream is once it is consumed.
+
+    Returns:
+        (answer, error, reasoning); reasoning is None unless show_reasoning.
+        With stream=True, answer is an iterator of text chunks (None on error)
+    """
+    trace = trace or Trace(query)
+    with trace.activate():
+        if COALESCE_REQUESTS:
+            result, coalesced = _in_flight.do((normalize_question(query), stream),
+                                              lambda publish: _run_traced(query, stream, publish, trace),
+                                              on_event=on_progress)
+        else:
+            result, coalesced = _run_traced(query, stream, on_progress, trace), False
+        answer, error, reasoning, source, leader_trace_id = result
+        trace.root.set(source=source, error=error)
+        if coalesced:
+            print(f"🔗 Coalesced with the identical in-flight question (trace {leader_trace_id})")
+            trace.root.set(coalesced=True, leader_trace=leader_trace_id)
+    if isinstance(answer, SharedStream):
+        answer = _finish_with_stream(answer, trace)
+    else:
+        trace.finish()
+    return answer, error, " | ".join(reasoning) if show_reasoning else None
+
+
+def coalescing_stats() -> dict:
+    """Counts of run_query_hybrid calls that ran vs. joined an identical in-flight one."""
+    return _in_flight.stats()
+
+
+def _run_traced(query, stream, on_progress, trace):
+    """_run_query with a streamed answer made shareable (the web answer is synthesized once)."""
+    answer, error, reasoning, source = _run_query(query, stream, on_progress)
+    if stream and answer is not None:
+        answer = SharedStream(answer)
+    return answer, error, tuple(reasoning), source, trace.trace_id
+
+
+def _finish_with_stream(shared, trace):
+    """This caller's view of a shared stream; its trace ends when the view is consumed."""
+    try:
+        yield from shared
+    finally:
+        trace.finish()
+
+
+def _run_query(query, stream, on_progress):
+    """run_query_hybrid inside its trace. Returns (answer, error, reasoning steps, source)."""
+    agent = get_agent()
+    reporter = ProgressReporter(on_progress)
+
+    is_relevant, reasoning = _screen(agent, query, reporter)
+    if not is_relevant:
+        reporter('done')
+        return _single_chunk(NOT_NFL_ANSWER) if stream else NOT_NFL_ANSWER, None, reasoning, "filtered"
+
+    if stream:
+        chunks, source, error = _run_streaming(agent, query, reasoning, reporter)
+        reporter('done')
+        return chunks, error, reasoning, source
+
+    db_future = _branch_executor.submit(with_current_context(_run_database_branch), agent, query, reporter)
+    web_future = _branch_executor.submit(with_current_context(_run_web_branch), agent._run_web_search, query,
+                                         reporter)
+    db_result = db_future.result()
+    web_result = web_future.result()
+
+    answer, error, source, explanation = _select_answer(agent, query, db_result, web_result)
+    reporter('scoring', source or '')
+    reporter('done')
+    if source:
+        reasoning.append(f"Selected {source} answer: {explanation}")
+    else:
+        reasoning.append(explanation)
+    return answer, error, reasoning, source
+
+
+async def _select_answer_async(agent, query, db_result, web_result, timeout):
+    """_select_answer off the event loop; past the deadline only rule scores are used."""
+    import asyncio
+    if timeout <= 0:
+        return _select_answer(_RuleScoringOnly(agent), query, db_result, web_result)
+    try:
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(_branch_executor, with_current_context(_select_answer),
+                                 agent, query, db_result, web_result), timeout)
+    except asyncio.TimeoutError:
+        print("⏱️ Deadline reached during LLM scoring, using rule-based scores")
+        return _select_answer(_RuleScoringOnly(agent), query, db_result, web_result)
+
+
+class _RuleScoringOnly:
+    """Agent view whose LLM scoring always defers to the rule-based scores."""
+
+    def __init__(self, agent):
+        self._agent = agent
+
+    def _score_answer(self, answer, error, source):
+        return self._agent._score_answer(answer, error, source)
+
+    def _llm_score_answers(self, query, db_answer, web_answer):
+        return None, "LLM scoring skipped"
+
+
+async def run_query_hybrid_async(query: str, show_reasoning: bool = False, on_progress=None,
+                                 confidence_threshold: float = None, deadline: float = None,
+                                 trace: Trace = None):
+    """Async variant of run_query_hybrid that doesn't wait on a losing branch.
+
+    The database and web branches run in worker threads. As soon as one
+    finishes with a rule-based score of at least confidence_threshold its
+    answer is returned and the other branch is cancelled; otherwise both
+    answers are scored as usual. After deadline seconds, branches still
+    running are cancelled and the best finished answer is used.
+
+    Cancelling stops the pipeline waiting for a branch; the agent's blocking
+    call carries on in its thread and its result is discarded.
+
+    Returns:
+        (answer, error, reasoning) as run_query_hybrid
+    """
+    trace = trace or Trace(query)
+    with trace.activate():
+        answer, error, reasoning, source = await _run_query_async(
+            query, on_progress, confidence_threshold, deadline)
+    trace.finish(source=source, error=error)
+    return answer, error, " | ".join(reasoning) if show_reasoning else None
+
+
+async def _run_query_async(query, on_progress, confidence_threshold, deadline):
+    """run_query_hybrid_async inside its trace. Returns (answer, error, reasoning steps, source)."""
+    # Imported here: the blocking entry points (and the UI's cold start) don't need asyncio
+    import asyncio
+    agent = get_agent()
+    reporter = ProgressReporter(on_progress)
+    threshold = CONFIDENCE_THRESHOLD if confidence_threshold is None else confidence_threshold
+    deadline_at = time.monotonic() + (DEADLINE_SECONDS if deadline is None else deadline)
+
+    loop = asyncio.get_running_loop()
+    is_relevant, reasoning = await loop.run_in_executor(
+        _branch_executor, with_current_context(_screen), agent, query, reporter)
+    if not is_relevant:
+        reporter('done')
+        return NOT_NFL_ANSWER, None, reasoning, "filtered"
+
+    tasks = {
+        loop.run_in_executor(_branch_executor, with_current_context(_run_database_branch),
+                             agent, query, reporter): "database",
+        loop.run_in_executor(_branch_executor, with_current_context(_run_web_branch),
+                             agent._run_web_search, query, reporter): "web",
+    }
+    results = {"database": (None, None), "web": (None, None)}
+    pending = set(tasks)
+    answer = error = source = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=max(0.0, deadline_at - time.monotonic()),
+                                               return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                missing = ", ".join(sorted(tasks[task] for task in pending))
+                print(f"⏱️ Deadline reached, cancelling {missing}")
+                reasoning.append(f"Deadline reached before the {missing} answer")
+                for source in (tasks[task] for task in pending):
+                    results[source] = (None, f"No {source} answer before the deadline")
+                break
+            for task in done:
+                source = tasks[task]
+                results[source] = task.result()
+                score = agent._score_answer(*results[source], source)
+                if results[source][0] and not results[source][1] and score >= threshold and pending:
+                    print(f"🏁 Confident {source} answer (score {score}), cancelling the other branch")
+                    reasoning.append(f"Selected {source} answer: score {score} cleared the "
+                                     f"confidence threshold {threshold:g}")
+                    answer = results[source][0]
+                    break
+            if answer is not None:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+
+    if answer is None:
+        timeout = max(0.0, deadline_at - time.monotonic())
+        answer, error, source, explanation = await _select_answer_async(
+            agent, query, results["database"], results["web"], timeout)
+        if source:
+            reasoning.append(f"Selected {source} answer: {explanation}")
+        else:
+            reasoning.append(explanation)
+    reporter('scoring')
+    reporter('done')
+    return answer, error, reasoning, source
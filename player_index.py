@@ -0,0 +1,273 @@
+"""
+Player name index and entity resolution.
+
+Questions name players the way people say them ("Patrick Mahomes", "Josh
+Allen"), but nflfastR stores abbreviated names ('P.Mahomes') in
+passer_player_name / rusher_player_name / receiver_player_name, so generated
+SQL tends to fall back to LIKE '%Mahomes%' scans of the whole play table.
+util/build_player_index.py extracts every passer, rusher and receiver from
+the database into a dictionary next to it (data/pbp_db.players.json):
+
+    player_id -> {name, names, seasons: {season: {teams, passer, rusher, receiver}}}
+
+PlayerIndex keeps the names in a character trie keyed like the stored names
+('pmahomes', first initial + surname) plus a surname trie, and finds the
+players a question mentions by exact key, surname or, for capitalized names,
+edit distance (typos like "Mahommes"). install_player_index() adds the
+resolved ids to the question before LLM SQL generation, so the SQL can filter
+on the indexed *_player_id columns with = instead of matching names.
+"""
+
+import os
+import re
+import json
+import threading
+
+from nfl_terms import TEAMS
+from tracing import span
+
+PLAYER_INDEX_SUFFIX = '.players.json'
+ROLES = ('passer', 'rusher', 'receiver')
+ID_COLUMNS = [f'{role}_player_id' for role in ROLES]
+MAX_CANDIDATES = 3
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z'-]*")
+_SEASON = re.compile(r'\b((?:19|20)\d{2})\b')
+# Capitalized words that start questions or name teams, never players
+_NOT_NAMES = ({'what', 'which', 'who', 'how', 'when', 'where', 'why', 'did', 'does', 'is', 'was',
+               'the', 'in', 'of', 'for', 'and', 'vs', 'nfl', 'afc', 'nfc', 'super', 'bowl', 'week'}
+              | {word.lower() for city, nickname in TEAMS.values() for word in f"{city} {nickname}".split()})
+
+
+def name_key(name: str) -> str:
+    """'P.Mahomes' / 'A.St. Brown' -> 'pmahomes' / 'astbrown', like sql_templates.NAME_KEY_SQL."""
+    return re.sub(r"[.\s']", '', name.lower())
+
+
+def spoken_key(tokens):
+    """['Patrick', 'Mahomes'] / ['C', 'J', 'Stroud'] -> 'pmahomes' / 'cstroud'."""
+    tokens = [token.lower().replace("'", '') for token in tokens]
+    rest = tokens[1:]
+    # Initials after the first one ("C.J.", "A.J.") aren't part of the stored name
+    while len(rest) > 1 and len(rest[0]) == 1:
+        rest = rest[1:]
+    return tokens[0][0] + ''.join(rest) if rest else None
+
+
+def surname_key(name: str) -> str:
+    """Surname part of a stored name: 'P.Mahomes' -> 'mahomes'."""
+    return name_key(name.split('.', 1)[1] if '.' in name else name.split()[-1])
+
+
+class _Node:
+    __slots__ = ('children', 'values')
+
+    def __init__(self):
+        self.children = {}
+        self.values = []
+
+
+class NameTrie:
+    """Character trie over name keys with exact, prefix and edit-distance lookup."""
+
+    def __init__(self):
+        self.root = _Node()
+        self.size = 0
+
+    def insert(self, key: str, value):
+        node = self.root
+        for char in key:
+            node = node.children.setdefault(char, _Node())
+        if value not in node.values:
+            node.values.append(value)
+            self.size += 1
+
+    def get(self, key: str):
+        node = self.root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return list(node.values)
+
+    def complete(self, prefix: str, limit: int = 10):
+        """[(key, values)] for keys starting with prefix, shortest first."""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        found, level = [], [(prefix, node)]
+        while level and len(found) < limit:
+            next_level = []
+            for key, current in level:
+                if current.values:
+                    found.append((key, list(current.values)))
+                next_level.extend((key + char, child) for char, child in sorted(current.children.items()))
+            level = next_level
+        return found[:limit]
+
+    def fuzzy(self, key: str, max_distance: int = 1):
+        """[(distance, key, values)] within max_distance edits, closest first.
+
+        Walks the trie with one Levenshtein row per node and prunes branches
+        whose best cell already exceeds max_distance.
+        """
+        results = []
+        first_row = list(range(len(key) + 1))
+        for char, child in self.root.children.items():
+            self._search(child, char, char, key, first_row, max_distance, results)
+        return sorted(results, key=lambda result: (result[0], result[1]))
+
+    def _search(self, node, char, prefix, key, previous_row, max_distance, results):
+        row = [previous_row[0] + 1]
+        for column in range(1, len(key) + 1):
+            row.append(min(row[column - 1] + 1, previous_row[column] + 1,
+                           previous_row[column - 1] + (key[column - 1] != char)))
+        if row[-1] <= max_distance and node.values:
+            results.append((row[-1], prefix, list(node.values)))
+        if min(row) <= max_distance:
+            for next_char, child in node.children.items():
+                self._search(child, next_char, prefix + next_char, key, row, max_distance, results)
+
+
+class PlayerIndex:
+    """Players from the play table, looked up by the names questions use."""
+
+    def __init__(self, players: dict):
+        self.players = players
+        self.names = NameTrie()
+        self.surnames = NameTrie()
+        for player_id, player in players.items():
+            for name in player['names']:
+                self.names.insert(name_key(name), player_id)
+                self.surnames.insert(surname_key(name), player_id)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path) as f:
+            return cls(json.load(f)['players'])
+
+    def plays(self, player_id: str, seasons=None) -> int:
+        return sum(count for season, entry in self.players[player_id]['seasons'].items()
+                   if not seasons or int(season) in seasons
+                   for role, count in entry.items() if role in ROLES)
+
+    def rank(self, player_ids, seasons=None):
+        """Players active in the given seasons first, then by plays."""
+        return sorted(set(player_ids), key=lambda player_id: (-self.plays(player_id, seasons),
+                                                              -self.plays(player_id), player_id))
+
+    def candidates(self, key: str, seasons=None, fuzzy: bool = False, trie: NameTrie = None):
+        """Player ids for a name key (exact, else within one edit if fuzzy)."""
+        trie = trie or self.names
+        found = trie.get(key)
+        # Short keys are one edit away from too many other names
+        if not found and fuzzy and len(key) >= 7:
+            # The first character is an initial in name keys, so it has to match
+            matches = [match for match in trie.fuzzy(key, 1) if trie is self.surnames or match[1][0] == key[0]]
+            found = [player_id for _, _, values in matches for player_id in values]
+        if seasons:
+            active = [player_id for player_id in found if self.plays(player_id, seasons)]
+            found = active or found
+        return self.rank(found, seasons)
+
+    def resolve(self, question: str):
+        """[(mention, [player ids])] for the players a question names."""
+        seasons = {int(year) for year in _SEASON.findall(question)}
+        words = [(match.group(), match.group()[0].isupper()) for match in _WORD.finditer(question.replace('.', ' '))]
+        resolved, position = [], 0
+        while position < len(words):
+            for width in (4, 3, 2):
+                span_words = words[position:position + width]
+                if len(span_words) < width or span_words[-1][0].lower() in _NOT_NAMES:
+                    continue
+                key = spoken_key([word for word, _ in span_words])
+                capitalized = all(upper for _, upper in span_words)
+                found = key and self.candidates(key, seasons, fuzzy=capitalized)
+                if found:
+                    resolved.append((' '.join(word for word, _ in span_words), found))
+                    position += width
+                    break
+            else:
+                word, upper = words[position]
+                # A bare surname only counts when it is capitalized ("Kelce")
+                if upper and word.lower() not in _NOT_NAMES:
+                    found = self.candidates(name_key(word), seasons, fuzzy=True, trie=self.surnames)
+                    if found:
+                        resolved.append((word, found))
+                position += 1
+        return resolved
+
+    def describe(self, player_id: str) -> str:
+        """"P.Mahomes = '00-0033873' (passer; KC 2017-2024)"."""
+        player = self.players[player_id]
+        spans, totals = {}, dict.fromkeys(ROLES, 0)
+        for season, entry in sorted(player['seasons'].items()):
+            for team in entry['teams']:
+                first, _ = spans.get(team, (int(season), None))
+                spans[team] = (first, int(season))
+            for role in ROLES:
+                totals[role] += entry.get(role, 0)
+        roles = '/'.join(role for role in sorted(ROLES, key=lambda role: -totals[role]) if totals[role])
+        teams = ', '.join(f"{team} {first}" + (f"-{last}" if last != first else '')
+                          for team, (first, last) in sorted(spans.items(), key=lambda item: item[1]))
+        return f"{player['name']} = '{player_id}' ({roles}; {teams})"
+
+    def hints(self, question: str) -> str:
+        """Prompt lines with the player ids a question refers to, or ''."""
+        lines = []
+        for mention, player_ids in self.resolve(question):
+            shown = '; '.join(self.describe(player_id) for player_id in player_ids[:MAX_CANDIDATES])
+            lines.append(f"- {mention}{' (ambiguous)' if len(player_ids) > 1 else ''}: {shown}")
+        if not lines:
+            return ''
+        return ("Player ids for the players named above (filter on "
+                f"{', '.join(ID_COLUMNS)} with = and these ids, not LIKE on names):\n" + "\n".join(lines))
+
+
+def player_index_path(db_path: str = None) -> str:
+    """Path of the player dictionary built for a database."""
+    return (db_path or os.getenv('DB_PATH', 'data/pbp_db')) + PLAYER_INDEX_SUFFIX
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_player_index(db_path: str = None):
+    """The database's PlayerIndex (reloaded when rebuilt), or None if it hasn't been built."""
+    path = player_index_path(db_path)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    with _indexes_lock:
+        loaded = _indexes.get(path)
+        if loaded is None or loaded[0] != mtime:
+            try:
+                loaded = (mtime, PlayerIndex.load(path))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Player index {path} unreadable: {e}")
+                loaded = (mtime, None)
+            _indexes[path] = loaded
+        return loaded[1]
+
+
+def install_player_index(agent, db_path: str = None):
+    """Resolve player names before an NFLStatAgent instance's LLM SQL generation."""
+    generate = agent._run_database_query
+
+    def _run_database_query(question, *args, **kwargs):
+        index = get_player_index(db_path)
+        if index is not None:
+            with span('player_resolution') as resolution_span:
+                hints = index.hints(question)
+                resolution_span.set(resolved=hints.count('\n- '))
+            if hints:
+                print(f"🔎 {hints}")
+                question = f"{question}\n\n{hints}"
+        return generate(question, *args, **kwargs)
+
+    agent._run_database_query = _run_database_query
+    return agent
@@ -0,0 +1,127 @@
+"""
+Stage progress events for the hybrid query flow.
+
+run_query_hybrid reports each stage it completes (keyword screen, classifier,
+SQL generated, SQL executed, web results fetched, scoring) to an optional
+callback. Code running inside a branch (the template fast path, the query
+cache) reports through report(), which finds the callback of the query being
+answered on the current thread.
+
+Streamlit elements can only be updated from the script thread, so the UI uses
+QueryProgress: it runs the query on a worker thread and yields the events on
+the caller's thread as they happen.
+"""
+
+import queue
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import NamedTuple
+
+# Stage -> (progress percent, label)
+STAGES = {
+    'keyword_screen': (10, "Keyword screen"),
+    'classifier': (25, "Classifier"),
+    'sql_generated': (45, "SQL generated"),
+    'sql_executed': (65, "SQL executed"),
+    'web_results': (80, "Web results fetched"),
+    'scoring': (95, "Scoring done"),
+    'done': (100, "Done"),
+}
+
+
+class ProgressEvent(NamedTuple):
+    stage: str
+    percent: int
+    label: str
+    detail: str = ''
+
+
+class ProgressReporter:
+    """Turns stage names into events for one query; percent never goes backwards."""
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.seen = set()
+        self._percent = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, stage: str, detail: str = ''):
+        percent, label = STAGES[stage]
+        with self._lock:
+            self.seen.add(stage)
+            self._percent = max(self._percent, percent)
+            event = ProgressEvent(stage, self._percent, label, detail)
+        if self.callback is not None:
+            self.callback(event)
+
+
+_local = threading.local()
+
+
+@contextmanager
+def reporting(reporter):
+    """Route report() calls on this thread to reporter for the duration."""
+    previous = getattr(_local, 'reporter', None)
+    _local.reporter = reporter
+    try:
+        yield reporter
+    finally:
+        _local.reporter = previous
+
+
+def report(stage: str, detail: str = ''):
+    """Report a stage for the query running on this thread, if anyone is listening."""
+    reporter = getattr(_local, 'reporter', None)
+    if reporter is not None:
+        reporter(stage, detail)
+
+
+class QueryProgress:
+    """Run func(*args, on_progress=..., **kwargs) on a worker thread.
+
+    The worker runs in a copy of the context the QueryProgress was created in,
+    so a trace or request log active there follows the query. Iterating yields ProgressEvent objects on the caller's thread until the
+    call finishes; afterwards .result holds its return value (exceptions are
+    re-raised).
+
+        progress = QueryProgress(run_query_hybrid, query)
+        for event in progress:
+            bar.progress(event.percent, text=event.label)
+        answer, error, reasoning = progress.result
+    """
+
+    _DONE = object()
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self._context = contextvars.copy_context()
+        self._result = None
+        self._error = None
+
+    def _run(self, events):
+        try:
+            self._result = self.func(*self.args, on_progress=events.put, **self.kwargs)
+        except BaseException as e:
+            self._error = e
+        finally:
+            events.put(self._DONE)
+
+    def __iter__(self):
+        events = queue.Queue()
+        worker = threading.Thread(target=self._context.run, args=(self._run, events), daemon=True)
+        worker.start()
+        while True:
+            event = events.get()
+            if event is self._DONE:
+                break
+            yield event
+        worker.join()
+
+    @property
+    def result(self):
+        if self._error is not None:
+            raise self._error
+        return self._result
@@ -0,0 +1,216 @@
+"""
+Persistent question -> SQL -> result cache.
+
+Two namespaces live in one small SQLite file:
+
+  question  normalized question text -> (answer, error) from _run_database_query
+  sql       normalized SQL text      -> (columns, rows) from query execution
+
+Every entry is stamped with the version of the play-by-play database it was
+computed from (the file's size and mtime plus the data-version marker that
+util/ingest_pbp.py bumps), so rebuilding or refreshing data/pbp_db
+invalidates the cache without any manual step. Entries also expire after a TTL and the least
+recently used ones are evicted once the cache grows past its entry limit.
+
+Settings come from the environment:
+    QUERY_CACHE_PATH         cache file (default .cache/query_cache.db)
+    QUERY_CACHE_TTL          seconds an entry stays valid (default 86400)
+    QUERY_CACHE_MAX_ENTRIES  entries kept before LRU eviction (default 5000)
+    QUERY_CACHE_DISABLED     set to 1 to bypass the cache entirely
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+import functools
+
+from db_pool import execute_query, database_version
+from tracing import span
+
+DEFAULT_CACHE_PATH = '.cache/query_cache.db'
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 5000
+
+QUESTION_NAMESPACE = 'question'
+SQL_NAMESPACE = 'sql'
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so rephrasings that
+    differ only in case or punctuation share a cache entry.
+
+    Comparison operators and number qualifiers (<, >, =, +, #) change what is
+    asked ("rating > 100" vs "< 100", "10+ wins", "#1") and are kept;
+    comparisons are spaced out so "rating>100" and "rating > 100" match.
+    """
+    text = re.sub(r"[^\w\s%.+#<>=-]", " ", question.lower())
+    text = re.sub(r"(?<!\d)\.|\.(?!\d)", " ", text)
+    text = re.sub(r"[<>=]+", r" \g<0> ", text)
+    return " ".join(text.split())
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and trailing semicolons; keep case (literals matter)."""
+    return " ".join(sql.split()).rstrip(";").strip()
+
+
+class QueryCache:
+    """On-disk LRU/TTL cache keyed by namespace and normalized text."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, db_path: str = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT,
+                key TEXT,
+                value TEXT,
+                db_version TEXT,
+                created_at REAL,
+                last_access REAL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache_entries(last_access)"
+        )
+        self._conn.commit()
+
+    def get(self, namespace: str, key: str):
+        """Return the cached value, or None on a miss, expiry or stale database."""
+        now = time.time()
+        version = database_version(self.db_path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, db_version, created_at FROM cache_entries "
+                "WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, entry_version, created_at = row
+            if entry_version != version or now - created_at > self.ttl:
+                self._conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key)
+                )
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(value)
+
+    def put(self, namespace: str, key: str, value):
+        """Store a JSON-serializable value and evict least recently used entries."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), database_version(self.db_path), now, now)
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM cache_entries WHERE rowid IN ("
+                    "SELECT rowid FROM cache_entries ORDER BY last_access LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def cache_enabled() -> bool:
+    return os.getenv('QUERY_CACHE_DISABLED', '').strip().lower() not in ('1', 'true', 'yes', 'on')
+
+
+def get_query_cache() -> QueryCache:
+    """Return the process-wide cache configured from the environment."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryCache(
+                path=os.getenv('QUERY_CACHE_PATH', DEFAULT_CACHE_PATH),
+                ttl=float(os.getenv('QUERY_CACHE_TTL', DEFAULT_TTL)),
+                max_entries=int(os.getenv('QUERY_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)),
+            )
+        return _cache
+
+
+def cached_database_query(func):
+    """Wrap a _run_database_query(question) -> (answer, error) callable.
+
+    Only successful answers are stored, so transient LLM or database errors
+    are retried on the next request.
+    """
+    @functools.wraps(func)
+    def wrapper(question, *args, **kwargs):
+        if not cache_enabled():
+            return func(question, *args, **kwargs)
+        cache = get_query_cache()
+        key = normalize_question(question)
+        cached = cache.get(QUESTION_NAMESPACE, key)
+        if cached is not None:
+            print(f"💾 Query cache hit for question: {key}")
+            return cached[0], cached[1]
+        answer, error = func(question, *args, **kwargs)
+        if answer and not error:
+            cache.put(QUESTION_NAMESPACE, key, [answer, error])
+        return answer, error
+    return wrapper
+
+
+def cached_execute_query(sql: str, params=(), db_path: str = None):
+    """db_pool.execute_query with results cached by normalized SQL text."""
+    if not cache_enabled():
+        return execute_query(sql, params, db_path)
+    cache = get_query_cache()
+    key = normalize_sql(sql)
+    if params:
+        key += " -- " + json.dumps(list(params))
+    cached = cache.get(SQL_NAMESPACE, key)
+    if cached is not None:
+        with span('sql', sql=sql, rows=len(cached['rows']), cached=True):
+            return cached['columns'], [tuple(row) for row in cached['rows']]
+    columns, rows = execute_query(sql, params, db_path)
+    cache.put(SQL_NAMESPACE, key, {'columns': columns, 'rows': [list(row) for row in rows]})
+    return columns, rows
+
+
+def install_query_cache(agent):
+    """Route an NFLStatAgent instance's _run_database_query through the cache."""
+    agent._run_database_query = cached_database_query(agent._run_database_query)
+    return agent
@@ -0,0 +1,458 @@
+"""
+Schema context for SQL generation, full or pruned to the question.
+
+The full context is the nflfastR_pbp schema text, the rollup table schema and
+the 200+ entries of schema/field_descriptions.json. Sending all of it with
+every SQL prompt makes prompt tokens the dominant cost, so this module also
+keeps a BM25 index over column names, descriptions and example queries
+(built offline by util/build_schema_index.py) and assembles a context with
+only the columns and examples relevant to a question.
+
+The build also stores the assembled full context in schema/schema_index.json,
+with a hash of the schema files it was built from, so a starting worker reads
+one JSON file instead of parsing the schema text and field descriptions. An
+index whose hash no longer matches the files is ignored and both are built
+from the files in memory.
+
+install_schema_pruning() puts the pruned context into an NFLStatAgent
+instance's SQL prompts: its SQL LLM is wrapped so a prompt that embeds the
+full schema context (matched regardless of whitespace and indentation) gets
+the context pruned to the question being answered instead. Prompts without
+it, and questions the index can't serve, are sent unchanged with the full
+context; each SQL prompt's outcome is traced and printed to the debug log.
+
+Settings come from the environment:
+    SCHEMA_PRUNING  send pruned schema context in SQL prompts (default on)
+    SCHEMA_TOP_K    columns kept in a pruned context (default 40)
+"""
+
+import os
+import re
+import json
+import math
+import hashlib
+import contextvars
+
+from tracing import span
+
+SCHEMA_DIR = 'schema'
+PBP_SCHEMA_FILE = os.path.join(SCHEMA_DIR, 'schema_nflfastR_pbp.txt')
+ROLLUP_SCHEMA_FILE = os.path.join(SCHEMA_DIR, 'schema_rollups.txt')
+FIELD_DESCRIPTIONS_FILE = os.path.join(SCHEMA_DIR, 'field_descriptions.json')
+INDEX_FILE = os.path.join(SCHEMA_DIR, 'schema_index.json')
+
+DEFAULT_TOP_K = int(os.getenv('SCHEMA_TOP_K', 40))
+SCHEMA_PRUNING = os.getenv('SCHEMA_PRUNING', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+DEFAULT_TOP_EXAMPLES = 2
+
+# Columns nearly every generated query needs, included regardless of score
+CORE_COLUMNS = [
+    'game_id', 'season', 'season_type', 'week', 'home_team', 'away_team',
+    'posteam', 'defteam', 'play_type',
+]
+
+FIELD_LINE = re.compile(r'^([a-zA-Z_][a-zA-Z0-9_]*):\s*(.*)$')
+
+# Question words that map onto schema vocabulary
+SYNONYMS = {
+    'rushers': ['rusher', 'rushing', 'run'],
+    'rusher': ['rushing', 'run'],
+    'rb': ['rusher', 'rushing'],
+    'quarterback': ['passer', 'passing', 'pass'],
+    'quarterbacks': ['passer', 'passing', 'pass'],
+    'qb': ['passer', 'passing', 'pass'],
+    'receivers': ['receiver', 'receiving'],
+    'wr': ['receiver', 'receiving'],
+    'red': ['yardline_100'],
+    'zone': ['yardline_100'],
+    'spread': ['spread_line', 'result'],
+    'covered': ['spread_line', 'result'],
+    'wins': ['total_home_score', 'total_away_score', 'result'],
+    'points': ['score', 'total_home_score', 'total_away_score'],
+    'scored': ['score', 'total_home_score', 'total_away_score'],
+    'td': ['touchdown'],
+    'tds': ['touchdown'],
+    'touchdowns': ['touchdown'],
+    'interceptions': ['interception'],
+    'sacks': ['sack'],
+    'clutch': ['wpa', 'qtr', 'game_seconds_remaining'],
+    'minutes': ['game_seconds_remaining', 'half_seconds_remaining'],
+    'quarter': ['qtr'],
+    'playoffs': ['season_type'],
+    'road': ['away_team'],
+    'home': ['home_team'],
+}
+
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'by', 'did', 'do', 'for', 'from', 'had', 'has',
+    'have', 'how', 'in', 'is', 'it', 'me', 'most', 'of', 'on', 'or', 'show', 'the', 'their',
+    'to', 'was', 'were', 'what', 'which', 'who', 'with',
+}
+
+
+def tokenize(text: str):
+    """Lowercase word tokens; snake_case names are split and kept whole."""
+    tokens = []
+    for word in re.findall(r'[a-z0-9_]+', text.lower()):
+        if word in STOPWORDS:
+            continue
+        tokens.append(word)
+        if '_' in word:
+            tokens.extend(part for part in word.split('_') if part)
+    return [token[:-1] if len(token) > 4 and token.endswith('s') and '_' not in token else token
+            for token in tokens]
+
+
+def _unwrap(value):
+    # jsonlite writes length-one vectors as one-element arrays
+    if isinstance(value, list):
+        return ' '.join(str(item) for item in value)
+    return '' if value is None else str(value)
+
+
+def load_field_descriptions(path: str = FIELD_DESCRIPTIONS_FILE) -> dict:
+    """Return {field: (description, data_type)} from field_descriptions.json."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        raw = json.load(f)
+    return {name: (_unwrap(info.get('description')), _unwrap(info.get('data_type')))
+            for name, info in raw.items()}
+
+
+def parse_schema_text(path: str):
+    """Split a schema text file into tables, field lines, example queries and notes.
+
+    Returns:
+        (tables, fields, examples, notes) where tables maps table name -> its
+        block of column lines, fields maps column name -> type and the other
+        two are lists of text blocks
+    """
+    tables, fields, examples, notes = {}, {}, [], []
+    if not os.path.exists(path):
+        return tables, fields, examples, notes
+    with open(path) as f:
+        blocks = f.read().split('\n\n')
+    for block in blocks:
+        other_lines = []
+        table = None
+        for line in block.splitlines():
+            if line.startswith('Table:'):
+                table = line.split(':', 1)[1].strip()
+                continue
+            match = FIELD_LINE.match(line.strip())
+            if match and ' ' not in match.group(2).strip():
+                fields[match.group(1)] = match.group(2).strip()
+            else:
+                other_lines.append(line)
+        if table:
+            tables[table] = block.strip()
+        text = '\n'.join(other_lines).strip()
+        text = re.sub(r'^Example queries:\s*', '', text)
+        if not text:
+            continue
+        if re.search(r'\bSELECT\b', text, re.IGNORECASE):
+            examples.append(text)
+        else:
+            notes.append(text)
+    return tables, fields, examples, notes
+
+
+def source_fingerprint() -> str:
+    """Hash of the schema files the context and index are built from."""
+    digest = hashlib.sha256()
+    for path in (PBP_SCHEMA_FILE, ROLLUP_SCHEMA_FILE, FIELD_DESCRIPTIONS_FILE):
+        digest.update(path.encode())
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+_precompiled = {}
+
+
+def load_precompiled(path: str = INDEX_FILE):
+    """The prebuilt index if it was built from the current schema files, else None."""
+    if path not in _precompiled:
+        index = None
+        if os.path.exists(path):
+            with open(path) as f:
+                index = json.load(f)
+            if index.get('sources') != source_fingerprint():
+                print(f"⚠️ {path} is out of date with the schema files, building the schema "
+                      f"context in memory (re-run python -m util.build_schema_index)")
+                index = None
+        _precompiled[path] = index
+    return _precompiled[path]
+
+
+def load_full_schema_context() -> str:
+    """The unpruned context: schema files plus every field description."""
+    index = load_precompiled()
+    if index is not None and 'full_context' in index:
+        return index['full_context']
+    return build_full_schema_context()
+
+
+def build_full_schema_context() -> str:
+    """Assemble the unpruned context from the schema files."""
+    parts = []
+    for path in (PBP_SCHEMA_FILE, ROLLUP_SCHEMA_FILE):
+        if os.path.exists(path):
+            with open(path) as f:
+                parts.append(f.read().strip())
+    descriptions = load_field_descriptions()
+    if descriptions:
+        lines = ['Field descriptions (nflfastR_pbp):']
+        lines.extend(f"- {name} ({dtype}): {description}"
+                     for name, (description, dtype) in descriptions.items())
+        parts.append('\n'.join(lines))
+    return '\n\n'.join(parts)
+
+
+def build_index() -> dict:
+    """Build the BM25 index over columns and example queries from the schema files,
+    with the full context and the hash of the files it was built from."""
+    _, fields, examples, notes = parse_schema_text(PBP_SCHEMA_FILE)
+    rollup_tables, _, rollup_examples, rollup_notes = parse_schema_text(ROLLUP_SCHEMA_FILE)
+    descriptions = load_field_descriptions()
+    for name, (_, dtype) in descriptions.items():
+        fields.setdefault(name, dtype)
+
+    documents = []
+    for name, dtype in fields.items():
+        description = descriptions.get(name, ('', dtype))[0]
+        documents.append({
+            'kind': 'column',
+            'name': name,
+            'text': f"- {name} ({dtype}): {description}".rstrip(': '),
+            'tokens': tokenize(f"{name} {name} {description}"),
+        })
+    for table, block in rollup_tables.items():
+        documents.append({
+            'kind': 'table',
+            'name': table,
+            'text': block,
+            'tokens': tokenize(block),
+        })
+    for i, example in enumerate(examples + rollup_examples):
+        documents.append({
+            'kind': 'example',
+            'name': f'example_{i}',
+            'text': example,
+            'tokens': tokenize(example),
+        })
+
+    document_frequency = {}
+    for document in documents:
+        for token in set(document['tokens']):
+            document_frequency[token] = document_frequency.get(token, 0) + 1
+    lengths = [len(document['tokens']) for document in documents]
+    return {
+        'documents': documents,
+        'document_frequency': document_frequency,
+        'average_length': sum(lengths) / len(lengths) if lengths else 0.0,
+        'notes': notes + rollup_notes,
+        'full_context': build_full_schema_context(),
+        'sources': source_fingerprint(),
+    }
+
+
+class SchemaIndex:
+    """BM25 retrieval over schema documents."""
+
+    def __init__(self, index: dict, k1: float = 1.2, b: float = 0.75):
+        self.documents = index['documents']
+        self.document_frequency = index['document_frequency']
+        self.average_length = index['average_length'] or 1.0
+        self.notes = index.get('notes', [])
+        self.k1 = k1
+        self.b = b
+        self._term_counts = []
+        for document in self.documents:
+            counts = {}
+            for token in document['tokens']:
+                counts[token] = counts.get(token, 0) + 1
+            self._term_counts.append(counts)
+
+    @classmethod
+    def load(cls, path: str = INDEX_FILE):
+        """Load the prebuilt index, or build it in memory if it is missing or stale."""
+        return cls(load_precompiled(path) or build_index())
+
+    def _query_tokens(self, question: str):
+        tokens = tokenize(question)
+        expanded = list(tokens)
+        for token in tokens:
+            expanded.extend(SYNONYMS.get(token, []))
+            expanded.extend(SYNONYMS.get(token + 's', []))
+        return expanded
+
+    def score(self, question: str):
+        """Return [(score, document)] for every document, best first."""
+        n = len(self.documents)
+        tokens = self._query_tokens(question)
+        results = []
+        for document, counts in zip(self.documents, self._term_counts):
+            length = len(document['tokens'])
+            total = 0.0
+            for token in tokens:
+                frequency = counts.get(token)
+                if not frequency:
+                    continue
+                df = self.document_frequency.get(token, 0)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                norm = frequency + self.k1 * (1 - self.b + self.b * length / self.average_length)
+                total += idf * frequency * (self.k1 + 1) / norm
+            results.append((total, document))
+        results.sort(key=lambda item: -item[0])
+        return results
+
+    def pruned_context(self, question: str, top_k: int = DEFAULT_TOP_K,
+                       top_examples: int = DEFAULT_TOP_EXAMPLES, top_tables: int = 2) -> str:
+        """Context with core columns, the top_k relevant columns, rollup tables and examples."""
+        scored = self.score(question)
+        by_name = {document['name']: document for document in self.documents}
+        columns = [by_name[name] for name in CORE_COLUMNS if name in by_name]
+        chosen = {document['name'] for document in columns}
+        examples, tables = [], []
+        for score, document in scored:
+            if score <= 0:
+                break
+            if document['kind'] == 'column' and document['name'] not in chosen and len(chosen) < top_k:
+                columns.append(document)
+                chosen.add(document['name'])
+            elif document['kind'] == 'example' and len(examples) < top_examples:
+                examples.append(document)
+            elif document['kind'] == 'table' and len(tables) < top_tables:
+                tables.append(document)
+        parts = ['Table: nflfastR_pbp (one row per play). Relevant columns:']
+        parts.extend(document['text'] for document in columns)
+        if tables:
+            parts.append('\nPre-aggregated tables (prefer these when they cover the question):')
+            parts.extend(document['text'] for document in tables)
+        if self.notes:
+            parts.append('\nImportant notes:')
+            parts.extend(self.notes)
+        if examples:
+            parts.append('\nExample queries:')
+            parts.extend(document['text'] for document in examples)
+        return '\n'.join(parts)
+
+
+_index = None
+
+
+def get_schema_index() -> SchemaIndex:
+    global _index
+    if _index is None:
+        _index = SchemaIndex.load()
+    return _index
+
+
+def build_pruned_schema_context(question: str, top_k: int = DEFAULT_TOP_K) -> str:
+    """Schema context for a SQL prompt, restricted to what the question needs."""
+    return get_schema_index().pruned_context(question, top_k)
+
+
+# Question the current thread is generating SQL for
+_current_question = contextvars.ContextVar('schema_question', default=None)
+_full_contexts = None
+
+
+def _load_full_contexts():
+    """[(text, pattern)] for each full context; the pattern matches the text
+    however the prompt re-wraps or indents its whitespace."""
+    global _full_contexts
+    if _full_contexts is None:
+        contexts = [load_full_schema_context()]
+        path = os.getenv('SCHEMA_FILE', 'schema_context.txt')
+        if os.path.exists(path):
+            with open(path) as f:
+                contexts.append(f.read().strip())
+        _full_contexts = [(context, re.compile(r'\s+'.join(re.escape(token) for token in context.split())))
+                          for context in contexts if context.strip()]
+    return _full_contexts
+
+
+def full_schema_contexts():
+    """Full schema context texts a SQL prompt may embed: this module's and the
+    agent's SCHEMA_FILE, if it exists."""
+    return [context for context, _ in _load_full_contexts()]
+
+
+def prune_prompt(prompt, question: str):
+    """prompt with its embedded full schema context replaced by the context
+    pruned to question, or prompt unchanged when there is nothing to replace.
+
+    Whether it was pruned (and if not, why) is recorded on a schema_pruning
+    span and printed to the debug log.
+    """
+    if not isinstance(prompt, str) or not question:
+        return prompt
+    with span('schema_pruning') as pruning_span:
+        for _, pattern in _load_full_contexts():
+            match = pattern.search(prompt)
+            if match is not None:
+                break
+        else:
+            # A truncated or reformatted schema can't be swapped safely
+            pruning_span.set(pruned=False, reason='no full schema context in prompt')
+            print(f"📐 Schema pruning skipped: prompt ({len(prompt):,} chars) has no full schema context")
+            return prompt
+        index = get_schema_index()
+        if not index.documents:
+            pruning_span.set(pruned=False, reason='empty index')
+            print("📐 Schema pruning skipped: the schema index is empty")
+            return prompt
+        pruned = index.pruned_context(question)
+        full_chars = match.end() - match.start()
+        pruning_span.set(pruned=True, full_chars=full_chars, pruned_chars=len(pruned))
+    print(f"📐 Schema context pruned: {full_chars:,} -> {len(pruned):,} chars")
+    return prompt[:match.start()] + pruned + prompt[match.end():]
+
+
+class PrunedSchemaLLM:
+    """Sends the wrapped SQL LLM prompts with the schema context pruned to the question."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, attribute):
+        return getattr(self._client, attribute)
+
+    def invoke(self, prompt, **kwargs):
+        return self._client.invoke(prune_prompt(prompt, _current_question.get()), **kwargs)
+
+    def stream(self, prompt, **kwargs):
+        return self._client.stream(prune_prompt(prompt, _current_question.get()), **kwargs)
+
+    def predict(self, text, **kwargs):
+        return self.invoke(text, **kwargs)
+
+    def __call__(self, prompt, **kwargs):
+        return self.invoke(prompt, **kwargs)
+
+
+def install_schema_pruning(agent, enabled: bool = None):
+    """Prune the schema context in an NFLStatAgent instance's SQL prompts to the question."""
+    if not (SCHEMA_PRUNING if enabled is None else enabled):
+        return agent
+    client = getattr(agent, '_llm', None)
+    if client is None or isinstance(client, PrunedSchemaLLM):
+        return agent
+    agent._llm = PrunedSchemaLLM(client)
+    generate = agent._run_database_query
+
+    def _run_database_query(question, *args, **kwargs):
+        token = _current_question.set(question)
+        try:
+            return generate(question, *args, **kwargs)
+        finally:
+            _current_question.reset(token)
+
+    agent._run_database_query = _run_database_query
+    return agent
@@ -0,0 +1,153 @@
+"""
+In-flight request coalescing ("single flight").
+
+On game days many users ask the same question within seconds, and each
+request would otherwise run its own classifier call, SQL generation, database
+scan, web search and scoring. SingleFlight lets the first request for a key do
+the work while identical requests arriving before it finishes wait for, and
+share, its result. Followers also receive the leader's progress events
+(including those published before they joined) so their progress bars move
+with it.
+
+A streamed answer can only be iterated once, so a shared stream is wrapped in
+SharedStream: each caller iterates its own view and the chunks are pulled
+from the underlying iterator once.
+"""
+
+import threading
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+        self.events = []
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    def publish(self, event):
+        with self.lock:
+            self.events.append(event)
+            subscribers = list(self.subscribers)
+        for callback in subscribers:
+            callback(event)
+
+    def subscribe(self, callback):
+        with self.lock:
+            history = list(self.events)
+            self.subscribers.append(callback)
+        for event in history:
+            callback(event)
+
+
+class SingleFlight:
+    """Runs func once per key among concurrent callers and shares the result."""
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, func, on_event=None):
+        """Return (func(publish), coalesced).
+
+        The leader calls func with a publish(event) callback; every caller's
+        on_event receives what is published. Followers block until the leader
+        finishes and get its result, or its exception re-raised.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.leaders += 1
+            else:
+                flight.followers += 1
+                self.coalesced += 1
+        if on_event is not None:
+            flight.subscribe(on_event)
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = func(flight.publish)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.leaders + self.coalesced
+            return {
+                'requests': requests,
+                'executed': self.leaders,
+                'coalesced': self.coalesced,
+                'coalesced_rate': self.coalesced / requests if requests else 0.0,
+                'in_flight': len(self._flights),
+            }
+
+
+class SharedStream:
+    """Replayable view of an iterator for several consumers, each reading from
+    the start; the underlying iterator is advanced once per chunk."""
+
+    def __init__(self, chunks):
+        self._source = iter(chunks)
+        self._chunks = []
+        self._finished = False
+        self._pulling = False
+        self._cond = threading.Condition()
+
+    def _chunk(self, index: int):
+        """(True, chunk) for chunk number index, or (False, None) past the end."""
+        while True:
+            with self._cond:
+                while index >= len(self._chunks) and not self._finished and self._pulling:
+                    self._cond.wait()
+                if index < len(self._chunks):
+                    return True, self._chunks[index]
+                if self._finished:
+                    return False, None
+                self._pulling = True
+            # Pull outside the lock so consumers behind us keep replaying
+            try:
+                chunk, finished = next(self._source), False
+            except StopIteration:
+                chunk, finished = None, True
+            except BaseException:
+                with self._cond:
+                    self._finished, self._pulling = True, False
+                    self._cond.notify_all()
+                raise
+            with self._cond:
+                if finished:
+                    self._finished = True
+                else:
+                    self._chunks.append(chunk)
+                self._pulling = False
+                self._cond.notify_all()
+
+    def __iter__(self):
+        index = 0
+        while True:
+            available, chunk = self._chunk(index)
+            if not available:
+                return
+            yield chunk
+            index += 1
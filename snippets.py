@@ -0,0 +1,146 @@
+"""
+Snippet ranking and compression before web answer synthesis.
+
+Web answers are synthesized by Llama-3-70B, whose latency grows with prompt
+length, and raw search snippets are long, repetitive and partly boilerplate
+("Sign up for our newsletter", cookie notices). Before synthesis this module:
+
+  1. strips boilerplate and repeated sentences from each snippet,
+  2. scores each snippet against the question by lexical overlap and by the
+     NFL entities (teams, players, football terms from keyword_screen.py) it
+     shares with the question,
+  3. drops near-duplicates of a higher-ranked snippet (word shingle overlap),
+  4. keeps the best snippets, in rank order, up to a token budget, cutting the
+     last one at a sentence or word boundary.
+
+Settings come from the environment:
+    WEB_SNIPPET_TOKEN_BUDGET   approximate tokens of snippet text given to
+                               synthesis (default 400, 0 disables compression)
+"""
+
+import os
+import re
+
+from keyword_screen import get_keyword_screen
+from tracing import approx_tokens, span
+
+TOKEN_BUDGET = int(os.getenv('WEB_SNIPPET_TOKEN_BUDGET', 400))
+NEAR_DUPLICATE_OVERLAP = 0.6
+SHINGLE_SIZE = 3
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'did', 'do', 'does', 'for', 'from', 'has',
+    'have', 'how', 'in', 'is', 'it', 'its', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was',
+    'were', 'what', 'when', 'where', 'which', 'who', 'whom', 'why', 'will', 'with', 'right', 'now',
+    'latest', 'current', 'currently', 'last', 'news', 'nfl',
+}
+
+BOILERPLATE = re.compile(
+    r"(sign up|subscribe|newsletter|cookies?|privacy policy|terms of (use|service)|all rights reserved"
+    r"|click here|read more|watch (now|live)|download (the|our) app|advertisement|log ?in to"
+    r"|follow us|share (this|on)|©)", re.IGNORECASE)
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def _words(text: str):
+    return _WORD.findall(text.lower())
+
+
+def content_terms(text: str) -> set:
+    return {word for word in _words(text) if word not in STOP_WORDS and len(word) > 1}
+
+
+def strip_boilerplate(text: str) -> str:
+    """Drop sentences that are navigation, promotion or legal text, and repeats."""
+    sentences = _SENTENCE_END.split(' '.join((text or '').split()))
+    kept = dict.fromkeys(sentence for sentence in sentences if sentence and not BOILERPLATE.search(sentence))
+    return ' '.join(kept)
+
+
+def _shingles(text: str) -> set:
+    words = _words(text)
+    if len(words) < SHINGLE_SIZE:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _overlap(a: set, b: set) -> float:
+    """Share of the smaller set found in the other (catches one snippet quoting another)."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def score_snippet(question_terms: set, question_entities: set, text: str):
+    """Lexical overlap with the question, plus a bonus per shared NFL entity,
+    other NFL entities and numbers.
+
+    Returns (score, relevant), where relevant means the snippet shares a word
+    or an entity with the question.
+    """
+    terms = content_terms(text)
+    shared_terms = len(question_terms & terms)
+    lexical = shared_terms / len(question_terms) if question_terms else 0.0
+    entities = set(get_keyword_screen().matches(text)[0])
+    shared_entities = len(question_entities & entities)
+    numbers = 0.1 if re.search(r'\d', text) else 0.0
+    score = lexical + 0.5 * shared_entities + 0.05 * len(entities - question_entities) + numbers
+    return score, bool(shared_terms or shared_entities)
+
+
+def _truncate(text: str, tokens: int) -> str:
+    """Cut text to about tokens tokens, at a sentence end if one is close, else a word."""
+    limit = tokens * 4
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    sentence_end = max(cut.rfind('. '), cut.rfind('! '), cut.rfind('? '))
+    if sentence_end >= limit // 2:
+        return cut[:sentence_end + 1]
+    return cut.rsplit(' ', 1)[0] + ' ...'
+
+
+def compress_results(question: str, results, token_budget: int = None):
+    """Rank, deduplicate and trim search results for the synthesis prompt.
+
+    Returns a new list of result dicts (same keys, shorter 'body'), best first.
+    """
+    budget = TOKEN_BUDGET if token_budget is None else token_budget
+    if budget <= 0 or not results:
+        return list(results)
+    with span('compress_snippets') as compress_span:
+        question_terms = content_terms(question)
+        question_entities = set(get_keyword_screen().matches(question)[0])
+        candidates = []
+        for position, result in enumerate(results):
+            body = strip_boilerplate(result.get('body', ''))
+            if not body:
+                continue
+            score, relevant = score_snippet(question_terms, question_entities,
+                                            f"{result.get('title', '')} {body}")
+            candidates.append((relevant, score, -position, dict(result, body=body)))
+        candidates.sort(key=lambda candidate: candidate[:3], reverse=True)
+
+        kept, kept_shingles, used = [], [], 0
+        for relevant, score, _, result in candidates:
+            shingles = _shingles(result['body'])
+            if any(_overlap(shingles, other) >= NEAR_DUPLICATE_OVERLAP for other in kept_shingles):
+                continue
+            # Off-topic snippets are only used when nothing relevant was found
+            if not relevant and kept:
+                break
+            remaining = budget - used - approx_tokens(result.get('title', ''))
+            if remaining <= 8:
+                break
+            result['body'] = _truncate(result['body'], remaining)
+            used += approx_tokens(result.get('title', '')) + approx_tokens(result['body'])
+            kept.append(result)
+            kept_shingles.append(shingles)
+
+        before = sum(approx_tokens(r.get('title', '')) + approx_tokens(r.get('body', '')) for r in results)
+        compress_span.set(snippets_before=len(results), snippets_after=len(kept),
+                          tokens_before=before, tokens_after=used)
+    print(f"✂️ Snippets compressed: {len(results)} -> {len(kept)} results, ~{before} -> ~{used} tokens")
+    return kept
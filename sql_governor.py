@@ -0,0 +1,209 @@
+"""
+Execution budget for SQL run against the play-by-play database.
+
+LLM-generated SQL occasionally contains an accidental cross join or
+self-join over nflfastR_pbp that would run for tens of seconds. Every query
+executed through db_pool.execute_query runs under a budget: a sqlite3
+progress handler checks elapsed time and virtual machine steps every few
+thousand instructions and aborts the statement once either limit is passed,
+and a timer calls Connection.interrupt() as a wall-clock backstop. The
+caller gets a QueryBudgetExceeded error instead of a stuck worker.
+
+The agent runs its generated SQL on connections it opens itself;
+db_pool.install_agent_connections() opens those as GovernedConnection, whose
+statements (and the fetching of their rows) run under the same budget.
+answer_with_regeneration gives the agent a second chance: when one of its
+statements is stopped and no answer comes back, the question is asked again
+with a hint about why.
+
+Settings come from the environment:
+    SQL_TIMEOUT_SECONDS   wall-clock budget per statement (default 10, 0 = none)
+    SQL_MAX_VM_STEPS      SQLite VM instruction budget per statement
+                          (default 0 = none)
+    SQL_REGENERATE_ATTEMPTS  rewrites requested after a stopped statement
+                          (default 1)
+"""
+
+import os
+import time
+import sqlite3
+import threading
+import contextvars
+from contextlib import contextmanager
+
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv('SQL_TIMEOUT_SECONDS', 10))
+DEFAULT_MAX_VM_STEPS = int(os.getenv('SQL_MAX_VM_STEPS', 0))
+DEFAULT_REGENERATE_ATTEMPTS = int(os.getenv('SQL_REGENERATE_ATTEMPTS', 1))
+
+# The progress handler runs once per this many VM instructions
+CHECK_INTERVAL = 10000
+
+TIMEOUT_HINT = (
+    "The previous query was stopped after exceeding its {budget} execution budget. "
+    "It most likely joined nflfastR_pbp to itself or to another table without a "
+    "selective join condition. Rewrite it to filter by season (and week or team) "
+    "before aggregating, avoid self-joins on nflfastR_pbp, and prefer the "
+    "pre-aggregated games, team_season and player_season tables when they cover "
+    "the question.\n\nPrevious query:\n{sql}"
+)
+
+# Budget stops during the current answer_with_regeneration call
+_stops = contextvars.ContextVar('budget_stops', default=None)
+
+
+class QueryBudgetExceeded(sqlite3.OperationalError):
+    """A statement was stopped for exceeding its time or VM-step budget."""
+
+    def __init__(self, sql: str, elapsed: float, steps: int, budget: str):
+        self.sql = sql
+        self.elapsed = elapsed
+        self.steps = steps
+        self.budget = budget
+        super().__init__(f"Query stopped after {elapsed:.1f}s and ~{steps:,} VM steps: "
+                         f"exceeded its {budget} execution budget")
+
+
+def describe_budget(timeout: float, max_steps: int) -> str:
+    parts = []
+    if timeout:
+        parts.append(f"{timeout:g}s")
+    if max_steps:
+        parts.append(f"{max_steps:,}-step")
+    return ' / '.join(parts) or 'unlimited'
+
+
+class QueryGovernor:
+    """Tracks one statement's budget; installed as the connection's progress handler."""
+
+    def __init__(self, timeout: float = None, max_steps: int = None):
+        self.timeout = DEFAULT_TIMEOUT_SECONDS if timeout is None else timeout
+        self.max_steps = DEFAULT_MAX_VM_STEPS if max_steps is None else max_steps
+        self.sql = None
+        self.started = None
+        self.steps = 0
+        self.exceeded = False
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started if self.started else 0.0
+
+    def _check(self) -> int:
+        self.steps += CHECK_INTERVAL
+        if (self.timeout and self.elapsed > self.timeout) or (self.max_steps and self.steps > self.max_steps):
+            self.exceeded = True
+            return 1  # non-zero aborts the statement
+        return 0
+
+    @contextmanager
+    def governing(self, conn: sqlite3.Connection, sql: str, resume: bool = False):
+        """Run the body with the budget enforced on conn; raise QueryBudgetExceeded if it is blown.
+
+        With resume=True the body continues the statement started last (e.g.
+        fetching its rows) and its budget isn't reset.
+        """
+        if not self.timeout and not self.max_steps:
+            yield self
+            return
+        if not resume or self.started is None:
+            self.sql = sql
+            self.started = time.monotonic()
+            self.steps = 0
+            self.exceeded = False
+        timer = None
+        if self.timeout and not resume:
+            # Backstop for work the progress handler doesn't see (e.g. a long sort step)
+            timer = threading.Timer(self.timeout * 1.5 + 0.5, self._interrupt, args=(conn,))
+            timer.daemon = True
+            timer.start()
+        conn.set_progress_handler(self._check, CHECK_INTERVAL)
+        try:
+            yield self
+        except sqlite3.OperationalError as e:
+            if self.exceeded or 'interrupted' in str(e):
+                budget = describe_budget(self.timeout, self.max_steps)
+                print(f"⛔ SQL stopped after {self.elapsed:.1f}s (budget {budget})")
+                error = QueryBudgetExceeded(self.sql, self.elapsed, self.steps, budget)
+                stops = _stops.get()
+                if stops is not None:
+                    stops.append(error)
+                raise error from e
+            raise
+        finally:
+            conn.set_progress_handler(None, 0)
+            if timer is not None:
+                timer.cancel()
+
+    def _interrupt(self, conn):
+        self.exceeded = True
+        conn.interrupt()
+
+
+class GovernedCursor(sqlite3.Cursor):
+    """Cursor whose statements, and the fetching of their rows, run under the connection's budget."""
+
+    def execute(self, sql, parameters=()):
+        with self.connection.governor.governing(self.connection, sql):
+            return super().execute(sql, parameters)
+
+    def fetchone(self):
+        with self.connection.governor.governing(self.connection, None, resume=True):
+            return super().fetchone()
+
+    def fetchmany(self, size=None):
+        with self.connection.governor.governing(self.connection, None, resume=True):
+            return super().fetchmany(self.arraysize if size is None else size)
+
+    def fetchall(self):
+        with self.connection.governor.governing(self.connection, None, resume=True):
+            return super().fetchall()
+
+    def __next__(self):
+        with self.connection.governor.governing(self.connection, None, resume=True):
+            return super().__next__()
+
+
+class GovernedConnection(sqlite3.Connection):
+    """sqlite3 connection factory whose queries run under a QueryGovernor budget."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.governor = QueryGovernor()
+
+    def cursor(self, factory=GovernedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        # Connection.execute makes a plain cursor, bypassing cursor()
+        return self.cursor().execute(sql, parameters)
+
+
+def answer_with_regeneration(question: str, answer, attempts: int = DEFAULT_REGENERATE_ATTEMPTS):
+    """Run answer(question); if one of its statements blew its budget and no
+    answer came back, ask again with a hint about the stopped SQL.
+
+    Args:
+        answer: callable returning (answer, error) for a question, e.g. the
+            agent's _run_database_query on governed connections
+        attempts: rewrites to try before giving up
+
+    Returns:
+        (answer, error) of the last attempt
+    """
+    prompt = question
+    for attempt in range(attempts + 1):
+        stops = []
+        token = _stops.set(stops)
+        try:
+            result = answer(prompt)
+        except QueryBudgetExceeded as e:
+            if attempt == attempts:
+                raise
+            stops.append(e)
+            result = None, str(e)
+        finally:
+            _stops.reset(token)
+        if result[0] or not stops or attempt == attempts:
+            return result
+        print(f"🔁 Regenerating SQL after budget stop (attempt {attempt + 1}/{attempts})")
+        prompt = f"{question}\n\n{TIMEOUT_HINT.format(budget=stops[-1].budget, sql=stops[-1].sql)}"
+    return result
@@ -0,0 +1,360 @@
+"""
+Deterministic SQL templates for common question shapes.
+
+A large share of questions follow a few patterns:
+
+  "Who were the top 5 rushers in 2022?"
+  "Which team had the most passing yards in 2023?"
+  "How many rushing yards did Derrick Henry have in 2024?"
+
+These are matched with strict patterns and answered with vetted SQL over the
+rollup tables (see util/build_rollups.py), skipping the LLM SQL-generation
+step. Anything with extra qualifiers (red zone, weeks, quarters, home/road,
+rates, comparisons...) does not match and goes to the LLM as before.
+"""
+
+import re
+import threading
+from typing import NamedTuple, Optional, Callable
+
+from db_pool import execute_query
+from nfl_terms import team_display_name
+from player_index import get_player_index
+from progress import report
+from query_cache import cached_execute_query, normalize_question
+from tracing import span
+
+# phrase -> (player_season column, team_season column)
+STATS = {
+    'passing yards': ('passing_yards', 'passing_yards'),
+    'pass yards': ('passing_yards', 'passing_yards'),
+    'rushing yards': ('rushing_yards', 'rushing_yards'),
+    'rush yards': ('rushing_yards', 'rushing_yards'),
+    'receiving yards': ('receiving_yards', None),
+    'passing touchdowns': ('pass_touchdowns', 'pass_touchdowns'),
+    'passing tds': ('pass_touchdowns', 'pass_touchdowns'),
+    'touchdown passes': ('pass_touchdowns', 'pass_touchdowns'),
+    'td passes': ('pass_touchdowns', 'pass_touchdowns'),
+    'rushing touchdowns': ('rush_touchdowns', 'rush_touchdowns'),
+    'rushing tds': ('rush_touchdowns', 'rush_touchdowns'),
+    'receiving touchdowns': ('receiving_touchdowns', None),
+    'receiving tds': ('receiving_touchdowns', None),
+    'receptions': ('receptions', None),
+    'catches': ('receptions', None),
+    'targets': ('targets', None),
+    'carries': ('carries', None),
+    'rushing attempts': ('carries', None),
+    'completions': ('completions', None),
+    'pass attempts': ('pass_attempts', None),
+    'passing attempts': ('pass_attempts', None),
+    'interceptions thrown': ('interceptions', 'interceptions_thrown'),
+    'wins': (None, 'wins'),
+    'losses': (None, 'losses'),
+    'points': (None, 'points_for'),
+    'points scored': (None, 'points_for'),
+    'points allowed': (None, 'points_against'),
+}
+
+# Stats a team gives up, by the stat phrase asked with "allowed"; other stats
+# ("allowed the most rushing yards") need defensive columns the rollups lack
+ALLOWED_STATS = {
+    'points': 'points allowed',
+    'points scored': 'points allowed',
+    'points allowed': 'points allowed',
+}
+
+# Role nouns that imply the stat ("top 5 rushers")
+ROLE_STATS = {
+    'rushers': 'rushing yards',
+    'running backs': 'rushing yards',
+    'passers': 'passing yards',
+    'quarterbacks': 'passing yards',
+    'qbs': 'passing yards',
+    'receivers': 'receiving yards',
+    'wide receivers': 'receiving yards',
+}
+
+NUMBER_WORDS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
+}
+
+TEAM_WORDS = ('team', 'teams', 'offense', 'offenses')
+PLAYER_WORDS = ('player', 'players', 'quarterback', 'quarterbacks', 'qb', 'qbs',
+                'running back', 'running backs', 'rb', 'rbs', 'receiver', 'receivers',
+                'wide receiver', 'wide receivers', 'wr', 'wrs', 'tight end', 'tight ends',
+                'rusher', 'rushers', 'passer', 'passers')
+
+# Trailing text allowed after the season; anything else means extra filters
+SEASON_SUFFIX = r'(?: (?P<phase>season|regular season|playoffs|postseason))?'
+SEASON = r'(?:in|during|for) (?:the )?(?P<season>(?:19|20)\d\d)' + SEASON_SUFFIX
+
+_stat_alternation = '|'.join(sorted(map(re.escape, STATS), key=len, reverse=True))
+_role_alternation = '|'.join(sorted(map(re.escape, ROLE_STATS), key=len, reverse=True))
+
+TOP_N_PATTERN = re.compile(
+    r'^(?:who (?:were|are) |what (?:were|are) |show me |list )?(?:the )?top (?P<n>\d+|'
+    + '|'.join(NUMBER_WORDS) + r') '
+    r'(?:(?P<role>' + _role_alternation + r')|(?P<entity>\w+(?: \w+)?) (?:by|in) (?P<stat>'
+    + _stat_alternation + r')|(?P<stat2>' + _stat_alternation + r') leaders)'
+    r'(?: by (?P<stat3>' + _stat_alternation + r'))? ' + SEASON + r'$'
+)
+
+LEADER_PATTERN = re.compile(
+    r'^(?:who|(?:which|what) (?P<entity>\w+(?: \w+)?)) '
+    r'(?:(?P<verb>had|threw|recorded|scored|allowed|gained|caught) (?:the )?'
+    r'(?P<direction>most|fewest|least)|led the (?:league|nfl) in) '
+    r'(?:total )?(?P<stat>' + _stat_alternation + r') ' + SEASON + r'$'
+)
+
+PLAYER_STAT_PATTERN = re.compile(
+    r'^(?:how many (?P<stat>' + _stat_alternation + r') did (?P<player>[a-z][a-z .\'-]+?) '
+    r'(?:have|throw|record|get|gain|catch|score)'
+    r'|(?:what (?:were|was) )?(?P<player2>[a-z][a-z .\'-]+?)(?: s)? (?:total )?(?P<stat2>'
+    + _stat_alternation + r')) ' + SEASON + r'$'
+)
+
+COMMON_PLAY_TYPE_PATTERN = re.compile(
+    r'^what (?:was|is) the most common play type ' + SEASON + r'$'
+)
+
+
+class TemplateMatch(NamedTuple):
+    name: str
+    sql: str
+    params: tuple
+    format_answer: Callable
+
+
+def _season_type(phase: Optional[str]) -> str:
+    return 'POST' if phase in ('playoffs', 'postseason') else 'REG'
+
+
+def _season_label(season, season_type: str) -> str:
+    return f"the {season} playoffs" if season_type == 'POST' else f"the {season} regular season"
+
+
+def _fmt(value) -> str:
+    if isinstance(value, float) and not value.is_integer():
+        return f"{value:,.1f}"
+    return f"{int(value):,}"
+
+
+def _name_key(name: str) -> Optional[str]:
+    """'patrick mahomes' / 'p mahomes' -> 'pmahomes' (nflfastR stores 'P.Mahomes')."""
+    tokens = re.findall(r"[a-z][a-z'-]*", name.lower())
+    if not 2 <= len(tokens) <= 4:
+        return None
+    return tokens[0][0] + ''.join(tokens[1:])
+
+
+NAME_KEY_SQL = "REPLACE(REPLACE(REPLACE(LOWER(player_name), '.', ''), ' ', ''), '''', '')"
+
+
+def _leaders(entity_is_team: bool, stat: str, season: int, season_type: str,
+             limit: int, ascending: bool = False) -> Optional[TemplateMatch]:
+    player_column, team_column = STATS[stat]
+    column = team_column if entity_is_team else player_column
+    if column is None:
+        return None
+    order = 'ASC' if ascending else 'DESC'
+    label = _season_label(season, season_type)
+    if entity_is_team:
+        sql = (f"SELECT team, {column} FROM team_season "
+               f"WHERE season = ? AND season_type = ? "
+               f"ORDER BY {column} {order}, team LIMIT ?")
+    else:
+        sql = (f"SELECT player_name, teams, {column} FROM player_season "
+               f"WHERE season = ? AND season_type = ? AND {column} > 0 "
+               f"ORDER BY {column} {order}, player_name LIMIT ?")
+
+    def describe(row):
+        if entity_is_team:
+            return team_display_name(row[0]), row[1]
+        return f"{row[0]} ({row[1]})", row[2]
+
+    def format_answer(rows):
+        if not rows:
+            return None
+        if limit == 1:
+            leaders = [describe(row) for row in rows if describe(row)[1] == describe(rows[0])[1]]
+            word = 'fewest' if ascending else 'most'
+            value = _fmt(leaders[0][1])
+            if len(leaders) == 1:
+                return f"{leaders[0][0]} had the {word} {stat} in {label} with {value}."
+            names = ', '.join(name for name, _ in leaders[:-1]) + f" and {leaders[-1][0]}"
+            return f"{names} tied for the {word} {stat} in {label} with {value}."
+        lines = [f"Top {len(rows)} by {stat} in {label}:"]
+        for i, row in enumerate(rows, 1):
+            name, value = describe(row)
+            lines.append(f"{i}. {name} - {_fmt(value)} {stat}")
+        return "\n".join(lines)
+
+    # A single leader query fetches a few extra rows so ties can be reported
+    name = f"{'team' if entity_is_team else 'player'}_leaders"
+    return TemplateMatch(name, sql, (season, season_type, limit if limit > 1 else 10), format_answer)
+
+
+def _player_stat(player: str, stat: str, season: int, season_type: str,
+                 players=None) -> Optional[TemplateMatch]:
+    column = STATS[stat][0]
+    key = _name_key(player)
+    if column is None or key is None:
+        return None
+    label = _season_label(season, season_type)
+    sql = (f"SELECT player_name, teams, {column} FROM player_season "
+           f"WHERE season = ? AND season_type = ? AND {NAME_KEY_SQL} = ?")
+    # With the player index, one player active that season is a primary key lookup
+    if players is not None:
+        found = [player_id for player_id in players.candidates(key, {season}, fuzzy=True)
+                 if players.plays(player_id, {season})]
+        if len(found) == 1:
+            sql = (f"SELECT player_name, teams, {column} FROM player_season "
+                   f"WHERE season = ? AND season_type = ? AND player_id = ?")
+            key = found[0]
+
+    def format_answer(rows):
+        # No match or an ambiguous abbreviation: let the LLM path handle it
+        if len(rows) != 1:
+            return None
+        name, teams, value = rows[0]
+        return f"{name} ({teams}) had {_fmt(value)} {stat} in {label}."
+
+    return TemplateMatch('player_stat', sql, (season, season_type, key), format_answer)
+
+
+def _common_play_type(season: int, season_type: str) -> TemplateMatch:
+    label = _season_label(season, season_type)
+    sql = ("SELECT play_type, COUNT(*) FROM nflfastR_pbp "
+           "WHERE season = ? AND season_type = ? AND play_type IS NOT NULL AND play_type != 'no_play' "
+           "GROUP BY play_type ORDER BY COUNT(*) DESC LIMIT 1")
+
+    def format_answer(rows):
+        if not rows:
+            return None
+        return f"The most common play type in {label} was '{rows[0][0]}' with {_fmt(rows[0][1])} plays."
+
+    return TemplateMatch('common_play_type', sql, (season, season_type), format_answer)
+
+
+def match_template(question: str, players=None) -> Optional[TemplateMatch]:
+    """Return the template for a question, or None if it needs the LLM.
+
+    players is an optional player_index.PlayerIndex used to look players up by id.
+    """
+    text = normalize_question(question)
+
+    match = TOP_N_PATTERN.match(text)
+    if match:
+        n = match.group('n')
+        limit = int(n) if n.isdigit() else NUMBER_WORDS[n]
+        if not 1 <= limit <= 50:
+            return None
+        entity = match.group('entity') or match.group('role') or ''
+        stat = (match.group('stat') or match.group('stat2') or match.group('stat3')
+                or ROLE_STATS.get(match.group('role') or ''))
+        if stat is None or (entity and entity not in TEAM_WORDS + PLAYER_WORDS):
+            return None
+        return _leaders(entity in TEAM_WORDS, stat, int(match.group('season')),
+                        _season_type(match.group('phase')), limit)
+
+    match = LEADER_PATTERN.match(text)
+    if match:
+        entity = match.group('entity')
+        stat = match.group('stat')
+        if match.group('verb') == 'allowed':
+            stat = ALLOWED_STATS.get(stat)
+            if stat is None:
+                return None
+        if entity and entity not in TEAM_WORDS + PLAYER_WORDS:
+            return None
+        player_column, team_column = STATS[stat]
+        entity_is_team = entity in TEAM_WORDS if entity else player_column is None
+        ascending = match.group('direction') in ('fewest', 'least')
+        return _leaders(entity_is_team, stat, int(match.group('season')),
+                        _season_type(match.group('phase')), 1, ascending)
+
+    match = COMMON_PLAY_TYPE_PATTERN.match(text)
+    if match:
+        return _common_play_type(int(match.group('season')), _season_type(match.group('phase')))
+
+    match = PLAYER_STAT_PATTERN.match(text)
+    if match:
+        player = match.group('player') or match.group('player2')
+        stat = match.group('stat') or match.group('stat2')
+        if any(word in player.split() for word in ('team', 'who', 'which', 'the', 'most')):
+            return None
+        return _player_stat(player, stat, int(match.group('season')),
+                            _season_type(match.group('phase')), players)
+    return None
+
+
+class TemplateFastPath:
+    """Answers template-shaped questions directly and tracks the hit rate."""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path
+        self.lookups = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._available = None
+
+    def _rollups_available(self) -> bool:
+        if self._available is None:
+            try:
+                _, rows = execute_query(
+                    "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' "
+                    "AND name IN ('team_season', 'player_season')", db_path=self.db_path)
+                self._available = rows[0][0] == 2
+            except Exception as e:
+                print(f"⚠️ Template fast path disabled: {e}")
+                self._available = False
+        return self._available
+
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def answer(self, question: str) -> Optional[str]:
+        """Return a templated answer, or None to fall back to the LLM."""
+        with span('template_fast_path') as template_span:
+            template = (match_template(question, get_player_index(self.db_path))
+                        if self._rollups_available() else None)
+            answer = None
+            if template is not None:
+                template_span.set(template=template.name)
+                report('sql_generated', f"template {template.name}")
+                try:
+                    _, rows = cached_execute_query(template.sql, template.params, self.db_path)
+                    report('sql_executed', f"{len(rows)} rows")
+                    answer = template.format_answer(rows)
+                except Exception as e:
+                    print(f"⚠️ Template {template.name} failed, falling back to LLM: {e}")
+            with self._lock:
+                self.lookups += 1
+                if answer is not None:
+                    self.hits += 1
+                template_span.set(hit=answer is not None, hits=self.hits, lookups=self.lookups)
+                stats = f"hit rate {self.hits}/{self.lookups} ({self.hit_rate():.0%})"
+        # Printed output goes to the request's debug log (debug_log.py)
+        if answer is not None:
+            print(f"⚡ Template fast path hit ({template.name}): {stats}")
+            print(f"📝 Template SQL: {template.sql} -- params {template.params}")
+        else:
+            print(f"🧩 Template fast path miss, using LLM SQL generation: {stats}")
+        return answer
+
+
+def install_template_fast_path(agent, fast_path: TemplateFastPath = None):
+    """Try templates before an NFLStatAgent instance's LLM SQL generation."""
+    fast_path = fast_path or TemplateFastPath()
+    generate = agent._run_database_query
+
+    def _run_database_query(question, *args, **kwargs):
+        answer = fast_path.answer(question)
+        if answer is not None:
+            return answer, None
+        return generate(question, *args, **kwargs)
+
+    agent._run_database_query = _run_database_query
+    agent.template_fast_path = fast_path
+    return agent
@@ -0,0 +1,80 @@
+"""
+Capture of the SQL statements the agent executes.
+
+Attach a recorder to a sqlite3 connection and every SELECT it runs is appended
+to a JSON lines file. The captured workload feeds util/index_advisor.py.
+db_pool attaches it to the pooled connections and, through
+install_agent_connections(), to the connections the agent opens itself for
+its generated SQL.
+
+Recording is off unless SQL_WORKLOAD_LOG points at a file (or a path is passed
+explicitly), so production connections pay nothing by default.
+"""
+
+import os
+import json
+import time
+import threading
+
+WORKLOAD_LOG_ENV = 'SQL_WORKLOAD_LOG'
+
+
+class WorkloadRecorder:
+    """Append executed SELECT statements to a JSON lines file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, statement: str):
+        sql = statement.strip()
+        head = sql[:10].upper()
+        if not (head.startswith('SELECT') or head.startswith('WITH')):
+            return
+        line = json.dumps({'ts': time.time(), 'sql': sql})
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+
+
+_recorders = {}
+_recorders_lock = threading.Lock()
+
+
+def _get_recorder(path: str) -> WorkloadRecorder:
+    with _recorders_lock:
+        if path not in _recorders:
+            _recorders[path] = WorkloadRecorder(path)
+        return _recorders[path]
+
+
+def record_workload(conn, path=None) -> bool:
+    """Record SELECTs executed on conn. Returns True if recording was enabled."""
+    path = path or os.getenv(WORKLOAD_LOG_ENV)
+    if not path:
+        return False
+    conn.set_trace_callback(_get_recorder(path))
+    return True
+
+
+def load_workload(path: str):
+    """Return the unique statements in a workload log with their counts.
+
+    Returns:
+        list of (sql, count) ordered by first appearance
+    """
+    counts = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                sql = json.loads(line)['sql']
+            except (ValueError, KeyError):
+                continue
+            counts[sql] = counts.get(sql, 0) + 1
+    return list(counts.items())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Small synthetic nflfastR_pbp table for offline tests.
+
+The real data/pbp_db is 2GB and not available everywhere, so the suites that
+exercise build steps and query helpers run against this deterministic sample
+instead. Column names and conventions follow nflfastR.
+"""
+
+import sqlite3
+
+PBP_COLUMNS = [
+    ('play_id', 'REAL'),
+    ('game_id', 'TEXT'),
+    ('home_team', 'TEXT'),
+    ('away_team', 'TEXT'),
+    ('season_type', 'TEXT'),
+    ('week', 'INTEGER'),
+    ('posteam', 'TEXT'),
+    ('defteam', 'TEXT'),
+    ('yardline_100', 'REAL'),
+    ('game_date', 'TEXT'),
+    ('qtr', 'REAL'),
+    ('down', 'REAL'),
+    ('drive', 'REAL'),
+    ('desc', 'TEXT'),
+    ('play_type', 'TEXT'),
+    ('yards_gained', 'REAL'),
+    ('air_yards', 'REAL'),
+    ('total_home_score', 'REAL'),
+    ('total_away_score', 'REAL'),
+    ('epa', 'REAL'),
+    ('wpa', 'REAL'),
+    ('incomplete_pass', 'REAL'),
+    ('interception', 'REAL'),
+    ('sack', 'REAL'),
+    ('touchdown', 'REAL'),
+    ('pass_touchdown', 'REAL'),
+    ('rush_touchdown', 'REAL'),
+    ('complete_pass', 'REAL'),
+    ('pass_attempt', 'REAL'),
+    ('rush_attempt', 'REAL'),
+    ('passer_player_id', 'TEXT'),
+    ('passer_player_name', 'TEXT'),
+    ('passing_yards', 'REAL'),
+    ('receiver_player_id', 'TEXT'),
+    ('receiver_player_name', 'TEXT'),
+    ('receiving_yards', 'REAL'),
+    ('rusher_player_id', 'TEXT'),
+    ('rusher_player_name', 'TEXT'),
+    ('rushing_yards', 'REAL'),
+    ('season', 'INTEGER'),
+    ('spread_line', 'REAL'),
+    ('total_line', 'REAL'),
+]
+
+COLUMN_NAMES = [name for name, _ in PBP_COLUMNS]
+
+# (qb id, qb name, rb id, rb name, wr id, wr name) per team
+ROSTERS = {
+    'KC': ('00-0033873', 'P.Mahomes', '00-0036000', 'I.Pacheco', '00-0030506', 'T.Kelce'),
+    'BUF': ('00-0034857', 'J.Allen', '00-0036001', 'J.Cook', '00-0036002', 'S.Diggs'),
+    'DET': ('00-0033106', 'J.Goff', '00-0036003', 'D.Montgomery', '00-0036004', 'A.St. Brown'),
+    'BAL': ('00-0034796', 'L.Jackson', '00-0036005', 'D.Henry', '00-0036006', 'Z.Flowers'),
+}
+
+# (game_id, season, week, season_type, home, away, spread_line, total_line,
+#  home_final, away_final)
+GAMES = [
+    ('2023_01_DET_KC', 2023, 1, 'REG', 'KC', 'DET', 6.5, 53.5, 20, 21),
+    ('2023_02_BAL_BUF', 2023, 2, 'REG', 'BUF', 'BAL', 2.5, 46.5, 27, 17),
+    ('2024_01_BAL_KC', 2024, 1, 'REG', 'KC', 'BAL', 3.0, 46.5, 27, 20),
+    ('2024_01_DET_BUF', 2024, 1, 'REG', 'BUF', 'DET', -1.5, 50.5, 24, 31),
+    ('2024_02_KC_DET', 2024, 2, 'REG', 'DET', 'KC', 2.5, 52.5, 24, 21),
+    ('2024_02_BUF_BAL', 2024, 2, 'REG', 'BAL', 'BUF', 4.0, 48.5, 24, 20),
+    ('2024_19_BUF_KC', 2024, 19, 'POST', 'KC', 'BUF', 1.5, 47.5, 32, 29),
+]
+
+PLAYS_PER_GAME = 24
+
+
+def generate_plays():
+    """Return deterministic play rows (dicts keyed by column name)."""
+    plays = []
+    for game_index, (game_id, season, week, season_type, home, away,
+                     spread_line, total_line, home_final, away_final) in enumerate(GAMES):
+        for n in range(PLAYS_PER_GAME):
+            posteam = home if (n // 4) % 2 == 0 else away
+            defteam = away if posteam == home else home
+            qb_id, qb_name, rb_id, rb_name, wr_id, wr_name = ROSTERS[posteam]
+            progress = (n + 1) / PLAYS_PER_GAME
+            yardline = 80 - (n % 4) * 20 + (game_index % 3)
+            is_pass = (n + game_index) % 3 != 0
+            is_touchdown = n % 4 == 3 and yardline <= 20
+            yards = 5 + (n * 7 + game_index * 3) % 15
+            row = {name: None for name in COLUMN_NAMES}
+            row.update({
+                'play_id': float(n + 1),
+                'game_id': game_id,
+                'home_team': home,
+                'away_team': away,
+                'season_type': season_type,
+                'week': week,
+                'posteam': posteam,
+                'defteam': defteam,
+                'yardline_100': float(yardline),
+                'game_date': f'{season}-09-{week + 5:02d}',
+                'qtr': float(1 + n * 4 // PLAYS_PER_GAME),
+                'down': float(1 + n % 4),
+                'drive': float(1 + n // 4),
+                'yards_gained': float(yards),
+                'total_home_score': float(int(home_final * progress)),
+                'total_away_score': float(int(away_final * progress)),
+                'epa': round(((n * 13 + game_index * 7) % 21 - 10) / 10.0, 2),
+                'wpa': round(((n * 5 + game_index) % 11 - 5) / 100.0, 3),
+                'touchdown': 1.0 if is_touchdown else 0.0,
+                'season': season,
+                'spread_line': spread_line,
+                'total_line': total_line,
+            })
+            if is_pass:
+                complete = (n + game_index) % 5 != 0
+                intercepted = not complete and n % 2 == 0
+                row.update({
+                    'play_type': 'pass',
+                    'desc': f'{qb_name} pass to {wr_name} for {yards} yards',
+                    'air_yards': float(yards - 2),
+                    'pass_attempt': 1.0, 'rush_attempt': 0.0,
+                    'complete_pass': 1.0 if complete else 0.0,
+                    'incomplete_pass': 0.0 if complete or intercepted else 1.0,
+                    'interception': 1.0 if intercepted else 0.0,
+                    'sack': 0.0,
+                    'pass_touchdown': 1.0 if is_touchdown and complete else 0.0,
+                    'rush_touchdown': 0.0,
+                    'passer_player_id': qb_id, 'passer_player_name': qb_name,
+                    'receiver_player_id': wr_id, 'receiver_player_name': wr_name,
+                    'passing_yards': float(yards) if complete else None,
+                    'receiving_yards': float(yards) if complete else None,
+                })
+                if not complete:
+                    row['touchdown'] = 0.0
+            else:
+                row.update({
+                    'play_type': 'run',
+                    'desc': f'{rb_name} left end for {yards} yards',
+                    'pass_attempt': 0.0, 'rush_attempt': 1.0,
+                    'complete_pass': 0.0, 'incomplete_pass': 0.0,
+                    'interception': 0.0, 'sack': 0.0,
+                    'pass_touchdown': 0.0,
+                    'rush_touchdown': 1.0 if is_touchdown else 0.0,
+                    'rusher_player_id': rb_id, 'rusher_player_name': rb_name,
+                    'rushing_yards': float(yards),
+                })
+            plays.append(row)
+    return plays
+
+
+def create_sample_pbp(conn, plays=None):
+    """Create nflfastR_pbp in the given connection and fill it with sample plays."""
+    plays = plays if plays is not None else generate_plays()
+    column_defs = ', '.join(f'"{name}" {dtype}' for name, dtype in PBP_COLUMNS)
+    conn.execute(f'CREATE TABLE nflfastR_pbp ({column_defs})')
+    placeholders = ', '.join('?' for _ in COLUMN_NAMES)
+    quoted = ', '.join(f'"{name}"' for name in COLUMN_NAMES)
+    conn.executemany(
+        f'INSERT INTO nflfastR_pbp ({quoted}) VALUES ({placeholders})',
+        [tuple(play[name] for name in COLUMN_NAMES) for play in plays],
+    )
+    conn.commit()
+    return plays
+
+
+def sample_database(path=':memory:'):
+    """Open a connection to a database holding the sample play table."""
+    conn = sqlite3.connect(path)
+    create_sample_pbp(conn)
+    return conn
@@ -14,10 +14,32 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from test_filtering_fix import FilteringTestSuite
 from test_scoring import ScoringTestSuite
 from test_sql_agent import SQLAgentTestSuite
+from test_rollups import RollupTestSuite
+from test_query_cache import QueryCacheTestSuite
+from test_sql_templates import SQLTemplateTestSuite
+from test_pipeline import PipelineTestSuite
+from test_keyword_screen import KeywordScreenTestSuite
+from test_classifier_cache import ClassifierCacheTestSuite
+from test_sql_governor import SQLGovernorTestSuite
+from test_backends import BackendsTestSuite
+from test_tracing import TracingTestSuite
+from test_debug_log import DebugLogTestSuite
+from test_api import APITestSuite
+from test_singleflight import SingleFlightTestSuite
+from test_web_search import WebSearchTestSuite
+from test_snippets import SnippetsTestSuite
+from test_ingest import IngestTestSuite
+from test_partition import PartitionTestSuite
+from test_column_store import ColumnStoreTestSuite
+from test_player_index import PlayerIndexTestSuite
+from test_startup import StartupTestSuite
+from test_db_pool import DBPoolTestSuite
+from test_schema_context import SchemaContextTestSuite
+from test_index_advisor import IndexAdvisorTestSuite
 
 def main():
     parser = argparse.ArgumentParser(description='Run NFL Stats Agent tests')
-    parser.add_argument('--test', choices=['filtering', 'scoring', 'sql', 'all'], 
+    parser.add_argument('--test', choices=['filtering', 'scoring', 'sql', 'rollups', 'cache', 'templates', 'pipeline', 'keywords', 'classifier', 'governor', 'backends', 'tracing', 'debuglog', 'api', 'singleflight', 'websearch', 'snippets', 'ingest', 'partition', 'columns', 'players', 'startup', 'pool', 'schema', 'advisor', 'all'], 
                        default='all', help='Which test to run')
     args = parser.parse_args()
 
@@ -39,5 +61,137 @@ def main():
         suite.run_all_tests()
         print()
 
+    if args.test == 'rollups' or args.test == 'all':
+        print("\n================ ROLLUP TEST SUITE ================")
+        suite = RollupTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'cache' or args.test == 'all':
+        print("\n================ QUERY CACHE TEST SUITE ================")
+        suite = QueryCacheTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'templates' or args.test == 'all':
+        print("\n================ SQL TEMPLATE TEST SUITE ================")
+        suite = SQLTemplateTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'pipeline' or args.test == 'all':
+        print("\n================ PIPELINE TEST SUITE ================")
+        suite = PipelineTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'keywords' or args.test == 'all':
+        print("\n================ KEYWORD SCREEN TEST SUITE ================")
+        suite = KeywordScreenTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'classifier' or args.test == 'all':
+        print("\n================ CLASSIFIER CACHE TEST SUITE ================")
+        suite = ClassifierCacheTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'governor' or args.test == 'all':
+        print("\n================ SQL GOVERNOR TEST SUITE ================")
+        suite = SQLGovernorTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'backends' or args.test == 'all':
+        print("\n================ BACKENDS TEST SUITE ================")
+        suite = BackendsTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'tracing' or args.test == 'all':
+        print("\n================ TRACING TEST SUITE ================")
+        suite = TracingTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'debuglog' or args.test == 'all':
+        print("\n================ DEBUG LOG TEST SUITE ================")
+        suite = DebugLogTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'api' or args.test == 'all':
+        print("\n================ API TEST SUITE ================")
+        suite = APITestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'singleflight' or args.test == 'all':
+        print("\n================ SINGLE FLIGHT TEST SUITE ================")
+        suite = SingleFlightTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'websearch' or args.test == 'all':
+        print("\n================ WEB SEARCH TEST SUITE ================")
+        suite = WebSearchTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'snippets' or args.test == 'all':
+        print("\n================ SNIPPETS TEST SUITE ================")
+        suite = SnippetsTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'ingest' or args.test == 'all':
+        print("\n================ INGEST TEST SUITE ================")
+        suite = IngestTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'partition' or args.test == 'all':
+        print("\n================ PARTITION TEST SUITE ================")
+        suite = PartitionTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'columns' or args.test == 'all':
+        print("\n================ COLUMN STORE TEST SUITE ================")
+        suite = ColumnStoreTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'players' or args.test == 'all':
+        print("\n================ PLAYER INDEX TEST SUITE ================")
+        suite = PlayerIndexTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'startup' or args.test == 'all':
+        print("\n================ STARTUP TEST SUITE ================")
+        suite = StartupTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'pool' or args.test == 'all':
+        print("\n================ DB POOL TEST SUITE ================")
+        suite = DBPoolTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'schema' or args.test == 'all':
+        print("\n================ SCHEMA CONTEXT TEST SUITE ================")
+        suite = SchemaContextTestSuite()
+        suite.run_all_tests()
+        print()
+
+    if args.test == 'advisor' or args.test == 'all':
+        print("\n================ INDEX ADVISOR TEST SUITE ================")
+        suite = IndexAdvisorTestSuite()
+        suite.run_all_tests()
+        print()
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test suite for the HTTP JSON API (api.py)
+Runs offline: requests are passed straight to the WSGI app, which answers with
+the scripted agent from test_pipeline.py
+"""
+
+import sys
+import os
+import io
+import json
+from wsgiref.util import setup_testing_defaults
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import api
+import pipeline
+from test_pipeline import ScriptedAgent
+from web_search import install_answer_streaming
+
+
+def call(method: str, path: str, body=None):
+    """Run one request through the WSGI app. Returns (status code, headers, body bytes)."""
+    data = body if isinstance(body, bytes) else json.dumps(body).encode() if body is not None else b''
+    environ = {'REQUEST_METHOD': method, 'PATH_INFO': path, 'CONTENT_LENGTH': str(len(data)),
+               'CONTENT_TYPE': 'application/json', 'wsgi.input': io.BytesIO(data)}
+    setup_testing_defaults(environ)
+    response = {}
+
+    def start_response(status, headers):
+        response['status'] = int(status.split()[0])
+        response['headers'] = dict(headers)
+
+    content = b''.join(api.app(environ, start_response))
+    return response['status'], response['headers'], content
+
+
+class APITestSuite:
+    def __init__(self):
+        print("🔧 Initializing API Test Suite...")
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 API TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All API tests passed successfully!")
+        print(f"{'='*60}")
+
+    def test_query(self):
+        print("\n🧪 Testing: POST /query")
+        pipeline._agent = ScriptedAgent()
+        status, headers, body = call('POST', '/query', {'question': "Which team passed the most in 2023?",
+                                                        'show_reasoning': True, 'debug': True})
+        response = json.loads(body)
+        self.log_test_result("Answer is returned as JSON",
+                             status == 200 and response['answer'] == "KC had 4,183 passing yards"
+                             and response['source'] == "database" and response['error'] is None,
+                             str(response['answer']))
+        self.log_test_result("Debug details carry the request's log and spans",
+                             "Answer scores" in response['debug']['log']
+                             and any(span['name'] == 'scoring' for span in response['debug']['spans']))
+
+    def test_streaming(self):
+        print("\n🧪 Testing: streamed POST /query")
+        pipeline._agent = install_answer_streaming(ScriptedAgent(db_result=(None, "no such column: foo")))
+        status, headers, body = call('POST', '/query', {'question': "Who won Super Bowl LVIII?", 'stream': True})
+        lines = [json.loads(line) for line in body.decode().splitlines()]
+        chunks = [line['text'] for line in lines if line['type'] == 'chunk']
+        self.log_test_result("Answer streams as NDJSON chunks",
+                             status == 200 and headers['Content-Type'] == 'application/x-ndjson'
+                             and len(chunks) > 1 and ''.join(chunks) == "The Chiefs won the Super Bowl.",
+                             str(chunks))
+        self.log_test_result("Final line reports the source and timings",
+                             lines[-1]['type'] == 'done' and lines[-1]['source'] == "web"
+                             and lines[-1]['first_chunk'] <= lines[-1]['elapsed'], str(lines[-1]))
+
+    def test_errors(self):
+        print("\n🧪 Testing: bad requests")
+        status, _, body = call('POST', '/query', {'question': "  "})
+        self.log_test_result("Missing question is a 400", status == 400 and b"question" in body)
+        status, _, _ = call('POST', '/query', b"not json")
+        self.log_test_result("Invalid JSON is a 400", status == 400)
+        status, headers, _ = call('GET', '/query')
+        self.log_test_result("GET /query is a 405", status == 405 and headers.get('Allow') == 'POST')
+        status, _, _ = call('POST', '/answers', {'question': "q"})
+        self.log_test_result("Unknown path is a 404", status == 404)
+        status, _, body = call('GET', '/health')
+        self.log_test_result("Health check reports the worker", status == 200
+                             and json.loads(body)['pid'] == os.getpid())
+
+    def run_all_tests(self):
+        print("\n🏈 API Test Suite")
+        print("=" * 60)
+        self.test_query()
+        self.test_streaming()
+        self.test_errors()
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = APITestSuite()
+    suite.run_all_tests()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test suite for the record/replay LLM and web search backends (backends.py)
+Runs offline: a scripted client is recorded, then replayed without it
+"""
+
+import sys
+import os
+import time
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import web_search
+from backends import install_backends, ReplayLatency, CassetteMiss, RECORD, REPLAY
+
+
+class ScriptedLLM:
+    """Stands in for a Together client; counts calls."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+        self.model = 'scripted-model'
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        return f"{self.reply}: {prompt}"
+
+    def stream(self, prompt, **kwargs):
+        self.calls += 1
+        text = self.invoke(prompt)
+        self.calls -= 1
+        for i in range(0, len(text), 5):
+            yield text[i:i + 5]
+
+
+class Agent:
+    def __init__(self):
+        self._llm = ScriptedLLM("SQL")
+        self._web_llm = ScriptedLLM("Web")
+        self._classifier_llm = ScriptedLLM("Y")
+
+
+class BackendsTestSuite:
+    def __init__(self):
+        print("🔧 Initializing Backends Test Suite...")
+        self.cassette_dir = tempfile.mkdtemp()
+        self.search_calls = 0
+        self.original_backend = web_search._search_backend
+        # One outbound search per query keeps the recorded calls countable
+        self.original_rewrites = web_search.QUERY_REWRITES
+        web_search.QUERY_REWRITES = ['{query}']
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 BACKENDS TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All backends tests passed successfully!")
+        print(f"{'='*60}")
+
+    def _live_search(self, query, max_results):
+        self.search_calls += 1
+        return [{'title': f"Result for {query}", 'href': 'https://example.com', 'body': 'KC 25, SF 22'}]
+
+    def test_record(self):
+        print("\n🧪 Testing: record mode")
+        web_search.set_search_backend(self._live_search)
+        web_search.text_search, live_text_search = self._live_search, web_search.text_search
+        agent = Agent()
+        try:
+            install_backends(agent, mode=RECORD, cassette_dir=self.cassette_dir)
+            self.sql = agent._llm.invoke("SELECT prompt")
+            self.streamed = list(agent._web_llm.stream("synthesis prompt"))
+            self.verdict = agent._classifier_llm.invoke("classify prompt")
+            self.results = web_search.search_web("super bowl winner", 3)
+        finally:
+            web_search.text_search = live_text_search
+        self.log_test_result("Recording passes calls through", self.sql == "SQL: SELECT prompt"
+                             and self.search_calls == 1)
+        self.log_test_result("Unknown attributes come from the wrapped client", agent._llm.model == 'scripted-model')
+        files = sorted(os.listdir(self.cassette_dir))
+        self.log_test_result("A cassette is written per client",
+                             files == ['classifier_llm.json', 'sql_llm.json', 'web_llm.json', 'web_search.json'],
+                             str(files))
+
+    def test_replay(self):
+        print("\n🧪 Testing: replay mode")
+        web_search.set_search_backend(self.original_backend)
+        agent = Agent()
+        install_backends(agent, mode=REPLAY, cassette_dir=self.cassette_dir, latency=ReplayLatency(0, 0))
+        web_search._cache.clear()
+        sql = agent._llm.invoke("SELECT prompt")
+        streamed = list(agent._web_llm.stream("synthesis prompt"))
+        results = web_search.search_web("super bowl winner", 3)
+        self.log_test_result("Replay returns the recorded responses",
+                             sql == self.sql and streamed == self.streamed and results == self.results)
+        self.log_test_result("Replay never calls the real clients",
+                             agent._llm.calls == 0 and agent._web_llm.calls == 0 and self.search_calls == 1)
+        self.log_test_result("Invoke replays a recorded stream",
+                             agent._web_llm.invoke("synthesis prompt") == ''.join(self.streamed))
+        try:
+            agent._llm.invoke("never recorded")
+            missed = False
+        except CassetteMiss:
+            missed = True
+        self.log_test_result("Unrecorded request raises CassetteMiss", missed)
+
+        install_backends(agent, mode=REPLAY, cassette_dir=self.cassette_dir, latency=ReplayLatency(200, 0))
+        start_time = time.perf_counter()
+        agent._llm.invoke("SELECT prompt")
+        elapsed = time.perf_counter() - start_time
+        self.log_test_result("Synthetic latency is applied", 0.2 <= elapsed < 0.5, f"{elapsed:.3f}s")
+        web_search.set_search_backend(self.original_backend)
+        web_search.QUERY_REWRITES = self.original_rewrites
+
+    def run_all_tests(self):
+        print("\n🏈 Backends Test Suite")
+        print("=" * 60)
+        self.test_record()
+        self.test_replay()
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = BackendsTestSuite()
+    suite.run_all_tests()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Test suite for the memory-mapped column store (column_store.py, util/export_columns.py)
+Runs offline against the synthetic play table in tests/pbp_fixture.py; needs numpy
+"""
+
+import sys
+import os
+import csv
+import math
+import shutil
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import db_pool
+import column_store
+from column_store import NotEligible, column_store_path
+from pbp_fixture import COLUMN_NAMES, create_sample_pbp, generate_plays
+from tracing import Trace
+from util.ingest_pbp import bump_data_version, ingest
+
+# Aggregates the column store answers, in the shapes generated SQL takes
+QUERIES = [
+    ("SELECT COUNT(*) FROM nflfastR_pbp", ()),
+    ("SELECT posteam, SUM(passing_yards) FROM nflfastR_pbp WHERE season = 2024 AND season_type = 'REG' "
+     "GROUP BY posteam ORDER BY 2 DESC", ()),
+    ("SELECT season, AVG(epa) AS avg_epa FROM nflfastR_pbp WHERE play_type IN ('pass', 'run') "
+     "GROUP BY season ORDER BY avg_epa", ()),
+    ("SELECT passer_player_name, SUM(pass_touchdown) AS tds, COUNT(*) FROM nflfastR_pbp WHERE season = 2023 "
+     "AND passer_player_name IS NOT NULL GROUP BY passer_player_name ORDER BY tds DESC, passer_player_name LIMIT 3", ()),
+    ("SELECT posteam, play_type, COUNT(*), MIN(yards_gained), MAX(yards_gained) FROM nflfastR_pbp "
+     "GROUP BY posteam, play_type", ()),
+    ("SELECT COUNT(DISTINCT game_id), COUNT(passer_player_id), MIN(posteam), MAX(game_date) FROM nflfastR_pbp "
+     "WHERE week BETWEEN 1 AND 2", ()),
+    ("SELECT SUM(yards_gained) FROM nflfastR_pbp WHERE posteam < 'C' AND down NOT IN (1, 2) AND posteam != 'BAL'", ()),
+    ("SELECT SUM(week), MAX(week), AVG(week) FROM nflfastR_pbp WHERE season = ?", (2024,)),
+    ("SELECT SUM(epa), COUNT(*) FROM nflfastR_pbp WHERE season = 1999", ()),
+    ("select posteam as team, count(*) n from nflfastR_pbp where game_date >= '2024-01-01' "
+     "group by 1 order by n desc, team limit 2 offset 1;", ()),
+]
+# Everything else has to stay on SQLite
+NOT_ELIGIBLE = [
+    "SELECT posteam FROM nflfastR_pbp",
+    "SELECT COUNT(*) FROM nflfastR_pbp WHERE season = 2024 OR week = 1",
+    "SELECT SUM(CASE WHEN touchdown = 1 THEN 1 ELSE 0 END) FROM nflfastR_pbp",
+    "SELECT SUM(epa) / COUNT(*) FROM nflfastR_pbp",
+    "SELECT COUNT(*) FROM nflfastR_pbp p JOIN games g ON p.game_id = g.game_id",
+    "SELECT posteam, COUNT(*) FROM nflfastR_pbp GROUP BY posteam HAVING COUNT(*) > 3",
+    "SELECT COUNT(*) FROM nflfastR_pbp WHERE \"desc\" LIKE '%pass%'",
+    "SELECT COUNT(*) FROM nflfastR_pbp WHERE season = '2024'",
+    "SELECT SUM(posteam) FROM nflfastR_pbp",
+    "SELECT SUM(wins) FROM team_season",
+]
+GROUPED = "SELECT posteam, SUM(yards_gained) FROM nflfastR_pbp WHERE season = 2024 GROUP BY posteam"
+
+
+def same_rows(expected, actual) -> bool:
+    if len(expected) != len(actual):
+        return False
+    for expected_row, actual_row in zip(expected, actual):
+        for left, right in zip(expected_row, actual_row):
+            if isinstance(left, float) and isinstance(right, float):
+                if not math.isclose(left, right, rel_tol=1e-9, abs_tol=1e-9):
+                    return False
+            elif left != right or type(left) != type(right):
+                return False
+    return True
+
+
+def traced_query(sql, db_path):
+    trace = Trace(sql)
+    with trace.activate():
+        columns, rows = db_pool.execute_query(sql, db_path=db_path)
+    return rows, trace.find('sql').attributes.get('engine')
+
+
+class ColumnStoreTestSuite:
+    def __init__(self):
+        print("🔧 Initializing Column Store Test Suite...")
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, 'pbp_db')
+        self.plays = generate_plays()
+        self.conn = sqlite3.connect(self.db_path)
+        create_sample_pbp(self.conn)
+        self.conn.commit()
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 COLUMN STORE TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All column store tests passed successfully!")
+        print(f"{'='*60}")
+
+    def test_export(self):
+        print("\n🧪 Testing: export")
+        from util.export_columns import export
+        result = export(self.db_path, max_categories=50)
+        self.log_test_result("Numeric and low-cardinality text columns are exported, desc is skipped",
+                             'season' in result['columns'] and 'posteam' in result['columns']
+                             and 'desc' in result['skipped'] and result['rows'] == len(self.plays),
+                             str(result['skipped']))
+        store = column_store.open_column_store(self.db_path)
+        season, posteam = store.column('season'), store.column('posteam')
+        self.log_test_result("Columns are read-only memory maps",
+                             isinstance(season.data, column_store.np.memmap) and not season.data.flags.writeable
+                             and season.integer and posteam.is_category)
+        self.log_test_result("Text is dictionary-encoded in sorted order",
+                             posteam.labels == sorted({play['posteam'] for play in self.plays if play['posteam']})
+                             and [posteam.labels[code] for code in posteam.data[:3].tolist()]
+                             == [play['posteam'] for play in self.plays[:3]])
+        self.store = store
+
+    def test_queries(self):
+        print("\n🧪 Testing: vectorized aggregates")
+        mismatched = []
+        for sql, params in QUERIES:
+            cursor = self.conn.execute(sql, params)
+            expected = cursor.fetchall()
+            names = [description[0] for description in cursor.description]
+            columns, rows = self.store.execute(sql, params)
+            if columns != names or not same_rows(expected, rows):
+                mismatched.append(sql)
+        self.log_test_result(f"{len(QUERIES)} aggregates return SQLite's columns and rows",
+                             not mismatched, "; ".join(mismatched))
+        accepted = []
+        for sql in NOT_ELIGIBLE:
+            try:
+                self.store.execute(sql)
+                accepted.append(sql)
+            except NotEligible:
+                pass
+        self.log_test_result("Joins, OR, CASE, expressions, HAVING, unexported columns and type mismatches "
+                             "are not eligible", not accepted, "; ".join(accepted))
+
+    def test_routing(self):
+        print("\n🧪 Testing: routing in db_pool.execute_query")
+        expected = self.conn.execute(GROUPED).fetchall()
+        rows, engine = traced_query(GROUPED, self.db_path)
+        _, join_engine = traced_query("SELECT COUNT(*) FROM nflfastR_pbp WHERE season = 2024 OR week = 1", self.db_path)
+        self.log_test_result("Eligible aggregates are answered from the column store, others by SQLite",
+                             engine == 'columns' and join_engine is None and same_rows(expected, rows))
+
+        db_pool.install_agent_connections()
+        statements = []
+        with db_pool.agent_sql():
+            conn = sqlite3.connect(self.db_path)
+            conn.set_trace_callback(statements.append)
+            cursor = conn.execute(GROUPED + " ORDER BY posteam")
+            columns = [description[0] for description in cursor.description]
+            agent_rows = cursor.fetchall()
+            conn.row_factory = sqlite3.Row
+            total = conn.execute("SELECT COUNT(*) AS plays FROM nflfastR_pbp WHERE season = ?", (2024,)).fetchone()
+            conn.set_trace_callback(None)
+            conn.close()
+        answered = [sql for sql in statements if sql.startswith(db_pool.COLUMN_STORE_MARKER)]
+        self.log_test_result("The agent's own SQL is answered from the column store",
+                             len(answered) == 2 and columns == ['posteam', 'SUM(yards_gained)']
+                             and same_rows(sorted(expected), agent_rows)
+                             and total['plays'] == sum(1 for play in self.plays if play['season'] == 2024),
+                             f"{columns} {answered}")
+
+        bump_data_version(self.db_path, note='test')
+        rows, engine = traced_query(GROUPED, self.db_path)
+        self.log_test_result("A store exported from older data is ignored", engine is None and rows == expected)
+
+        play = dict(self.plays[0], yards_gained=99.0)
+        drop = os.path.join(self.directory, 'drop.csv')
+        with open(drop, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMN_NAMES)
+            writer.writerow(['NA' if play[name] is None else play[name] for name in COLUMN_NAMES])
+        summary = ingest(self.db_path, [drop], rollups=False)
+        expected = self.conn.execute(GROUPED).fetchall()
+        rows, engine = traced_query(GROUPED, self.db_path)
+        builds = [entry for entry in os.listdir(column_store_path(self.db_path)) if entry != 'manifest.json']
+        self.log_test_result("Ingest re-exports the store, which then answers with the new data",
+                             summary['column_store'] is not None and engine == 'columns'
+                             and same_rows(expected, rows) and len(builds) == 2, str(builds))
+        db_pool.get_pool(self.db_path).close_all()
+
+    def test_fallback(self):
+        print("\n🧪 Testing: fallback without numpy")
+        rows, engine = traced_query(GROUPED, self.db_path)
+        self.log_test_result("Without numpy every query runs on SQLite",
+                             column_store.open_column_store(self.db_path) is None and engine is None
+                             and rows == self.conn.execute(GROUPED).fetchall())
+
+    def run_all_tests(self):
+        print("\n🏈 Column Store Test Suite")
+        print("=" * 60)
+        try:
+            if column_store.load_numpy() is None:
+                print("⚠️ numpy is not installed; only the SQLite fallback is tested")
+                self.test_fallback()
+            else:
+                self.test_export()
+                self.test_queries()
+                self.test_routing()
+        finally:
+            self.conn.close()
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = ColumnStoreTestSuite()
+    suite.run_all_tests()
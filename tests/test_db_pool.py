@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Test suite for the pooled read-only SQLite connections (db_pool.py)
+Runs offline against the synthetic play table in tests/pbp_fixture.py
+"""
+
+import sys
+import os
+import gc
+import shutil
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbp_fixture import create_sample_pbp
+from db_pool import AgentConnection, ReadOnlyConnectionPool, agent_sql, get_pool, install_agent_connections
+
+COUNT_SQL = "SELECT COUNT(*) FROM nflfastR_pbp"
+
+
+def open_fds():
+    """Open file descriptors of this process, or None where /proc isn't available."""
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        return None
+
+
+class DBPoolTestSuite:
+    def __init__(self):
+        print("🔧 Initializing DB Pool Test Suite...")
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, 'pbp_db')
+        conn = sqlite3.connect(self.db_path)
+        create_sample_pbp(conn)
+        conn.commit()
+        self.plays = conn.execute(COUNT_SQL).fetchone()[0]
+        conn.close()
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 DB POOL TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All DB pool tests passed successfully!")
+        print(f"{'='*60}")
+
+    def test_per_thread(self):
+        print("\n🧪 Testing: one connection per thread")
+        pool = ReadOnlyConnectionPool(self.db_path, column_store=False)
+        conn = pool.connection()
+        self.log_test_result("A thread reuses its read-only connection",
+                             pool.connection() is conn and conn.execute(COUNT_SQL).fetchone()[0] == self.plays
+                             and conn.execute("PRAGMA query_only").fetchone()[0] == 1 and len(pool) == 1)
+        others = []
+        thread = threading.Thread(target=lambda: others.append(pool.connection()))
+        thread.start()
+        thread.join()
+        self.log_test_result("Another thread gets its own connection", others and others[0] is not conn)
+        others.clear()
+        pool.close_all()
+
+    def test_short_lived_threads(self):
+        print("\n🧪 Testing: connections of finished threads are closed")
+        pool = ReadOnlyConnectionPool(self.db_path, column_store=False)
+        fds_before = open_fds()
+        results = []
+        for _ in range(200):
+            # A fresh executor per request, as callers outside pipeline.py may do
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [executor.submit(lambda: pool.connection().execute(COUNT_SQL).fetchone()[0])
+                           for _ in range(2)]
+                results.extend(future.result() for future in futures)
+        gc.collect()
+        fds_after = open_fds()
+        self.log_test_result("200 requests on short-lived threads leave no connections or file descriptors open",
+                             results == [self.plays] * 400 and len(pool) == 0
+                             and (fds_before is None or fds_after - fds_before <= 2),
+                             f"connections held: {len(pool)}, fds {fds_before} -> {fds_after}")
+
+        executor = ThreadPoolExecutor(max_workers=4)
+        for _ in range(200):
+            executor.submit(lambda: pool.connection().execute(COUNT_SQL).fetchone()).result()
+        self.log_test_result("A long-lived executor keeps at most one connection per worker thread",
+                             1 <= len(pool) <= 4, f"connections held: {len(pool)}")
+        executor.shutdown()
+        gc.collect()
+        self.log_test_result("Its connections are closed once the executor shuts down", len(pool) == 0,
+                             f"connections held: {len(pool)}")
+
+    def test_close_all(self):
+        print("\n🧪 Testing: close_all")
+        pool = ReadOnlyConnectionPool(self.db_path, column_store=False)
+        conn = pool.connection()
+        pool.close_all()
+        try:
+            conn.execute(COUNT_SQL)
+            closed = False
+        except sqlite3.ProgrammingError:
+            closed = True
+        reopened = pool.connection()
+        self.log_test_result("close_all closes the connections and the next query reopens one",
+                             closed and reopened is not conn and reopened.execute(COUNT_SQL).fetchone()[0] == self.plays)
+        pool.close_all()
+
+    def test_agent_connections(self):
+        print("\n🧪 Testing: connections the agent opens itself")
+        install_agent_connections()
+        pool = get_pool(self.db_path)
+        with agent_sql():
+            conn = sqlite3.connect(self.db_path)
+            plays = conn.execute(COUNT_SQL).fetchone()[0]
+            conn.row_factory = sqlite3.Row
+            conn.close()
+            again = sqlite3.connect(self.db_path)
+            self.log_test_result("The agent's connect() gets the thread's pooled connection back after close()",
+                                 isinstance(conn, AgentConnection) and again is conn and plays == self.plays
+                                 and again.row_factory is None and again.execute(COUNT_SQL).fetchone()[0] == self.plays)
+            self.log_test_result("It is read-only and tuned like the pool's own",
+                                 again.execute("PRAGMA query_only").fetchone()[0] == 1
+                                 and again.execute("PRAGMA cache_size").fetchone()[0] == -pool.cache_size_kb)
+            try:
+                again.execute("DELETE FROM nflfastR_pbp")
+                refused = False
+            except sqlite3.OperationalError:
+                refused = True
+            self.log_test_result("Writes are refused", refused)
+
+            others = []
+
+            def connect():
+                with agent_sql():
+                    others.append(sqlite3.connect(self.db_path))
+            thread = threading.Thread(target=connect)
+            thread.start()
+            thread.join()
+            memory = sqlite3.connect(':memory:')
+            self.log_test_result("Other threads get their own; other targets are opened as asked",
+                                 others and others[0] is not conn and isinstance(others[0], AgentConnection)
+                                 and not isinstance(memory, AgentConnection))
+            others.clear()
+            memory.close()
+        outside = sqlite3.connect(self.db_path)
+        self.log_test_result("Connections opened outside the agent are plain", type(outside) is sqlite3.Connection)
+        outside.close()
+        pool.close_all()
+
+    def run_all_tests(self):
+        print("\n🏈 DB Pool Test Suite")
+        print("=" * 60)
+        try:
+            self.test_per_thread()
+            self.test_short_lived_threads()
+            self.test_close_all()
+            self.test_agent_connections()
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = DBPoolTestSuite()
+    suite.run_all_tests()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test suite for request-scoped debug logs (debug_log.py)
+Runs offline: concurrent requests go through the pipeline with the scripted
+agent from test_pipeline.py
+"""
+
+import sys
+import os
+import time
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pipeline
+from debug_log import RequestLog, capturing, get_debug_logs
+from progress import QueryProgress
+from test_pipeline import ScriptedAgent
+
+
+class ChattyAgent(ScriptedAgent):
+    """Prints which question each branch is working on, as the real agent does."""
+
+    def _run_database_query(self, query):
+        print(f"🗄️ database branch: {query}")
+        time.sleep(0.05)
+        return f"Database answer to {query}", None
+
+    def _run_web_search(self, query):
+        print(f"🌐 web branch: {query}")
+        time.sleep(0.05)
+        return f"Web answer to {query}", None
+
+
+class DebugLogTestSuite:
+    def __init__(self):
+        print("🔧 Initializing Debug Log Test Suite...")
+        pipeline._agent = ChattyAgent()
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 DEBUG LOG TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All debug log tests passed successfully!")
+        print(f"{'='*60}")
+
+    def test_ring_buffer(self):
+        print("\n🧪 Testing: bounded log buffer")
+        log = RequestLog(max_lines=3, max_line_chars=20)
+        log.write("one\ntwo\nthree\n")
+        log.write("four\nfi")
+        log.write("ve\n" + "x" * 50 + "\n")
+        lines = log.text().splitlines()
+        self.log_test_result("Only the most recent lines are kept",
+                             lines[0] == "... 3 earlier lines dropped ..." and lines[1:3] == ["four", "five"],
+                             str(lines))
+        self.log_test_result("Long lines are truncated", lines[3].startswith("x" * 20 + " ... [30 chars"),
+                             lines[3])
+
+    def test_concurrent_requests(self):
+        print("\n🧪 Testing: concurrent requests keep separate logs")
+        questions = [f"Who led the league in rushing in {season}?" for season in (2021, 2022, 2023, 2024)]
+        logs = {}
+
+        def ask(question):
+            with capturing() as log:
+                pipeline.run_query_hybrid(question)
+                logs[question] = (log, get_debug_logs())
+
+        threads = [threading.Thread(target=ask, args=(question,)) for question in questions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        own = all(f"database branch: {q}" in logs[q][0].text() and f"web branch: {q}" in logs[q][0].text()
+                  for q in questions)
+        foreign = [q for q in questions for other in questions
+                   if other != q and other in logs[q][0].text()]
+        self.log_test_result("Branch-thread output lands in its own request's log", own)
+        self.log_test_result("No request sees another request's output", not foreign, str(foreign[:2]))
+        self.log_test_result("get_debug_logs reads the current request's log",
+                             all(text == log.text() for log, text in logs.values()))
+        self.log_test_result("Nothing is captured outside a request", get_debug_logs() == '')
+
+    def test_query_progress(self):
+        print("\n🧪 Testing: QueryProgress carries the log to its worker")
+        with capturing() as log:
+            progress = QueryProgress(pipeline.run_query_hybrid, "Who won Super Bowl LVIII?")
+        stages = [event.stage for event in progress]
+        self.log_test_result("Worker thread output is captured",
+                             "database branch: Who won Super Bowl LVIII?" in log.text() and 'done' in stages)
+
+    def run_all_tests(self):
+        print("\n🏈 Debug Log Test Suite")
+        print("=" * 60)
+        self.test_ring_buffer()
+        self.test_concurrent_requests()
+        self.test_query_progress()
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = DebugLogTestSuite()
+    suite.run_all_tests()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Test suite for SQL workload capture (sql_workload.py, db_pool.install_agent_connections)
+and the index advisor (util/index_advisor.py)
+Runs offline against the synthetic play table in tests/pbp_fixture.py
+"""
+
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbp_fixture import COLUMN_NAMES, create_sample_pbp
+import db_pool
+from partitioning import HOT_TABLE
+from util.partition_pbp import partition
+from sql_workload import WORKLOAD_LOG_ENV, load_workload
+from util.index_advisor import analyze_statement, create_statement, explain, propose_indexes, scans_table
+
+TEAM_RUSHING_SQL = ("SELECT posteam, SUM(rushing_yards) FROM nflfastR_pbp "
+                    "WHERE season = 2024 AND season_type = 'REG' GROUP BY posteam")
+EARLY_WEEKS_SQL = "SELECT COUNT(*) FROM nflfastR_pbp WHERE season = 2024 AND week BETWEEN 1 AND 4"
+TEAM_PASSERS_SQL = ("SELECT passer_player_name, SUM(passing_yards) FROM nflfastR_pbp "
+                    "WHERE season = 2024 AND season_type = 'REG' AND posteam = 'KC' GROUP BY passer_player_name")
+ALL_PLAYS_SQL = "SELECT COUNT(*) FROM nflfastR_pbp"
+ALIASED_SQL = ("SELECT p.posteam, COUNT(*) FROM nflfastR_pbp AS p "
+               "WHERE p.play_type = 'pass' GROUP BY p.posteam")
+# Reads wpa and qtr, which the partitioned test database keeps cold
+COLD_SQL = "SELECT game_id, MAX(wpa) FROM nflfastR_pbp WHERE season = 2024 AND qtr = 4 GROUP BY game_id"
+
+
+class ScriptedSQLAgent:
+    """Runs its 'generated' SQL on a connection it opens itself, like NFLStatAgent."""
+
+    def __init__(self, db_path, sql):
+        self.db_path = db_path
+        self.sql = sql
+
+    def _run_database_query(self, question):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(self.sql[question]).fetchall()
+        finally:
+            conn.close()
+        return f"{rows[0][0]}", None
+
+
+class IndexAdvisorTestSuite:
+    def __init__(self):
+        print("🔧 Initializing Index Advisor Test Suite...")
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, 'pbp_db')
+        self.workload_path = os.path.join(self.directory, 'logs', 'sql_workload.jsonl')
+        conn = sqlite3.connect(self.db_path)
+        create_sample_pbp(conn)
+        conn.close()
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 INDEX ADVISOR TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All index advisor tests passed successfully!")
+        print(f"{'='*60}")
+
+    def test_analysis(self):
+        print("\n🧪 Testing: statement analysis")
+        info = analyze_statement(TEAM_PASSERS_SQL + " ORDER BY 2 DESC LIMIT 5", set(COLUMN_NAMES))
+        self.log_test_result("Filter, group and referenced columns are classified",
+                             info['equality'] == ['season', 'season_type', 'posteam'] and info['range'] == []
+                             and info['group_by'] == ['passer_player_name']
+                             and set(info['referenced']) == {'season', 'season_type', 'posteam',
+                                                             'passer_player_name', 'passing_yards'}, str(info))
+        info = analyze_statement(EARLY_WEEKS_SQL, set(COLUMN_NAMES))
+        self.log_test_result("BETWEEN is a range predicate", info['equality'] == ['season'] and info['range'] == ['week'],
+                             str(info))
+
+    def test_capture(self):
+        print("\n🧪 Testing: workload capture")
+        os.environ[WORKLOAD_LOG_ENV] = self.workload_path
+        try:
+            # Pooled queries (templates, cached queries) are recorded by the pool
+            for _ in range(3):
+                db_pool.execute_query(TEAM_RUSHING_SQL, db_path=self.db_path)
+            db_pool.execute_query(ALL_PLAYS_SQL, db_path=self.db_path)
+
+            # LLM-generated SQL runs on the agent's own connections
+            agent = ScriptedSQLAgent(self.db_path, {'early': EARLY_WEEKS_SQL, 'passers': TEAM_PASSERS_SQL})
+            db_pool.install_agent_connections(agent)
+            for question in ('early', 'early', 'passers'):
+                agent._run_database_query(question)
+            outside = sqlite3.connect(self.db_path)
+            outside.execute("SELECT MAX(week) FROM nflfastR_pbp").fetchall()
+            outside.close()
+        finally:
+            os.environ.pop(WORKLOAD_LOG_ENV, None)
+            db_pool.get_pool(self.db_path).close_all()
+
+        self.workload = load_workload(self.workload_path)
+        counts = dict(self.workload)
+        self.log_test_result("Pooled queries are recorded with their counts",
+                             counts.get(TEAM_RUSHING_SQL) == 3 and counts.get(ALL_PLAYS_SQL) == 1, str(counts))
+        self.log_test_result("SQL the agent runs on its own connections is recorded",
+                             counts.get(EARLY_WEEKS_SQL) == 2 and counts.get(TEAM_PASSERS_SQL) == 1, str(counts))
+        self.log_test_result("Connections opened outside the agent's database query are not",
+                             not any('MAX(week)' in sql for sql in counts), str(list(counts)))
+
+    def test_advisor(self):
+        print("\n🧪 Testing: index proposals for the recorded workload")
+        conn = sqlite3.connect(self.db_path)
+        try:
+            proposals, report = propose_indexes(self.workload, conn)
+            expected = {
+                ('season', 'season_type', 'posteam', 'rushing_yards'): 3,
+                ('season', 'week'): 2,
+                ('season', 'season_type', 'posteam', 'passer_player_name', 'passing_yards'): 1,
+            }
+            self.log_test_result("Equality columns lead by workload frequency, then a range column, made covering",
+                                 proposals == expected, str(proposals))
+            statuses = {sql: (status, key) for sql, status, key in report}
+            self.log_test_result("An unfiltered count gets no index", statuses[ALL_PLAYS_SQL] == ('full scan', None),
+                                 str(statuses[ALL_PLAYS_SQL]))
+            # SQLite reports the scan by alias: SCAN p
+            plan = explain(conn, ALIASED_SQL)
+            aliased, _ = propose_indexes([(ALIASED_SQL, 1)], conn)
+            self.log_test_result("A full scan of the aliased table is found and indexed",
+                                 scans_table(plan, sql=ALIASED_SQL) and not scans_table(plan)
+                                 and aliased == {('play_type', 'posteam'): 1}, f"{plan} {aliased}")
+
+            for key in proposals:
+                conn.execute(create_statement(key))
+            still_scanning = [sql for sql in (TEAM_RUSHING_SQL, EARLY_WEEKS_SQL, TEAM_PASSERS_SQL)
+                              if scans_table(explain(conn, sql), sql=sql)]
+            self.log_test_result("After applying them the filtered statements no longer scan the table",
+                                 not still_scanning, str(still_scanning))
+            proposals, _ = propose_indexes(self.workload, conn)
+            self.log_test_result("A second run has nothing new to propose", proposals == {}, str(proposals))
+        finally:
+            conn.close()
+
+    def test_partitioned_advisor(self):
+        print("\n🧪 Testing: index proposals when nflfastR_pbp is the hot/cold view")
+        conn = sqlite3.connect(os.path.join(self.directory, 'partitioned_db'))
+        try:
+            create_sample_pbp(conn)
+            partition(conn, [name for name in COLUMN_NAMES if name not in ('qtr', 'wpa', 'desc')])
+            # The workload log holds SQL as it ran: routed to the hot table when it could be
+            workload = [(TEAM_RUSHING_SQL.replace('nflfastR_pbp', HOT_TABLE), 3), (EARLY_WEEKS_SQL, 2),
+                        (ALIASED_SQL.replace('nflfastR_pbp', HOT_TABLE), 1), (COLD_SQL, 1)]
+            proposals, _ = propose_indexes(workload, conn)
+            expected = {
+                ('season', 'season_type', 'posteam', 'rushing_yards'): 3,
+                ('season', 'week'): 2,
+                ('play_type', 'posteam'): 1,
+                ('season', 'game_id'): 1,
+            }
+            self.log_test_result("Scans of the hot table are found, through the view and by alias",
+                                 proposals == expected, str(proposals))
+            for key in proposals:
+                conn.execute(create_statement(key, HOT_TABLE))
+            proposals, _ = propose_indexes(workload, conn)
+            self.log_test_result("Indexes on the hot table serve the workload", proposals == {}, str(proposals))
+        finally:
+            conn.close()
+
+    def run_all_tests(self):
+        print("\n🏈 Index Advisor Test Suite")
+        print("=" * 60)
+        try:
+            self.test_analysis()
+            self.test_capture()
+            self.test_advisor()
+            self.test_partitioned_advisor()
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = IndexAdvisorTestSuite()
+    suite.run_all_tests()
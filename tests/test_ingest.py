@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test suite for incremental play-by-play ingestion (util/ingest_pbp.py)
+Runs offline: loads CSV drops of the synthetic plays in tests/pbp_fixture.py
+into a temporary database
+"""
+
+import sys
+import os
+import csv
+import shutil
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbp_fixture import COLUMN_NAMES, create_sample_pbp, generate_plays, sample_database
+from query_cache import database_version
+from util.build_rollups import refresh_rollups
+from util.ingest_pbp import IngestError, ingest
+
+
+def write_csv(path, plays):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMN_NAMES)
+        for play in plays:
+            writer.writerow(['NA' if play[name] is None else play[name] for name in COLUMN_NAMES])
+    return path
+
+
+def rows(conn, sql):
+    return sorted(conn.execute(sql).fetchall(), key=repr)
+
+
+class IngestTestSuite:
+    def __init__(self):
+        print("🔧 Initializing Ingest Test Suite...")
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, 'pbp_db')
+        self.plays = generate_plays()
+        # The database holds everything but week 2 of 2024
+        conn = sqlite3.connect(self.db_path)
+        create_sample_pbp(conn, [play for play in self.plays
+                                 if not (play['season'] == 2024 and play['week'] == 2)])
+        refresh_rollups(conn)
+        conn.close()
+        # Reference: every play, rolled up from scratch
+        self.expected = sample_database()
+        refresh_rollups(self.expected)
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 INGEST TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All ingest tests passed successfully!")
+        print(f"{'='*60}")
+
+    def test_weekly_upsert(self):
+        print("\n🧪 Testing: weekly upsert")
+        conn = sqlite3.connect(self.db_path)
+        season_2023 = rows(conn, "SELECT * FROM team_season WHERE season = 2023")
+        conn.close()
+        version = database_version(self.db_path)
+
+        # The drop re-sends week 1 of 2024 and adds week 2; 2023 plays are filtered out
+        drop = write_csv(os.path.join(self.directory, 'drop.csv'),
+                         [play for play in self.plays if play['season'] == 2024 or play['week'] == 1])
+        summary = ingest(self.db_path, [drop], seasons=[2024], weeks=[1, 2], batch_size=10)
+        week_2 = sum(1 for play in self.plays if play['season'] == 2024 and play['week'] == 2)
+        week_1 = sum(1 for play in self.plays if play['season'] == 2024 and play['week'] == 1)
+        self.log_test_result("New plays are inserted and re-sent plays updated",
+                             summary['inserted'] == week_2 and summary['updated'] == week_1, str(summary))
+
+        conn = sqlite3.connect(self.db_path)
+        count, keys = conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT game_id || '-' || play_id) FROM nflfastR_pbp").fetchone()
+        self.log_test_result("Every play is stored once", count == keys == len(self.plays), f"{count}/{keys}")
+        for table in ('games', 'team_season', 'player_season'):
+            self.log_test_result(f"{table} matches a full rebuild",
+                                 rows(conn, f"SELECT * FROM {table}") == rows(self.expected, f"SELECT * FROM {table}"))
+        self.log_test_result("Seasons outside the drop are left alone",
+                             rows(conn, "SELECT * FROM team_season WHERE season = 2023") == season_2023)
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        conn.close()
+        self.log_test_result("The previous journal mode is restored", journal_mode == 'delete', journal_mode)
+        self.log_test_result("The data version is bumped",
+                             summary['data_version']['version'] == 1 and database_version(self.db_path) != version,
+                             str(summary['data_version']))
+
+    def test_corrections(self):
+        print("\n🧪 Testing: corrected plays and re-runs")
+        corrected = [dict(play) for play in self.plays if play['game_id'] == '2024_01_BAL_KC']
+        corrected[0]['yards_gained'] = 99.0
+        corrected = corrected[:-2]
+        drop = write_csv(os.path.join(self.directory, 'correction.csv'), corrected)
+        summary = ingest(self.db_path, [drop], replace_games=True)
+        conn = sqlite3.connect(self.db_path)
+        plays = conn.execute("SELECT play_id, yards_gained FROM nflfastR_pbp WHERE game_id = '2024_01_BAL_KC' "
+                             "ORDER BY play_id").fetchall()
+        conn.close()
+        self.log_test_result("A replaced game keeps only the drop's plays",
+                             len(plays) == len(corrected) and plays[0][1] == 99.0
+                             and summary['deleted'] == len(corrected) + 2, str(summary))
+
+        summary = ingest(self.db_path, [drop])
+        self.log_test_result("Re-running a drop only updates",
+                             summary['inserted'] == 0 and summary['updated'] == len(corrected)
+                             and summary['data_version']['version'] == 3, str(summary))
+        try:
+            ingest(self.db_path, [drop], weeks=[17])
+            raised = False
+        except IngestError:
+            raised = True
+        self.log_test_result("A drop with no matching plays is refused", raised)
+
+    def test_new_table_types(self):
+        print("\n🧪 Testing: column types of a table created from a CSV drop")
+        db_path = os.path.join(self.directory, 'new_pbp_db')
+        drop = write_csv(os.path.join(self.directory, 'all.csv'), self.plays)
+        ingest(db_path, [drop], batch_size=50)
+        conn = sqlite3.connect(db_path)
+        types = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(nflfastR_pbp)")}
+        self.log_test_result("Ids, season and week are INTEGER, stats REAL and names TEXT",
+                             types['season'] == types['week'] == types['play_id'] == 'INTEGER'
+                             and types['yards_gained'] == types['epa'] == 'REAL'
+                             and types['posteam'] == types['game_id'] == 'TEXT', str(types))
+        self.log_test_result("A stat missing on the first play isn't made TEXT",
+                             types['passing_yards'] == types['air_yards'] == 'REAL', str(types))
+        for sql, expected in [
+            ("SELECT COUNT(*) FROM nflfastR_pbp WHERE yards_gained > 5",
+             sum(1 for play in self.plays if play['yards_gained'] > 5)),
+            ("SELECT COUNT(*) FROM nflfastR_pbp WHERE passing_yards > 10",
+             sum(1 for play in self.plays if (play['passing_yards'] or 0) > 10)),
+            ("SELECT COUNT(*) FROM nflfastR_pbp WHERE season = 2024 AND week >= 2",
+             sum(1 for play in self.plays if play['season'] == 2024 and play['week'] >= 2)),
+        ]:
+            count = conn.execute(sql).fetchone()[0]
+            self.log_test_result(f"Numeric comparison works: {sql.split('WHERE ')[1]}",
+                                 count == expected, f"{count} rows, expected {expected}")
+        conn.close()
+
+    def run_all_tests(self):
+        print("\n🏈 Ingest Test Suite")
+        print("=" * 60)
+        try:
+            self.test_weekly_upsert()
+            self.test_corrections()
+            self.test_new_table_types()
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = IngestTestSuite()
+    suite.run_all_tests()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test suite for the compiled keyword pre-screen (keyword_screen.py)
+Runs offline against the tests/test_filtering_fix.py question set
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import re
+from keyword_screen import KeywordScreen, _trie_pattern
+from bench.questions import FILTERING_SHOULD_PASS, FILTERING_SHOULD_BE_FILTERED
+
+
+class KeywordScreenTestSuite:
+    def __init__(self):
+        print("🔧 Initializing Keyword Screen Test Suite...")
+        self.screen = KeywordScreen()
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 KEYWORD SCREEN TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All keyword screen tests passed successfully!")
+        print(f"{'='*60}")
+
+    def test_trie_pattern(self):
+        print("\n🧪 Testing: trie-factored pattern")
+        terms = ['pass', 'passer', 'passers', 'passing', 'punt', 'red zone']
+        pattern = re.compile(rf"(?<!\w)(?:{_trie_pattern(terms)})(?!\w)")
+        found = [m.group(0) for m in pattern.finditer("passers passing punt punter red zone pass")]
+        self.log_test_result("Matches every term and only whole terms",
+                             found == ['passers', 'passing', 'punt', 'red zone', 'pass'], str(found))
+
+    def test_filtering_questions(self):
+        print("\n🧪 Testing: filtering question set")
+        for question in FILTERING_SHOULD_PASS:
+            is_relevant, reason, _ = self.screen(question)
+            self.log_test_result(f"Not filtered: {question}", is_relevant, reason)
+        for question in FILTERING_SHOULD_BE_FILTERED:
+            is_relevant, reason, is_conclusive = self.screen(question)
+            self.log_test_result(f"Filtered: {question}", not is_relevant and is_conclusive, reason)
+
+    def test_vocabulary(self):
+        print("\n🧪 Testing: vocabulary and verdicts")
+        cases = [
+            ("How many yards did Josh Allen throw in 2023?", (True, True)),
+            ("Chiefs vs Bills in the playoffs", (True, True)),
+            ("How many rushing yards did James Cook have?", (True, True)),
+            ("Did the Kansas City Chiefs win?", (True, True)),
+            ("Who has the most wins this year?", (True, True)),
+            ("What team scored the most points in the 2024 season?", (True, True)),
+            ("What is the most common play type in the 2023 season?", (True, True)),
+            ("How did KC do in 2023?", (True, True)),
+            ("Is the NFL or the NBA more popular?", (True, False)),
+            ("Is there no way to cook lasagna in ten minutes?", (False, True)),
+        ]
+        for question, expected in cases:
+            is_relevant, reason, is_conclusive = self.screen(question)
+            self.log_test_result(f"Verdict: {question}", (is_relevant, is_conclusive) == expected, reason)
+        nfl, _ = self.screen.matches("Did NO beat SF, or did no one score?")
+        self.log_test_result("Team abbreviations only match in upper case", nfl == ['NO', 'SF'], str(nfl))
+        screen = KeywordScreen(nfl_terms=['zeller vance'], non_nfl_terms=[])
+        self.log_test_result("Extra roster names are recognised", screen("how did zeller vance play?")[2])
+
+    def run_all_tests(self):
+        print("\n🏈 Keyword Screen Test Suite")
+        print("=" * 60)
+        self.test_trie_pattern()
+        self.test_filtering_questions()
+        self.test_vocabulary()
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = KeywordScreenTestSuite()
+    suite.run_all_tests()
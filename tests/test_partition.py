@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Test suite for the hot/cold split of nflfastR_pbp (partitioning.py, util/partition_pbp.py)
+Runs offline against the synthetic play table in tests/pbp_fixture.py
+"""
+
+import sys
+import os
+import csv
+import shutil
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import db_pool
+from pbp_fixture import COLUMN_NAMES, create_sample_pbp, generate_plays
+from partitioning import HOT_TABLE, COLD_TABLE, partition_layout, route_sql
+from util.build_rollups import refresh_rollups
+from util.ingest_pbp import ingest
+from util.partition_pbp import partition, merge
+
+# Everything the test-suite queries below need; desc, qtr, down, drive, air_yards and wpa go cold
+HOT = ['play_id', 'game_id', 'season', 'season_type', 'week', 'game_date', 'home_team', 'away_team',
+       'posteam', 'defteam', 'play_type', 'yardline_100', 'yards_gained', 'epa', 'total_home_score',
+       'total_away_score', 'spread_line', 'total_line', 'touchdown', 'pass_touchdown', 'rush_touchdown',
+       'complete_pass', 'incomplete_pass', 'pass_attempt', 'rush_attempt', 'interception', 'sack',
+       'passer_player_id', 'passer_player_name', 'passing_yards', 'receiver_player_id',
+       'receiver_player_name', 'receiving_yards', 'rusher_player_id', 'rusher_player_name', 'rushing_yards']
+
+# Direct queries from tests/test_sql_agent.py and sql_templates.py
+QUERIES = [
+    """WITH final_scores AS (
+           SELECT game_id, away_team, home_team, spread_line,
+                  MAX(total_away_score) as final_away_score, MAX(total_home_score) as final_home_score
+           FROM nflfastR_pbp WHERE season=2024 AND week BETWEEN 1 AND 18 GROUP BY game_id)
+       SELECT away_team, COUNT(DISTINCT game_id) as covers FROM final_scores
+       WHERE spread_line > 0 AND final_away_score + spread_line > final_home_score
+       GROUP BY away_team ORDER BY covers DESC, away_team""",
+    """SELECT posteam, COUNT(*), SUM(CASE WHEN touchdown = 1 THEN 1 ELSE 0 END)
+       FROM nflfastR_pbp WHERE season=2024 AND yardline_100 <= 20 AND play_type IN ('pass', 'run')
+       GROUP BY posteam ORDER BY posteam""",
+    "SELECT play_type, COUNT(*) FROM nflfastR_pbp WHERE season = 2023 GROUP BY play_type ORDER BY 2 DESC",
+]
+COLD_QUERY = "SELECT game_id, MAX(wpa) FROM nflfastR_pbp WHERE qtr = 4 GROUP BY game_id ORDER BY game_id"
+
+
+def write_csv(path, plays):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMN_NAMES)
+        for play in plays:
+            writer.writerow(['NA' if play[name] is None else play[name] for name in COLUMN_NAMES])
+    return path
+
+
+class PartitionTestSuite:
+    def __init__(self):
+        print("🔧 Initializing Partition Test Suite...")
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, 'pbp_db')
+        self.plays = generate_plays()
+        conn = sqlite3.connect(self.db_path)
+        create_sample_pbp(conn)
+        refresh_rollups(conn)
+        conn.execute('CREATE INDEX idx_pbp_season_posteam ON nflfastR_pbp(season, posteam)')
+        conn.execute('CREATE INDEX idx_pbp_season_qtr ON nflfastR_pbp(season, qtr)')
+        conn.commit()
+        self.before = {sql: conn.execute(sql).fetchall() for sql in QUERIES + [COLD_QUERY]}
+        self.rows_before = conn.execute('SELECT rowid, * FROM nflfastR_pbp ORDER BY rowid').fetchall()
+        self.rollups_before = conn.execute('SELECT * FROM team_season ORDER BY season, team').fetchall()
+        self.conn = conn
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 PARTITION TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All partition tests passed successfully!")
+        print(f"{'='*60}")
+
+    def test_partition(self):
+        print("\n🧪 Testing: hot/cold split behind a view")
+        result = partition(self.conn, HOT)
+        layout = partition_layout(self.conn)
+        self.log_test_result("Columns are split", layout is not None and 'desc' in layout.cold
+                             and 'epa' in layout.hot, repr(layout))
+        rows = self.conn.execute('SELECT * FROM nflfastR_pbp').fetchall()
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(nflfastR_pbp)')]
+        self.log_test_result("The view returns every play with the original columns in order",
+                             columns == COLUMN_NAMES and rows == [row[1:] for row in self.rows_before])
+        self.log_test_result("Single-side indexes are recreated, mixed ones dropped",
+                             result['indexes'] == ['idx_pbp_season_posteam']
+                             and result['dropped_indexes'] == ['idx_pbp_season_qtr'], str(result))
+        refresh_rollups(self.conn)
+        self.log_test_result("Rollups build from the view",
+                             self.conn.execute('SELECT * FROM team_season ORDER BY season, team').fetchall()
+                             == self.rollups_before)
+
+    def test_routing(self):
+        print("\n🧪 Testing: routing to the hot table")
+        layout = partition_layout(self.conn)
+        routed = [route_sql(sql, layout) for sql in QUERIES]
+        self.log_test_result("Hot-only test-suite queries read the hot table",
+                             all(HOT_TABLE in sql and 'nflfastR_pbp ' not in sql for sql in routed))
+        plans = [' '.join(row[-1] for row in self.conn.execute(f'EXPLAIN QUERY PLAN {sql}')) for sql in routed]
+        self.log_test_result("Routed plans never touch the cold table",
+                             not any(COLD_TABLE in plan for plan in plans), plans[0])
+        self.log_test_result("Routed queries return the same results",
+                             all(self.conn.execute(sql).fetchall() == self.before[original]
+                                 for sql, original in zip(routed, QUERIES)))
+        self.log_test_result("Cold columns and SELECT * stay on the view",
+                             route_sql(COLD_QUERY, layout) == COLD_QUERY
+                             and route_sql("SELECT * FROM nflfastR_pbp LIMIT 1", layout).endswith("nflfastR_pbp LIMIT 1")
+                             and route_sql('SELECT "desc" FROM nflfastR_pbp', layout).endswith("nflfastR_pbp")
+                             and HOT_TABLE in route_sql("SELECT COUNT(*) FROM nflfastR_pbp WHERE play_type = 'qtr'", layout))
+
+        pool = db_pool.get_pool(self.db_path)
+        columns, rows = db_pool.execute_query(COLD_QUERY, db_path=self.db_path)
+        _, hot_rows = db_pool.execute_query(QUERIES[1], db_path=self.db_path)
+        self.log_test_result("execute_query routes on a partitioned database",
+                             rows == self.before[COLD_QUERY] and hot_rows == self.before[QUERIES[1]]
+                             and pool._layout is not None)
+        pool.close_all()
+
+    def test_agent_routing(self):
+        print("\n🧪 Testing: routing of the agent's own SQL")
+        db_pool.install_agent_connections()
+        pool = db_pool.get_pool(self.db_path)
+        statements = []
+        try:
+            with db_pool.agent_sql():
+                conn = sqlite3.connect(self.db_path)
+                conn.set_trace_callback(statements.append)
+                hot_rows = conn.execute(QUERIES[1]).fetchall()
+                cursor = conn.cursor()
+                cursor.execute(COLD_QUERY)
+                columns = [description[0] for description in cursor.description]
+                cold_rows = cursor.fetchall()
+                conn.set_trace_callback(None)
+                conn.close()
+        finally:
+            pool.close_all()
+        # Leave out the pool's layout lookup
+        statements = [sql for sql in statements if 'sqlite_master' not in sql and not sql.startswith('PRAGMA')]
+        self.log_test_result("The agent's hot-only SQL runs on the hot table",
+                             hot_rows == self.before[QUERIES[1]] and HOT_TABLE in statements[0], statements[0])
+        self.log_test_result("The agent's SQL with a cold column stays on the view",
+                             cold_rows == self.before[COLD_QUERY] and statements[1] == COLD_QUERY
+                             and columns == ['game_id', 'MAX(wpa)'], str(columns))
+
+    def test_ingest_and_merge(self):
+        print("\n🧪 Testing: ingest into the split table and merge back")
+        play = dict(self.plays[0], desc='Corrected description', yards_gained=42.0)
+        new_play = dict(play, play_id=999.0, desc='New play')
+        drop = write_csv(os.path.join(self.directory, 'drop.csv'), [play, new_play])
+        summary = ingest(self.db_path, [drop])
+        self.conn.close()
+        self.conn = sqlite3.connect(self.db_path)
+        stored = self.conn.execute("SELECT play_id, yards_gained, desc FROM nflfastR_pbp WHERE game_id = ? "
+                                   "AND play_id IN (1, 999) ORDER BY play_id", (play['game_id'],)).fetchall()
+        self.log_test_result("Ingest upserts hot and cold columns",
+                             summary['inserted'] == 1 and summary['updated'] == 1
+                             and stored == [(1.0, 42.0, 'Corrected description'), (999.0, 42.0, 'New play')],
+                             str(stored))
+
+        result = merge(self.conn)
+        kinds = dict(self.conn.execute("SELECT name, type FROM sqlite_master "
+                                       "WHERE name IN ('nflfastR_pbp', 'nflfastR_pbp_hot')").fetchall())
+        rows = self.conn.execute('SELECT rowid, * FROM nflfastR_pbp WHERE play_id != 999 ORDER BY rowid').fetchall()
+        corrected = list(self.rows_before[0])
+        corrected[1 + COLUMN_NAMES.index('desc')] = 'Corrected description'
+        corrected[1 + COLUMN_NAMES.index('yards_gained')] = 42.0
+        expected = [tuple(corrected)] + self.rows_before[1:]
+        self.log_test_result("Merging rebuilds one table with the same rows and rowids",
+                             kinds == {'nflfastR_pbp': 'table'} and rows == expected
+                             and 'idx_pbp_season_posteam' in result['indexes'], str(kinds))
+
+    def run_all_tests(self):
+        print("\n🏈 Partition Test Suite")
+        print("=" * 60)
+        try:
+            self.test_partition()
+            self.test_routing()
+            self.test_agent_routing()
+            self.test_ingest_and_merge()
+        finally:
+            self.conn.close()
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = PartitionTestSuite()
+    suite.run_all_tests()
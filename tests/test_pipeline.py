@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Test suite for the hybrid query pipeline (pipeline.py)
+Runs offline: the agent's stage methods and the web search are replaced by
+scripted stand-ins so only the pipeline's own control flow is exercised
+"""
+
+import sys
+import os
+import time
+import asyncio
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pipeline
+from progress import QueryProgress
+from tracing import Trace
+from web_search import install_answer_streaming
+
+
+class ScriptedLLM:
+    """Streams a fixed answer a few characters at a time."""
+
+    def __init__(self, text, delay=0.0):
+        self.text = text
+        self.delay = delay
+        self.prompts = []
+
+    def stream(self, prompt):
+        self.prompts.append(prompt)
+        for i in range(0, len(self.text), 4):
+            time.sleep(self.delay)
+            yield self.text[i:i + 4]
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return self.text
+
+
+class ScriptedAgent:
+    """Stand-in for NFLStatAgent with canned stage results."""
+
+    # Results of the agent's own web search
+    search_results = [{'title': 'Super Bowl LVIII', 'href': 'https://example.com', 'body': 'KC 25, SF 22'}]
+
+    def __init__(self, relevant=True, conclusive=True, db_result=("KC had 4,183 passing yards", None),
+                 web_result=None, web_text="The Chiefs won the Super Bowl.",
+                 db_delay=0.0, web_delay=0.0, llm_choice="Database"):
+        self.relevant = relevant
+        self.conclusive = conclusive
+        self.db_result = db_result
+        self.web_result = web_result
+        self._web_llm = ScriptedLLM(web_text)
+        self.db_delay = db_delay
+        self.web_delay = web_delay
+        self.llm_choice = llm_choice
+        self.classifier_calls = 0
+        self.scoring_calls = 0
+
+    def _stage1_keyword_pre_screen(self, query):
+        return self.relevant, "scripted keyword screen", self.conclusive
+
+    def _stage2_llm_classifier(self, query):
+        self.classifier_calls += 1
+        return self.relevant, "scripted classifier"
+
+    def _run_database_query(self, query):
+        time.sleep(self.db_delay)
+        return self.db_result
+
+    def _run_web_search(self, query):
+        """Canned web_result if given, else an answer synthesized with its own prompt."""
+        time.sleep(self.web_delay)
+        if self.web_result is not None:
+            return self.web_result
+        if not self.search_results:
+            return None, "No web results found"
+        snippets = '\n'.join(result['body'] for result in self.search_results)
+        return self._web_llm.invoke(f"Agent web prompt\nResults:\n{snippets}\nQuestion: {query}"), None
+
+    def _score_answer(self, answer, error, source):
+        return 0 if error or not answer else len(answer)
+
+    def _llm_score_answers(self, query, db_answer, web_answer):
+        self.scoring_calls += 1
+        return self.llm_choice, "scripted rationale"
+
+
+class PipelineTestSuite:
+    def __init__(self):
+        print("🔧 Initializing Pipeline Test Suite...")
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 PIPELINE TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All pipeline tests passed successfully!")
+        print(f"{'='*60}")
+
+    def _use(self, agent):
+        pipeline._agent = install_answer_streaming(agent)
+        return agent
+
+    def test_blocking(self):
+        print("\n🧪 Testing: blocking answers")
+        self._use(ScriptedAgent())
+        answer, error, reasoning = pipeline.run_query_hybrid("Which team passed the most in 2023?", show_reasoning=True)
+        self.log_test_result("LLM scoring choice is returned", answer == "KC had 4,183 passing yards" and error is None,
+                             str(answer))
+        self.log_test_result("Reasoning lists the stages", reasoning and "Keyword screen" in reasoning
+                             and "Selected database answer" in reasoning, str(reasoning))
+
+        agent = self._use(ScriptedAgent(relevant=False, conclusive=False))
+        answer, error, reasoning = pipeline.run_query_hybrid("Best pasta recipe?")
+        self.log_test_result("Non-NFL question is refused after the classifier",
+                             answer == pipeline.NOT_NFL_ANSWER and agent.classifier_calls == 1 and reasoning is None)
+
+        self._use(ScriptedAgent(conclusive=False))
+        for _ in range(50):
+            pipeline.run_query_hybrid("Which team passed the most in 2023?")
+        branch_threads = [thread for thread in threading.enumerate() if thread.name.startswith('hybrid-branch')]
+        self.log_test_result("Requests share the branch threads (and their connections)",
+                             0 < len(branch_threads) <= pipeline.BRANCH_THREADS, str(len(branch_threads)))
+
+    def test_streaming(self):
+        print("\n🧪 Testing: streamed answers")
+        self._use(ScriptedAgent())
+        chunks, error, _ = pipeline.run_query_hybrid("Which team passed the most in 2023?", stream=True)
+        self.log_test_result("Database answer streams when the query succeeds",
+                             error is None and ''.join(chunks) == "KC had 4,183 passing yards")
+
+        agent = self._use(ScriptedAgent(db_result=(None, "no such column: foo")))
+        chunks, error, reasoning = pipeline.run_query_hybrid("Who won Super Bowl LVIII?", show_reasoning=True,
+                                                             stream=True)
+        pieces = list(chunks)
+        self.log_test_result("Web answer is synthesized token by token",
+                             len(pieces) > 1 and ''.join(pieces) == "The Chiefs won the Super Bowl.", str(pieces))
+        self.log_test_result("Reasoning names the streamed source", "Selected web answer" in reasoning, reasoning)
+        streamed_prompt = agent._web_llm.prompts[-1]
+        agent = self._use(ScriptedAgent(db_result=(None, "no such column: foo")))
+        answer, error, _ = pipeline.run_query_hybrid("Who won Super Bowl LVIII?")
+        self.log_test_result("The stream comes from the agent's own web search and prompt, as the blocking answer does",
+                             streamed_prompt.startswith("Agent web prompt") and "KC 25, SF 22" in streamed_prompt
+                             and agent._web_llm.prompts == [streamed_prompt]
+                             and answer == "The Chiefs won the Super Bowl.", streamed_prompt)
+
+        agent = self._use(ScriptedAgent(db_result=(None, "no such column: foo")))
+        agent._web_llm._client.delay = 0.05
+        start_time = time.perf_counter()
+        chunks, error, _ = pipeline.run_query_hybrid("Who won Super Bowl LVIII?", stream=True)
+        first_chunk = next(chunks)
+        first_chunk_seconds = time.perf_counter() - start_time
+        rest = ''.join(chunks)
+        total_seconds = time.perf_counter() - start_time
+        self.log_test_result("The first chunk arrives before the synthesis finishes",
+                             first_chunk + rest == "The Chiefs won the Super Bowl." and first_chunk_seconds < total_seconds / 2,
+                             f"first chunk {first_chunk_seconds:.2f}s of {total_seconds:.2f}s")
+
+        sources = {}
+        for choice in ("Database", "Web"):
+            for stream in (False, True):
+                agent = self._use(ScriptedAgent(llm_choice=choice))
+                trace = Trace("Which team passed the most in 2023?")
+                answer, error, _ = pipeline.run_query_hybrid("Which team passed the most in 2023?", stream=stream,
+                                                             trace=trace)
+                text = ''.join(answer) if stream else answer
+                sources[choice, stream] = (trace.root.attributes.get('source'), agent.scoring_calls, text)
+        self.log_test_result("Streaming and blocking answers go through scoring and pick the same source",
+                             all(sources[choice, False][:2] == sources[choice, True][:2] == (choice.lower(), 1)
+                                 for choice in ("Database", "Web"))
+                             and sources["Web", True][2] == "The Chiefs won the Super Bowl.", str(sources))
+
+        agent = self._use(ScriptedAgent(db_result=(None, "database unavailable")))
+        agent.search_results = []
+        chunks, error, _ = pipeline.run_query_hybrid("Who won Super Bowl LVIII?", stream=True)
+        self.log_test_result("Error is returned when both branches fail", chunks is None and error == "database unavailable",
+                             str(error))
+
+        self._use(ScriptedAgent(relevant=False))
+        chunks, error, _ = pipeline.run_query_hybrid("Best pasta recipe?", stream=True)
+        self.log_test_result("Refusal is streamed too", ''.join(chunks) == pipeline.NOT_NFL_ANSWER)
+
+    def test_progress(self):
+        print("\n🧪 Testing: stage progress events")
+        self._use(ScriptedAgent(conclusive=False))
+        events = []
+        pipeline.run_query_hybrid("Which team passed the most in 2023?", on_progress=events.append)
+        stages = [event.stage for event in events]
+        expected = {'keyword_screen', 'classifier', 'sql_generated', 'sql_executed', 'web_results', 'scoring', 'done'}
+        self.log_test_result("Every stage is reported", set(stages) == expected, str(stages))
+        self.log_test_result("Stages start with the screen and end with done",
+                             stages[:2] == ['keyword_screen', 'classifier'] and stages[-2:] == ['scoring', 'done'])
+        percents = [event.percent for event in events]
+        self.log_test_result("Progress never goes backwards", percents == sorted(percents) and percents[-1] == 100,
+                             str(percents))
+
+        self._use(ScriptedAgent(db_result=(None, "no such column: foo")))
+        progress = QueryProgress(pipeline.run_query_hybrid, "Who won Super Bowl LVIII?", stream=True)
+        stages = [event.stage for event in progress]
+        chunks, error, _ = progress.result
+        self.log_test_result("QueryProgress yields events then the result",
+                             'web_results' in stages and stages[-1] == 'done'
+                             and ''.join(chunks) == "The Chiefs won the Super Bowl.", str(stages))
+
+    def test_async(self):
+        print("\n🧪 Testing: async entry point")
+        self._use(ScriptedAgent(web_delay=2.0))
+        start_time = time.perf_counter()
+        answer, error, reasoning = asyncio.run(pipeline.run_query_hybrid_async(
+            "Which team passed the most in 2023?", show_reasoning=True))
+        elapsed = time.perf_counter() - start_time
+        self.log_test_result("Confident database answer doesn't wait for the web branch",
+                             answer == "KC had 4,183 passing yards" and elapsed < 1.0, f"{elapsed:.2f}s")
+        self.log_test_result("Reasoning names the confidence threshold", "confidence threshold" in reasoning, reasoning)
+
+        self._use(ScriptedAgent(db_result=("KC", None), web_result=("Kansas City had the most passing yards", None),
+                                web_delay=0.2))
+        answer, error, _ = asyncio.run(pipeline.run_query_hybrid_async(
+            "Which team passed the most in 2023?", confidence_threshold=100))
+        self.log_test_result("Below the threshold both answers are scored", answer == "KC", str(answer))
+
+        self._use(ScriptedAgent(db_result=("KC", None), web_delay=2.0))
+        start_time = time.perf_counter()
+        answer, error, reasoning = asyncio.run(pipeline.run_query_hybrid_async(
+            "Which team passed the most in 2023?", show_reasoning=True, deadline=0.3))
+        elapsed = time.perf_counter() - start_time
+        self.log_test_result("Deadline returns the best finished answer",
+                             answer == "KC" and elapsed < 1.0 and "Deadline reached" in reasoning,
+                             f"{elapsed:.2f}s: {reasoning}")
+
+    def run_all_tests(self):
+        print("\n🏈 Pipeline Test Suite")
+        print("=" * 60)
+        self.test_blocking()
+        self.test_streaming()
+        self.test_progress()
+        self.test_async()
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = PipelineTestSuite()
+    suite.run_all_tests()
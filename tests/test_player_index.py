@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Test suite for player name resolution (player_index.py, util/build_player_index.py)
+Runs offline against the synthetic play table in tests/pbp_fixture.py
+"""
+
+import sys
+import os
+import csv
+import shutil
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('QUERY_CACHE_DISABLED', '1')
+
+from pbp_fixture import COLUMN_NAMES, create_sample_pbp, generate_plays
+from player_index import NameTrie, PlayerIndex, get_player_index, install_player_index
+from sql_templates import TemplateFastPath, match_template
+from tracing import Trace
+from util.build_player_index import build_player_index, create_id_indexes
+from util.build_rollups import refresh_rollups
+from util.ingest_pbp import ingest
+
+MAHOMES, ALLEN, KELCE = '00-0033873', '00-0034857', '00-0030506'
+
+
+class ScriptedAgent:
+    """Stands in for NFLStatAgent's LLM SQL generation and records what it was asked."""
+
+    def __init__(self):
+        self.questions = []
+
+    def _run_database_query(self, question):
+        self.questions.append(question)
+        return "LLM answer", None
+
+
+class PlayerIndexTestSuite:
+    def __init__(self):
+        print("🔧 Initializing Player Index Test Suite...")
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, 'pbp_db')
+        self.plays = generate_plays()
+        conn = sqlite3.connect(self.db_path)
+        create_sample_pbp(conn)
+        refresh_rollups(conn)
+        conn.close()
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 PLAYER INDEX TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All player index tests passed successfully!")
+        print(f"{'='*60}")
+
+    def test_build(self):
+        print("\n🧪 Testing: building the index")
+        self.log_test_result("Without a built index nothing is resolved", get_player_index(self.db_path) is None)
+        index = build_player_index(self.db_path)
+        expected = {play[f'{role}_player_id'] for play in self.plays for role in ('passer', 'rusher', 'receiver')}
+        expected.discard(None)
+        mahomes = index['players'].get(MAHOMES, {})
+        self.log_test_result("Every passer, rusher and receiver is indexed with names, teams and plays by season",
+                             set(index['players']) == expected and mahomes.get('name') == 'P.Mahomes'
+                             and mahomes['seasons']['2024']['teams'] == ['KC'] and mahomes['seasons']['2024']['passer'] > 0,
+                             str(mahomes))
+        conn = sqlite3.connect(self.db_path)
+        names = create_id_indexes(conn)
+        plan = ' '.join(row[-1] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT SUM(passing_yards) FROM nflfastR_pbp WHERE passer_player_id = ?", (MAHOMES,)))
+        conn.close()
+        self.log_test_result("Player id indexes are created and used for equality filters",
+                             len(names) == 3 and 'idx_pbp_passer_player_id' in plan, plan)
+
+    def test_resolution(self):
+        print("\n🧪 Testing: resolving names in questions")
+        index = get_player_index(self.db_path)
+        cases = [
+            ("How many passing yards did Patrick Mahomes have in 2024?", [MAHOMES]),
+            ("how many touchdowns did josh allen throw", [ALLEN]),
+            ("Compare Josh Allen and Kelce in 2023", [ALLEN, KELCE]),
+            ("Did Patrick Mahommes throw more touchdowns than Mahomes?", [MAHOMES, MAHOMES]),
+            ("Amon-Ra St. Brown receiving yards in 2024", ['00-0036004']),
+            ("What did the Kansas City Chiefs do in Week 5 of 2024?", []),
+            ("Show Pacheco rushing in 2024", ['00-0036000']),
+        ]
+        wrong = []
+        for question, expected in cases:
+            actual = [player_ids[0] for _, player_ids in index.resolve(question)]
+            if actual != expected:
+                wrong.append(f"{question} -> {actual}")
+        self.log_test_result("Full names, lowercase names, surnames, typos and team names resolve as expected",
+                             not wrong, "; ".join(wrong))
+
+        trie = NameTrie()
+        for key in ('cstroud', 'cjohnson', 'cjones'):
+            trie.insert(key, key)
+        self.log_test_result("The trie supports exact, prefix and edit-distance lookup",
+                             trie.get('cstroud') == ['cstroud'] and trie.get('cstro') == []
+                             and [key for key, _ in trie.complete('cj')] == ['cjones', 'cjohnson']
+                             and [key for _, key, _ in trie.fuzzy('cstrud')] == ['cstroud'])
+
+        players = {
+            'A': {'name': 'J.Williams', 'names': ['J.Williams'], 'seasons': {'2024': {'teams': ['DET'], 'receiver': 40}}},
+            'B': {'name': 'J.Williams', 'names': ['J.Williams'], 'seasons': {'2022': {'teams': ['LA'], 'rusher': 90}}},
+        }
+        index = PlayerIndex(players)
+        hints = index.hints("How many yards did Jameson Williams have?")
+        self.log_test_result("Ambiguous names list every candidate, most plays first, a season narrows them",
+                             "- Jameson Williams (ambiguous): J.Williams = 'B' (rusher; LA 2022); "
+                             "J.Williams = 'A' (receiver; DET 2024)" in hints
+                             and index.resolve("Jameson Williams in 2024") == [('Jameson Williams', ['A'])], hints)
+
+    def test_agent(self):
+        print("\n🧪 Testing: resolution before SQL generation")
+        agent = install_player_index(ScriptedAgent(), self.db_path)
+        trace = Trace("question")
+        with trace.activate():
+            agent._run_database_query("How many passing yards did Patrick Mahomes have in 2024?")
+        question = agent.questions[-1]
+        self.log_test_result("The player id and the id columns are added to the question",
+                             question.startswith("How many passing yards did Patrick Mahomes have in 2024?\n\n")
+                             and f"P.Mahomes = '{MAHOMES}' (passer; KC 2023-2024)" in question
+                             and 'passer_player_id' in question
+                             and trace.find('player_resolution').attributes.get('resolved') == 1, question)
+        agent._run_database_query("Which team had the most wins in 2024?")
+        self.log_test_result("Questions without players are passed through unchanged",
+                             agent.questions[-1] == "Which team had the most wins in 2024?")
+
+    def test_templates(self):
+        print("\n🧪 Testing: player templates")
+        question = "How many passing yards did Patrick Mahomes have in 2024?"
+        template = match_template(question, get_player_index(self.db_path))
+        by_name = match_template(question)
+        self.log_test_result("Player templates look the player up by id",
+                             'player_id = ?' in template.sql and template.params[-1] == MAHOMES
+                             and 'LOWER(player_name)' in by_name.sql, template.sql)
+        answer = TemplateFastPath(self.db_path).answer("How many passing yards did Patrick Mahommes have in 2024?")
+        self.log_test_result("A misspelled name still gets the templated answer",
+                             answer is not None and answer.startswith("P.Mahomes (KC) had"), str(answer))
+
+    def test_ingest(self):
+        print("\n🧪 Testing: refresh on ingest")
+        play = next(play for play in self.plays if play['season'] == 2024 and play['passer_player_id'])
+        play = dict(play, passer_player_id='00-0039999', passer_player_name='B.Nix', posteam='DEN')
+        drop = os.path.join(self.directory, 'drop.csv')
+        with open(drop, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMN_NAMES)
+            writer.writerow(['NA' if play[name] is None else play[name] for name in COLUMN_NAMES])
+        summary = ingest(self.db_path, [drop], rollups=False, columns=False)
+        index = get_player_index(self.db_path)
+        self.log_test_result("Ingest re-reads the affected seasons and keeps the others",
+                             summary['player_index'] == len(index.players)
+                             and [player_ids for _, player_ids in index.resolve("Bo Nix in 2024")] == [['00-0039999']]
+                             and '2023' in index.players[MAHOMES]['seasons'], str(summary['player_index']))
+
+    def run_all_tests(self):
+        print("\n🏈 Player Index Test Suite")
+        print("=" * 60)
+        try:
+            self.test_build()
+            self.test_resolution()
+            self.test_agent()
+            self.test_templates()
+            self.test_ingest()
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = PlayerIndexTestSuite()
+    suite.run_all_tests()
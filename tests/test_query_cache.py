@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test suite for the persistent question/SQL cache (query_cache.py)
+Runs offline against temporary files
+"""
+
+import sys
+import os
+import time
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from query_cache import QueryCache, normalize_question, normalize_sql, QUESTION_NAMESPACE
+
+
+class QueryCacheTestSuite:
+    def __init__(self):
+        print("🔧 Initializing Query Cache Test Suite...")
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'pbp_db')
+        with open(self.db_path, 'w') as f:
+            f.write('v1')
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def _cache(self, name, **kwargs):
+        return QueryCache(path=os.path.join(self.tmpdir, name), db_path=self.db_path, **kwargs)
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 QUERY CACHE TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All query cache tests passed successfully!")
+        print(f"{'='*60}")
+
+    def test_normalization(self):
+        print("\n🧪 Testing: key normalization")
+        same = normalize_question("Who were the top 5 rushers in 2022?") == \
+            normalize_question("  who were the TOP 5 rushers in 2022 ")
+        self.log_test_result("Case and punctuation do not change the question key", same)
+        decimals = normalize_question("Spread of 2.5 points?")
+        self.log_test_result("Decimal numbers survive normalization", "2.5" in decimals, decimals)
+        pairs = [("Which QBs had a passer rating > 100 in 2023?", "Which QBs had a passer rating < 100 in 2023?"),
+                 ("Which teams had 10+ wins in 2022?", "Which teams had 10 wins in 2022?"),
+                 ("Who was the #1 pick in 2021?", "Who was the 1 pick in 2021?"),
+                 ("Games with spread >= 7 in 2024", "Games with spread = 7 in 2024")]
+        collisions = [pair for pair in pairs if normalize_question(pair[0]) == normalize_question(pair[1])]
+        self.log_test_result("Comparison and number-qualifier characters keep questions apart", not collisions,
+                             str(collisions))
+        spaced = normalize_question("passer rating>100?") == normalize_question("Passer rating > 100")
+        self.log_test_result("Spacing around a comparison does not change the key", spaced)
+        sql_same = normalize_sql("SELECT  *\n FROM nflfastR_pbp ;") == normalize_sql("SELECT * FROM nflfastR_pbp")
+        self.log_test_result("Whitespace and semicolons do not change the SQL key", sql_same)
+
+    def test_round_trip(self):
+        print("\n🧪 Testing: store and lookup")
+        cache = self._cache('round_trip.db')
+        cache.put(QUESTION_NAMESPACE, 'top 5 rushers in 2022', ['J.Jacobs 1653 yards', None])
+        value = cache.get(QUESTION_NAMESPACE, 'top 5 rushers in 2022')
+        self.log_test_result("Stored answer is returned", value == ['J.Jacobs 1653 yards', None], str(value))
+        self.log_test_result("Unknown key misses", cache.get(QUESTION_NAMESPACE, 'other') is None)
+        self.log_test_result("Hit/miss counters", cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1,
+                             str(cache.stats()))
+
+    def test_database_invalidation(self):
+        print("\n🧪 Testing: invalidation when the database changes")
+        cache = self._cache('invalidation.db')
+        cache.put(QUESTION_NAMESPACE, 'q', ['answer', None])
+        time.sleep(0.01)
+        with open(self.db_path, 'a') as f:
+            f.write('more plays')
+        self.log_test_result("Entry is dropped after the database file changes",
+                             cache.get(QUESTION_NAMESPACE, 'q') is None)
+
+    def test_ttl_and_lru(self):
+        print("\n🧪 Testing: TTL expiry and LRU eviction")
+        cache = self._cache('ttl.db', ttl=0.05)
+        cache.put(QUESTION_NAMESPACE, 'q', ['answer', None])
+        time.sleep(0.1)
+        self.log_test_result("Expired entry misses", cache.get(QUESTION_NAMESPACE, 'q') is None)
+
+        cache = self._cache('lru.db', max_entries=2)
+        cache.put(QUESTION_NAMESPACE, 'a', [1])
+        time.sleep(0.01)
+        cache.put(QUESTION_NAMESPACE, 'b', [2])
+        time.sleep(0.01)
+        cache.get(QUESTION_NAMESPACE, 'a')
+        time.sleep(0.01)
+        cache.put(QUESTION_NAMESPACE, 'c', [3])
+        kept = [key for key in 'abc' if cache.get(QUESTION_NAMESPACE, key) is not None]
+        self.log_test_result("Least recently used entry is evicted", kept == ['a', 'c'], f"kept {kept}")
+
+    def run_all_tests(self):
+        print("\n🏈 Query Cache Test Suite")
+        print("=" * 60)
+        self.test_normalization()
+        self.test_round_trip()
+        self.test_database_invalidation()
+        self.test_ttl_and_lru()
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = QueryCacheTestSuite()
+    suite.run_all_tests()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test suite for the rollup table build step (util/build_rollups.py)
+Runs offline against the synthetic play table in tests/pbp_fixture.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbp_fixture import sample_database, generate_plays, GAMES
+from util.build_rollups import refresh_rollups
+
+
+class RollupTestSuite:
+    def __init__(self):
+        print("🔧 Initializing Rollup Test Suite...")
+        self.conn = sample_database()
+        self.plays = generate_plays()
+        self.counts = refresh_rollups(self.conn)
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 ROLLUP TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All rollup tests passed successfully!")
+        print(f"{'='*60}")
+
+    def test_games(self):
+        print("\n🧪 Testing: games rollup")
+        rows = self.conn.execute(
+            "SELECT game_id, home_score, away_score, home_cover, away_cover FROM games"
+        ).fetchall()
+        by_id = {row[0]: row[1:] for row in rows}
+        self.log_test_result("One row per game", len(rows) == len(GAMES), f"{len(rows)} rows")
+        for game_id, _, _, _, home, away, spread, _, home_final, away_final in GAMES:
+            result = home_final - away_final
+            expected = (home_final, away_final, int(result > spread), int(result < spread))
+            actual = by_id.get(game_id)
+            self.log_test_result(f"Final score and spread result: {game_id}",
+                                 actual == expected, f"expected {expected}, got {actual}")
+
+    def test_team_season(self):
+        print("\n🧪 Testing: team_season rollup")
+        wins = {}
+        road_covers = {}
+        for _, season, _, season_type, home, away, spread, _, home_final, away_final in GAMES:
+            winner = home if home_final > away_final else away
+            wins[(season, season_type, winner)] = wins.get((season, season_type, winner), 0) + 1
+            if home_final - away_final < spread:
+                key = (season, season_type, away)
+                road_covers[key] = road_covers.get(key, 0) + 1
+        rows = self.conn.execute(
+            "SELECT season, season_type, team, wins, road_ats_wins FROM team_season"
+        ).fetchall()
+        mismatches = [row for row in rows
+                      if row[3] != wins.get(row[:3], 0) or row[4] != road_covers.get(row[:3], 0)]
+        self.log_test_result("Wins and road covers match game results", not mismatches,
+                             f"mismatches: {mismatches}" if mismatches else f"{len(rows)} team seasons")
+
+        red_zone = {}
+        for play in self.plays:
+            if play['yardline_100'] <= 20 and play['play_type'] in ('pass', 'run'):
+                key = (play['season'], play['season_type'], play['posteam'])
+                plays, tds = red_zone.get(key, (0, 0))
+                red_zone[key] = (plays + 1, tds + int(play['touchdown'] == 1))
+        rows = self.conn.execute(
+            "SELECT season, season_type, team, red_zone_plays, red_zone_touchdowns FROM team_season"
+        ).fetchall()
+        mismatches = [row for row in rows if tuple(row[3:]) != red_zone.get(row[:3], (0, 0))]
+        self.log_test_result("Red zone counts match play-level definition", not mismatches,
+                             f"mismatches: {mismatches}" if mismatches else "")
+
+    def test_player_season(self):
+        print("\n🧪 Testing: player_season rollup")
+        passing = {}
+        rushing = {}
+        for play in self.plays:
+            key = (play['season'], play['season_type'])
+            if play['passer_player_id']:
+                k = key + (play['passer_player_id'],)
+                passing[k] = passing.get(k, 0) + (play['passing_yards'] or 0)
+            if play['rusher_player_id']:
+                k = key + (play['rusher_player_id'],)
+                rushing[k] = rushing.get(k, 0) + (play['rushing_yards'] or 0)
+        rows = self.conn.execute(
+            "SELECT season, season_type, player_id, passing_yards, rushing_yards FROM player_season"
+        ).fetchall()
+        mismatches = [row for row in rows
+                      if row[3] != passing.get(row[:3], 0) or row[4] != rushing.get(row[:3], 0)]
+        self.log_test_result("Passing and rushing totals match plays", not mismatches,
+                             f"mismatches: {mismatches[:3]}" if mismatches else f"{len(rows)} player seasons")
+
+    def test_partial_refresh(self):
+        print("\n🧪 Testing: refresh of a single season")
+        before = self.conn.execute("SELECT COUNT(*) FROM team_season").fetchone()[0]
+        counts = refresh_rollups(self.conn, seasons=[2024])
+        after = self.conn.execute("SELECT COUNT(*) FROM team_season").fetchone()[0]
+        games_2024 = sum(1 for game in GAMES if game[1] == 2024)
+        self.log_test_result("Season refresh does not duplicate rows", before == after,
+                             f"team_season rows before={before}, after={after}")
+        self.log_test_result("Season refresh only rebuilds that season",
+                             counts['games'] == games_2024, f"games rebuilt: {counts['games']}")
+
+    def run_all_tests(self):
+        print("\n🏈 Rollup Test Suite")
+        print("=" * 60)
+        self.test_games()
+        self.test_team_season()
+        self.test_player_season()
+        self.test_partial_refresh()
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = RollupTestSuite()
+    suite.run_all_tests()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Test suite for the relevance-pruned schema context (schema_context.py)
+Runs offline against small schema files written to a temporary directory
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import textwrap
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import schema_context
+from schema_context import CORE_COLUMNS, SchemaIndex, build_index, install_schema_pruning, tokenize
+from tracing import Trace
+from debug_log import RequestLog, capturing
+
+PBP_SCHEMA = """Table: nflfastR_pbp
+game_id: TEXT
+season: INTEGER
+season_type: TEXT
+week: INTEGER
+home_team: TEXT
+away_team: TEXT
+posteam: TEXT
+defteam: TEXT
+play_type: TEXT
+yardline_100: REAL
+rushing_yards: REAL
+passing_yards: REAL
+receiving_yards: REAL
+rusher_player_name: TEXT
+spread_line: REAL
+wpa: REAL
+air_yards: REAL
+punt_blocked: REAL
+kick_distance: REAL
+
+Example queries:
+SELECT posteam, SUM(rushing_yards) FROM nflfastR_pbp WHERE season = 2024 AND yardline_100 <= 20 GROUP BY posteam
+
+Example queries:
+SELECT posteam, SUM(air_yards) FROM nflfastR_pbp WHERE season = 2024 GROUP BY posteam
+
+Always filter season_type = 'REG' for regular season totals."""
+
+FIELD_DESCRIPTIONS = {
+    'yardline_100': 'Yards from the opponent end zone (red zone is 20 or less)',
+    'rushing_yards': 'Yards gained on a run',
+    'passing_yards': 'Yards gained on a pass',
+    'receiving_yards': 'Yards gained by the receiver',
+    'rusher_player_name': 'Name of the rusher',
+    'spread_line': 'Closing point spread for the home team',
+    'wpa': 'Win probability added',
+    'air_yards': 'Yards the ball travelled in the air',
+    'punt_blocked': 'Whether the punt was blocked',
+    'kick_distance': 'Distance of the kick',
+    'posteam': 'Team with possession',
+    'season_type': 'REG or POST',
+}
+
+RED_ZONE_QUESTION = "Which team had the most rushing yards in the red zone in 2024?"
+
+
+class ScriptedSQLLLM:
+    """Records prompts and returns a fixed statement."""
+
+    model_name = 'scripted-sql'
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return "SELECT 1"
+
+
+class ScriptedSQLAgent:
+    """Builds its SQL prompt from the full schema context, like NFLStatAgent."""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self._llm = ScriptedSQLLLM()
+
+    def _run_database_query(self, question):
+        return self._llm.invoke(f"Schema:\n{self.schema}\n\nQuestion: {question}\nSQL:"), None
+
+
+class SchemaFileAgent(ScriptedSQLAgent):
+    """Reads SCHEMA_FILE when constructed and indents it into its SQL prompt,
+    re-wrapping the whitespace of the text it embeds."""
+
+    def __init__(self, length=None):
+        with open(os.getenv('SCHEMA_FILE', 'schema_context.txt')) as f:
+            super().__init__(f.read()[:length])
+
+    def _run_database_query(self, question):
+        schema = textwrap.indent(self.schema.strip(), '    ')
+        prompt = f"You write SQLite for the nflfastR database.\n  Schema:\n{schema}\n\nQuestion: {question}\nSQL:"
+        return self._llm.invoke(prompt), None
+
+
+class SchemaContextTestSuite:
+    def __init__(self):
+        print("🔧 Initializing Schema Context Test Suite...")
+        self.directory = tempfile.mkdtemp()
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 SCHEMA CONTEXT TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All schema context tests passed successfully!")
+        print(f"{'='*60}")
+
+    def _reset(self):
+        schema_context._precompiled.clear()
+        schema_context._index = None
+        schema_context._full_contexts = None
+
+    def _write_schema(self):
+        os.makedirs(schema_context.SCHEMA_DIR, exist_ok=True)
+        with open(schema_context.PBP_SCHEMA_FILE, 'w') as f:
+            f.write(PBP_SCHEMA)
+        with open(schema_context.FIELD_DESCRIPTIONS_FILE, 'w') as f:
+            json.dump({name: {'description': [description]} for name, description in FIELD_DESCRIPTIONS.items()}, f)
+        self._reset()
+
+    def test_tokenize(self):
+        print("\n🧪 Testing: tokenize")
+        tokens = tokenize("Who had the most rushing_yards for the Rushers?")
+        self.log_test_result("Stopwords are dropped, snake_case names are split and kept whole, plurals trimmed",
+                             tokens == ['rushing_yards', 'rushing', 'yard', 'rusher'], str(tokens))
+
+    def test_scoring(self):
+        print("\n🧪 Testing: BM25 scoring")
+        index = SchemaIndex(build_index())
+        scored = index.score("rushing yards by team")
+        scores = [score for score, _ in scored]
+        self.log_test_result("Every document is scored, best first, with the matching column on top",
+                             len(scored) == len(index.documents) and scores == sorted(scores, reverse=True)
+                             and scored[0][1]['name'] == 'rushing_yards', scored[0][1]['name'])
+        self.log_test_result("Unrelated columns score zero",
+                             all(score == 0 for score, document in scored if document['name'] == 'kick_distance'))
+
+    def test_pruned_context(self):
+        print("\n🧪 Testing: pruned context")
+        index = SchemaIndex(build_index())
+        context = index.pruned_context(RED_ZONE_QUESTION, top_k=len(CORE_COLUMNS))
+        self.log_test_result("Core columns are included even when top_k leaves no room for others",
+                             all(f"- {name} " in context for name in CORE_COLUMNS)
+                             and '- rushing_yards ' not in context)
+
+        context = index.pruned_context(RED_ZONE_QUESTION)
+        # SELECT posteam, SUM(rushing_yards) ... WHERE season = ? AND season_type = 'REG' AND yardline_100 <= 20
+        needed = ['posteam', 'season', 'season_type', 'rushing_yards', 'yardline_100']
+        missing = [name for name in needed if f"- {name} " not in context]
+        self.log_test_result("A red zone rushing question gets every column its SQL needs", not missing, str(missing))
+        self.log_test_result("Unrelated columns are left out, the notes and the matching example kept",
+                             '- punt_blocked ' not in context and '- kick_distance ' not in context
+                             and "season_type = 'REG'" in context and 'yardline_100 <= 20' in context)
+
+    def test_stale_index(self):
+        print("\n🧪 Testing: stale index fallback")
+        index = build_index()
+        with open(schema_context.INDEX_FILE, 'w') as f:
+            json.dump(index, f)
+        self._reset()
+        self.log_test_result("A current prebuilt index is used",
+                             schema_context.load_precompiled() is not None)
+        with open(schema_context.PBP_SCHEMA_FILE, 'a') as f:
+            f.write("\n\ntotal_home_score: REAL")
+        self._reset()
+        context = schema_context.build_pruned_schema_context("total home score in 2024")
+        self.log_test_result("A stale index is rebuilt from the schema files, so new columns can be picked",
+                             schema_context.load_precompiled() is None and '- total_home_score ' in context)
+        self._write_schema()
+        os.remove(schema_context.INDEX_FILE)
+
+    def test_install(self):
+        print("\n🧪 Testing: install_schema_pruning")
+        self._reset()
+        full_context = schema_context.load_full_schema_context()
+        agent = install_schema_pruning(ScriptedSQLAgent(full_context), enabled=True)
+        trace = Trace(RED_ZONE_QUESTION)
+        with trace.activate():
+            agent._run_database_query(RED_ZONE_QUESTION)
+        prompt = agent._llm.prompts[-1]
+        self.log_test_result("The agent's SQL prompt gets the pruned context in place of the full one",
+                             full_context not in prompt and '- yardline_100 ' in prompt and '- kick_distance ' not in prompt
+                             and prompt.endswith(f"Question: {RED_ZONE_QUESTION}\nSQL:")
+                             and trace.find('schema_pruning').attributes['pruned_chars'] < len(full_context))
+        self.log_test_result("The wrapped SQL LLM still forwards its attributes",
+                             agent._llm.model_name == 'scripted-sql')
+
+        agent = install_schema_pruning(ScriptedSQLAgent("Custom schema text"), enabled=True)
+        agent._run_database_query(RED_ZONE_QUESTION)
+        self.log_test_result("A prompt without the full context is sent unchanged",
+                             agent._llm.prompts[-1].startswith("Schema:\nCustom schema text\n"))
+        agent._llm.invoke(f"Schema:\n{full_context}")
+        self.log_test_result("Calls outside a database query keep the full context",
+                             agent._llm.prompts[-1] == f"Schema:\n{full_context}")
+
+        with open('schema_context.txt', 'w') as f:
+            f.write(PBP_SCHEMA + "\n")
+        self._reset()
+        agent = install_schema_pruning(SchemaFileAgent(), enabled=True)
+        trace = Trace(RED_ZONE_QUESTION)
+        with trace.activate(), capturing(RequestLog()) as log:
+            agent._run_database_query(RED_ZONE_QUESTION)
+        prompt = agent._llm.prompts[-1]
+        attributes = trace.find('schema_pruning').attributes
+        self.log_test_result("The SCHEMA_FILE text is pruned even when the prompt re-indents it",
+                             attributes['pruned'] and '- yardline_100 ' in prompt and 'punt_blocked' not in prompt
+                             and prompt.startswith("You write SQLite for the nflfastR database.\n  Schema:\n")
+                             and "Schema context pruned" in log.text(), f"{attributes} {log.text()}")
+
+        agent = install_schema_pruning(SchemaFileAgent(length=len(PBP_SCHEMA) // 2), enabled=True)
+        trace = Trace(RED_ZONE_QUESTION)
+        with trace.activate(), capturing(RequestLog()) as log:
+            agent._run_database_query(RED_ZONE_QUESTION)
+        attributes = trace.find('schema_pruning').attributes
+        self.log_test_result("A truncated schema is sent unchanged, and the miss is traced and logged",
+                             not attributes['pruned'] and attributes['reason'] == 'no full schema context in prompt'
+                             and 'punt_blocked' in agent._llm.prompts[-1]
+                             and "Schema pruning skipped" in log.text(), f"{attributes} {log.text()}")
+        os.remove('schema_context.txt')
+        self._reset()
+
+        agent = install_schema_pruning(ScriptedSQLAgent(full_context), enabled=False)
+        agent._run_database_query(RED_ZONE_QUESTION)
+        self.log_test_result("SCHEMA_PRUNING off leaves the agent alone",
+                             isinstance(agent._llm, ScriptedSQLLLM) and full_context in agent._llm.prompts[-1])
+
+    def run_all_tests(self):
+        print("\n🏈 Schema Context Test Suite")
+        print("=" * 60)
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+        try:
+            self._write_schema()
+            self.test_tokenize()
+            self.test_scoring()
+            self.test_pruned_context()
+            self.test_stale_index()
+            self.test_install()
+        finally:
+            os.chdir(cwd)
+            self._reset()
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = SchemaContextTestSuite()
+    suite.run_all_tests()
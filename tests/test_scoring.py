@@ -8,6 +8,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from agent import NFLStatAgent
+from backends import install_backends
 import re
 
 class ScoringTestSuite:
@@ -15,6 +16,8 @@ class ScoringTestSuite:
         print("🔧 Initializing Scoring Test Suite...")
         self.suppress_debug = suppress_debug
         self.agent = NFLStatAgent()
+        # BACKEND_MODE=replay runs the suite offline from recorded responses
+        install_backends(self.agent)
         self.test_results = {
             'passed': 0,
             'failed': 0,
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Test suite for in-flight request coalescing (singleflight.py)
+Runs offline: concurrent identical questions go through the pipeline with the
+scripted agent from test_pipeline.py
+"""
+
+import sys
+import os
+import time
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pipeline
+from singleflight import SingleFlight, SharedStream
+from test_pipeline import ScriptedAgent, ScriptedLLM
+from web_search import install_answer_streaming
+
+
+class CountingAgent(ScriptedAgent):
+    """Scripted agent that counts how often each branch actually runs."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.db_calls = 0
+        self.web_calls = 0
+        self._count_lock = threading.Lock()
+
+    def _run_database_query(self, query):
+        with self._count_lock:
+            self.db_calls += 1
+        return super()._run_database_query(query)
+
+    def _run_web_search(self, query):
+        with self._count_lock:
+            self.web_calls += 1
+        return super()._run_web_search(query)
+
+
+def run_concurrently(count: int, func):
+    """Call func(i) on count threads started together; returns the results in order."""
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def run(i):
+        barrier.wait()
+        results[i] = func(i)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class SingleFlightTestSuite:
+    def __init__(self):
+        print("🔧 Initializing Single Flight Test Suite...")
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 SINGLE FLIGHT TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All single flight tests passed successfully!")
+        print(f"{'='*60}")
+
+    def test_blocking(self):
+        print("\n🧪 Testing: identical blocking questions")
+        agent = CountingAgent(db_delay=0.3)
+        pipeline._agent = agent
+        before = pipeline.coalescing_stats()
+        questions = ["Which team passed the most in 2023?", "which team passed the most in 2023",
+                     "Which team PASSED the most in 2023?!", "Which team passed the most in 2023?"]
+        events = [[] for _ in questions]
+        results = run_concurrently(len(questions), lambda i: pipeline.run_query_hybrid(
+            questions[i], on_progress=events[i].append))
+        stats = pipeline.coalescing_stats()
+        self.log_test_result("Each stage runs once for normalized-identical questions",
+                             agent.db_calls == 1 and agent.web_calls == 1,
+                             f"db {agent.db_calls}, web {agent.web_calls}")
+        self.log_test_result("Every caller gets the answer",
+                             all(answer == "KC had 4,183 passing yards" for answer, _, _ in results))
+        self.log_test_result("Coalesced requests are counted",
+                             stats['coalesced'] - before['coalesced'] == 3
+                             and stats['executed'] - before['executed'] == 1 and stats['in_flight'] == 0, str(stats))
+        self.log_test_result("Followers receive the leader's progress events",
+                             all(caller_events and caller_events[-1].stage == 'done' for caller_events in events))
+
+        pipeline.run_query_hybrid("Which team passed the most in 2023?")
+        self.log_test_result("A later identical question runs again", agent.db_calls == 2)
+
+    def test_streaming(self):
+        print("\n🧪 Testing: identical streamed questions")
+        agent = CountingAgent(db_result=(None, "no such column: foo"), db_delay=0.2)
+        agent._web_llm = ScriptedLLM("The Chiefs won the Super Bowl.", delay=0.01)
+        pipeline._agent = install_answer_streaming(agent)
+        results = run_concurrently(4, lambda i: pipeline.run_query_hybrid("Who won Super Bowl LVIII?", stream=True))
+        texts = run_concurrently(4, lambda i: ''.join(results[i][0]))
+        self.log_test_result("Every caller streams the whole answer",
+                             all(text == "The Chiefs won the Super Bowl." for text in texts), str(texts))
+        self.log_test_result("The answer is synthesized once", len(agent._web_llm._client.prompts) == 1,
+                             f"{len(agent._web_llm._client.prompts)} synthesis calls")
+
+    def test_primitives(self):
+        print("\n🧪 Testing: SingleFlight and SharedStream")
+        flight = SingleFlight()
+
+        def fail(publish):
+            time.sleep(0.2)
+            raise RuntimeError("database is locked")
+
+        def call(i):
+            try:
+                flight.do('key', fail)
+            except RuntimeError as e:
+                return str(e)
+
+        errors = run_concurrently(3, call)
+        self.log_test_result("The leader's exception reaches every caller",
+                             errors == ["database is locked"] * 3 and flight.stats()['coalesced'] == 2, str(errors))
+
+        pulls = []
+
+        def source():
+            for chunk in ("a", "b", "c"):
+                pulls.append(chunk)
+                yield chunk
+
+        shared = SharedStream(source())
+        first, second = iter(shared), iter(shared)
+        merged = [next(first), next(first), next(second), next(first), next(second), next(second)]
+        self.log_test_result("SharedStream replays chunks and pulls each once",
+                             merged == ["a", "b", "a", "c", "b", "c"] and pulls == ["a", "b", "c"]
+                             and list(first) == [] and list(iter(shared)) == ["a", "b", "c"], str(merged))
+
+    def run_all_tests(self):
+        print("\n🏈 Single Flight Test Suite")
+        print("=" * 60)
+        self.test_blocking()
+        self.test_streaming()
+        self.test_primitives()
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = SingleFlightTestSuite()
+    suite.run_all_tests()
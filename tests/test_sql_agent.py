@@ -4,9 +4,10 @@ Focused test suite for SQL Agent component
 Tests SQL generation and execution without the full agent pipeline
 """
 
-import sqlite3
 import time
 from agent import NFLStatAgent
+from backends import install_backends
+from db_pool import get_connection
 
 class SQLAgentTestSuite:
     """Test suite focused on SQL agent functionality"""
@@ -20,8 +21,10 @@ class SQLAgentTestSuite:
         print("🔧 Initializing SQL Agent Test Suite...")
         self.suppress_debug = suppress_debug
         self.agent = NFLStatAgent()
+        # BACKEND_MODE=replay runs the suite offline from recorded responses
+        install_backends(self.agent)
         self.db_path = 'data/pbp_db'
-        self.conn = sqlite3.connect(self.db_path)
+        self.conn = get_connection(self.db_path)
         self.cursor = self.conn.cursor()
         self.test_results = {
             'passed': 0,
@@ -33,11 +36,6 @@ class SQLAgentTestSuite:
         if suppress_debug:
             print("🔇 Debug output suppressed")
         
-    def __del__(self):
-        """Clean up database connection"""
-        if hasattr(self, 'conn'):
-            self.conn.close()
-    
     def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
         """Log test result with detailed reporting"""
         self.test_results['total'] += 1
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Test suite for the SQL execution budget (sql_governor.py, db_pool.execute_query)
+Runs offline against the synthetic play table in tests/pbp_fixture.py
+"""
+
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pbp_fixture import create_sample_pbp
+import sql_governor
+from db_pool import execute_query, install_agent_connections
+from sql_governor import GovernedConnection, QueryBudgetExceeded
+
+# Accidental three-way self-join of the play table
+RUNAWAY_SQL = "SELECT COUNT(*) FROM nflfastR_pbp a, nflfastR_pbp b, nflfastR_pbp c, nflfastR_pbp d"
+GOOD_SQL = "SELECT COUNT(*) FROM nflfastR_pbp WHERE season = 2024"
+# Streams rows: the work happens while they are fetched, not in execute()
+RUNAWAY_ROWS_SQL = "SELECT a.season FROM nflfastR_pbp a, nflfastR_pbp b, nflfastR_pbp c"
+
+
+class ScriptedSQLAgent:
+    """Runs runaway SQL on a connection it opens itself, and the good query once
+    the prompt carries the rewrite hint; errors come back as (None, error) like
+    NFLStatAgent's."""
+
+    def __init__(self, db_path, fixable=True):
+        self.db_path = db_path
+        self.fixable = fixable
+        self.prompts = []
+        self.connections = []
+
+    def _run_database_query(self, question):
+        self.prompts.append(question)
+        sql = GOOD_SQL if self.fixable and "Previous query" in question else RUNAWAY_SQL
+        conn = sqlite3.connect(self.db_path)
+        self.connections.append(type(conn))
+        try:
+            rows = conn.execute(sql).fetchall()
+            return f"{rows[0][0]} plays", None
+        except sqlite3.Error as e:
+            return None, str(e)
+        finally:
+            conn.close()
+
+
+class SQLGovernorTestSuite:
+    def __init__(self):
+        print("🔧 Initializing SQL Governor Test Suite...")
+        self.db_path = os.path.join(tempfile.mkdtemp(), 'pbp_db')
+        conn = sqlite3.connect(self.db_path)
+        create_sample_pbp(conn)
+        conn.close()
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 SQL GOVERNOR TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All SQL governor tests passed successfully!")
+        print(f"{'='*60}")
+
+    def test_budgets(self):
+        print("\n🧪 Testing: time and step budgets")
+        start_time = time.perf_counter()
+        try:
+            execute_query(RUNAWAY_SQL, db_path=self.db_path, timeout=0.3)
+            stopped = False
+        except QueryBudgetExceeded as e:
+            stopped = True
+            print(f"   {e}")
+        elapsed = time.perf_counter() - start_time
+        self.log_test_result("Runaway join is stopped at the time budget", stopped and elapsed < 1.5,
+                             f"{elapsed:.2f}s")
+
+        try:
+            execute_query(RUNAWAY_SQL, db_path=self.db_path, timeout=0, max_steps=200000)
+            stopped = False
+        except QueryBudgetExceeded:
+            stopped = True
+        self.log_test_result("Runaway join is stopped at the step budget", stopped)
+
+        _, rows = execute_query(GOOD_SQL, db_path=self.db_path, timeout=0.3)
+        self.log_test_result("Connection still works after a stopped query", rows[0][0] > 0, str(rows))
+
+    def test_agent_sql(self):
+        print("\n🧪 Testing: the agent's own connections")
+        default_timeout = sql_governor.DEFAULT_TIMEOUT_SECONDS
+        sql_governor.DEFAULT_TIMEOUT_SECONDS = 0.3
+        try:
+            agent = install_agent_connections(ScriptedSQLAgent(self.db_path))
+            start_time = time.perf_counter()
+            answer, error = agent._run_database_query("How many plays were there?")
+            elapsed = time.perf_counter() - start_time
+            self.log_test_result("Runaway agent SQL is stopped and the question asked again with a hint",
+                                 answer and answer.endswith(" plays") and elapsed < 3.0 and len(agent.prompts) == 2
+                                 and "execution budget" in agent.prompts[1] and RUNAWAY_SQL in agent.prompts[1],
+                                 f"{elapsed:.2f}s: {answer} {error}")
+            self.log_test_result("The agent's connections are governed",
+                                 all(issubclass(kind, GovernedConnection) for kind in agent.connections))
+
+            agent = install_agent_connections(ScriptedSQLAgent(self.db_path, fixable=False))
+            answer, error = agent._run_database_query("How many plays were there?")
+            self.log_test_result("When the rewrite is stopped too the budget error is returned",
+                                 answer is None and "execution budget" in error
+                                 and len(agent.prompts) == sql_governor.DEFAULT_REGENERATE_ATTEMPTS + 1, str(error))
+
+            conn = sqlite3.connect(self.db_path)
+            self.log_test_result("Connections opened outside the agent are left alone",
+                                 type(conn) is sqlite3.Connection)
+            conn.close()
+
+            conn = sqlite3.connect(self.db_path, factory=GovernedConnection)
+            start_time = time.perf_counter()
+            try:
+                for _ in conn.execute(RUNAWAY_ROWS_SQL):
+                    pass
+                stopped = False
+            except QueryBudgetExceeded as e:
+                stopped = e.sql == RUNAWAY_ROWS_SQL
+            elapsed = time.perf_counter() - start_time
+            self.log_test_result("Fetching rows counts against the statement's budget", stopped and elapsed < 1.5,
+                                 f"{elapsed:.2f}s")
+            rows = conn.execute(GOOD_SQL).fetchall()
+            self.log_test_result("A governed connection keeps working after a stop", rows[0][0] > 0)
+            conn.close()
+        finally:
+            sql_governor.DEFAULT_TIMEOUT_SECONDS = default_timeout
+
+    def run_all_tests(self):
+        print("\n🏈 SQL Governor Test Suite")
+        print("=" * 60)
+        self.test_budgets()
+        self.test_agent_sql()
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = SQLGovernorTestSuite()
+    suite.run_all_tests()
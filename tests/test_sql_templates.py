@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test suite for the deterministic SQL template fast path (sql_templates.py)
+Runs offline against the synthetic play table in tests/pbp_fixture.py
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('QUERY_CACHE_DISABLED', '1')
+
+from pbp_fixture import create_sample_pbp
+from util.build_rollups import refresh_rollups
+from sql_templates import match_template, TemplateFastPath
+from tracing import Trace
+from debug_log import RequestLog, capturing
+
+
+class SQLTemplateTestSuite:
+    def __init__(self):
+        print("🔧 Initializing SQL Template Test Suite...")
+        self.db_path = os.path.join(tempfile.mkdtemp(), 'pbp_db')
+        conn = sqlite3.connect(self.db_path)
+        create_sample_pbp(conn)
+        refresh_rollups(conn)
+        conn.close()
+        self.fast_path = TemplateFastPath(self.db_path)
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 SQL TEMPLATE TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All SQL template tests passed successfully!")
+        print(f"{'='*60}")
+
+    def test_matching(self):
+        print("\n🧪 Testing: question shape matching")
+        cases = [
+            ("Who were the top 5 rushers in 2022?", 'player_leaders'),
+            ("Which team had the most passing yards in 2023?", 'team_leaders'),
+            ("What was the most common play type in the 2023 season?", 'common_play_type'),
+            ("who had the most passing touchdowns in 2024", 'player_leaders'),
+            ("which team had the most wins in 2024", 'team_leaders'),
+            ("which team allowed the fewest points in 2021?", 'team_leaders'),
+            ("Top 3 teams by rushing yards in the 2024 playoffs", 'team_leaders'),
+            ("How many passing yards did Patrick Mahomes have in 2024?", 'player_stat'),
+            # Extra qualifiers or ambiguous stats must go to the LLM
+            ("which team had the most rushing yards in the red zone in 2024", None),
+            ("who had the most passing touchdowns in the last 2 minutes of games in 2024", None),
+            ("which team covered the spread the most in 2024", None),
+            ("who had the most interceptions in the 2020 season?", None),
+            ("Compare Patrick Mahomes and Josh Allen by EPA", None),
+            # "allowed" only fits stats with a defensive column
+            ("Which team allowed the most rushing yards in 2023?", None),
+            ("Who allowed the most passing yards in 2023?", None),
+            ("which team allowed the fewest passing touchdowns in 2022", None),
+        ]
+        for question, expected in cases:
+            template = match_template(question)
+            actual = template.name if template else None
+            self.log_test_result(f"Match: {question}", actual == expected,
+                                 f"expected {expected}, got {actual}")
+
+    def test_answers(self):
+        print("\n🧪 Testing: templated answers from rollup tables")
+        answer = self.fast_path.answer("How many passing yards did Patrick Mahomes have in 2024?")
+        conn = sqlite3.connect(self.db_path)
+        expected = conn.execute(
+            "SELECT CAST(SUM(passing_yards) AS INTEGER) FROM nflfastR_pbp "
+            "WHERE season = 2024 AND season_type = 'REG' AND passer_player_name = 'P.Mahomes'"
+        ).fetchone()[0]
+        conn.close()
+        self.log_test_result("Player stat answer matches the play table",
+                             answer is not None and f"{expected:,} passing yards" in answer, str(answer))
+
+        answer = self.fast_path.answer("Top 3 passers in 2024")
+        self.log_test_result("Top-N answer lists three players",
+                             answer is not None and answer.count("\n") == 3, str(answer))
+
+        answer = self.fast_path.answer("Who were the top 5 rushers in 2019?")
+        self.log_test_result("Season without data falls back to the LLM", answer is None, str(answer))
+
+        trace = Trace("Which team covered the spread the most in 2024?")
+        with trace.activate(), capturing(RequestLog()) as log:
+            answer = self.fast_path.answer("Which team covered the spread the most in 2024?")
+        self.log_test_result("Unmatched question falls back to the LLM", answer is None)
+        self.log_test_result("Hit rate is tracked on the template span",
+                             self.fast_path.lookups == 4 and self.fast_path.hits == 2
+                             and trace.find('template_fast_path').attributes
+                             == {'hit': False, 'hits': 2, 'lookups': 4},
+                             f"{self.fast_path.hits}/{self.fast_path.lookups}")
+        self.log_test_result("Hit rate is written to the request's debug log",
+                             "Template fast path miss, using LLM SQL generation: hit rate 2/4 (50%)" in log.text(),
+                             log.text())
+
+        template = match_template("Which team allowed the fewest points in 2024?")
+        self.log_test_result("Points allowed is answered from points_against",
+                             'points_against' in template.sql and 'points_for' not in template.sql, template.sql)
+
+    def run_all_tests(self):
+        print("\n🏈 SQL Template Test Suite")
+        print("=" * 60)
+        self.test_matching()
+        self.test_answers()
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = SQLTemplateTestSuite()
+    suite.run_all_tests()
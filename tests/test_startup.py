@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test suite for worker cold start (lazy imports, app.py's cached pipeline,
+the precompiled schema context in schema_context.py)
+Runs offline; import checks run in fresh interpreters
+"""
+
+import sys
+import os
+import ast
+import json
+import shutil
+import sqlite3
+import tempfile
+import subprocess
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import schema_context
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+PBP_SCHEMA = """Table: nflfastR_pbp
+season: INTEGER
+posteam: TEXT
+rushing_yards: REAL
+
+Example queries:
+SELECT posteam, SUM(rushing_yards) FROM nflfastR_pbp WHERE season = 2024 GROUP BY posteam
+
+Always filter season_type = 'REG' for regular season totals."""
+FIELD_DESCRIPTIONS = {
+    'rushing_yards': {'description': ['Yards gained on a run'], 'data_type': ['numeric']},
+    'posteam': {'description': ['Team with possession'], 'data_type': ['character']},
+}
+
+
+def loaded_modules(code: str):
+    """Modules a fresh interpreter has imported after running code."""
+    result = subprocess.run([sys.executable, '-c', f"{code}\nimport sys, json\nprint(json.dumps(sorted(sys.modules)))"],
+                            capture_output=True, text=True, cwd=ROOT, env=dict(os.environ, PYTHONPATH=ROOT))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return set(json.loads(result.stdout.strip().splitlines()[-1]))
+
+
+class StartupTestSuite:
+    def __init__(self):
+        print("🔧 Initializing Startup Test Suite...")
+        self.directory = tempfile.mkdtemp()
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 STARTUP TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All startup tests passed successfully!")
+        print(f"{'='*60}")
+
+    def test_lazy_imports(self):
+        print("\n🧪 Testing: lazy imports")
+        modules = loaded_modules("import pipeline")
+        heavy = sorted(module for module in ('numpy', 'asyncio', 'agent', 'ddgs', 'together', 'langchain')
+                       if module in modules)
+        self.log_test_result("Importing the pipeline loads no agent, LLM client, numpy or asyncio modules",
+                             'pipeline' in modules and not heavy, str(heavy))
+        db_path = os.path.join(self.directory, 'pbp_db')
+        sqlite3.connect(db_path).close()
+        modules = loaded_modules(f"import db_pool\ndb_pool.execute_query('SELECT 1', db_path={db_path!r})")
+        self.log_test_result("Queries on a database without a column store don't import numpy",
+                             'numpy' not in modules)
+
+        with open(os.path.join(ROOT, 'app.py')) as f:
+            tree = ast.parse(f.read())
+        imported = {alias.name.split('.')[0] for node in tree.body if isinstance(node, ast.Import) for alias in node.names}
+        imported |= {node.module.split('.')[0] for node in tree.body if isinstance(node, ast.ImportFrom)}
+        cached = [node.name for node in tree.body if isinstance(node, ast.FunctionDef)
+                  and any('cache_resource' in ast.unparse(decorator) for decorator in node.decorator_list)]
+        self.log_test_result("app.py imports the pipeline inside a cache_resource loader, not at module import",
+                             'pipeline' not in imported and cached == ['load_pipeline'], f"{sorted(imported)} {cached}")
+
+    def test_precompiled_schema(self):
+        print("\n🧪 Testing: precompiled schema context")
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+        try:
+            os.makedirs(schema_context.SCHEMA_DIR)
+            with open(schema_context.PBP_SCHEMA_FILE, 'w') as f:
+                f.write(PBP_SCHEMA)
+            with open(schema_context.FIELD_DESCRIPTIONS_FILE, 'w') as f:
+                json.dump(FIELD_DESCRIPTIONS, f)
+            full_context = schema_context.build_full_schema_context()
+            index = schema_context.build_index()
+            self.log_test_result("The build stores the full context and a hash of the schema files",
+                                 index['full_context'] == full_context
+                                 and '- rushing_yards (numeric): Yards gained on a run' in full_context
+                                 and index['sources'] == schema_context.source_fingerprint())
+
+            # A marker instead of the real context shows which one was used
+            with open(schema_context.INDEX_FILE, 'w') as f:
+                json.dump(dict(index, full_context='precompiled'), f)
+            schema_context._precompiled.clear()
+            self.log_test_result("A current prebuilt file is used without parsing the schema files",
+                                 schema_context.load_full_schema_context() == 'precompiled'
+                                 and len(schema_context.SchemaIndex.load().documents) == len(index['documents']))
+
+            with open(schema_context.PBP_SCHEMA_FILE, 'a') as f:
+                f.write("\nepa: REAL")
+            schema_context._precompiled.clear()
+            context = schema_context.load_full_schema_context()
+            names = {document['name'] for document in schema_context.SchemaIndex.load().documents}
+            self.log_test_result("A prebuilt file out of date with the schema files is ignored",
+                                 context != 'precompiled' and 'epa: REAL' in context and 'epa' in names)
+        finally:
+            os.chdir(cwd)
+            schema_context._precompiled.clear()
+
+    def run_all_tests(self):
+        print("\n🏈 Startup Test Suite")
+        print("=" * 60)
+        try:
+            self.test_lazy_imports()
+            self.test_precompiled_schema()
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = StartupTestSuite()
+    suite.run_all_tests()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Test suite for cached, fanned-out web search (web_search.py)
+Runs offline: the search backend is a scripted stand-in for DuckDuckGo
+"""
+
+import sys
+import os
+import time
+import types
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import web_search
+from web_search import SearchCache, dedupe_results, query_rewrites, search_web
+
+
+class ScriptedSearch:
+    """Returns canned results per query after a delay; records every call."""
+
+    def __init__(self, delay=0.0, failing=()):
+        self.delay = delay
+        self.failing = set(failing)
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def __call__(self, query, max_results):
+        with self._lock:
+            self.queries.append(query)
+        time.sleep(self.delay)
+        if query in self.failing:
+            raise RuntimeError(f"rate limited: {query}")
+        shared = {'title': 'Chiefs win', 'href': 'https://www.espn.com/nfl/story?id=1&utm_source=x',
+                  'body': 'Kansas City beat San Francisco 25-22.'}
+        return [shared, {'title': f"Result for {query}", 'href': f"https://example.com/{len(query)}",
+                         'body': f"Snippet about {query}"}]
+
+
+class WebSearchTestSuite:
+    def __init__(self):
+        print("🔧 Initializing Web Search Test Suite...")
+        self.original_backend = web_search._search_backend
+        self.test_results = {
+            'passed': 0,
+            'failed': 0,
+            'total': 0
+        }
+        print("✅ Test suite initialized successfully")
+
+    def log_test_result(self, test_name: str, passed: bool, reason: str = ""):
+        self.test_results['total'] += 1
+        if passed:
+            self.test_results['passed'] += 1
+            print(f"✅ PASSED: {test_name}")
+        else:
+            self.test_results['failed'] += 1
+            print(f"❌ FAILED: {test_name}")
+        if reason:
+            print(f"   Reason: {reason}")
+
+    def print_summary(self):
+        print(f"\n{'='*60}")
+        print("📊 WEB SEARCH TEST SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total Tests: {self.test_results['total']}")
+        print(f"✅ Passed: {self.test_results['passed']}")
+        print(f"❌ Failed: {self.test_results['failed']}")
+        if self.test_results['failed'] == 0:
+            print(f"\n🎉 All web search tests passed successfully!")
+        print(f"{'='*60}")
+
+    def _use(self, search):
+        web_search._cache.clear()
+        web_search.set_search_backend(search)
+        return search
+
+    def test_fan_out(self):
+        print("\n🧪 Testing: parallel query rewrites")
+        search = self._use(ScriptedSearch(delay=0.2))
+        start_time = time.perf_counter()
+        results = search_web("Who won Super Bowl LVIII?", 5)
+        elapsed = time.perf_counter() - start_time
+        self.log_test_result("Every rewrite is searched", sorted(search.queries) == sorted([
+            "Who won Super Bowl LVIII?", "Who won Super Bowl LVIII? NFL", "Who won Super Bowl LVIII? site:espn.com"]),
+            str(search.queries))
+        self.log_test_result("Rewrites run in parallel", elapsed < 0.35, f"{elapsed:.2f}s")
+        self.log_test_result("Duplicate snippets are merged", len(results) == 4
+                             and sum(r['title'] == 'Chiefs win' for r in results) == 1,
+                             str([r['title'] for r in results]))
+        self.log_test_result("No NFL rewrite for a question that says NFL",
+                             query_rewrites("Who leads the NFL in sacks?") ==
+                             ["Who leads the NFL in sacks?", "Who leads the NFL in sacks? site:espn.com"])
+
+    def test_cache(self):
+        print("\n🧪 Testing: short-TTL result cache")
+        search = self._use(ScriptedSearch())
+        first = search_web("Who won Super Bowl LVIII?", 5)
+        calls = len(search.queries)
+        second = search_web("who won super bowl LVIII", 5)
+        self.log_test_result("Repeated query is served from the cache",
+                             second == first and len(search.queries) == calls)
+        cache = SearchCache(ttl=0.05, max_entries=2)
+        cache.put('a', [1])
+        cache.put('b', [2])
+        cache.put('c', [3])
+        evicted = cache.get('a') is None and cache.get('c') == [3]
+        time.sleep(0.06)
+        self.log_test_result("Entries expire after the TTL and the oldest are evicted",
+                             evicted and cache.get('c') is None)
+
+    def test_dedupe_and_failures(self):
+        print("\n🧪 Testing: deduplication and failed rewrites")
+        results = dedupe_results([
+            {'title': 'A', 'href': 'https://www.nfl.com/news/a/', 'body': 'Mahomes threw for 300 yards.'},
+            {'title': 'A again', 'href': 'http://nfl.com/news/a?utm_campaign=feed', 'body': 'Different text'},
+            {'title': 'Copy', 'href': 'https://mirror.example/a', 'body': 'Mahomes  threw for 300 yards!'},
+            {'title': '', 'href': 'https://empty.example', 'body': ''},
+            {'title': 'B', 'href': 'https://www.nfl.com/news/b', 'body': 'Kelce caught 9 passes.'},
+        ])
+        self.log_test_result("Same URL or same snippet text is dropped",
+                             [r['title'] for r in results] == ['A', 'B'], str([r['title'] for r in results]))
+
+        search = self._use(ScriptedSearch(failing={"Who won? NFL"}))
+        results = search_web("Who won?", 5)
+        self.log_test_result("A failed rewrite doesn't fail the search", len(results) == 3, str(len(results)))
+        self._use(ScriptedSearch(failing={"Who won?", "Who won? NFL", "Who won? site:espn.com"}))
+        try:
+            search_web("Who won?", 5)
+            raised = False
+        except RuntimeError:
+            raised = True
+        self.log_test_result("The search fails when every rewrite fails", raised)
+
+    def test_agent_routing(self):
+        print("\n🧪 Testing: agent DDGS calls are routed through search_web")
+        calls, options = [], []
+
+        class DDGS:
+            def text(self, query, region='us-en', safesearch='moderate', timelimit=None, max_results=10):
+                calls.append(query)
+                options.append((region, safesearch, timelimit))
+                return [{'title': 'Live', 'href': f"https://live.example/{len(calls)}", 'body': f"Live {query}"}]
+
+        original_module = sys.modules.get('ddgs')
+        sys.modules['ddgs'] = types.SimpleNamespace(DDGS=DDGS)
+        try:
+            self._use(web_search.text_search)
+            web_search.install_web_search()
+            first = DDGS().text("Latest Chiefs injury news", max_results=3)
+            second = DDGS().text("latest chiefs injury news", max_results=3)
+            cached_calls = len(calls)
+            del calls[:], options[:]
+            this_week = DDGS().text("Latest Chiefs injury news", timelimit='w', max_results=3)
+            DDGS().text("Latest Chiefs injury news", 'uk-en', 'off', max_results=3)
+        finally:
+            web_search._ddgs_text = None
+            if original_module is None:
+                del sys.modules['ddgs']
+            else:
+                sys.modules['ddgs'] = original_module
+        self.log_test_result("Agent searches fan out through the original DDGS.text and hit the cache",
+                             cached_calls == 3 and len(first) >= 1 and second == first, str(calls))
+        self.log_test_result("Region, safesearch and timelimit reach DDGS.text and get their own cache entries",
+                             len(calls) == 6 and this_week
+                             and set(options) == {('us-en', 'moderate', 'w'), ('uk-en', 'off', None)},
+                             str(options))
+
+    def run_all_tests(self):
+        print("\n🏈 Web Search Test Suite")
+        print("=" * 60)
+        try:
+            self.test_fan_out()
+            self.test_cache()
+            self.test_dedupe_and_failures()
+            self.test_agent_routing()
+        finally:
+            web_search.set_search_backend(self.original_backend)
+            web_search._cache.clear()
+        self.print_summary()
+
+
+if __name__ == "__main__":
+    suite = WebSearchTestSuite()
+    suite.run_all_tests()
@@ -0,0 +1,307 @@
+"""
+Structured per-request traces for the hybrid query flow.
+
+A Trace is a tree of timed spans, one per stage of a request (keyword
+screen, classifier, database branch, SQL statements, web search, synthesis,
+scoring), each carrying attributes such as the SQL text, row counts, token
+counts and the selected source. The active span lives in a context variable,
+so code anywhere below the pipeline (the template fast path, db_pool) can add
+a child span with span(); with_current_context() carries it into executor
+threads. install_tracing() wraps the agent's LLM clients so each call is an
+'llm' span with its prompt and completion token counts.
+
+Finished traces can be written as JSON lines, one line per span, for offline
+latency analysis.
+
+Settings come from the environment:
+    TRACE_LOG   append every finished trace to this JSON lines file
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+
+TRACE_LOG_ENV = 'TRACE_LOG'
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+_export_lock = threading.Lock()
+
+
+def approx_tokens(text) -> int:
+    """Rough token count (about four characters per token)."""
+    return (len(str(text)) + 3) // 4 if text else 0
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    def __init__(self, trace, name: str, parent=None, **attributes):
+        self.trace = trace
+        self.name = name
+        self.parent = parent
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attributes = dict(attributes)
+        self.children = []
+        self.start = time.perf_counter()
+        self.end = None
+        if parent is not None:
+            with trace._lock:
+                parent.children.append(self)
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.perf_counter()
+        return self
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    def walk(self, depth: int = 0):
+        """Yield (depth, span) for this span and its descendants in start order."""
+        yield depth, self
+        for child in sorted(self.children, key=lambda span: span.start):
+            yield from child.walk(depth + 1)
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent.span_id if self.parent else None,
+            'name': self.name,
+            'start_ms': round((self.start - self.trace.root.start) * 1000, 3),
+            'duration_ms': round(self.duration * 1000, 3),
+            'attributes': self.attributes,
+        }
+
+
+class Trace:
+    """The span tree for one request; the root span is the request itself."""
+
+    def __init__(self, question: str = '', **attributes):
+        self.trace_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self.root = Span(self, 'query', question=question, **attributes)
+        self.finished = False
+
+    @contextmanager
+    def activate(self):
+        """Make the root span current so span() calls attach to this trace."""
+        token = _current_span.set(self.root)
+        try:
+            yield self
+        finally:
+            _current_span.reset(token)
+
+    def spans(self):
+        return [span for _, span in self.root.walk()]
+
+    def find(self, name: str):
+        """The first span with this name, or None."""
+        return next((span for span in self.spans() if span.name == name), None)
+
+    @property
+    def source(self):
+        return self.root.attributes.get('source')
+
+    def finish(self, **attributes):
+        """End the request span and export the trace (once)."""
+        with self._lock:
+            if self.finished:
+                return self
+            self.finished = True
+        self.root.set(**attributes).finish()
+        path = os.getenv(TRACE_LOG_ENV)
+        if path:
+            export_jsonl(self, path)
+        return self
+
+    def to_jsonl(self) -> str:
+        lines = []
+        for span in self.spans():
+            record = span.to_dict()
+            if span is self.root:
+                record['started_at'] = self.started_at
+            lines.append(json.dumps(record, default=str))
+        return '\n'.join(lines)
+
+
+def format_waterfall(trace: Trace, width: int = 40) -> str:
+    """Text timing waterfall: one row per span, offset and duration in ms."""
+    total = trace.root.duration or 1e-9
+    lines = [f"{'span':<28}{'start':>9}{'ms':>9}  timeline"]
+    for depth, span in trace.root.walk():
+        offset = span.start - trace.root.start
+        begin = min(width - 1, int(offset / total * width))
+        length = max(1, min(width - begin, round(span.duration / total * width)))
+        bar = ' ' * begin + '█' * length + ' ' * (width - begin - length)
+        label = ('  ' * depth + span.name)[:27]
+        lines.append(f"{label:<28}{offset * 1000:>9.1f}{span.duration * 1000:>9.1f}  |{bar}|")
+    return '\n'.join(lines)
+
+
+def export_jsonl(trace: Trace, path: str):
+    """Append the trace to a JSON lines file, one line per span."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with _export_lock, open(path, 'a') as f:
+        f.write(trace.to_jsonl() + '\n')
+
+
+class _NoSpan:
+    """Stands in for a span when no trace is active."""
+
+    def set(self, **attributes):
+        return self
+
+    def finish(self):
+        return self
+
+
+NO_SPAN = _NoSpan()
+
+
+def current_span():
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time the body as a child of the current span; a no-op outside a trace."""
+    parent = _current_span.get()
+    if parent is None:
+        yield NO_SPAN
+        return
+    child = Span(parent.trace, name, parent, **attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.set(error=str(e))
+        raise
+    finally:
+        _current_span.reset(token)
+        child.finish()
+
+
+def start_span(name: str, **attributes):
+    """Open a child of the current span to be finished explicitly (e.g. by a stream)."""
+    parent = _current_span.get()
+    if parent is None:
+        return NO_SPAN
+    return Span(parent.trace, name, parent, **attributes)
+
+
+def traced_stream(chunks, name: str, on_finish=None, **attributes):
+    """Yield from chunks inside a child span of the current span.
+
+    The chunks are produced in a copy of the current context, so spans opened
+    while generating them (an LLM stream) join the trace even when another
+    thread consumes the stream. on_finish runs once the stream is exhausted or
+    closed.
+    """
+    stream_span = start_span(name, **attributes)
+    context = contextvars.copy_context()
+    if stream_span is not NO_SPAN:
+        context.run(_current_span.set, stream_span)
+    return _stream_in_context(iter(chunks), context, stream_span, on_finish)
+
+
+def _stream_in_context(iterator, context, stream_span, on_finish):
+    start_time = time.perf_counter()
+    count = 0
+    try:
+        while True:
+            try:
+                chunk = context.run(next, iterator)
+            except StopIteration:
+                break
+            if not count:
+                stream_span.set(first_chunk_ms=round((time.perf_counter() - start_time) * 1000, 3))
+            count += 1
+            yield chunk
+    finally:
+        stream_span.set(chunks=count).finish()
+        if on_finish is not None:
+            on_finish()
+
+
+def with_current_context(func):
+    """Bind func to a copy of the current context, for running on another thread."""
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+# Agent attribute -> client name on 'llm' spans
+LLM_CLIENTS = {
+    '_llm': 'sql_llm',
+    '_web_llm': 'web_llm',
+    '_classifier_llm': 'classifier_llm',
+}
+
+
+def _text(response) -> str:
+    # LLMs return str, chat models return messages
+    return getattr(response, 'content', response) or ''
+
+
+def _token_counts(prompt, response) -> dict:
+    """Token usage reported by a chat model, else an estimate from the text."""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage:
+        return {'prompt_tokens': usage.get('input_tokens'), 'completion_tokens': usage.get('output_tokens')}
+    return {'prompt_tokens': approx_tokens(prompt), 'completion_tokens': approx_tokens(_text(response)),
+            'tokens_estimated': True}
+
+
+class TracedLLM:
+    """Records an 'llm' span for every call to the wrapped client."""
+
+    def __init__(self, client, name: str):
+        self._client = client
+        self._name = name
+
+    def __getattr__(self, attribute):
+        return getattr(self._client, attribute)
+
+    def invoke(self, prompt, **kwargs):
+        with span('llm', client=self._name) as llm_span:
+            response = self._client.invoke(prompt, **kwargs)
+            llm_span.set(**_token_counts(prompt, response))
+        return response
+
+    def stream(self, prompt, **kwargs):
+        llm_span = start_span('llm', client=self._name, streamed=True)
+        start_time = time.perf_counter()
+        text = []
+        try:
+            for chunk in self._client.stream(prompt, **kwargs):
+                if not text:
+                    llm_span.set(first_chunk_ms=round((time.perf_counter() - start_time) * 1000, 3))
+                text.append(_text(chunk))
+                yield chunk
+        finally:
+            llm_span.set(**_token_counts(prompt, ''.join(text))).finish()
+
+    def predict(self, text, **kwargs):
+        return self.invoke(text, **kwargs)
+
+    def __call__(self, prompt, **kwargs):
+        return self.invoke(prompt, **kwargs)
+
+
+def install_tracing(agent):
+    """Wrap an NFLStatAgent instance's LLM clients so their calls show up in traces."""
+    for attribute, name in LLM_CLIENTS.items():
+        client = getattr(agent, attribute, None)
+        if client is not None and not isinstance(client, TracedLLM):
+            setattr(agent, attribute, TracedLLM(client, name))
+    return agent
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Build the player dictionary used for name resolution (see player_index.py).
+
+Collects every passer, rusher and receiver in nflfastR_pbp with the names
+the data uses for them, their teams and play counts per season, and writes
+data/pbp_db.players.json. With --seasons only those seasons are re-read and
+merged into the existing dictionary (util/ingest_pbp.py does this after a
+weekly load).
+
+It also creates single-column indexes on passer_player_id,
+rusher_player_id and receiver_player_id (on nflfastR_pbp_hot for a
+partitioned database), so the id equality filters that resolution suggests
+are index lookups rather than scans.
+
+Usage (from the project root):
+    python -m util.build_player_index                     # all seasons, plus the id indexes
+    python -m util.build_player_index --seasons 2024      # refresh one season
+    python -m util.build_player_index --no-indexes
+"""
+
+import os
+import json
+import sqlite3
+import argparse
+import time
+from datetime import datetime, timezone
+
+from db_pool import database_version
+from partitioning import HOT_TABLE, TABLE_NAME, partition_layout, route_sql
+from player_index import ID_COLUMNS, ROLES, player_index_path
+
+DB_PATH = os.getenv('DB_PATH', 'data/pbp_db')
+
+
+def player_rows(conn, seasons=None):
+    """(player_id, name, season, team, role, plays) for every role a player had."""
+    season_filter = f" AND season IN ({', '.join('?' * len(seasons))})" if seasons else ''
+    selects = [f"SELECT {role}_player_id, {role}_player_name, season, posteam, '{role}', COUNT(*) "
+               f"FROM {TABLE_NAME} WHERE {role}_player_id IS NOT NULL{season_filter} GROUP BY 1, 2, 3, 4"
+               for role in ROLES]
+    sql = route_sql(' UNION ALL '.join(selects), partition_layout(conn))
+    return conn.execute(sql, list(seasons or []) * len(ROLES)).fetchall()
+
+
+def build_players(rows, existing=None, seasons=None) -> dict:
+    """Merge player rows into a player_id -> entry dictionary.
+
+    Seasons in `seasons` are replaced; every other season of `existing` is kept.
+    """
+    players = {}
+    for player_id, player in (existing or {}).items():
+        kept = {season: entry for season, entry in player['seasons'].items()
+                if not seasons or int(season) not in seasons}
+        if seasons and kept:
+            players[player_id] = dict(player, seasons=kept, names=list(player['names']))
+    latest = {player_id: max(player['seasons']) for player_id, player in players.items()}
+    for player_id, name, season, team, role, count in rows:
+        if name is None:
+            continue
+        player = players.setdefault(player_id, {'name': name, 'names': [], 'seasons': {}})
+        if name not in player['names']:
+            player['names'].append(name)
+        entry = player['seasons'].setdefault(str(season), {'teams': []})
+        if team and team not in entry['teams']:
+            entry['teams'].append(team)
+        entry[role] = entry.get(role, 0) + count
+        # The display name is the one from the player's latest season
+        if str(season) >= latest.get(player_id, ''):
+            latest[player_id] = str(season)
+            player['name'] = name
+    for player in players.values():
+        player['names'].sort()
+        for entry in player['seasons'].values():
+            entry['teams'].sort()
+    return players
+
+
+def create_id_indexes(conn):
+    """Single-column indexes on the player id columns; returns their names."""
+    table = HOT_TABLE if partition_layout(conn) is not None else TABLE_NAME
+    names = []
+    for column in ID_COLUMNS:
+        name = f'idx_pbp_{column}'
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table}({column})')
+        names.append(name)
+    conn.commit()
+    return names
+
+
+def build_player_index(db_path: str, seasons=None) -> dict:
+    """Write db_path's player dictionary (merging into the existing one for
+    the given seasons) and return it."""
+    path = player_index_path(db_path)
+    existing = {}
+    if seasons:
+        try:
+            with open(path) as f:
+                existing = json.load(f)['players']
+        except (OSError, ValueError, KeyError):
+            seasons = None
+    version = database_version(db_path)
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    try:
+        players = build_players(player_rows(conn, seasons), existing, seasons)
+    finally:
+        conn.close()
+    index = {
+        'database_version': version,
+        'built_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'players': players,
+    }
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(temporary, path)
+    return index
+
+
+def refresh_player_index(db_path: str, seasons):
+    """Re-read the given seasons into db_path's player dictionary, if it has one."""
+    if not os.path.exists(player_index_path(db_path)):
+        return None
+    index = build_player_index(db_path, seasons)
+    print(f"✅ Player index refreshed: {len(index['players'])} players")
+    return len(index['players'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the player name dictionary for entity resolution')
+    parser.add_argument('--db', default=DB_PATH, help='Path to the SQLite database')
+    parser.add_argument('--seasons', type=int, nargs='*', help='Only re-read these seasons')
+    parser.add_argument('--no-indexes', action='store_true', help="Don't create the player id indexes")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    print(f"👤 Building the player index from {args.db}")
+    index = build_player_index(args.db, args.seasons)
+    print(f"✅ {len(index['players'])} players written to {player_index_path(args.db)}")
+    if not args.no_indexes:
+        conn = sqlite3.connect(args.db)
+        try:
+            print(f"✅ Indexes: {', '.join(create_id_indexes(conn))}")
+        finally:
+            conn.close()
+    print(f"⏱️  Done in {time.time() - start_time:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
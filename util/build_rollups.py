@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Build pre-aggregated rollup tables from nflfastR_pbp.
+
+Creates three summary tables next to the play-by-play table so common
+questions can be answered from thousands of rows instead of millions:
+
+  games         one row per game: final score, spread/total results
+  team_season   one row per team/season/season_type: record, ATS, scoring,
+                passing/rushing totals and red zone counts
+  player_season one row per player/season/season_type: passing, rushing
+                and receiving totals
+
+Usage (from the project root):
+    python -m util.build_rollups                   # rebuild every season
+    python -m util.build_rollups --seasons 2023 2024
+"""
+
+import os
+import sqlite3
+import argparse
+import time
+
+from partitioning import partition_layout, route_sql
+
+DB_PATH = os.getenv('DB_PATH', 'data/pbp_db')
+TABLE_NAME = 'nflfastR_pbp'
+SCHEMA_OUTPUT_PATH = 'schema/schema_rollups.txt'
+
+ROLLUP_TABLES = ['games', 'team_season', 'player_season']
+
+CREATE_STATEMENTS = {
+    'games': """
+        CREATE TABLE IF NOT EXISTS games (
+            game_id TEXT PRIMARY KEY,
+            season INTEGER,
+            week INTEGER,
+            season_type TEXT,
+            game_date TEXT,
+            home_team TEXT,
+            away_team TEXT,
+            home_score INTEGER,
+            away_score INTEGER,
+            result INTEGER,
+            total INTEGER,
+            winner TEXT,
+            spread_line REAL,
+            total_line REAL,
+            home_cover INTEGER,
+            away_cover INTEGER,
+            spread_push INTEGER,
+            total_over INTEGER,
+            plays INTEGER
+        )
+    """,
+    'team_season': """
+        CREATE TABLE IF NOT EXISTS team_season (
+            season INTEGER,
+            season_type TEXT,
+            team TEXT,
+            games INTEGER,
+            wins INTEGER,
+            losses INTEGER,
+            ties INTEGER,
+            points_for INTEGER,
+            points_against INTEGER,
+            ats_wins INTEGER,
+            ats_losses INTEGER,
+            ats_pushes INTEGER,
+            home_ats_wins INTEGER,
+            road_ats_wins INTEGER,
+            passing_yards INTEGER,
+            rushing_yards INTEGER,
+            pass_touchdowns INTEGER,
+            rush_touchdowns INTEGER,
+            interceptions_thrown INTEGER,
+            sacks_taken INTEGER,
+            red_zone_plays INTEGER,
+            red_zone_touchdowns INTEGER,
+            red_zone_trips INTEGER,
+            offensive_plays INTEGER,
+            epa_per_play REAL,
+            PRIMARY KEY (season, season_type, team)
+        )
+    """,
+    'player_season': """
+        CREATE TABLE IF NOT EXISTS player_season (
+            season INTEGER,
+            season_type TEXT,
+            player_id TEXT,
+            player_name TEXT,
+            teams TEXT,
+            completions INTEGER,
+            pass_attempts INTEGER,
+            passing_yards INTEGER,
+            pass_touchdowns INTEGER,
+            interceptions INTEGER,
+            sacks INTEGER,
+            carries INTEGER,
+            rushing_yards INTEGER,
+            rush_touchdowns INTEGER,
+            targets INTEGER,
+            receptions INTEGER,
+            receiving_yards INTEGER,
+            receiving_touchdowns INTEGER,
+            PRIMARY KEY (season, season_type, player_id)
+        )
+    """,
+}
+
+# Final score is the max running score per game, the same definition used by
+# the final_scores CTE in tests/test_sql_agent.py. spread_line is positive
+# when the home team is favored, so the home side covers when result > spread.
+GAMES_SELECT = f"""
+    SELECT game_id, season, week, season_type, game_date,
+           home_team, away_team, home_score, away_score,
+           home_score - away_score AS result,
+           home_score + away_score AS total,
+           CASE WHEN home_score > away_score THEN home_team
+                WHEN away_score > home_score THEN away_team END AS winner,
+           spread_line, total_line,
+           CASE WHEN spread_line IS NULL THEN NULL
+                WHEN home_score - away_score > spread_line THEN 1 ELSE 0 END AS home_cover,
+           CASE WHEN spread_line IS NULL THEN NULL
+                WHEN home_score - away_score < spread_line THEN 1 ELSE 0 END AS away_cover,
+           CASE WHEN spread_line IS NULL THEN NULL
+                WHEN home_score - away_score = spread_line THEN 1 ELSE 0 END AS spread_push,
+           CASE WHEN total_line IS NULL THEN NULL
+                WHEN home_score + away_score > total_line THEN 1 ELSE 0 END AS total_over,
+           plays
+    FROM (
+        SELECT game_id, MAX(season) AS season, MAX(week) AS week,
+               MAX(season_type) AS season_type, MAX(game_date) AS game_date,
+               MAX(home_team) AS home_team, MAX(away_team) AS away_team,
+               MAX(total_home_score) AS home_score,
+               MAX(total_away_score) AS away_score,
+               MAX(spread_line) AS spread_line, MAX(total_line) AS total_line,
+               COUNT(*) AS plays
+        FROM {TABLE_NAME}
+        WHERE {{season_filter}}
+        GROUP BY game_id
+    )
+"""
+
+# Red zone plays/touchdowns mirror the red_zone_plays CTE in
+# util/debug_red_zone.py (yardline_100 <= 20, pass and run plays only).
+TEAM_SEASON_SELECT = f"""
+    WITH results AS (
+        SELECT season, season_type, home_team AS team,
+               CASE WHEN home_score > away_score THEN 1 ELSE 0 END AS win,
+               CASE WHEN home_score < away_score THEN 1 ELSE 0 END AS loss,
+               CASE WHEN home_score = away_score THEN 1 ELSE 0 END AS tie,
+               home_score AS points_for, away_score AS points_against,
+               home_cover AS ats_win, away_cover AS ats_loss, spread_push AS ats_push,
+               home_cover AS home_ats_win, 0 AS road_ats_win
+        FROM games WHERE {{season_filter}}
+        UNION ALL
+        SELECT season, season_type, away_team AS team,
+               CASE WHEN away_score > home_score THEN 1 ELSE 0 END,
+               CASE WHEN away_score < home_score THEN 1 ELSE 0 END,
+               CASE WHEN away_score = home_score THEN 1 ELSE 0 END,
+               away_score, home_score,
+               away_cover, home_cover, spread_push,
+               0, away_cover
+        FROM games WHERE {{season_filter}}
+    ),
+    record AS (
+        SELECT season, season_type, team,
+               COUNT(*) AS games, SUM(win) AS wins, SUM(loss) AS losses, SUM(tie) AS ties,
+               SUM(points_for) AS points_for, SUM(points_against) AS points_against,
+               SUM(ats_win) AS ats_wins, SUM(ats_loss) AS ats_losses, SUM(ats_push) AS ats_pushes,
+               SUM(home_ats_win) AS home_ats_wins, SUM(road_ats_win) AS road_ats_wins
+        FROM results
+        GROUP BY season, season_type, team
+    ),
+    offense AS (
+        SELECT season, season_type, posteam AS team,
+               SUM(COALESCE(passing_yards, 0)) AS passing_yards,
+               SUM(COALESCE(rushing_yards, 0)) AS rushing_yards,
+               SUM(COALESCE(pass_touchdown, 0)) AS pass_touchdowns,
+               SUM(COALESCE(rush_touchdown, 0)) AS rush_touchdowns,
+               SUM(COALESCE(interception, 0)) AS interceptions_thrown,
+               SUM(COALESCE(sack, 0)) AS sacks_taken,
+               SUM(CASE WHEN yardline_100 <= 20 AND play_type IN ('pass', 'run')
+                        THEN 1 ELSE 0 END) AS red_zone_plays,
+               SUM(CASE WHEN yardline_100 <= 20 AND play_type IN ('pass', 'run')
+                         AND touchdown = 1 THEN 1 ELSE 0 END) AS red_zone_touchdowns,
+               COUNT(DISTINCT CASE WHEN yardline_100 <= 20
+                                   THEN game_id || '-' || drive END) AS red_zone_trips,
+               SUM(CASE WHEN play_type IN ('pass', 'run') THEN 1 ELSE 0 END) AS offensive_plays,
+               AVG(CASE WHEN play_type IN ('pass', 'run') THEN epa END) AS epa_per_play
+        FROM {TABLE_NAME}
+        WHERE {{season_filter}} AND posteam IS NOT NULL AND posteam != ''
+        GROUP BY season, season_type, posteam
+    )
+    SELECT r.season, r.season_type, r.team, r.games, r.wins, r.losses, r.ties,
+           r.points_for, r.points_against, r.ats_wins, r.ats_losses, r.ats_pushes,
+           r.home_ats_wins, r.road_ats_wins,
+           o.passing_yards, o.rushing_yards, o.pass_touchdowns, o.rush_touchdowns,
+           o.interceptions_thrown, o.sacks_taken, o.red_zone_plays,
+           o.red_zone_touchdowns, o.red_zone_trips, o.offensive_plays,
+           ROUND(o.epa_per_play, 4)
+    FROM record r
+    LEFT JOIN offense o
+      ON o.season = r.season AND o.season_type = r.season_type AND o.team = r.team
+"""
+
+# One UNION ALL branch per role so a single pass credits passers, rushers and
+# receivers. Attempts exclude sacks (nflfastR's pass_attempt includes them).
+PLAYER_SEASON_SELECT = f"""
+    WITH roles AS (
+        SELECT season, season_type, passer_player_id AS player_id,
+               passer_player_name AS player_name, posteam,
+               COALESCE(complete_pass, 0) AS completions,
+               COALESCE(complete_pass, 0) + COALESCE(incomplete_pass, 0)
+                   + COALESCE(interception, 0) AS pass_attempts,
+               COALESCE(passing_yards, 0) AS passing_yards,
+               COALESCE(pass_touchdown, 0) AS pass_touchdowns,
+               COALESCE(interception, 0) AS interceptions,
+               COALESCE(sack, 0) AS sacks,
+               0 AS carries, 0 AS rushing_yards, 0 AS rush_touchdowns,
+               0 AS targets, 0 AS receptions, 0 AS receiving_yards,
+               0 AS receiving_touchdowns
+        FROM {TABLE_NAME}
+        WHERE {{season_filter}} AND passer_player_id IS NOT NULL
+        UNION ALL
+        SELECT season, season_type, rusher_player_id, rusher_player_name, posteam,
+               0, 0, 0, 0, 0, 0,
+               COALESCE(rush_attempt, 0), COALESCE(rushing_yards, 0),
+               COALESCE(rush_touchdown, 0),
+               0, 0, 0, 0
+        FROM {TABLE_NAME}
+        WHERE {{season_filter}} AND rusher_player_id IS NOT NULL
+        UNION ALL
+        SELECT season, season_type, receiver_player_id, receiver_player_name, posteam,
+               0, 0, 0, 0, 0, 0,
+               0, 0, 0,
+               1, COALESCE(complete_pass, 0), COALESCE(receiving_yards, 0),
+               COALESCE(pass_touchdown, 0)
+        FROM {TABLE_NAME}
+        WHERE {{season_filter}} AND receiver_player_id IS NOT NULL
+    )
+    SELECT season, season_type, player_id, MAX(player_name),
+           GROUP_CONCAT(DISTINCT posteam),
+           SUM(completions), SUM(pass_attempts), SUM(passing_yards),
+           SUM(pass_touchdowns), SUM(interceptions), SUM(sacks),
+           SUM(carries), SUM(rushing_yards), SUM(rush_touchdowns),
+           SUM(targets), SUM(receptions), SUM(receiving_yards),
+           SUM(receiving_touchdowns)
+    FROM roles
+    GROUP BY season, season_type, player_id
+"""
+
+SELECT_STATEMENTS = {
+    'games': GAMES_SELECT,
+    'team_season': TEAM_SEASON_SELECT,
+    'player_season': PLAYER_SEASON_SELECT,
+}
+
+EXAMPLE_QUERIES = """
+-- Road team that covered the spread the most in the 2024 regular season
+SELECT team, road_ats_wins FROM team_season
+WHERE season = 2024 AND season_type = 'REG'
+ORDER BY road_ats_wins DESC LIMIT 1;
+
+-- Best red zone touchdown percentage in 2024 (min 20 red zone plays)
+SELECT team, red_zone_plays, red_zone_touchdowns,
+       ROUND(CAST(red_zone_touchdowns AS FLOAT) / red_zone_plays * 100, 1) AS td_percentage
+FROM team_season
+WHERE season = 2024 AND season_type = 'REG' AND red_zone_plays >= 20
+ORDER BY td_percentage DESC LIMIT 5;
+
+-- Top 5 rushers in 2022
+SELECT player_name, rushing_yards FROM player_season
+WHERE season = 2022 AND season_type = 'REG'
+ORDER BY rushing_yards DESC LIMIT 5;
+
+-- Games decided by 3 points or less in 2024
+SELECT winner, COUNT(*) AS close_wins FROM games
+WHERE season = 2024 AND season_type = 'REG' AND ABS(result) <= 3 AND winner IS NOT NULL
+GROUP BY winner ORDER BY close_wins DESC;
+"""
+
+
+def _season_filter(seasons):
+    """Return a WHERE fragment and its parameters for the given seasons."""
+    if not seasons:
+        return '1 = 1', []
+    placeholders = ', '.join('?' for _ in seasons)
+    return f'season IN ({placeholders})', list(seasons)
+
+
+def create_rollup_tables(conn):
+    """Create the rollup tables and their lookup indexes if missing."""
+    cursor = conn.cursor()
+    for table in ROLLUP_TABLES:
+        cursor.execute(CREATE_STATEMENTS[table])
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_games_season_week ON games(season, week)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_player_season_name ON player_season(player_name)')
+    conn.commit()
+
+
+def refresh_rollups(conn, seasons=None):
+    """Rebuild rollup rows for the given seasons (all seasons when None).
+
+    Existing rows for those seasons are deleted and re-derived from
+    nflfastR_pbp inside one transaction. games is refreshed first because
+    team_season is derived from it. On a hot/cold partitioned database the
+    selects read the hot table directly (see partitioning.py).
+
+    Returns:
+        dict: row counts written per table
+    """
+    create_rollup_tables(conn)
+    layout = partition_layout(conn)
+    season_filter, params = _season_filter(seasons)
+    counts = {}
+    cursor = conn.cursor()
+    try:
+        for table in ROLLUP_TABLES:
+            cursor.execute(f'DELETE FROM {table} WHERE {season_filter}', params)
+            template = SELECT_STATEMENTS[table]
+            select_sql = route_sql(template.format(season_filter=season_filter), layout)
+            # Some selects apply the season filter in several branches
+            query_params = params * template.count('{season_filter}')
+            cursor.execute(f'INSERT INTO {table} {select_sql}', query_params)
+            counts[table] = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return counts
+
+
+def write_schema_context(conn, output_path=SCHEMA_OUTPUT_PATH):
+    """Write the rollup table schema and example queries for the SQL prompt."""
+    cursor = conn.cursor()
+    with open(output_path, 'w') as f:
+        f.write('Pre-aggregated rollup tables derived from nflfastR_pbp.\n')
+        f.write('Prefer these tables over nflfastR_pbp for game results, team season totals '
+                'and player season totals; they hold thousands of rows instead of millions.\n')
+        f.write("season_type is 'REG' for the regular season and 'POST' for the playoffs.\n")
+        for table in ROLLUP_TABLES:
+            cursor.execute(f'PRAGMA table_info({table})')
+            f.write(f'\nTable: {table}\n')
+            for col in cursor.fetchall():
+                f.write(f'{col[1]}: {col[2]}\n')
+        f.write('\nExample queries:\n')
+        f.write(EXAMPLE_QUERIES.lstrip('\n'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build rollup tables from nflfastR_pbp')
+    parser.add_argument('--db', default=DB_PATH, help='Path to the SQLite database')
+    parser.add_argument('--seasons', type=int, nargs='*',
+                        help='Only rebuild these seasons (default: all)')
+    parser.add_argument('--schema-output', default=SCHEMA_OUTPUT_PATH,
+                        help='Where to write the rollup schema context')
+    args = parser.parse_args()
+
+    print(f"🏗️  Building rollup tables in {args.db}")
+    start_time = time.time()
+    conn = sqlite3.connect(args.db)
+    try:
+        counts = refresh_rollups(conn, args.seasons)
+        for table, count in counts.items():
+            print(f"✅ {table}: {count} rows")
+        write_schema_context(conn, args.schema_output)
+        print(f"📝 Schema context written to {args.schema_output}")
+    finally:
+        conn.close()
+    print(f"⏱️  Done in {time.time() - start_time:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
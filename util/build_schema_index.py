@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Build the schema retrieval index used to prune SQL prompts.
+
+Indexes the columns in schema/schema_nflfastR_pbp.txt and
+schema/field_descriptions.json, the rollup tables and the example queries,
+and writes schema/schema_index.json together with the assembled full schema
+context, so workers start without parsing the schema files. Re-run after
+regenerating any of those files (e.g. after util/build_rollups.py or
+getDescriptions.R); until then the stale file is ignored.
+
+Usage (from the project root):
+    python -m util.build_schema_index
+"""
+
+import json
+
+from schema_context import build_index, INDEX_FILE
+
+
+def main():
+    index = build_index()
+    with open(INDEX_FILE, 'w') as f:
+        json.dump(index, f)
+    kinds = {}
+    for document in index['documents']:
+        kinds[document['kind']] = kinds.get(document['kind'], 0) + 1
+    print(f"✅ Schema index written to {INDEX_FILE}")
+    for kind, count in sorted(kinds.items()):
+        print(f"   {kind}: {count} documents")
+    print(f"   full context: {len(index['full_context']):,} characters")
+
+
+if __name__ == '__main__':
+    main()
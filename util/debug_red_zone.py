@@ -3,9 +3,9 @@
 Debug script for red zone efficiency inconsistency issue
 """
 
-import sqlite3
 import time
 from agent import NFLStatAgent
+from db_pool import get_connection
 
 def debug_red_zone_efficiency():
     """Debug the red zone efficiency inconsistency"""
@@ -14,7 +14,7 @@ def debug_red_zone_efficiency():
     
     # Initialize agent and database
     agent = NFLStatAgent()
-    conn = sqlite3.connect('data/pbp_db')
+    conn = get_connection()
     cursor = conn.cursor()
     
     # Direct database query to get the correct answer
@@ -145,7 +145,6 @@ def debug_red_zone_efficiency():
             team, pct = answer_key.split('_')
             print(f"  {team} with {pct}%: Tests {test_numbers}")
     
-    conn.close()
     return results
 
 def debug_sql_generation():
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Export the hot columns of nflfastR_pbp to the column store (see column_store.py).
+
+Every column is read in row order inside one read transaction, so the arrays
+line up with each other and with one snapshot of the table. Numeric columns
+are written as float64 (NaN for NULL); text columns with at most
+--max-categories distinct values are dictionary-encoded as int32 codes into
+their sorted values (-1 for NULL). Columns holding mixed types or more
+distinct strings than that (desc) are skipped and stay SQLite-only.
+
+Each export is written to its own build directory and published by
+atomically replacing manifest.json, so running workers keep reading the
+arrays they have mapped; builds older than the previous one are removed.
+The manifest records the database version it was exported from, and
+db_pool ignores the store once the data changes: util/ingest_pbp.py and
+util/partition_pbp.py re-export an existing store after they write.
+
+Usage (from the project root):
+    python -m util.export_columns                            # partitioning.HOT_COLUMNS
+    python -m util.export_columns --columns season week posteam epa
+    python -m util.export_columns --max-categories 5000
+"""
+
+import os
+import re
+import json
+import shutil
+import sqlite3
+import argparse
+import time
+from datetime import datetime, timezone
+
+from column_store import CATEGORY, MANIFEST_FILE, NUMERIC, column_store_path, load_numpy
+from db_pool import database_version
+from partitioning import COLD_TABLE, HOT_COLUMNS, HOT_TABLE, PLAY_KEY, TABLE_NAME, partition_layout, quote
+
+DB_PATH = os.getenv('DB_PATH', 'data/pbp_db')
+# Team, player and play-type columns fit easily; play descriptions don't
+MAX_CATEGORIES = 100000
+
+
+def _source(layout, name: str):
+    """(expression, FROM clause, ORDER BY) that read one column in row order."""
+    if layout is None:
+        return quote(name), TABLE_NAME, 'rowid'
+    order = f'{HOT_TABLE}.{PLAY_KEY}'
+    if name.lower() in layout.hot:
+        return f'{HOT_TABLE}.{quote(name)}', HOT_TABLE, order
+    return (f'{COLD_TABLE}.{quote(name)}',
+            f'{HOT_TABLE} LEFT JOIN {COLD_TABLE} ON {COLD_TABLE}.{PLAY_KEY} = {HOT_TABLE}.{PLAY_KEY}', order)
+
+
+def column_kind(conn, layout, name: str, max_categories: int = MAX_CATEGORIES):
+    """(kind, integer) for a column, or (None, reason) if it can't be exported."""
+    expression, source, _ = _source(layout, name)
+    types = dict(conn.execute(f'SELECT typeof({expression}), COUNT(*) FROM {source} GROUP BY 1').fetchall())
+    types.pop('null', None)
+    if types and set(types) <= {'integer', 'real'}:
+        return NUMERIC, 'real' not in types
+    if set(types) == {'text'}:
+        distinct = conn.execute(f'SELECT COUNT(DISTINCT {expression}) FROM {source}').fetchone()[0]
+        if distinct > max_categories:
+            return None, f"{distinct} distinct values"
+        return CATEGORY, False
+    return None, f"types {', '.join(sorted(types)) or 'null only'}"
+
+
+def _write_column(conn, layout, name: str, kind: str, rows: int, directory: str):
+    np = load_numpy()
+    expression, source, order = _source(layout, name)
+    cursor = conn.execute(f'SELECT {expression} FROM {source} ORDER BY {order}')
+    if kind == NUMERIC:
+        data = np.fromiter((np.nan if value is None else value for (value,) in cursor),
+                           dtype=np.float64, count=rows)
+    else:
+        labels = sorted(value for (value,) in conn.execute(
+            f'SELECT DISTINCT {expression} FROM {source} WHERE {expression} IS NOT NULL'))
+        codes = {value: code for code, value in enumerate(labels)}
+        data = np.fromiter((codes.get(value, -1) for (value,) in cursor), dtype=np.int32, count=rows)
+        with open(os.path.join(directory, f'{name}.values.json'), 'w') as f:
+            json.dump(labels, f)
+    np.save(os.path.join(directory, f'{name}.npy'), data)
+
+
+def export(db_path: str, columns=None, max_categories: int = MAX_CATEGORIES) -> dict:
+    """Write a new column store build for db_path and publish it.
+
+    Returns:
+        dict with the build id, row count, exported columns and skipped
+        columns (name -> reason)
+    """
+    if load_numpy() is None:
+        raise RuntimeError("Exporting the column store needs numpy: pip install numpy")
+    store = column_store_path(db_path)
+    build = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    directory = os.path.join(store, build)
+    os.makedirs(directory)
+    # Stamp the version the snapshot below is read from; a write during the
+    # export changes it, so the store is never taken for newer data
+    version = database_version(db_path)
+    exported, skipped = {}, {}
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    try:
+        conn.execute('BEGIN')
+        layout = partition_layout(conn)
+        available = {row[1].lower(): row[1] for row in conn.execute(f'PRAGMA table_info({TABLE_NAME})')}
+        rows = conn.execute(f'SELECT COUNT(*) FROM {HOT_TABLE if layout else TABLE_NAME}').fetchone()[0]
+        for requested in dict.fromkeys(columns or HOT_COLUMNS):
+            name = available.get(requested.lower())
+            if name is None:
+                if columns:
+                    skipped[requested] = 'not in the table'
+                continue
+            if not re.fullmatch(r'\w+', name):
+                skipped[name] = 'name not usable as a file name'
+                continue
+            kind, detail = column_kind(conn, layout, name, max_categories)
+            if kind is None:
+                skipped[name] = detail
+                continue
+            _write_column(conn, layout, name, kind, rows, directory)
+            exported[name] = {'kind': kind, 'integer': detail} if kind == NUMERIC else {'kind': kind}
+        conn.rollback()
+    except Exception:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+    finally:
+        conn.close()
+
+    manifest_path = os.path.join(store, MANIFEST_FILE)
+    try:
+        with open(manifest_path) as f:
+            previous = json.load(f).get('build')
+    except (OSError, ValueError):
+        previous = None
+    manifest = {
+        'build': build,
+        'database_version': version,
+        'rows': rows,
+        'exported_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'columns': exported,
+    }
+    temporary = manifest_path + '.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temporary, manifest_path)
+    # Workers may still be mapping the previous build's files
+    for entry in os.listdir(store):
+        path = os.path.join(store, entry)
+        if os.path.isdir(path) and entry not in (build, previous):
+            shutil.rmtree(path, ignore_errors=True)
+    return {'build': build, 'rows': rows, 'columns': list(exported), 'skipped': skipped}
+
+
+def refresh_column_store(db_path: str):
+    """Re-export db_path's column store with the same columns, if it has one."""
+    try:
+        with open(os.path.join(column_store_path(db_path), MANIFEST_FILE)) as f:
+            columns = list(json.load(f)['columns'])
+    except (OSError, ValueError, KeyError):
+        return None
+    result = export(db_path, columns)
+    print(f"✅ Column store re-exported: {len(result['columns'])} columns, {result['rows']} rows")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export nflfastR_pbp columns to the memory-mapped column store')
+    parser.add_argument('--db', default=DB_PATH, help='Path to the SQLite database')
+    parser.add_argument('--columns', nargs='*', help='Columns to export (default: partitioning.HOT_COLUMNS)')
+    parser.add_argument('--max-categories', type=int, default=MAX_CATEGORIES,
+                        help='Skip text columns with more distinct values than this')
+    args = parser.parse_args()
+
+    print(f"📦 Exporting {TABLE_NAME} columns from {args.db} to {column_store_path(args.db)}")
+    start_time = time.time()
+    result = export(args.db, args.columns, args.max_categories)
+    print(f"✅ Build {result['build']}: {len(result['columns'])} columns, {result['rows']} rows")
+    for name, reason in result['skipped'].items():
+        print(f"⚠️  Skipped {name}: {reason}")
+    print(f"⏱️  Done in {time.time() - start_time:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Workload-driven index advisor for nflfastR_pbp.
+
+Reads SQL captured by sql_workload.py, runs EXPLAIN QUERY PLAN on each
+statement and, for the ones that fall back to a full scan of nflfastR_pbp,
+proposes composite (and, when narrow enough, covering) indexes built from the
+columns the statement filters and groups on. With --apply the indexes are
+created and the workload is timed before and after.
+
+On a database split by util/partition_pbp.py nflfastR_pbp is a view, so the
+statements are routed the way db_pool routes them and indexes are proposed on
+nflfastR_pbp_hot (only its columns can lead them).
+
+Usage (from the project root):
+    SQL_WORKLOAD_LOG=logs/sql_workload.jsonl streamlit run app.py   # capture
+    python -m util.index_advisor --workload logs/sql_workload.jsonl
+    python -m util.index_advisor --workload logs/sql_workload.jsonl --apply
+"""
+
+import os
+import re
+import sqlite3
+import argparse
+import statistics
+import time
+
+from partitioning import HOT_TABLE, partition_layout, route_sql
+from sql_workload import load_workload, WORKLOAD_LOG_ENV
+
+DB_PATH = os.getenv('DB_PATH', 'data/pbp_db')
+TABLE_NAME = 'nflfastR_pbp'
+DEFAULT_WORKLOAD = os.getenv(WORKLOAD_LOG_ENV, 'logs/sql_workload.jsonl')
+
+# Clause keywords that end a WHERE / GROUP BY segment at the same nesting depth
+SEGMENT_END = re.compile(r'\b(GROUP\s+BY|ORDER\s+BY|LIMIT|HAVING|UNION|WINDOW|WHERE)\b', re.IGNORECASE)
+EQUALITY_OPS = ('=', '==', 'IN', 'IS')
+RANGE_OPS = ('<', '>', '<=', '>=', 'BETWEEN')
+# A table in a FROM/JOIN list, with its alias if it has one
+TABLE_REFERENCE = r'(?:\bFROM|\bJOIN|,)\s*"?{table}\b"?(?:\s+(?:AS\s+)?"?(\w+)"?)?'
+# Words that can follow a table name in FROM/JOIN without being its alias
+NOT_ALIASES = {'where', 'group', 'order', 'limit', 'having', 'union', 'window', 'join', 'left',
+               'inner', 'cross', 'natural', 'outer', 'on', 'using', 'indexed', 'not', 'except',
+               'intersect'}
+PREDICATE = re.compile(
+    r'(?:\b\w+\.)?"?(\w+)"?\s*(==|=|<=|>=|<|>|\bIN\b|\bBETWEEN\b|\bIS\b|\bLIKE\b)',
+    re.IGNORECASE,
+)
+
+
+def _segments(sql, keyword):
+    """Return the text following each occurrence of keyword up to the end of its clause."""
+    segments = []
+    for match in re.finditer(keyword, sql, re.IGNORECASE):
+        depth = 0
+        pos = match.end()
+        end = len(sql)
+        while pos < len(sql):
+            char = sql[pos]
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+                if depth < 0:
+                    end = pos
+                    break
+            elif depth == 0:
+                stop = SEGMENT_END.match(sql, pos)
+                if stop and (pos == 0 or not sql[pos - 1].isalnum()):
+                    end = pos
+                    break
+            pos += 1
+        segments.append(sql[match.end():end])
+    return segments
+
+
+def analyze_statement(sql, columns):
+    """Classify the nflfastR_pbp columns a statement filters, groups and reads on.
+
+    Returns:
+        dict with 'equality', 'range', 'group_by' and 'referenced' column lists
+    """
+    equality, ranges = [], []
+    for segment in _segments(sql, r'\bWHERE\b') + _segments(sql, r'\bON\b'):
+        for name, op in PREDICATE.findall(segment):
+            if name not in columns:
+                continue
+            op = op.upper()
+            if op in EQUALITY_OPS and name not in equality:
+                equality.append(name)
+            elif op in RANGE_OPS and name not in ranges:
+                ranges.append(name)
+    group_by = []
+    for segment in _segments(sql, r'\bGROUP\s+BY\b'):
+        for token in re.findall(r'\w+', segment):
+            if token in columns and token not in group_by:
+                group_by.append(token)
+    referenced = []
+    for token in re.findall(r'\w+', sql):
+        if token in columns and token not in referenced:
+            referenced.append(token)
+    # A column compared both ways (e.g. season = 2024 ... season >= 2020) is an equality
+    ranges = [name for name in ranges if name not in equality]
+    return {'equality': equality, 'range': ranges, 'group_by': group_by, 'referenced': referenced}
+
+
+def explain(conn, sql):
+    """Return the EXPLAIN QUERY PLAN detail lines for a statement."""
+    return [row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}').fetchall()]
+
+
+def table_names(sql, table=TABLE_NAME):
+    """The play table's name and every alias the statement gives it."""
+    names = [table]
+    reference = re.compile(TABLE_REFERENCE.format(table=re.escape(table)), re.IGNORECASE)
+    for alias in reference.findall(sql or ''):
+        if alias and alias.lower() not in NOT_ALIASES and alias not in names:
+            names.append(alias)
+    return names
+
+
+def scans_table(plan, table=TABLE_NAME, sql=None):
+    """True if the plan contains a full scan of the table (no index used).
+
+    SQLite names an aliased table by its alias (FROM nflfastR_pbp p -> SCAN p),
+    so pass the statement to count scans of its aliases too.
+    """
+    names = '|'.join(re.escape(name) for name in table_names(sql, table))
+    pattern = re.compile(rf'^SCAN (TABLE )?(?:{names})\b(?!.*\bINDEX\b)')
+    return any(pattern.search(detail) for detail in plan)
+
+
+def index_table(layout):
+    """The table indexes go on: nflfastR_pbp_hot when nflfastR_pbp is the hot/cold view."""
+    return HOT_TABLE if layout is not None else TABLE_NAME
+
+
+def propose_indexes(workload, conn, max_columns=6):
+    """Propose indexes for statements in the workload that fully scan the play table.
+
+    Equality columns lead, ordered by how often they appear across the whole
+    workload so indexes share prefixes; one range column follows. If every
+    referenced column fits within max_columns the index is made covering.
+
+    Returns:
+        (proposals, report) where proposals maps column tuples to the number
+        of executions they serve and report lists per-statement findings
+    """
+    layout = partition_layout(conn)
+    table = index_table(layout)
+    columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+    analyses = []
+    frequency = {}
+    for sql, count in workload:
+        routed = route_sql(sql, layout)
+        try:
+            plan = explain(conn, routed)
+        except sqlite3.Error as e:
+            analyses.append((sql, count, None, f'EXPLAIN failed: {e}'))
+            continue
+        if not scans_table(plan, table, sql=routed):
+            analyses.append((sql, count, None, 'already indexed'))
+            continue
+        info = analyze_statement(routed, columns)
+        for name in info['equality']:
+            frequency[name] = frequency.get(name, 0) + count
+        analyses.append((sql, count, info, 'full scan'))
+
+    proposals = {}
+    report = []
+    for sql, count, info, status in analyses:
+        if info is None or not (info['equality'] or info['range']):
+            report.append((sql, status, None))
+            continue
+        key = sorted(info['equality'], key=lambda name: (-frequency.get(name, 0), name))
+        if info['range']:
+            key.append(info['range'][0])
+        extra = [name for name in dict.fromkeys(info['group_by'] + info['referenced'])
+                 if name not in key]
+        if len(key) + len(extra) <= max_columns:
+            key.extend(extra)
+        key = tuple(key[:max_columns])
+        proposals[key] = proposals.get(key, 0) + count
+        report.append((sql, status, key))
+
+    # Drop proposals that are a strict prefix of another proposal
+    for key in list(proposals):
+        for other in proposals:
+            if other != key and other[:len(key)] == key:
+                proposals[other] += proposals.pop(key)
+                break
+    return proposals, report
+
+
+def index_name(key):
+    return 'idx_pbp_' + '_'.join(key)
+
+
+def create_statement(key, table=TABLE_NAME):
+    quoted = ', '.join(f'"{name}"' for name in key)
+    return f'CREATE INDEX IF NOT EXISTS {index_name(key)} ON {table}({quoted})'
+
+
+def time_workload(conn, workload, repeats=1):
+    """Return the median wall time in seconds for each statement, routed as db_pool runs it."""
+    layout = partition_layout(conn)
+    timings = []
+    for sql, _ in workload:
+        sql = route_sql(sql, layout)
+        samples = []
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            try:
+                conn.execute(sql).fetchall()
+            except sqlite3.Error:
+                samples = None
+                break
+            samples.append(time.perf_counter() - start_time)
+        timings.append(statistics.median(samples) if samples else None)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Propose indexes for the captured SQL workload')
+    parser.add_argument('--db', default=DB_PATH, help='Path to the SQLite database')
+    parser.add_argument('--workload', default=DEFAULT_WORKLOAD, help='Workload log (JSON lines)')
+    parser.add_argument('--max-columns', type=int, default=6, help='Maximum columns per index')
+    parser.add_argument('--apply', action='store_true', help='Create the proposed indexes')
+    parser.add_argument('--repeats', type=int, default=1, help='Timing runs per statement')
+    args = parser.parse_args()
+
+    workload = load_workload(args.workload)
+    print(f"📋 Loaded {len(workload)} unique statements from {args.workload}")
+    conn = sqlite3.connect(args.db)
+    try:
+        proposals, report = propose_indexes(workload, conn, args.max_columns)
+        print("\n🔍 Statement analysis:")
+        for sql, status, key in report:
+            summary = ' '.join(sql.split())[:90]
+            target = f" -> ({', '.join(key)})" if key else ''
+            print(f"  [{status}] {summary}{target}")
+
+        layout = partition_layout(conn)
+        table = index_table(layout)
+        if not proposals:
+            print(f"\n✅ No full scans of {table} found; nothing to propose")
+            return
+        print("\n💡 Proposed indexes:")
+        for key, served in sorted(proposals.items(), key=lambda item: -item[1]):
+            print(f"  {create_statement(key, table)};  -- serves {served} executions")
+
+        if not args.apply:
+            print("\nRun again with --apply to create these indexes and time the workload")
+            return
+
+        print("\n⏱️  Timing workload before indexing...")
+        before = time_workload(conn, workload, args.repeats)
+        for key in proposals:
+            print(f"🏗️  {create_statement(key, table)}")
+            conn.execute(create_statement(key, table))
+        conn.execute(f'ANALYZE {table}')
+        conn.commit()
+        print("⏱️  Timing workload after indexing...")
+        after = time_workload(conn, workload, args.repeats)
+
+        print("\n📊 Before/after timing:")
+        total_before = total_after = 0.0
+        for (sql, _), t_before, t_after in zip(workload, before, after):
+            if t_before is None or t_after is None:
+                continue
+            total_before += t_before
+            total_after += t_after
+            routed = route_sql(sql, layout)
+            uses_index = not scans_table(explain(conn, routed), table, sql=routed)
+            summary = ' '.join(sql.split())[:60]
+            print(f"  {t_before:8.3f}s -> {t_after:8.3f}s  {'📇' if uses_index else '  '} {summary}")
+        if total_after > 0:
+            print(f"\nTotal: {total_before:.3f}s -> {total_after:.3f}s "
+                  f"({total_before / total_after:.1f}x)")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
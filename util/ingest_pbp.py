@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Incremental ingestion of nflfastR play-by-play drops into nflfastR_pbp.
+
+Loads local nflfastR CSV (optionally gzipped) or Parquet files for the given
+seasons and weeks instead of rebuilding the whole database:
+
+  1. switches the database to WAL mode, so the running app keeps reading
+     while the load is written,
+  2. upserts the plays by (game_id, play_id) with batched executemany in one
+     transaction (a unique index on those columns is created on first use;
+     its maintenance and that of every other index is incremental),
+  3. refreshes the rollup tables (util/build_rollups.py) for the affected
+     seasons only and runs PRAGMA optimize,
+  4. checkpoints the WAL, restores the previous journal mode and bumps the
+     data-version marker (data/pbp_db.version) that query_cache.py and any
+     other cache of query results watch,
+  5. re-exports the column store (util/export_columns.py) if the database
+     has one, since db_pool stops using it once the data version changes,
+  6. re-reads the affected seasons into the player index
+     (util/build_player_index.py) if the database has one.
+
+On a database split by util/partition_pbp.py the hot and cold columns are
+upserted into nflfastR_pbp_hot and nflfastR_pbp_cold under the same play_key.
+
+Columns the drop has that the table lacks are added; columns the table has
+that the drop lacks are left untouched on existing plays. Missing values
+('' or NA) are stored as NULL. A new column's type comes from the values of
+the first batch of plays: season, week and play_id are INTEGER, numeric
+columns (CSV values included) REAL and the rest TEXT. A column with no values
+in that batch is made REAL, since nflfastR columns are mostly numeric and
+SQLite still stores text in a REAL column as text.
+
+Usage (from the project root):
+    python -m util.ingest_pbp play_by_play_2024.csv.gz --seasons 2024 --weeks 7
+    python -m util.ingest_pbp drops/*.parquet --seasons 2024
+    python -m util.ingest_pbp pbp_2024.csv --weeks 7 8 --replace-games --keep-wal
+"""
+
+import os
+import csv
+import gzip
+import json
+import sqlite3
+import argparse
+import time
+from itertools import islice
+from datetime import datetime, timezone
+
+from db_pool import data_version_path, read_data_version
+from partitioning import COLD_TABLE, HOT_TABLE, PLAY_KEY, create_view, partition_layout
+from util.build_player_index import refresh_player_index
+from util.build_rollups import refresh_rollups
+from util.export_columns import refresh_column_store
+
+DB_PATH = os.getenv('DB_PATH', 'data/pbp_db')
+TABLE_NAME = 'nflfastR_pbp'
+KEY_COLUMNS = ('game_id', 'play_id')
+UPSERT_INDEX = 'idx_pbp_game_play'
+BATCH_SIZE = 5000
+MISSING_VALUES = {'', 'NA', 'NaN', 'nan'}
+INTEGER_COLUMNS = {'play_id', 'season', 'week'}
+
+
+class IngestError(ValueError):
+    """The drop can't be loaded as given."""
+
+
+def _open_text(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', newline='')
+    return open(path, newline='')
+
+
+def read_csv(path):
+    """Yield plays from an nflfastR CSV file as dicts of column -> value."""
+    with _open_text(path) as f:
+        for row in csv.DictReader(f):
+            yield {column: None if value in MISSING_VALUES else value for column, value in row.items()}
+
+
+def read_parquet(path):
+    """Yield plays from an nflfastR Parquet file (needs pyarrow)."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise IngestError(f"Reading {path} needs pyarrow: pip install pyarrow")
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=BATCH_SIZE):
+        yield from batch.to_pylist()
+
+
+def read_plays(path):
+    if path.endswith('.parquet'):
+        return read_parquet(path)
+    if path.endswith('.csv') or path.endswith('.csv.gz'):
+        return read_csv(path)
+    raise IngestError(f"Unsupported file type: {path} (expected .csv, .csv.gz or .parquet)")
+
+
+def _is_number(value) -> bool:
+    if isinstance(value, (bool, int, float)):
+        return True
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def column_type(column: str, values) -> str:
+    """SQLite type for a new column from its values in a batch of plays (None = missing)."""
+    if column in INTEGER_COLUMNS:
+        return 'INTEGER'
+    if all(value is None or _is_number(value) for value in values):
+        return 'REAL'
+    return 'TEXT'
+
+
+def column_types(sample) -> dict:
+    """Column -> SQLite type for the columns of a batch of plays, in the first play's order."""
+    names = list(dict.fromkeys(column for play in sample for column in play))
+    return {column: column_type(column, [play.get(column) for play in sample]) for column in names}
+
+
+def table_columns(conn) -> list:
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({TABLE_NAME})')]
+
+
+def ensure_table(conn, sample, layout=None) -> list:
+    """Create nflfastR_pbp, or add the drop's new columns to it, typed from a
+    sample batch of plays.
+
+    On a hot/cold partitioned database new columns go to the cold table and
+    the view is recreated. Returns the table's (or view's) columns.
+    """
+    types = column_types(sample)
+    columns = table_columns(conn)
+    if layout is not None:
+        new = [column for column in types if column not in columns]
+        for column in new:
+            conn.execute(f'ALTER TABLE {COLD_TABLE} ADD COLUMN "{column}" {types[column]}')
+            print(f"➕ Added column {column} to {COLD_TABLE}")
+        if new:
+            create_view(conn, columns + new)
+        return columns + new
+    if not columns:
+        column_defs = ', '.join(f'"{column}" {type_}' for column, type_ in types.items())
+        conn.execute(f'CREATE TABLE {TABLE_NAME} ({column_defs})')
+        print(f"🏗️  Created {TABLE_NAME} with {len(types)} columns")
+        return table_columns(conn)
+    for column, type_ in types.items():
+        if column not in columns:
+            conn.execute(f'ALTER TABLE {TABLE_NAME} ADD COLUMN "{column}" {type_}')
+            print(f"➕ Added column {column}")
+            columns.append(column)
+    return columns
+
+
+def ensure_upsert_index(conn, table: str = TABLE_NAME):
+    """Create the (game_id, play_id) unique index the upsert conflicts on."""
+    try:
+        conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS {UPSERT_INDEX} '
+                     f'ON {table}({", ".join(KEY_COLUMNS)})')
+    except sqlite3.IntegrityError:
+        raise IngestError(f"{table} already holds duplicate (game_id, play_id) rows; "
+                          f"remove them before ingesting")
+
+
+def upsert_statement(columns, table: str = TABLE_NAME) -> str:
+    quoted = ', '.join(f'"{column}"' for column in columns)
+    placeholders = ', '.join('?' for _ in columns)
+    updates = ', '.join(f'"{column}" = excluded."{column}"' for column in columns if column not in KEY_COLUMNS)
+    return (f'INSERT INTO {table} ({quoted}) VALUES ({placeholders}) '
+            f'ON CONFLICT({", ".join(KEY_COLUMNS)}) DO UPDATE SET {updates}')
+
+
+def cold_upsert_statement(columns) -> str:
+    """Upsert a play's cold columns under the play_key its hot row was given.
+
+    Parameters are the cold column values followed by game_id and play_id.
+    """
+    quoted = ''.join(f', "{column}"' for column in columns)
+    placeholders = ''.join(', ?' for _ in columns)
+    updates = ', '.join(f'"{column}" = excluded."{column}"' for column in columns)
+    conflict = f'DO UPDATE SET {updates}' if columns else 'DO NOTHING'
+    return (f'INSERT INTO {COLD_TABLE} ({PLAY_KEY}{quoted}) '
+            f'SELECT {PLAY_KEY}{placeholders} FROM {HOT_TABLE} WHERE game_id = ? AND play_id = ? '
+            f'ON CONFLICT({PLAY_KEY}) {conflict}')
+
+
+def write_plan(conn, columns, layout):
+    """Statements that store a play: [(sql, parameter columns)], plus the
+    game deletes for replace_games and the table to count plays in."""
+    if layout is None:
+        ensure_upsert_index(conn)
+        return ([(upsert_statement(columns), columns)],
+                [f'DELETE FROM {TABLE_NAME} WHERE game_id = ?'], TABLE_NAME)
+    hot = [column for column in columns if column.lower() in layout.hot]
+    cold = [column for column in columns if column.lower() not in layout.hot]
+    ensure_upsert_index(conn, HOT_TABLE)
+    return ([(upsert_statement(hot, HOT_TABLE), hot),
+             (cold_upsert_statement(cold), cold + list(KEY_COLUMNS))],
+            [f'DELETE FROM {COLD_TABLE} WHERE {PLAY_KEY} IN '
+             f'(SELECT {PLAY_KEY} FROM {HOT_TABLE} WHERE game_id = ?)',
+             f'DELETE FROM {HOT_TABLE} WHERE game_id = ?'], HOT_TABLE)
+
+
+def _wanted(play: dict, seasons, weeks) -> bool:
+    try:
+        if seasons and int(float(play.get('season'))) not in seasons:
+            return False
+        if weeks and int(float(play.get('week'))) not in weeks:
+            return False
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _filtered(paths, seasons, weeks):
+    for path in paths:
+        for play in read_plays(path):
+            if _wanted(play, seasons, weeks):
+                yield play
+
+
+def _chain(head, rest):
+    yield from head
+    yield from rest
+
+
+def bump_data_version(db_path: str, **details) -> dict:
+    """Write the next data-version marker next to the database file."""
+    marker = {
+        'version': read_data_version(db_path).get('version', 0) + 1,
+        'updated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        **details,
+    }
+    path = data_version_path(db_path)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(marker, f)
+    os.replace(temp_path, path)
+    return marker
+
+
+def ingest(db_path: str, paths, seasons=None, weeks=None, replace_games: bool = False,
+           rollups: bool = True, keep_wal: bool = False, batch_size: int = BATCH_SIZE,
+           columns: bool = True) -> dict:
+    """Upsert the plays in paths into db_path and refresh what depends on them.
+
+    With replace_games, existing plays of every game in the drop are deleted
+    first, so plays the new data no longer has (a corrected play sequence)
+    don't linger.
+
+    Returns:
+        dict: plays read, inserted, updated and deleted, affected seasons/weeks/games,
+        rollup row counts, the new data-version marker, the column store
+        re-export (None if there is no store or columns is False) and the
+        player index's player count (None if there is no index)
+    """
+    seasons = set(seasons or ())
+    weeks = set(weeks or ())
+    plays = _filtered(paths, seasons, weeks)
+    # New columns are typed from the first batch
+    sample = list(islice(plays, batch_size))
+    if not sample:
+        raise IngestError("No plays in the given files match the requested seasons/weeks")
+    first = sample[0]
+    missing = [column for column in KEY_COLUMNS + ('season', 'week') if column not in first]
+    if missing:
+        raise IngestError(f"Drop is missing required columns: {', '.join(missing)}")
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute('PRAGMA temp_store = MEMORY')
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            layout = partition_layout(conn)
+            columns = [column for column in ensure_table(conn, sample, layout) if column in first]
+            statements, deletes, count_table = write_plan(conn, columns, layout)
+            before = conn.execute(f'SELECT COUNT(*) FROM {count_table}').fetchone()[0]
+            read, games, affected_seasons, affected_weeks = 0, set(), set(), set()
+            batch, replaced, deleted = [], set(), 0
+
+            def flush():
+                nonlocal deleted
+                if replace_games:
+                    new_games = [(game_id,) for game_id in {play['game_id'] for play in batch} - replaced]
+                    for delete in deletes:
+                        removed = conn.executemany(delete, new_games).rowcount
+                    # The last delete removes the plays themselves
+                    deleted += removed
+                    replaced.update(game_id for game_id, in new_games)
+                for statement, parameters in statements:
+                    conn.executemany(statement, [tuple(play.get(column) for column in parameters)
+                                                 for play in batch])
+                batch.clear()
+
+            for play in _chain(sample, plays):
+                batch.append(play)
+                if len(batch) >= batch_size:
+                    flush()
+                games.add(play['game_id'])
+                affected_seasons.add(int(float(play['season'])))
+                affected_weeks.add(int(float(play['week'])))
+                read += 1
+            if batch:
+                flush()
+            after = conn.execute(f'SELECT COUNT(*) FROM {count_table}').fetchone()[0]
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        # Replaced games' old plays count as deleted, their new ones as inserted
+        inserted = after - before + deleted
+        print(f"✅ {count_table}: {read} plays read, {inserted} inserted, {read - inserted} updated, "
+              f"{deleted} deleted ({len(games)} games)")
+
+        counts = {}
+        if rollups:
+            counts = refresh_rollups(conn, sorted(affected_seasons))
+            for table, count in counts.items():
+                print(f"✅ {table}: {count} rows for seasons {sorted(affected_seasons)}")
+        conn.execute('PRAGMA optimize')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        if journal_mode.lower() != 'wal' and not keep_wal:
+            try:
+                conn.execute(f'PRAGMA journal_mode = {journal_mode}')
+            except sqlite3.OperationalError as e:
+                print(f"⚠️  Left the database in WAL mode ({e})")
+    finally:
+        conn.close()
+
+    marker = bump_data_version(db_path, seasons=sorted(affected_seasons), weeks=sorted(affected_weeks),
+                               plays=read)
+    print(f"🔖 Data version {marker['version']} written to {data_version_path(db_path)}")
+    column_store = refresh_column_store(db_path) if columns else None
+    players = refresh_player_index(db_path, sorted(affected_seasons))
+    return {
+        'read': read,
+        'inserted': inserted,
+        'updated': read - inserted,
+        'deleted': deleted,
+        'games': sorted(games),
+        'seasons': sorted(affected_seasons),
+        'weeks': sorted(affected_weeks),
+        'rollups': counts,
+        'data_version': marker,
+        'column_store': column_store,
+        'player_index': players,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Upsert nflfastR play-by-play drops into the database')
+    parser.add_argument('files', nargs='+', help='nflfastR .csv, .csv.gz or .parquet files')
+    parser.add_argument('--db', default=DB_PATH, help='Path to the SQLite database')
+    parser.add_argument('--seasons', type=int, nargs='*', help='Only load these seasons (default: all in the files)')
+    parser.add_argument('--weeks', type=int, nargs='*', help='Only load these weeks (default: all in the files)')
+    parser.add_argument('--replace-games', action='store_true',
+                        help="Delete each loaded game's existing plays before inserting")
+    parser.add_argument('--skip-rollups', action='store_true', help="Don't refresh the rollup tables")
+    parser.add_argument('--skip-columns', action='store_true', help="Don't re-export the column store")
+    parser.add_argument('--keep-wal', action='store_true', help='Leave the database in WAL mode')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows per executemany batch')
+    args = parser.parse_args()
+
+    print(f"📥 Ingesting {len(args.files)} file(s) into {args.db}")
+    start_time = time.time()
+    try:
+        ingest(args.db, args.files, seasons=args.seasons, weeks=args.weeks,
+               replace_games=args.replace_games, rollups=not args.skip_rollups,
+               keep_wal=args.keep_wal, batch_size=args.batch_size, columns=not args.skip_columns)
+    except IngestError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    print(f"⏱️  Done in {time.time() - start_time:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Split nflfastR_pbp into hot and cold column tables (see partitioning.py).
+
+Every scan of the 370+ column play table reads whole rows, although
+generated SQL touches a few dozen columns. This build step copies the hot
+columns (partitioning.HOT_COLUMNS, plus any a captured SQL workload
+references) into nflfastR_pbp_hot and the rest into nflfastR_pbp_cold, keyed
+by the original rowid as play_key, and replaces the table with a
+nflfastR_pbp view over both. Indexes on hot-only or cold-only columns are
+recreated on the matching table; mixed ones are reported and dropped.
+The file is then vacuumed so each table's pages are contiguous.
+
+--merge reverses it, rebuilding nflfastR_pbp as a single table.
+
+Usage (from the project root):
+    python -m util.partition_pbp                                   # split
+    python -m util.partition_pbp --workload logs/sql_workload.jsonl
+    python -m util.partition_pbp --hot-columns cp xpass           # add columns
+    python -m util.partition_pbp --merge                           # undo
+"""
+
+import os
+import sqlite3
+import argparse
+import time
+
+from partitioning import (TABLE_NAME, HOT_TABLE, COLD_TABLE, PLAY_KEY, HOT_COLUMNS,
+                          column_types, create_view, joined_select, partition_layout, quote)
+from sql_workload import load_workload, WORKLOAD_LOG_ENV
+from util.export_columns import refresh_column_store
+from util.ingest_pbp import bump_data_version
+
+DB_PATH = os.getenv('DB_PATH', 'data/pbp_db')
+# Needed by the upsert key and the rollup build whatever the workload says
+REQUIRED_HOT_COLUMNS = ['game_id', 'play_id', 'season', 'week']
+
+
+def workload_columns(path: str, columns):
+    """Table columns referenced anywhere in a captured SQL workload."""
+    from util.index_advisor import analyze_statement
+    referenced = set()
+    for sql, _ in load_workload(path):
+        referenced.update(analyze_statement(sql, columns)['referenced'])
+    return referenced
+
+
+def table_indexes(conn, table: str):
+    """[(name, unique, [columns])] for the explicitly created indexes on a table."""
+    indexes = []
+    for _, name, unique, origin, _ in conn.execute(f'PRAGMA index_list({table})'):
+        if origin != 'c':
+            continue
+        columns = [row[2] for row in conn.execute(f'PRAGMA index_info({quote(name)})')]
+        indexes.append((name, bool(unique), columns))
+    return indexes
+
+
+def _create_index(conn, table: str, name: str, unique: bool, columns):
+    conn.execute(f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS {quote(name)} '
+                 f'ON {table}({", ".join(quote(column) for column in columns)})')
+
+
+def _create_table(conn, table: str, columns, key: bool):
+    definitions = [f'{PLAY_KEY} INTEGER PRIMARY KEY'] if key else []
+    definitions += [f'{quote(name)} {dtype}'.rstrip() for name, dtype in columns]
+    conn.execute(f'CREATE TABLE {table} ({", ".join(definitions)})')
+
+
+def partition(conn, hot_columns=None) -> dict:
+    """Split nflfastR_pbp into hot and cold tables behind a view.
+
+    Returns:
+        dict with the hot and cold column names and the recreated and
+        dropped indexes
+    """
+    if partition_layout(conn) is not None:
+        raise ValueError(f"{TABLE_NAME} is already partitioned")
+    columns = column_types(conn, TABLE_NAME)
+    if not columns:
+        raise ValueError(f"No {TABLE_NAME} table to partition")
+    wanted = {name.lower() for name in list(hot_columns or HOT_COLUMNS) + REQUIRED_HOT_COLUMNS}
+    hot = [(name, dtype) for name, dtype in columns if name.lower() in wanted]
+    cold = [(name, dtype) for name, dtype in columns if name.lower() not in wanted]
+    indexes = table_indexes(conn, TABLE_NAME)
+    hot_names = {name for name, _ in hot}
+    cold_names = {name for name, _ in cold}
+
+    recreated, dropped = [], []
+    conn.execute('BEGIN')
+    try:
+        for table, table_columns in ((HOT_TABLE, hot), (COLD_TABLE, cold)):
+            _create_table(conn, table, table_columns, key=True)
+            selected = ', '.join(quote(name) for name, _ in table_columns)
+            conn.execute(f'INSERT INTO {table} ({PLAY_KEY}{", " if selected else ""}{selected}) '
+                         f'SELECT rowid{", " if selected else ""}{selected} FROM {TABLE_NAME} ORDER BY rowid')
+        conn.execute(f'DROP TABLE {TABLE_NAME}')
+        create_view(conn, [name for name, _ in columns])
+        for name, unique, index_columns in indexes:
+            if set(index_columns) <= hot_names:
+                _create_index(conn, HOT_TABLE, name, unique, index_columns)
+            elif set(index_columns) <= cold_names:
+                _create_index(conn, COLD_TABLE, name, unique, index_columns)
+            else:
+                dropped.append(name)
+                continue
+            recreated.append(name)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return {'hot': [name for name, _ in hot], 'cold': [name for name, _ in cold],
+            'indexes': recreated, 'dropped_indexes': dropped}
+
+
+def merge(conn) -> dict:
+    """Rebuild nflfastR_pbp as one table from the hot/cold partitions."""
+    if partition_layout(conn) is None:
+        raise ValueError(f"{TABLE_NAME} is not partitioned")
+    types = dict(column_types(conn, HOT_TABLE))
+    types.update(column_types(conn, COLD_TABLE))
+    order = [row[1] for row in conn.execute(f'PRAGMA table_info({TABLE_NAME})')]
+    indexes = table_indexes(conn, HOT_TABLE) + table_indexes(conn, COLD_TABLE)
+    merged = f'{TABLE_NAME}_merged'
+    conn.execute('BEGIN')
+    try:
+        _create_table(conn, merged, [(name, types[name]) for name in order], key=False)
+        selected = ', '.join(quote(name) for name in order)
+        # play_key was the original rowid; keep it
+        select = joined_select(conn, order).replace('SELECT ', f'SELECT {HOT_TABLE}.{PLAY_KEY}, ', 1)
+        conn.execute(f'INSERT INTO {merged} (rowid, {selected}) {select} ORDER BY {HOT_TABLE}.{PLAY_KEY}')
+        conn.execute(f'DROP VIEW {TABLE_NAME}')
+        conn.execute(f'DROP TABLE {HOT_TABLE}')
+        conn.execute(f'DROP TABLE {COLD_TABLE}')
+        conn.execute(f'ALTER TABLE {merged} RENAME TO {TABLE_NAME}')
+        for name, unique, index_columns in indexes:
+            _create_index(conn, TABLE_NAME, name, unique, index_columns)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return {'columns': order, 'indexes': [name for name, _, _ in indexes]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Split nflfastR_pbp into hot and cold column tables')
+    parser.add_argument('--db', default=DB_PATH, help='Path to the SQLite database')
+    parser.add_argument('--workload', default=os.getenv(WORKLOAD_LOG_ENV),
+                        help='SQL workload log whose referenced columns are kept hot')
+    parser.add_argument('--hot-columns', nargs='*', default=[], help='Extra columns to keep hot')
+    parser.add_argument('--merge', action='store_true', help='Undo: rebuild nflfastR_pbp as one table')
+    parser.add_argument('--no-vacuum', action='store_true', help='Skip VACUUM afterwards')
+    args = parser.parse_args()
+
+    start_time = time.time()
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.merge:
+            print(f"🔗 Merging {HOT_TABLE} and {COLD_TABLE} back into {TABLE_NAME}")
+            result = merge(conn)
+            print(f"✅ {TABLE_NAME}: {len(result['columns'])} columns, {len(result['indexes'])} indexes")
+        else:
+            hot_columns = HOT_COLUMNS + args.hot_columns
+            if args.workload and os.path.exists(args.workload):
+                columns = {name for name, _ in column_types(conn, TABLE_NAME)}
+                extra = workload_columns(args.workload, columns) - set(hot_columns)
+                print(f"📋 {len(extra)} more hot columns from {args.workload}: {', '.join(sorted(extra))}")
+                hot_columns += sorted(extra)
+            print(f"✂️  Partitioning {TABLE_NAME} in {args.db}")
+            result = partition(conn, hot_columns)
+            print(f"✅ {HOT_TABLE}: {len(result['hot'])} columns")
+            print(f"✅ {COLD_TABLE}: {len(result['cold'])} columns")
+            print(f"✅ Indexes recreated: {', '.join(result['indexes']) or 'none'}")
+            if result['dropped_indexes']:
+                print(f"⚠️  Indexes spanning hot and cold columns dropped: {', '.join(result['dropped_indexes'])}")
+        conn.execute('ANALYZE')
+        conn.commit()
+        if not args.no_vacuum:
+            print("🧹 Vacuuming...")
+            conn.execute('VACUUM')
+    finally:
+        conn.close()
+    marker = bump_data_version(args.db, layout='merged' if args.merge else 'partitioned')
+    print(f"🔖 Data version {marker['version']}; restart the app to pick up the new layout")
+    refresh_column_store(args.db)
+    print(f"⏱️  Done in {time.time() - start_time:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+"""
+Web search retrieval and answer synthesis that can be streamed.
+
+The agent's _run_web_search returns a finished answer, which means the UI
+waits for the whole synthesis completion before showing anything.
+install_answer_streaming() wraps the agent's web LLM so that, while
+streaming_to(sink) is active, its completion is requested as a stream and
+each chunk is handed to sink as it arrives; _run_web_search still gets the
+whole text back. The streamed answer therefore comes from the agent's own
+search and synthesis prompt, the same as a blocking answer.
+
+search_web is also where the cost of searching is kept down. Recent-news
+questions repeat heavily within minutes, so results are cached for a short
+TTL by normalized query. A cache miss fans out a few rewrites of the query
+(e.g. "<q> NFL", "<q> site:espn.com") in parallel on a bounded pool, and the
+merged snippets are deduplicated by URL and content. Before synthesis the
+snippets are ranked against the question and trimmed to a token budget
+(snippets.py). install_web_search() routes the agent's own DDGS().text()
+calls through search_web and the same compression.
+
+Settings come from the environment:
+    WEB_MAX_RESULTS        results given to answer synthesis (default 5)
+    WEB_CACHE_TTL_SECONDS  how long search results are reused (default 300,
+                           0 disables the cache)
+    WEB_CACHE_SIZE         cached queries kept (default 256)
+    WEB_QUERY_REWRITES     '|'-separated rewrites searched in parallel, with
+                           {query} for the question (default
+                           "{query}|{query} NFL|{query} site:espn.com")
+    WEB_FANOUT_WORKERS     concurrent searches across all requests (default 4)
+"""
+
+import os
+import re
+import time
+import hashlib
+import operator
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import reduce
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+from query_cache import normalize_question
+from snippets import compress_results
+from tracing import span, with_current_context
+
+WEB_MAX_RESULTS = int(os.getenv('WEB_MAX_RESULTS', 5))
+WEB_CACHE_TTL = float(os.getenv('WEB_CACHE_TTL_SECONDS', 300))
+WEB_CACHE_SIZE = int(os.getenv('WEB_CACHE_SIZE', 256))
+QUERY_REWRITES = [rewrite.strip() for rewrite in
+                  os.getenv('WEB_QUERY_REWRITES', '{query}|{query} NFL|{query} site:espn.com').split('|')
+                  if rewrite.strip()]
+WEB_FANOUT_WORKERS = int(os.getenv('WEB_FANOUT_WORKERS', 4))
+
+SYNTHESIS_PROMPT = """You are an NFL expert. Answer the question using the web search results below.
+Be concise and specific, include the relevant numbers, and say so if the results do not contain the answer.
+
+Search results:
+{results}
+
+Question: {question}
+Answer:"""
+
+# DDGS.text as it was before install_web_search() routed it through search_web
+_ddgs_text = None
+# DDGS.text parameters that may be passed positionally after the query
+DDGS_POSITIONAL = ('region', 'safesearch', 'timelimit')
+
+
+def ddgs_options(args, kwargs) -> dict:
+    """Keyword form of the extra arguments to a DDGS().text(query, ...) call."""
+    return dict(zip(DDGS_POSITIONAL, args), **kwargs)
+
+
+def text_search(query: str, max_results: int, **options):
+    """DuckDuckGo text search; options (region, safesearch, timelimit, ...) go to DDGS.text."""
+    from ddgs import DDGS
+    text = _ddgs_text or DDGS.text
+    return text(DDGS(), query, max_results=max_results, **options) or []
+
+
+# Replaced by backends.install_backends() for record/replay runs
+_search_backend = text_search
+
+
+def set_search_backend(search):
+    """Use search(query, max_results, **options) instead of DuckDuckGo."""
+    global _search_backend
+    _search_backend = search
+
+
+class SearchCache:
+    """Thread-safe bounded LRU of search results that expire after ttl seconds."""
+
+    def __init__(self, ttl: float = WEB_CACHE_TTL, max_entries: int = WEB_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, results = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return results
+
+    def put(self, key, results):
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_cache = SearchCache()
+_fanout_executor = ThreadPoolExecutor(max_workers=max(1, WEB_FANOUT_WORKERS), thread_name_prefix='web-search')
+_stats = {'searches': 0, 'cache_hits': 0, 'outbound_calls': 0, 'duplicates_dropped': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(**increments):
+    with _stats_lock:
+        for name, increment in increments.items():
+            _stats[name] += increment
+
+
+def search_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats, cached_queries=len(_cache))
+
+
+def query_rewrites(query: str, rewrites=None):
+    """The distinct queries to fan out for a question."""
+    queries = []
+    for rewrite in QUERY_REWRITES if rewrites is None else rewrites:
+        # Don't ask for "... NFL NFL"
+        if rewrite.endswith(' NFL') and re.search(r'\bnfl\b', query, re.IGNORECASE):
+            continue
+        candidate = rewrite.format(query=query).strip()
+        if candidate not in queries:
+            queries.append(candidate)
+    return queries or [query]
+
+
+def _url_key(url: str) -> str:
+    """URL without scheme, www., tracking parameters, fragment or trailing slash."""
+    parts = urlsplit((url or '').strip().lower())
+    host = parts.netloc[4:] if parts.netloc.startswith('www.') else parts.netloc
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.startswith('utm_')])
+    return f"{host}{parts.path.rstrip('/')}" + (f"?{query}" if query else '')
+
+
+def _content_key(result: dict) -> str:
+    text = ' '.join(re.sub(r'[^\w\s]', ' ', result.get('body', '') or result.get('title', '')).lower().split())
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def dedupe_results(results):
+    """Drop empty results and repeats of a URL or of the same snippet text, keeping order."""
+    seen_urls, seen_content, unique = set(), set(), []
+    for result in results:
+        if not (result.get('body') or result.get('title')):
+            continue
+        url, content = _url_key(result.get('href', '')), _content_key(result)
+        if (url and url in seen_urls) or content in seen_content:
+            continue
+        if url:
+            seen_urls.add(url)
+        seen_content.add(content)
+        unique.append(result)
+    return unique
+
+
+def _interleave(result_lists):
+    """Round-robin merge so every rewrite's top results come first."""
+    merged = []
+    for rank in range(max((len(results) for results in result_lists), default=0)):
+        merged.extend(results[rank] for results in result_lists if rank < len(results))
+    return merged
+
+
+def _fan_out(queries, max_results: int, options):
+    futures = [_fanout_executor.submit(with_current_context(_search_backend), q, max_results, **options)
+               for q in queries]
+    _count(outbound_calls=len(futures))
+    result_lists, errors = [], []
+    for query, future in zip(queries, futures):
+        try:
+            result_lists.append(list(future.result()))
+        except Exception as e:
+            print(f"⚠️ web_search failed for {query!r}: {e}")
+            errors.append(e)
+    if errors and not result_lists:
+        raise errors[0]
+    return _interleave(result_lists)
+
+
+def search_web(query: str, max_results: int = WEB_MAX_RESULTS, rewrites=None, **options):
+    """Return web results as a list of {'title', 'href', 'body'} dicts.
+
+    Results come from the cache when the same normalized query was searched
+    with the same options within WEB_CACHE_TTL_SECONDS; otherwise every
+    rewrite of the query is searched in parallel and the merged results are
+    deduplicated. options (e.g. timelimit='w', region='us-en') are passed to
+    each search.
+    """
+    print(f"🌐 web_search: {query}")
+    key = (normalize_question(query), max_results, tuple(rewrites) if rewrites is not None else None,
+           tuple(sorted(options.items())))
+    with span('web_search', query=query) as search_span:
+        results = _cache.get(key)
+        search_span.set(cache_hit=results is not None)
+        _count(searches=1, cache_hits=int(results is not None))
+        if results is None:
+            queries = query_rewrites(query, rewrites)
+            raw = _fan_out(queries, max_results, options)
+            unique = dedupe_results(raw)
+            _count(duplicates_dropped=len(raw) - len(unique))
+            results = unique[:max_results]
+            search_span.set(rewrites=len(queries), raw_results=len(raw))
+            _cache.put(key, results)
+        search_span.set(results=len(results))
+    print(f"🌐 web_search returned {len(results)} results")
+    return list(results)
+
+
+def format_results(results) -> str:
+    lines = []
+    for i, result in enumerate(results, 1):
+        lines.append(f"[{i}] {result.get('title', '')}\n{result.get('body', '')}")
+    return '\n\n'.join(lines)
+
+
+def synthesis_prompt(question: str, results, compress: bool = True) -> str:
+    if compress:
+        results = compress_results(question, results)
+    return SYNTHESIS_PROMPT.format(results=format_results(results), question=question)
+
+
+def _chunk_text(chunk) -> str:
+    # LLMs stream str chunks, chat models stream message chunks
+    return getattr(chunk, 'content', chunk) or ''
+
+
+# Receives the web LLM's text chunks while the current context runs the agent's web search
+_chunk_sink = contextvars.ContextVar('web_chunk_sink', default=None)
+
+
+@contextmanager
+def streaming_to(sink):
+    """Pass the text of web LLM completions made in the body to sink(text) as they arrive."""
+    token = _chunk_sink.set(sink)
+    try:
+        yield
+    finally:
+        _chunk_sink.reset(token)
+
+
+def _join_chunks(chunks):
+    if all(isinstance(chunk, str) for chunk in chunks):
+        return ''.join(chunks)
+    # Chat model message chunks add up to the whole message
+    return reduce(operator.add, chunks)
+
+
+class StreamingWebLLM:
+    """Streams the wrapped web LLM's completions to the current chunk sink.
+
+    invoke() still returns the whole completion, so the agent's
+    _run_web_search is unchanged; with no sink it is a plain invoke().
+    """
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, attribute):
+        return getattr(self._client, attribute)
+
+    def invoke(self, prompt, **kwargs):
+        sink = _chunk_sink.get()
+        if sink is None or not hasattr(self._client, 'stream'):
+            return self._client.invoke(prompt, **kwargs)
+        chunks = []
+        for chunk in self._client.stream(prompt, **kwargs):
+            chunks.append(chunk)
+            text = _chunk_text(chunk)
+            if text:
+                sink(text)
+        return _join_chunks(chunks) if chunks else ''
+
+    def stream(self, prompt, **kwargs):
+        return self._client.stream(prompt, **kwargs)
+
+    def predict(self, text, **kwargs):
+        return self.invoke(text, **kwargs)
+
+    def __call__(self, prompt, **kwargs):
+        return self.invoke(prompt, **kwargs)
+
+
+def install_answer_streaming(agent):
+    """Let the pipeline stream an NFLStatAgent instance's web answer as it is synthesized."""
+    client = getattr(agent, '_web_llm', None)
+    if client is not None and not isinstance(client, StreamingWebLLM):
+        agent._web_llm = StreamingWebLLM(client)
+    return agent
+
+
+def install_web_search(agent=None):
+    """Route DDGS().text() (used inside an NFLStatAgent instance's own web
+    search) through search_web, so the agent shares its cache and fan-out and
+    synthesizes from ranked, compressed snippets. The call's other arguments
+    (region, safesearch, timelimit) are passed on and keep their own cache
+    entries.
+
+    Returns the agent; does nothing when ddgs isn't installed.
+    """
+    global _ddgs_text
+    try:
+        from ddgs import DDGS
+    except ImportError:
+        return agent
+    if _ddgs_text is None:
+        _ddgs_text = DDGS.text
+
+        def text(self, query, *args, max_results=10, **kwargs):
+            return compress_results(query, search_web(query, max_results or WEB_MAX_RESULTS,
+                                                      **ddgs_options(args, kwargs)))
+
+        DDGS.text = text
+    return agent